@@ -0,0 +1,44 @@
+#!/usr/bin/env python3
+"""
+批量分析基准
+测量 ContentAnalyzer.analyze_batch 在不同批大小下的单条耗时，
+单条耗时应随批大小增大保持平稳（不随批次线性增长）。
+
+用法: python benchmarks/bench_analyze_batch.py [总条数]
+"""
+
+import logging
+import sys
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+import jieba
+
+from benchmarks.bench_sentiment import make_dynamics
+from src.core.analyzer import ContentAnalyzer
+
+
+def main():
+    count = int(sys.argv[1]) if len(sys.argv) > 1 else 10000
+    jieba.setLogLevel(logging.WARNING)
+    jieba.initialize()
+
+    analyzer = ContentAnalyzer()
+    texts = make_dynamics(count)
+    items = [(str(i), 'dynamic', text, '') for i, text in enumerate(texts)]
+
+    for batch_size in (1, 10, 100, 1000, 10000):
+        if batch_size > count:
+            break
+        start = time.perf_counter()
+        for i in range(0, count, batch_size):
+            analyzer.analyze_batch(items[i:i + batch_size])
+        elapsed = time.perf_counter() - start
+        print(f"批大小 {batch_size:>6}  {elapsed:8.3f} 秒  单条 {elapsed / count * 1e6:8.1f} µs  "
+              f"{count / elapsed:10.0f} items/sec")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,81 @@
+#!/usr/bin/env python3
+"""
+数据库写入性能基准
+对比每次调用都 connect/close 的旧写法、连接池写法与批量写入的吞吐量 (rows/sec)
+
+用法: python benchmarks/bench_database.py [行数]
+"""
+
+import json
+import sqlite3
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from src.core.database import DatabaseManager
+from tests.test_database import make_video
+
+
+def legacy_save_video(db_path: str, video):
+    """旧版 save_video: 每次调用新建连接并提交"""
+    conn = sqlite3.connect(db_path)
+    cursor = conn.cursor()
+    try:
+        cursor.execute('''
+            INSERT OR REPLACE INTO videos
+            (bvid, title, description, transcript, publish_time, up_name,
+             view_count, like_count, coin_count, share_count, tags, content_hash)
+            VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
+        ''', (
+            video.bvid, video.title, video.description, video.transcript,
+            video.publish_time, video.up_name, video.view_count,
+            video.like_count, video.coin_count, video.share_count,
+            json.dumps(video.tags, ensure_ascii=False), video.content_hash
+        ))
+        conn.commit()
+    finally:
+        conn.close()
+
+
+def run(label: str, func, rows: int) -> float:
+    """执行并打印吞吐量"""
+    start = time.perf_counter()
+    func()
+    elapsed = time.perf_counter() - start
+    rate = rows / elapsed
+    print(f"{label:<24} {rows:>7} 行  {elapsed:8.3f} 秒  {rate:12.0f} rows/sec")
+    return rate
+
+
+def main():
+    rows = int(sys.argv[1]) if len(sys.argv) > 1 else 2000
+    videos = [make_video(f"BV{i}") for i in range(rows)]
+
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        # 旧写法使用默认的 rollback journal，与改造前的数据库一致
+        legacy_path = str(Path(tmp_dir) / "legacy.db")
+        DatabaseManager(legacy_path).close()
+        conn = sqlite3.connect(legacy_path)
+        conn.execute("PRAGMA journal_mode=DELETE")
+        conn.close()
+        legacy = run("per-call connect", lambda: [legacy_save_video(legacy_path, v) for v in videos], rows)
+
+        db = DatabaseManager(str(Path(tmp_dir) / "pooled.db"))
+        pooled = run("pooled connection", lambda: [db.save_video(v) for v in videos], rows)
+        db.close()
+
+        db = DatabaseManager(str(Path(tmp_dir) / "bulk.db"))
+        bulk = run("pooled bulk insert", lambda: db.save_videos_bulk(videos), rows)
+        db.close()
+
+    print(f"连接池加速比: {pooled / legacy:.1f}x")
+    print(f"批量写入加速比: {bulk / legacy:.1f}x")
+
+
+if __name__ == "__main__":
+    import logging
+    logging.disable(logging.INFO)
+    main()
@@ -0,0 +1,53 @@
+#!/usr/bin/env python3
+"""
+近似重复索引基准
+逐步扩大索引规模，测量每条新内容的插入耗时（签名计算 + 分带查找 + 写入），
+耗时应随索引规模基本不变，而不是与已索引条数成正比。
+
+用法: python benchmarks/bench_dedup_index.py [最大条数]
+"""
+
+import random
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from src.core.dedup_index import NearDuplicateIndex
+
+CHARS = "央行降准利率市场资金股票指数板块行情反弹下跌上涨政策经济数据通胀就业消费投资出口"
+
+
+def make_texts(count: int, seed: int):
+    """生成互不相关的随机文本（约60字）"""
+    rng = random.Random(seed)
+    return ["".join(rng.choice(CHARS) for _ in range(60)) for _ in range(count)]
+
+
+def main():
+    limit = int(sys.argv[1]) if len(sys.argv) > 1 else 20000
+    probe = make_texts(200, seed=0)
+
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        index = NearDuplicateIndex(str(Path(tmp_dir) / "bench.dedup.db"))
+        size = 0
+        target = 1000
+        while target <= limit:
+            fill = make_texts(target - size, seed=target)
+            index.assign([(f"F{size + i}", 'dynamic', text, '') for i, text in enumerate(fill)])
+            size = target
+
+            start = time.perf_counter()
+            for i, text in enumerate(probe):
+                index.assign([(f"P{size}_{i}", 'news', text, '')])
+            elapsed = time.perf_counter() - start
+            print(f"索引 {size:>7} 条  单条插入 {elapsed / len(probe) * 1000:7.3f} ms")
+            size += len(probe)
+            target *= 4
+        index.close()
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,50 @@
+#!/usr/bin/env python3
+"""
+新闻站点解析器基准
+用 tests/fixtures/news/sites 中保存的各站点文章页和列表页，测量每个站点解析器
+（预编译XPath选择器）与通用解析器的吞吐量，包含lxml构建文档的时间。
+
+用法: python benchmarks/bench_news_parsers.py [每个页面的重复次数]
+"""
+
+import sys
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+import lxml.html
+
+from src.core.news_parsers import GENERIC_PARSER, PARSERS
+
+SITES = Path(__file__).parent.parent / "tests" / "fixtures" / "news" / "sites"
+
+
+def measure(parse, body: bytes, url: str, count: int) -> float:
+    """重复解析 count 次，返回每秒页数"""
+    start = time.perf_counter()
+    for _ in range(count):
+        parse(lxml.html.fromstring(body, base_url=url), url)
+    return count / (time.perf_counter() - start)
+
+
+def main():
+    count = int(sys.argv[1]) if len(sys.argv) > 1 else 2000
+    parsers = {parser.name: (domain, parser) for domain, parser in PARSERS.items()}
+
+    print(f"{'解析器':<14}{'文章 站点':>12}{'文章 通用':>12}{'列表 站点':>12}{'列表 通用':>12}  (pages/sec)")
+    for name, (domain, parser) in sorted(parsers.items()):
+        url = f"https://www.{domain}/"
+        article = (SITES / f"{name}_article.html").read_bytes()
+        listing = (SITES / f"{name}_listing.html").read_bytes()
+        rates = (
+            measure(parser.parse_article, article, url, count),
+            measure(GENERIC_PARSER.parse_article, article, url, count),
+            measure(parser.parse_listing, listing, url, count),
+            measure(GENERIC_PARSER.parse_listing, listing, url, count),
+        )
+        print(f"{name:<14}" + "".join(f"{rate:12.0f}" for rate in rates))
+
+
+if __name__ == '__main__':
+    main()
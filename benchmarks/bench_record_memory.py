@@ -0,0 +1,97 @@
+#!/usr/bin/env python3
+"""
+记录类型内存基准
+测量每10万条记录的内存占用:
+1. 不带 __slots__ 的dataclass（改造前）与 slotted 记录类型
+2. 缓存完整的视频详情响应与只保留用到字段的精简视频信息
+
+用法: python benchmarks/bench_record_memory.py [条数]
+"""
+
+import copy
+import sys
+import tracemalloc
+from dataclasses import dataclass, fields, make_dataclass
+from datetime import datetime
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from src.core.crawler import BilibiliCrawler
+from src.core.database import AnalysisResult, DynamicContent, VideoContent
+
+
+def unslotted(cls):
+    """生成字段相同但带实例 __dict__ 的dataclass"""
+    return dataclass(make_dataclass(cls.__name__, [(f.name, f.type, f) for f in fields(cls)]))
+
+
+def raw_view_payload(i: int) -> dict:
+    """模拟 /x/web-interface/view 的 data（省略部分字段）"""
+    return {
+        'bvid': f'BV{i}', 'aid': i, 'videos': 1, 'tid': 207, 'tname': '财经',
+        'copyright': 1, 'pic': f'http://i0.hdslb.com/bfs/archive/{i}.jpg',
+        'title': f'标题{i}', 'pubdate': 1700000000 + i, 'ctime': 1700000000 + i,
+        'desc': '本期视频聊聊市场', 'desc_v2': [{'raw_text': '本期视频聊聊市场', 'type': 1, 'biz_id': 0}],
+        'state': 0, 'duration': 600,
+        'rights': {key: 0 for key in ('bp', 'elec', 'download', 'movie', 'pay', 'hd5', 'no_reprint',
+                                      'autoplay', 'ugc_pay', 'is_cooperation', 'ugc_pay_preview')},
+        'owner': {'mid': 1, 'name': '测试UP', 'face': 'http://i0.hdslb.com/bfs/face/1.jpg'},
+        'stat': {'aid': i, 'view': i, 'danmaku': 1, 'reply': 2, 'favorite': 3, 'coin': 4,
+                 'share': 5, 'now_rank': 0, 'his_rank': 0, 'like': 6, 'dislike': 0},
+        'dynamic': '', 'cid': i + 1,
+        'dimension': {'width': 1920, 'height': 1080, 'rotate': 0},
+        'pages': [{'cid': i + 1, 'page': 1, 'from': 'vupload', 'part': f'P1 标题{i}', 'duration': 600,
+                   'dimension': {'width': 1920, 'height': 1080, 'rotate': 0}}],
+        'subtitle': {'allow_submit': False, 'list': []},
+        'user_garb': {'url_image_ani_cut': ''},
+        'honor_reply': {},
+    }
+
+
+def measure(label: str, build, count: int) -> float:
+    """构造 count 条记录并保持引用，返回每10万条的MB数"""
+    tracemalloc.start()
+    records = build()
+    current, _ = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    per_100k = current / len(records) * 100000 / 1024 / 1024
+    print(f"{label:<32} {per_100k:8.1f} MB / 10万条")
+    del records
+    return per_100k
+
+
+def main():
+    count = int(sys.argv[1]) if len(sys.argv) > 1 else 100000
+    now = datetime.now()
+    video_args = lambda i: dict(
+        bvid=f"BV{i}", title=f"标题{i}", description="简介", transcript="", publish_time=now,
+        up_name="测试UP", view_count=i, like_count=i, coin_count=i, share_count=i,
+        tags=[], content_hash=str(i)
+    )
+    dynamic_args = lambda i: dict(
+        dynamic_id=str(i), content="动态", publish_time=now, up_name="测试UP",
+        like_count=i, forward_count=i, comment_count=i, content_hash=str(i)
+    )
+    result_args = lambda i: dict(
+        content_id=str(i), content_type="video", sentiment_score=0.1, key_points=[],
+        investment_signals=[], risk_level="中等", confidence=0.5, analysis_time=now
+    )
+    print(f"{count} 条记录（只计记录本身，字符串等字段值两种方式相同）")
+    for cls, make_args in ((VideoContent, video_args), (DynamicContent, dynamic_args),
+                           (AnalysisResult, result_args)):
+        legacy = unslotted(cls)
+        # 先构造好参数，只测量记录对象本身
+        args = [make_args(i) for i in range(count)]
+        before = measure(f"{cls.__name__} (__dict__)", lambda: [legacy(**a) for a in args], count)
+        after = measure(f"{cls.__name__} (__slots__)", lambda: [cls(**a) for a in args], count)
+        print(f"{'':<32} 节省 {1 - after / before:.0%}")
+
+    payloads = [raw_view_payload(i) for i in range(min(count, 20000))]
+    before = measure("视频详情 (完整响应)", lambda: [copy.deepcopy(p) for p in payloads], count)
+    after = measure("视频详情 (精简)", lambda: [BilibiliCrawler._compact_video_info(p) for p in payloads], count)
+    print(f"{'':<32} 节省 {1 - after / before:.0%}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,75 @@
+#!/usr/bin/env python3
+"""
+大结果集读取内存基准
+对比 get_latest_content（fetchall + 字典列表）与 iter_content 流式读取
+（namedtuple / sqlite3.Row）的峰值内存、首行延迟和总耗时。
+每种方式都遍历全部行并累加播放量，模拟报表类的逐行统计。
+
+用法: python benchmarks/bench_result_streaming.py [行数]
+"""
+
+import sys
+import tempfile
+import time
+import tracemalloc
+from datetime import datetime
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from src.core.database import DatabaseManager, VideoContent
+
+# 模拟带字幕的视频（字幕是结果集中最大的列）
+TRANSCRIPT = "今天我们聊聊市场的走势和板块轮动，" * 30
+
+
+def make_videos(count: int):
+    now = datetime.now()
+    return [VideoContent(
+        bvid=f"BV{i}", title=f"标题{i}", description="简介" * 20, transcript=TRANSCRIPT,
+        publish_time=now, up_name=f"UP{i % 20}", view_count=i, like_count=0,
+        coin_count=0, share_count=0, tags=["财经", "股票"], content_hash=str(i)
+    ) for i in range(count)]
+
+
+def measure(label: str, make_iterable, view_count):
+    """遍历结果并打印峰值内存、首行延迟和总耗时"""
+    tracemalloc.start()
+    start = time.perf_counter()
+    first_row = None
+    total = 0
+    for row in make_iterable():
+        if first_row is None:
+            first_row = time.perf_counter() - start
+        total += view_count(row)
+    elapsed = time.perf_counter() - start
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    print(f"{label:<26} 峰值内存 {peak / 1024 / 1024:8.1f} MB  "
+          f"首行 {first_row * 1000:8.1f} ms  总耗时 {elapsed:6.2f} 秒  (合计 {total})")
+
+
+def main():
+    rows = int(sys.argv[1]) if len(sys.argv) > 1 else 50000
+
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        db = DatabaseManager(str(Path(tmp_dir) / "bench.db"))
+        videos = make_videos(rows)
+        for start in range(0, rows, 5000):
+            db.save_videos_bulk(videos[start:start + 5000])
+        del videos
+        print(f"{rows} 行视频")
+
+        by_key = lambda row: row['view_count']
+        measure("get_latest_content (dict)", lambda: db.get_latest_content('video', days=1), by_key)
+        measure("iter_content (record)", lambda: db.iter_content('video', days=1),
+                lambda row: row.view_count)
+        measure("iter_content (sqlite3.Row)",
+                lambda: db.iter_content('video', days=1, row_type='row'), by_key)
+        db.close()
+
+
+if __name__ == "__main__":
+    import logging
+    logging.disable(logging.INFO)
+    main()
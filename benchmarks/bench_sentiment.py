@@ -0,0 +1,75 @@
+#!/usr/bin/env python3
+"""
+情感分析吞吐基准
+测量 ContentAnalyzer.analyze_sentiment_batch 的单核吞吐量 (texts/sec)，
+分别统计分词和向量化打分的耗时。目标: 每秒 5000 条动态（约50字/条）。
+
+用法: python benchmarks/bench_sentiment.py [条数] [批大小]
+"""
+
+import logging
+import random
+import sys
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+import jieba
+
+from src.core.analyzer import ContentAnalyzer
+
+TARGET_RATE = 5000
+
+SAMPLE_SENTENCES = [
+    "今天大盘大幅上涨，券商板块表现强势",
+    "后市并不乐观，需要警惕回调风险",
+    "三季度业绩不及预期，股价直接跌停",
+    "新能源继续承压，不建议追高",
+    "央行降准释放流动性，对市场是重大利好",
+    "美联储加息预期升温，外资持续净流出",
+    "消费板块估值低估，可以考虑分批买入",
+    "这波反弹力度有限，我比较谨慎",
+]
+
+
+def make_dynamics(count: int):
+    """生成约50字的模拟动态"""
+    rng = random.Random(42)
+    return ["。".join(rng.sample(SAMPLE_SENTENCES, 3)) for _ in range(count)]
+
+
+def main():
+    count = int(sys.argv[1]) if len(sys.argv) > 1 else 20000
+    batch_size = int(sys.argv[2]) if len(sys.argv) > 2 else 1000
+    jieba.setLogLevel(logging.WARNING)
+    jieba.initialize()
+
+    analyzer = ContentAnalyzer()
+    engine = analyzer.sentiment_engine
+    texts = make_dynamics(count)
+    batches = [texts[i:i + batch_size] for i in range(0, count, batch_size)]
+
+    start = time.perf_counter()
+    token_batches = [engine.tokenize(batch) for batch in batches]
+    segment_time = time.perf_counter() - start
+
+    start = time.perf_counter()
+    for tokens in token_batches:
+        engine.score_tokens(tokens)
+    score_time = time.perf_counter() - start
+
+    start = time.perf_counter()
+    for batch in batches:
+        analyzer.analyze_sentiment_batch(batch)
+    total_time = time.perf_counter() - start
+
+    rate = count / total_time
+    print(f"条数 {count}, 平均 {sum(map(len, texts)) / count:.0f} 字/条, 批大小 {batch_size}")
+    print(f"{'分词':<12} {segment_time:8.3f} 秒  {count / segment_time:10.0f} texts/sec")
+    print(f"{'向量化打分':<10} {score_time:8.3f} 秒  {count / score_time:10.0f} texts/sec")
+    print(f"{'端到端':<11} {total_time:8.3f} 秒  {rate:10.0f} texts/sec  (目标 {TARGET_RATE})")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,64 @@
+#!/usr/bin/env python3
+"""
+信号匹配基准
+对比 Aho-Corasick 自动机与逐个词条 re.search 的朴素写法，
+并测量词典扩充到数千个词条时的单条耗时和自动机重建耗时。
+
+用法: python benchmarks/bench_signal_matcher.py [条数] [额外词条数]
+"""
+
+import json
+import re
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from benchmarks.bench_sentiment import make_dynamics
+from src.core.signal_matcher import DEFAULT_SIGNAL_DICTIONARY_PATH, SignalMatcher
+
+
+def build_dictionary(path: Path, extra_tickers: int):
+    """在内置词典基础上补充模拟股票代码，模拟全市场词典规模"""
+    with open(DEFAULT_SIGNAL_DICTIONARY_PATH, 'r', encoding='utf-8') as f:
+        dictionary = json.load(f)
+    for i in range(extra_tickers):
+        dictionary['tickers'][f"{800000 + i}"] = {'name': f"模拟公司{i}", 'market': 'SH', 'aliases': []}
+    with open(path, 'w', encoding='utf-8') as f:
+        json.dump(dictionary, f, ensure_ascii=False)
+
+
+def main():
+    count = int(sys.argv[1]) if len(sys.argv) > 1 else 2000
+    extra = int(sys.argv[2]) if len(sys.argv) > 2 else 5000
+    texts = [text + "，建议加仓贵州茅台" for text in make_dynamics(count)]
+
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        path = Path(tmp_dir) / "signals.json"
+        build_dictionary(path, extra)
+
+        start = time.perf_counter()
+        matcher = SignalMatcher(str(path))
+        build_time = time.perf_counter() - start
+        print(f"词条 {len(matcher.terms)}，构建自动机 {build_time * 1000:.1f} ms")
+
+        start = time.perf_counter()
+        for text in texts:
+            matcher.extract_signals(text)
+        ac_time = time.perf_counter() - start
+
+        patterns = [re.compile(re.escape(term)) for term in matcher.terms]
+        naive_count = min(count, 200)
+        start = time.perf_counter()
+        for text in texts[:naive_count]:
+            [p.search(text) for p in patterns]
+        naive_time = (time.perf_counter() - start) * count / naive_count
+
+    print(f"{'Aho-Corasick':<14} {ac_time:8.3f} 秒  {count / ac_time:10.0f} texts/sec")
+    print(f"{'逐词条re.search':<12} {naive_time:8.3f} 秒  {count / naive_time:10.0f} texts/sec  (按{naive_count}条外推)")
+
+
+if __name__ == '__main__':
+    main()
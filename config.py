@@ -31,6 +31,13 @@ class Config:
         "smtp_port": int(os.getenv("SMTP_PORT", "587")),
         "email": os.getenv("SENDER_EMAIL", ""),
         "password": os.getenv("EMAIL_PASSWORD", ""),  # 使用应用密码
+        "queue_path": "data/mail_queue.db",  # 发件箱路径，未发出的邮件重启后继续投递
+        "starttls": True,  # 非465端口使用STARTTLS
+        "batch_window": 5,  # 警报合并窗口（秒），窗口内的警报合并为一封
+        "max_retries": 5,  # 最大投递次数
+        "retry_backoff": 30,  # 首次重试等待秒数，之后每次翻倍
+        "retry_backoff_max": 1800,  # 重试等待秒数上限
+        "idle_timeout": 60,  # SMTP连接空闲多久后断开（秒）
     }
     
     # 收件人邮箱
@@ -50,6 +57,18 @@ class Config:
         ]
     }
     
+    # 新闻抓取配置
+    NEWS_CONFIG = {
+        "feeds": {},  # 新闻源网址 -> RSS/Atom/JSON Feed 地址，未配置时使用页面声明的订阅源或解析网页
+        "timeout": 15,  # 单个新闻源请求超时（秒）
+        "max_connections": 20,  # 共享会话的总连接数
+        "per_host_connections": 2,  # 每个主机的并发连接数
+        "max_items_per_source": 50,  # 每个新闻源每轮最多保留的新闻数
+        "min_title_length": 8,  # 网页解析时文章标题的最短长度
+        "fetch_article_bodies": True,  # 为网页中提取的新文章获取正文（已入库的文章不再请求）
+        "max_articles_per_source": 20,  # 每个新闻源每轮最多获取正文的文章数
+    }
+    
     # API配置
     API_KEYS = {
         "openai_api_key": os.getenv("OPENAI_API_KEY", ""),  # 用于更高级的文本分析
@@ -62,13 +81,59 @@ class Config:
         "confidence_threshold": 0.6,  # 置信度阈值
         "max_daily_videos": 100,  # 每日最大分析视频数
         "lookback_days": 7,  # 历史数据回看天数
+        "sentiment_lexicon_path": None,  # 情感词典路径，None使用内置金融词典 src/core/lexicons/sentiment_lexicon.json
+        "sentiment_window": 3,  # 否定词/程度副词向后作用的最大词数
+        "signal_dictionary_path": None,  # 投资信号词典路径，None使用内置词典 src/core/lexicons/signal_dictionary.json，文件修改后自动重建
+        "analysis_workers": 2,  # 分析工作进程数，0表示在后台线程中分析
+        "analysis_shard_size": 100,  # 每个分析分片的条数
+        "analysis_max_pending_shards": 4,  # 最多在途分片数，超出后提交方等待
+        "dedup_enabled": True,  # 近似重复检测，重复簇只分析一条代表
+        "dedup_threshold": 0.5,  # 判定为重复的相似度（字符3-gram的Jaccard系数）
+        "dedup_min_shingles": 20,  # 短于此长度的文本不参与去重
+        "dedup_index_path": None,  # 索引路径，None表示与数据库同目录的 <数据库名>.dedup.db
+        "history_export_path": None,  # 历史数据Parquet目录（按内容类型/日期分区），None表示数据库同目录的 history/，需要pyarrow
+        "alert_enabled": True,  # 投资信号警报（按 目标+方向+时间窗口 合并后发送）
+        "alert_window": 3600,  # 警报时间窗口（秒），窗口内同一目标同一方向的信号合并为一组
+        "alert_cooldown": 4 * 3600,  # 同一目标同一方向两次警报的最小间隔（秒）
+        "alert_max_entries": 1000,  # 内存中最多保留的警报状态数
     }
     
     # 爬虫配置
     CRAWLER_CONFIG = {
-        "rate_limit_delay": 5,  # 请求间隔（秒）- 增加到5秒避免频率限制
+        "rate_limit_delay": 5,  # 请求间隔（秒）- 增加到5秒避免频率限制，未单独配置的端点按此限流
         "max_retries": 3,  # 最大重试次数
         "timeout": 30,  # 请求超时时间
+        "max_concurrent_ups": 3,  # 同时爬取的UP主数量
+        "max_pages_per_feed": 3,  # 每轮每个信息流最多翻页数（首次回溯历史的深度）
+        "stats_tracking_days": 2,  # 持续记录互动数据增长的视频发布天数，0表示不跟踪
+        "per_host_concurrency": 2,  # 每个主机的并发请求数
+        # 各API端点的请求预算: 路径 -> (每秒请求数, 突发请求数)
+        "endpoint_rate_limits": {
+            "/x/space/arc/search": (0.2, 1),
+            "/x/web-interface/view": (0.5, 2),
+            "/x/player/v2": (0.5, 2),
+            "/x/polymer/web-dynamic/v1/feed/space": (0.2, 1),
+            "/x/v2/reply/main": (0.3, 1),
+        },
+        "throttle_backoff": 10,  # 收到-799后的首次退避秒数，连续限流时翻倍
+        "throttle_backoff_max": 120,  # 退避秒数上限
+        "video_info_ttl": 240,  # 视频信息缓存秒数，小于分析周期以保证每轮只获取一次
+        "video_info_cache_size": 1000,  # 视频信息缓存条数上限
+        # 持久化HTTP响应缓存
+        "response_cache": {
+            "enabled": True,
+            "path": "data/cache/http_cache.db",
+            "max_bytes": 50 * 1024 * 1024,  # 缓存总大小上限，超出后按LRU淘汰
+            "access_update_interval": 60,  # 命中时访问时间的写回间隔（秒）
+            "default_ttl": 0,  # 未配置的端点只在服务器支持ETag/Last-Modified时缓存
+            # 各端点缓存有效期（秒）: URL路径或主机名 -> 秒数
+            "ttls": {
+                "aisubtitle.hdslb.com": 30 * 86400,  # 字幕文件
+                "/x/player/v2": 86400,  # 字幕列表
+                "/x/web-interface/view": 240,  # 视频详情（互动数据每轮刷新）
+                "/x/polymer/web-dynamic/v1/feed/space": 86400,  # 仅用于较早的动态分页
+            },
+        },
     }
     
     # Web应用配置
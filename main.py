@@ -5,18 +5,29 @@ Financial Intelligence Analysis System - Main Entry Point
 """
 
 import asyncio
+import hashlib
 import logging
 import signal
 import sys
+from dataclasses import replace
+from datetime import datetime
 from pathlib import Path
+from typing import Dict, List, Optional
 
 # 添加项目根目录到Python路径
 sys.path.insert(0, str(Path(__file__).parent))
 
 from config import config
-from src.core.database import DatabaseManager
+from src.core.database import (
+    DatabaseManager, VideoContent, DynamicContent, AnalysisResult,
+    SAVE_INSERTED, SAVE_UPDATED
+)
 from src.core.analyzer import ContentAnalyzer
+from src.core.analysis_executor import AnalysisExecutor
+from src.core.alert_pipeline import AlertPipeline
+from src.core.dedup_index import NearDuplicateIndex
 from src.core.crawler import BilibiliCrawler
+from src.core.crawl_scheduler import CrawlScheduler
 from src.core.news_aggregator import NewsAggregator
 from src.core.report_generator import ReportGenerator
 from src.utils.email_notifier import EmailNotifier
@@ -46,19 +57,31 @@ def setup_logging():
 class FinancialAnalysisSystem:
     """财经智能分析系统主类"""
     
+    # 每页读取的待分析内容数
+    PENDING_ANALYSIS_PAGE = {'video': 50, 'dynamic': 100, 'news': 50}
+    
     def __init__(self):
         self.logger = logging.getLogger(__name__)
         self.running = False
+        self.crawl_stats = {'fetched': 0, 'skipped': 0, 'changed': 0}
         
         # 初始化组件
         self.db_manager = DatabaseManager(config.DATABASE_PATH)
         self.crawler = BilibiliCrawler()
+        self.crawl_scheduler = CrawlScheduler(
+            config.CRAWLER_CONFIG.get('max_concurrent_ups', 3)
+        )
         self.analyzer = ContentAnalyzer()
-        self.news_aggregator = NewsAggregator()
-        self.report_generator = ReportGenerator(self.db_manager)
+        self.analysis_executor = AnalysisExecutor.from_config(config.ANALYSIS_CONFIG)
+        self.dedup_index = NearDuplicateIndex.from_config(config.DATABASE_PATH, config.ANALYSIS_CONFIG)
+        self.news_aggregator = NewsAggregator(db_manager=self.db_manager)
+        self.report_generator = ReportGenerator(self.db_manager, self.dedup_index)
         self.email_notifier = EmailNotifier(
             **config.EMAIL_CONFIG
         ) if config.EMAIL_CONFIG['email'] else None
+        self.alert_pipeline = AlertPipeline.from_config(
+            self.db_manager, self.email_notifier, config.RECIPIENT_EMAIL, config.ANALYSIS_CONFIG
+        )
         
         self.logger.info("财经智能分析系统初始化完成")
     
@@ -70,6 +93,10 @@ class FinancialAnalysisSystem:
         # 初始化爬虫会话
         await self.crawler.init_session()
         
+        # 启动邮件发送队列（继续投递上次未发出的邮件）
+        if self.email_notifier:
+            self.email_notifier.start()
+        
         try:
             # 启动主循环
             await self.main_loop()
@@ -100,16 +127,18 @@ class FinancialAnalysisSystem:
     async def run_analysis_cycle(self):
         """执行一轮完整的分析周期"""
         self.logger.info("开始新的分析周期")
+        self.crawl_stats = {'fetched': 0, 'skipped': 0, 'changed': 0}
         
-        # 1. 爬取UP主内容
-        for up_info in config.UP_LIST:
-            if not self.running:
-                break
-                
-            try:
-                await self.crawl_up_content(up_info['uid'], up_info['name'])
-            except Exception as e:
-                self.logger.error(f"爬取UP主 {up_info['name']} 内容失败: {e}")
+        # 1. 并发爬取UP主内容（请求节奏由爬虫共享的限流器控制）
+        await self.crawl_scheduler.run(
+            config.UP_LIST,
+            lambda up_info: self.crawl_up_content(up_info['uid'], up_info['name']),
+            should_continue=lambda: self.running
+        )
+        self.logger.info(
+            f"本轮爬取统计: 获取 {self.crawl_stats['fetched']}, "
+            f"跳过 {self.crawl_stats['skipped']}, 变化 {self.crawl_stats['changed']}"
+        )
         
         # 2. 爬取新闻
         try:
@@ -134,161 +163,273 @@ class FinancialAnalysisSystem:
         self.logger.info("分析周期完成")
     
     async def crawl_up_content(self, uid: str, up_name: str):
-        """爬取UP主内容"""
+        """爬取UP主内容（只获取上次水位之后的新内容）"""
         self.logger.info(f"开始爬取UP主内容: {up_name}")
         
-        # 获取视频列表
-        videos = await self.crawler.get_user_videos(uid)
+        fetched_bvids = await self.crawl_up_videos(uid, up_name)
+        await self.refresh_video_stats(up_name, exclude=fetched_bvids)
+        await self.crawl_up_dynamics(uid, up_name)
+    
+    def get_crawl_watermark(self, uid: str, up_name: str, feed: str) -> Optional[datetime]:
+        """获取增量爬取水位，没有爬取记录时以库中最新内容为准"""
+        state = self.db_manager.get_crawl_state(uid, feed)
+        if state and state.get('newest_pubdate'):
+            return datetime.fromtimestamp(state['newest_pubdate'])
+        return self.db_manager.get_latest_publish_time(feed, up_name=up_name)
+    
+    def record_crawl_stats(self, fetched: int, skipped: int, outcomes: List[str]):
+        """累计本轮爬取统计"""
+        self.crawl_stats['fetched'] += fetched
+        self.crawl_stats['skipped'] += skipped
+        self.crawl_stats['changed'] += sum(
+            outcome in (SAVE_INSERTED, SAVE_UPDATED) for outcome in outcomes
+        )
+    
+    @staticmethod
+    def make_content_hash(text: str) -> str:
+        """计算内容哈希"""
+        return hashlib.md5(text.encode()).hexdigest()
+    
+    async def crawl_up_videos(self, uid: str, up_name: str) -> List[str]:
+        """增量爬取UP主视频，返回本轮已获取详情的BV号"""
+        since = self.get_crawl_watermark(uid, up_name, 'video')
+        max_pages = config.CRAWLER_CONFIG.get('max_pages_per_feed', 3)
         
-        for video in videos[:10]:  # 只处理最新的10个视频
-            try:
-                # 获取详细信息
-                video_info = await self.crawler.get_video_info(video['bvid'])
-                if not video_info:
-                    continue
-                
-                # 获取转录文本
-                transcript = await self.crawler.get_video_transcript(video['bvid'])
-                
-                # 保存到数据库
-                from src.core.database import VideoContent
-                import hashlib
-                from datetime import datetime
-                
-                content_hash = hashlib.md5(
-                    (video_info['title'] + video_info['desc']).encode()
-                ).hexdigest()
-                
-                video_content = VideoContent(
-                    bvid=video['bvid'],
-                    title=video_info['title'],
-                    description=video_info['desc'],
-                    transcript=transcript,
-                    publish_time=datetime.fromtimestamp(video_info['pubdate']),
-                    up_name=up_name,
-                    view_count=video_info['stat']['view'],
-                    like_count=video_info['stat']['like'],
-                    coin_count=video_info['stat']['coin'],
-                    share_count=video_info['stat']['share'],
-                    tags=[tag['tag_name'] for tag in video_info.get('tags', [])],
-                    content_hash=content_hash
-                )
-                
-                self.db_manager.save_video(video_content)
-                
-                # 添加延迟避免过于频繁的请求
-                await asyncio.sleep(config.CRAWLER_CONFIG['rate_limit_delay'])
-                
-            except Exception as e:
-                self.logger.error(f"处理视频 {video.get('bvid', 'unknown')} 失败: {e}")
+        # 列表中只包含水位之后的视频
+        listed = [
+            video async for video in self.crawler.iter_user_videos(
+                uid, since=since, max_pages=max_pages
+            )
+        ]
+        if not listed:
+            return []
+        
+        # 列表中的标题和简介与已入库内容一致时，跳过详情和字幕请求
+        stored_hashes = self.db_manager.get_content_hashes(
+            'video', [video['bvid'] for video in listed]
+        )
+        to_fetch = [
+            video for video in listed
+            if stored_hashes.get(video['bvid']) != self.make_content_hash(
+                video.get('title', '') + video.get('description', '')
+            )
+        ]
         
-        # 获取动态
-        dynamics = await self.crawler.get_user_dynamics(uid)
+        # 并发处理，请求间隔由限流器统一控制
+        results = await asyncio.gather(*(
+            self.fetch_video_content(video, up_name) for video in to_fetch
+        ))
+        video_contents = [content for content in results if content]
         
-        for dynamic in dynamics[:20]:  # 只处理最新的20条动态
+        # 批量保存到数据库（单个事务）
+        outcomes = self.db_manager.save_videos_bulk(video_contents)
+        self.record_crawl_stats(len(listed), len(listed) - len(to_fetch), outcomes)
+        
+        # 水位推进到最新视频；有失败时停在最早失败的视频之前，下轮重试
+        failed = [video for video, content in zip(to_fetch, results) if content is None]
+        if failed:
+            newest = min(failed, key=lambda video: video.get('created', 0))
+            newest_pubdate, newest_id = newest.get('created', 0) - 1, ''
+        else:
+            newest = max(listed, key=lambda video: video.get('created', 0))
+            newest_pubdate, newest_id = newest.get('created', 0), newest['bvid']
+        self.db_manager.update_crawl_state(uid, 'video', up_name, newest_pubdate, newest_id)
+        return [content.bvid for content in video_contents]
+    
+    async def refresh_video_stats(self, up_name: str, exclude: List[str] = None):
+        """刷新近期视频的互动数据，写入时间序列
+
+        只跟踪 stats_tracking_days 天内发布的视频，只请求视频详情，不重新获取字幕。
+        """
+        days = config.CRAWLER_CONFIG.get('stats_tracking_days', 2)
+        if days <= 0:
+            return
+        
+        exclude = set(exclude or [])
+        bvids = [
+            bvid for bvid in self.db_manager.get_recent_video_ids(up_name, days)
+            if bvid not in exclude
+        ]
+        if not bvids:
+            return
+        
+        infos = await asyncio.gather(*(self.crawler.get_video_info(bvid) for bvid in bvids))
+        samples = [
+            (bvid, info['stat']['view'], info['stat']['like'],
+             info['stat']['coin'], info['stat']['share'])
+            for bvid, info in zip(bvids, infos)
+            if info and 'stat' in info
+        ]
+        self.db_manager.record_video_stats(samples)
+    
+    async def crawl_up_dynamics(self, uid: str, up_name: str):
+        """增量爬取UP主动态"""
+        since = self.get_crawl_watermark(uid, up_name, 'dynamic')
+        max_pages = config.CRAWLER_CONFIG.get('max_pages_per_feed', 3)
+        
+        listed = [
+            dynamic async for dynamic in self.crawler.iter_user_dynamics(
+                uid, since=since, max_pages=max_pages
+            )
+        ]
+        if not listed:
+            return
+        
+        stored_hashes = self.db_manager.get_content_hashes(
+            'dynamic', [str(dynamic['id']) for dynamic in listed]
+        )
+        dynamic_contents = []
+        
+        for dynamic in listed:
             try:
-                from src.core.database import DynamicContent
-                
-                content_hash = hashlib.md5(
-                    dynamic['content'].encode()
-                ).hexdigest()
-                
-                dynamic_content = DynamicContent(
-                    dynamic_id=str(dynamic['id']),
-                    content=dynamic['content'],
-                    publish_time=datetime.fromtimestamp(dynamic['timestamp']),
-                    up_name=up_name,
-                    like_count=dynamic.get('like_count', 0),
-                    forward_count=dynamic.get('forward_count', 0),
-                    comment_count=dynamic.get('comment_count', 0),
-                    content_hash=content_hash
-                )
+                content_hash = self.make_content_hash(dynamic['content'])
+                # 内容未变化的动态（如置顶动态）不再写入
+                if stored_hashes.get(str(dynamic['id'])) == content_hash:
+                    continue
                 
-                self.db_manager.save_dynamic(dynamic_content)
+                dynamic_contents.append(DynamicContent.from_api(dynamic, up_name, content_hash))
                 
             except Exception as e:
                 self.logger.error(f"处理动态失败: {e}")
+        
+        outcomes = self.db_manager.save_dynamics_bulk(dynamic_contents)
+        self.record_crawl_stats(len(listed), len(listed) - len(dynamic_contents), outcomes)
+        
+        newest = max(listed, key=lambda dynamic: dynamic.get('timestamp', 0))
+        self.db_manager.update_crawl_state(
+            uid, 'dynamic', up_name, newest.get('timestamp', 0), str(newest['id'])
+        )
+    
+    async def fetch_video_content(self, video: Dict, up_name: str) -> Optional[VideoContent]:
+        """获取单个视频的详细信息和转录文本"""
+        try:
+            # 获取详细信息
+            video_info = await self.crawler.get_video_info(video['bvid'])
+            if not video_info:
+                return None
+            
+            # 获取转录文本（复用已获取的视频信息）
+            transcript = await self.crawler.get_video_transcript(
+                video['bvid'], video_info=video_info
+            )
+            
+            content_hash = self.make_content_hash(video_info['title'] + video_info['desc'])
+            
+            return VideoContent.from_api(video_info, up_name, transcript, content_hash)
+            
+        except Exception as e:
+            self.logger.error(f"处理视频 {video.get('bvid', 'unknown')} 失败: {e}")
+            return None
     
     async def crawl_news(self):
         """爬取新闻"""
         self.logger.info("开始爬取新闻")
         
-        for category in ['financial', 'geopolitical']:
-            try:
-                news_list = await self.news_aggregator.fetch_latest_news(category)
-                
-                for news in news_list:
-                    self.db_manager.save_news(news)
-                    
-            except Exception as e:
-                self.logger.error(f"爬取 {category} 新闻失败: {e}")
+        # 所有分类的新闻源共享一个会话并发获取
+        all_news = await self.news_aggregator.fetch_all_news()
+        # 新闻保存成功后才写入条件请求状态，失败时下一轮重新获取
+        if len(self.db_manager.save_news_bulk(all_news)) == len(all_news):
+            self.news_aggregator.commit_source_states()
     
     async def analyze_content(self):
-        """分析内容"""
-        self.logger.info("开始分析内容")
-        
-        # 获取最近的未分析内容
-        recent_videos = self.db_manager.get_latest_content('video', days=1)
-        recent_dynamics = self.db_manager.get_latest_content('dynamic', days=1)
-        recent_news = self.db_manager.get_latest_content('news', days=1)
-        
-        # 分析视频
-        for video in recent_videos[:50]:  # 限制处理数量
-            await self.analyze_single_content(
-                video['bvid'], 'video', 
-                f"{video['title']} {video['description']} {video['transcript']}"
-            )
+        """分析内容
         
-        # 分析动态
-        for dynamic in recent_dynamics[:100]:
-            await self.analyze_single_content(
-                dynamic['dynamic_id'], 'dynamic', dynamic['content']
-            )
+        待分析内容按页读取，每页分析并保存后再读取下一页，直到读完。
+        内存中最多只有一页内容；爬取与分析在同一周期内顺序执行，
+        积压的内容分析完之前不会开始下一轮爬取。
+        """
+        self.logger.info("开始分析内容")
         
-        # 分析新闻
-        for news in recent_news[:50]:
-            await self.analyze_single_content(
-                str(news['id']), 'news', 
-                f"{news['title']} {news['content']}"
-            )
-    
-    async def analyze_single_content(self, content_id: str, content_type: str, text: str):
-        """分析单个内容"""
-        try:
-            # 情感分析
-            sentiment_score = self.analyzer.analyze_sentiment(text)
+        # 只获取未分析过或内容/分析器版本已变化的内容；已保存结果的内容不会再出现在下一页
+        version = self.analyzer.ANALYZER_VERSION
+        while True:
+            pages = {
+                content_type: self.db_manager.get_pending_analysis(content_type, version, days=1, limit=limit)
+                for content_type, limit in self.PENDING_ANALYSIS_PAGE.items()
+            }
+            items = []
             
-            # 提取关键点
-            key_points = self.analyzer.extract_key_points(text)
+            # 分析视频
+            for video in pages['video']:
+                items.append((
+                    video['bvid'], 'video', 
+                    f"{video['title']} {video['description']} {video['transcript']}",
+                    video['content_hash']
+                ))
             
-            # 检测投资信号
-            investment_signals = self.analyzer.detect_investment_signals(text)
+            # 分析动态
+            for dynamic in pages['dynamic']:
+                items.append((
+                    dynamic['dynamic_id'], 'dynamic', dynamic['content'], dynamic['content_hash']
+                ))
             
-            # 评估风险等级
-            risk_level = self.analyzer.assess_risk_level(sentiment_score, investment_signals)
+            # 分析新闻
+            for news in pages['news']:
+                items.append((
+                    str(news['id']), 'news', 
+                    f"{news['title']} {news['content']}",
+                    news['content_hash']
+                ))
             
-            # 计算置信度
-            confidence = self.analyzer.calculate_confidence(text, investment_signals)
-            
-            # 保存分析结果
-            from src.core.database import AnalysisResult
-            from datetime import datetime
-            
-            result = AnalysisResult(
-                content_id=content_id,
-                content_type=content_type,
-                sentiment_score=sentiment_score,
-                key_points=key_points,
-                investment_signals=investment_signals,
-                risk_level=risk_level,
-                confidence=confidence,
-                analysis_time=datetime.now()
-            )
-            
-            self.db_manager.save_analysis_result(result)
+            self.logger.info(f"待分析内容 {len(items)} 条")
+            if not items:
+                break
+            saved = await self.analyze_items(items)
             
-        except Exception as e:
-            self.logger.error(f"分析内容 {content_id} 失败: {e}")
+            # 各类型都不满一页说明已读完；没有保存任何结果时停止，避免反复读取同一页
+            full = any(len(pages[content_type]) >= limit
+                       for content_type, limit in self.PENDING_ANALYSIS_PAGE.items())
+            if not full or not saved:
+                break
+    
+    async def analyze_items(self, items: List) -> int:
+        """分析一页内容并保存结果，返回保存的结果数"""
+        # 近似重复的转发每簇只分析代表，其余复用代表的结果
+        clusters = self.dedup_index.assign(items) if self.dedup_index else {}
+        representatives, duplicates = [], []
+        for item in items:
+            key = (item[0], item[1])
+            (representatives if clusters.get(key, key) == key else duplicates).append(item)
+        
+        # 分片交给工作进程分析，不阻塞事件循环；结果单个事务批量保存、按内容原地更新
+        results = await self.analysis_executor.analyze(representatives)
+        results.extend(await self.copy_cluster_results(duplicates, clusters, results))
+        self.db_manager.save_analysis_results_bulk(results)
+        
+        # 投资信号按目标和方向合并后发送警报，冷却期内不重复发送
+        if self.alert_pipeline:
+            self.alert_pipeline.process(results)
+        return len(results)
+    
+    async def copy_cluster_results(self, duplicates: List, clusters: Dict,
+                                   results: List[AnalysisResult]) -> List[AnalysisResult]:
+        """重复内容复用簇代表的分析结果，代表没有结果时单独分析"""
+        if not duplicates:
+            return []
+        
+        by_key = {(result.content_id, result.content_type): result for result in results}
+        missing = [clusters[(item[0], item[1])] for item in duplicates
+                   if clusters[(item[0], item[1])] not in by_key]
+        if missing:
+            by_key.update(self.db_manager.get_analysis_results_by_keys(missing))
+        
+        # 复制的结果以本次分析时间记录，与其他新结果一起进入按分析时间筛选的查询和报告
+        analysis_time = datetime.now()
+        copied, fallback = [], []
+        for content_id, content_type, text, content_hash in duplicates:
+            source = by_key.get(clusters[(content_id, content_type)])
+            if source is None or source.analyzer_version != self.analyzer.ANALYZER_VERSION:
+                fallback.append((content_id, content_type, text, content_hash))
+                continue
+            copied.append(replace(
+                source, content_id=content_id, content_type=content_type, content_hash=content_hash,
+                analysis_time=analysis_time
+            ))
+        
+        self.logger.info(f"近似重复内容复用分析结果 {len(copied)} 条，单独分析 {len(fallback)} 条")
+        if fallback:
+            copied.extend(await self.analysis_executor.analyze(fallback))
+        return copied
     
     async def generate_and_send_report(self):
         """生成并发送报告"""
@@ -298,14 +439,14 @@ class FinancialAnalysisSystem:
             # 生成报告
             report_content = self.report_generator.generate_daily_report()
             
-            # 发送邮件
+            # 加入邮件发送队列，由后台线程投递
             if self.email_notifier and config.RECIPIENT_EMAIL:
                 from datetime import date
                 subject = f"财经智能分析日报 - {date.today()}"
-                self.email_notifier.send_report(
+                if self.email_notifier.send_report(
                     config.RECIPIENT_EMAIL, subject, report_content
-                )
-                self.logger.info("报告发送完成")
+                ):
+                    self.logger.info("报告已加入发送队列")
             else:
                 self.logger.warning("邮件配置不完整，跳过发送")
                 
@@ -318,6 +459,13 @@ class FinancialAnalysisSystem:
         
         try:
             await self.crawler.close_session()
+            await self.news_aggregator.close_session()
+            self.analysis_executor.shutdown()
+            if self.dedup_index:
+                self.dedup_index.close()
+            if self.email_notifier:
+                self.email_notifier.close()
+            self.db_manager.close()
             self.logger.info("清理完成")
         except Exception as e:
             self.logger.error(f"清理资源时出错: {e}")
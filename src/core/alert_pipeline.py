@@ -0,0 +1,201 @@
+"""
+警报合并模块
+Alert Coalescing Pipeline
+
+一条市场消息往往在短时间内被多条动态、视频反复提及，逐条发送警报会造成邮件风暴。
+这里按 (目标, 方向, 时间窗口) 对投资信号分组: 每组只发一次警报，同一目标同一方向在
+冷却期内的后续信号只计数，并入下一次警报；一轮分析中触发的全部警报合并为一封摘要。
+状态只保存在有上限的内存结构中，每轮处理后检查点写入SQLite，重启后恢复。
+"""
+
+import logging
+import time
+from collections import OrderedDict
+from dataclasses import dataclass, field
+from typing import Dict, List, Optional, Sequence, Tuple
+
+from .database import AnalysisResult, DatabaseManager
+
+logger = logging.getLogger(__name__)
+
+# 警报键: (目标, 方向)，目标为股票代码或板块名称
+AlertKey = Tuple[str, str]
+
+DIRECTION_NAMES = {'bullish': '偏多', 'bearish': '偏空'}
+
+@dataclass
+class AlertState:
+    """某个目标某个方向最近一次警报的状态"""
+    bucket: int  # 最近一次警报所在的时间窗口序号
+    last_alert: float  # 最近一次警报的时间戳
+    signal_count: int = 0  # 最近一次警报包含的信号数
+    suppressed: int = 0  # 此后被合并（未单独发送）的信号数
+
+@dataclass
+class AlertDigest:
+    """一组触发警报的信号"""
+    target: str
+    name: str
+    direction: str
+    signal_types: List[str] = field(default_factory=list)
+    sources: List[str] = field(default_factory=list)
+    signal_count: int = 0
+    suppressed: int = 0  # 上次警报以来被合并的信号数
+
+class AlertPipeline:
+    """投资信号警报合并器，位于 ContentAnalyzer 与 EmailNotifier 之间"""
+
+    # 摘要中每组最多列出的来源数
+    MAX_SOURCES = 5
+
+    def __init__(self, db_manager: DatabaseManager, notifier=None, recipient: str = '',
+                 window: float = 3600, cooldown: float = 4 * 3600, max_entries: int = 1000):
+        """
+        Args:
+            db_manager: 保存状态检查点的数据库
+            notifier: EmailNotifier，为None时只记录日志
+            recipient: 警报收件人
+            window: 时间窗口（秒），同一窗口内同一目标同一方向的信号合并为一组
+            cooldown: 冷却期（秒），同一目标同一方向两次警报的最小间隔
+            max_entries: 内存中最多保留的状态数，超出时淘汰最久未更新的
+        """
+        self.db_manager = db_manager
+        self.notifier = notifier
+        self.recipient = recipient
+        self.window = max(window, 1)
+        self.cooldown = cooldown
+        self.max_entries = max(max_entries, 1)
+        # 状态在冷却期和所在时间窗口都结束后才不再需要
+        self.retention = max(self.cooldown, self.window)
+        self.stats = {'signals': 0, 'alerts': 0, 'suppressed': 0, 'digests': 0}
+        self._states: 'OrderedDict[AlertKey, AlertState]' = OrderedDict()
+        self._restore()
+
+    @classmethod
+    def from_config(cls, db_manager: DatabaseManager, notifier, recipient: str,
+                    analysis_config: Dict) -> Optional['AlertPipeline']:
+        """根据 config.ANALYSIS_CONFIG 创建警报合并器，未启用时返回None"""
+        if not analysis_config.get('alert_enabled', True):
+            return None
+        return cls(
+            db_manager, notifier, recipient,
+            window=analysis_config.get('alert_window', 3600),
+            cooldown=analysis_config.get('alert_cooldown', 4 * 3600),
+            max_entries=analysis_config.get('alert_max_entries', 1000),
+        )
+
+    def _restore(self):
+        """从检查点恢复仍在冷却期内的状态"""
+        rows = self.db_manager.get_alert_states(time.time() - self.retention)
+        for row in reversed(rows[:self.max_entries]):
+            self._states[(row['target'], row['direction'])] = AlertState(
+                row['bucket'], row['last_alert'], row['signal_count'], row['suppressed']
+            )
+        if rows:
+            logger.info(f"恢复警报状态 {len(self._states)} 条")
+
+    @staticmethod
+    def signal_key(signal: Dict) -> Optional[Tuple[AlertKey, str]]:
+        """信号的警报键和目标显示名，没有股票或板块目标的信号不触发警报"""
+        target = signal.get('target')
+        if not target:
+            return None
+        name = target.get('name') or target.get('term', '')
+        code = target.get('code') or name
+        if not code:
+            return None
+        label = f"{name}({code})" if code != name else name
+        return (code, signal.get('direction', 'bullish')), label
+
+    def process(self, results: Sequence[AnalysisResult],
+                now: Optional[float] = None) -> List[AlertDigest]:
+        """处理一轮分析结果，发送合并后的警报摘要
+
+        Returns:
+            本轮触发的警报分组（没有时为空列表）
+        """
+        now = time.time() if now is None else now
+        bucket = int(now // self.window)
+
+        groups: Dict[AlertKey, AlertDigest] = {}
+        for result in results:
+            for signal in result.investment_signals or []:
+                keyed = self.signal_key(signal)
+                if keyed is None:
+                    continue
+                key, label = keyed
+                digest = groups.get(key)
+                if digest is None:
+                    digest = groups[key] = AlertDigest(key[0], label, key[1])
+                digest.signal_count += 1
+                signal_type = signal.get('type', '')
+                if signal_type and signal_type not in digest.signal_types:
+                    digest.signal_types.append(signal_type)
+                source = f"{result.content_type}:{result.content_id}"
+                if source not in digest.sources:
+                    digest.sources.append(source)
+
+        fired = []
+        for key, digest in groups.items():
+            self.stats['signals'] += digest.signal_count
+            state = self._states.get(key)
+            if state and (state.bucket == bucket or now - state.last_alert < self.cooldown):
+                state.suppressed += digest.signal_count
+                self.stats['suppressed'] += digest.signal_count
+            else:
+                digest.suppressed = state.suppressed if state else 0
+                state = AlertState(bucket, now, digest.signal_count)
+                fired.append(digest)
+            self._states[key] = state
+            self._states.move_to_end(key)
+
+        self._evict(now)
+        self.checkpoint(now, groups.keys())
+
+        if fired:
+            self.stats['alerts'] += len(fired)
+            self.stats['digests'] += 1
+            self._send(fired)
+        return fired
+
+    def _evict(self, now: float):
+        """先清理过期的状态，仍超出上限时淘汰最久未更新的"""
+        expired = [key for key, state in self._states.items()
+                   if now - state.last_alert >= self.retention]
+        for key in expired:
+            del self._states[key]
+        while len(self._states) > self.max_entries:
+            self._states.popitem(last=False)
+
+    def checkpoint(self, now: Optional[float] = None, keys=None):
+        """把状态写入SQLite，keys为None时写入全部内存状态"""
+        now = time.time() if now is None else now
+        keys = self._states.keys() if keys is None else keys
+        states = [
+            (key[0], key[1], state.bucket, state.last_alert, state.signal_count, state.suppressed)
+            for key, state in ((key, self._states.get(key)) for key in keys)
+            if state is not None
+        ]
+        self.db_manager.save_alert_states(states, expire_before=now - self.retention)
+
+    def format_digest(self, digests: Sequence[AlertDigest]) -> str:
+        """格式化警报摘要"""
+        lines = [f"检测到 {len(digests)} 组投资信号:"]
+        for digest in digests:
+            sources = ', '.join(digest.sources[:self.MAX_SOURCES])
+            if len(digest.sources) > self.MAX_SOURCES:
+                sources += f" 等{len(digest.sources)}条内容"
+            lines.append(
+                f"- {digest.name} {DIRECTION_NAMES.get(digest.direction, digest.direction)}: "
+                f"{digest.signal_count}条信号 ({'/'.join(digest.signal_types)})，来源 {sources}"
+            )
+            if digest.suppressed:
+                lines.append(f"  上次警报后另有 {digest.suppressed} 条同向信号被合并")
+        return "\n".join(lines)
+
+    def _send(self, digests: Sequence[AlertDigest]):
+        """发送一封警报摘要"""
+        message = self.format_digest(digests)
+        logger.info(f"触发投资信号警报 {len(digests)} 组")
+        if self.notifier and self.recipient:
+            self.notifier.send_alert(self.recipient, message)
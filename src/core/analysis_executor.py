@@ -0,0 +1,134 @@
+"""
+分析执行器模块
+Analysis Executor Module
+
+分词和打分是CPU密集操作，放在事件循环里会阻塞爬虫和Web接口。
+执行器把待分析内容切成分片交给进程池，每个工作进程只在启动时
+加载一次jieba词典和情感词典；在途分片数有上限，提交方在池满时等待。
+"""
+
+import asyncio
+import logging
+import signal
+from concurrent.futures import Executor, ProcessPoolExecutor, ThreadPoolExecutor
+from typing import Dict, List, Optional, Sequence
+
+import jieba
+
+from .analyzer import AnalysisItem, ContentAnalyzer
+from .database import AnalysisResult
+
+logger = logging.getLogger(__name__)
+
+# 工作进程内的分析器，由 _init_worker 创建
+_worker_analyzer: Optional[ContentAnalyzer] = None
+
+def _init_worker(ignore_sigint: bool = True):
+    """工作进程初始化: 预加载jieba词典和情感词典
+
+    Ctrl+C 会发给整个进程组，工作进程忽略SIGINT，由主进程统一关闭。
+    """
+    global _worker_analyzer
+    if ignore_sigint:
+        signal.signal(signal.SIGINT, signal.SIG_IGN)
+    jieba.setLogLevel(logging.WARNING)
+    jieba.initialize()
+    _worker_analyzer = ContentAnalyzer()
+
+def _analyze_shard(items: List[AnalysisItem]) -> List[AnalysisResult]:
+    """在工作进程中分析一个分片"""
+    return _worker_analyzer.analyze_batch(items)
+
+class AnalysisExecutor:
+    """进程池分析执行器"""
+
+    def __init__(self, max_workers: int = 2, shard_size: int = 100,
+                 max_pending: Optional[int] = None):
+        """
+        Args:
+            max_workers: 工作进程数，0表示在单个后台线程中分析（不启动子进程）
+            shard_size: 每个分片的条数
+            max_pending: 最多在途分片数，默认为工作进程数的两倍
+        """
+        self.max_workers = max(max_workers, 0)
+        self.shard_size = max(shard_size, 1)
+        self.max_pending = max_pending or max(self.max_workers, 1) * 2
+        self._pool: Optional[Executor] = None
+        self._slots: Optional[asyncio.Semaphore] = None
+        self._slots_loop = None
+        self._closed = False
+
+    @classmethod
+    def from_config(cls, analysis_config: Dict) -> 'AnalysisExecutor':
+        """根据 config.ANALYSIS_CONFIG 创建执行器"""
+        return cls(
+            max_workers=analysis_config.get('analysis_workers', 2),
+            shard_size=analysis_config.get('analysis_shard_size', 100),
+            max_pending=analysis_config.get('analysis_max_pending_shards'),
+        )
+
+    def _get_pool(self) -> Executor:
+        """首次提交时再创建进程池，未分析过内容就不启动子进程"""
+        if self._pool is None:
+            if self.max_workers > 0:
+                self._pool = ProcessPoolExecutor(
+                    self.max_workers, initializer=_init_worker
+                )
+            else:
+                self._pool = ThreadPoolExecutor(
+                    1, thread_name_prefix="analysis",
+                    initializer=_init_worker, initargs=(False,)
+                )
+            logger.info(f"分析执行器已启动: {self.max_workers or '线程'} 个工作进程")
+        return self._pool
+
+    def _get_slots(self) -> asyncio.Semaphore:
+        """在途分片信号量（绑定当前事件循环）"""
+        loop = asyncio.get_running_loop()
+        if self._slots is None or self._slots_loop is not loop:
+            self._slots = asyncio.Semaphore(self.max_pending)
+            self._slots_loop = loop
+        return self._slots
+
+    async def submit(self, items: Sequence[AnalysisItem]) -> asyncio.Future:
+        """提交一个分片，返回结果Future
+
+        在途分片达到上限时等待，直到有分片完成（背压）。
+        """
+        if self._closed:
+            raise RuntimeError("分析执行器已关闭")
+
+        slots = self._get_slots()
+        await slots.acquire()
+        try:
+            future = asyncio.get_running_loop().run_in_executor(
+                self._get_pool(), _analyze_shard, list(items)
+            )
+        except Exception:
+            slots.release()
+            raise
+        future.add_done_callback(lambda _: slots.release())
+        return future
+
+    async def analyze(self, items: Sequence[AnalysisItem]) -> List[AnalysisResult]:
+        """分片并行分析，失败的分片记录日志后跳过"""
+        items = list(items)
+        futures = []
+        for start in range(0, len(items), self.shard_size):
+            futures.append(await self.submit(items[start:start + self.shard_size]))
+
+        results = []
+        for shard_results in await asyncio.gather(*futures, return_exceptions=True):
+            if isinstance(shard_results, BaseException):
+                logger.error(f"分析分片失败: {shard_results}")
+                continue
+            results.extend(shard_results)
+        return results
+
+    def shutdown(self, wait: bool = True):
+        """关闭执行器: 取消尚未开始的分片，wait为True时等待进行中的分片完成"""
+        self._closed = True
+        if self._pool is not None:
+            self._pool.shutdown(wait=wait, cancel_futures=True)
+            self._pool = None
+            logger.info("分析执行器已关闭")
@@ -5,40 +5,159 @@ Content Analyzer Module
 
 import logging
 import re
-from typing import List, Dict, Any
+from datetime import datetime
+from typing import List, Dict, Any, Sequence, Tuple
 from config import config
+from .database import AnalysisResult
+from .sentiment import SentimentEngine
+from .signal_matcher import SignalMatcher
 
 logger = logging.getLogger(__name__)
 
+# 待分析条目: (content_id, content_type, text, content_hash)
+AnalysisItem = Tuple[str, str, str, str]
+
 class ContentAnalyzer:
     """内容分析器"""
-    
+
+    # 分析逻辑变化时递增，已分析的内容会在下一轮重新分析
+    ANALYZER_VERSION = "4"
+
+    # 关键观点按句切分
+    SENTENCE_ENDINGS = {'。', '！', '？', '!', '?', '；', ';', '\n'}
+    MAX_KEY_POINTS = 3
+    MAX_KEY_POINT_LENGTH = 80
+
     def __init__(self):
         self.sentiment_threshold = config.ANALYSIS_CONFIG.get('sentiment_threshold', 0.3)
         self.confidence_threshold = config.ANALYSIS_CONFIG.get('confidence_threshold', 0.6)
-        
+        self.sentiment_engine = SentimentEngine(
+            lexicon_path=config.ANALYSIS_CONFIG.get('sentiment_lexicon_path'),
+            window=config.ANALYSIS_CONFIG.get('sentiment_window', 3)
+        )
+        self.signal_matcher = SignalMatcher(config.ANALYSIS_CONFIG.get('signal_dictionary_path'))
+
+    def analyze_batch(self, items: Sequence[AnalysisItem]) -> List[AnalysisResult]:
+        """批量分析内容
+
+        每条文本只分词一次，情感贡献对整批一次向量化计算，
+        情感、关键观点、风险和置信度共用同一份分词结果，
+        投资信号由信号词典自动机对原文线性扫描一遍得到。
+        单条分析失败只跳过该条。
+
+        Args:
+            items: (content_id, content_type, text, content_hash) 列表
+
+        Returns:
+            分析结果列表（由调用方一次性批量保存）
+        """
+        items = list(items)
+        if not items:
+            return []
+
+        self.signal_matcher.reload_if_changed()
+        engine = self.sentiment_engine
+        token_lists = engine.tokenize([item[2] for item in items])
+        contributions, doc_index = engine.token_contributions(token_lists)
+        scores = engine.score_contributions(contributions, doc_index, len(items))
+
+        contribution_list = contributions.tolist()
+        analysis_time = datetime.now()
+        results = []
+        offset = 0
+        for (content_id, content_type, text, content_hash), tokens, score in zip(items, token_lists, scores):
+            token_contributions = contribution_list[offset:offset + len(tokens)]
+            offset += len(tokens)
+            try:
+                sentiment_score = round(float(score), 4)
+                investment_signals = self.signal_matcher.extract_signals(text)
+                results.append(AnalysisResult(
+                    content_id=content_id,
+                    content_type=content_type,
+                    sentiment_score=sentiment_score,
+                    key_points=self._key_points_from_tokens(tokens, token_contributions),
+                    investment_signals=investment_signals,
+                    risk_level=self.assess_risk_level(sentiment_score, investment_signals),
+                    confidence=self._confidence_from_contributions(token_contributions),
+                    analysis_time=analysis_time,
+                    content_hash=content_hash,
+                    analyzer_version=self.ANALYZER_VERSION
+                ))
+            except Exception as e:
+                logger.error(f"分析内容 {content_id} 失败: {e}")
+
+        return results
+
     def analyze_sentiment(self, text: str) -> float:
-        """情感分析"""
-        # TODO: 实现情感分析逻辑
-        # 返回-1到1之间的情感分数
-        return 0.0
-    
+        """情感分析，返回-1到1之间的情感分数"""
+        return self.analyze_sentiment_batch([text])[0]
+
+    def analyze_sentiment_batch(self, texts: Sequence[str]) -> List[float]:
+        """批量情感分析，一批文本一次向量化打分"""
+        try:
+            return [round(float(score), 4) for score in self.sentiment_engine.score_texts(texts)]
+        except Exception as e:
+            logger.error(f"情感分析失败: {e}")
+            return [0.0] * len(texts)
+
     def extract_key_points(self, text: str) -> List[str]:
         """提取关键观点"""
-        # TODO: 实现关键观点提取
-        return []
-    
+        tokens, token_contributions = self._tokenize_single(text)
+        return self._key_points_from_tokens(tokens, token_contributions)
+
     def detect_investment_signals(self, text: str) -> List[Dict]:
-        """检测投资信号"""
-        # TODO: 实现投资信号检测
-        return []
-    
+        """检测投资信号，返回带偏移和关联股票/板块的结构化信号"""
+        self.signal_matcher.reload_if_changed()
+        return self.signal_matcher.extract_signals(text)
+
     def assess_risk_level(self, sentiment_score: float, signals: List[Dict]) -> str:
-        """评估风险等级"""
-        # TODO: 实现风险评估逻辑
+        """评估风险等级: 情感明显偏空或偏空信号居多为高，明显偏多且无偏空信号为低"""
+        bearish = sum(1 for signal in signals if signal.get('direction') == 'bearish')
+        bullish = len(signals) - bearish
+        if sentiment_score <= -self.sentiment_threshold or bearish > bullish:
+            return "高"
+        if sentiment_score >= self.sentiment_threshold and bearish == 0:
+            return "低"
         return "中等"
-    
+
     def calculate_confidence(self, text: str, signals: List[Dict]) -> float:
         """计算置信度"""
-        # TODO: 实现置信度计算
-        return 0.5 
\ No newline at end of file
+        _, token_contributions = self._tokenize_single(text)
+        return self._confidence_from_contributions(token_contributions)
+
+    def _tokenize_single(self, text: str) -> Tuple[List[str], List[float]]:
+        """单条文本分词并计算每个词的情感贡献"""
+        tokens = self.sentiment_engine.tokenize([text])[0]
+        contributions, _ = self.sentiment_engine.token_contributions([tokens])
+        return tokens, contributions.tolist()
+
+    def _key_points_from_tokens(self, tokens: List[str], contributions: List[float]) -> List[str]:
+        """按句汇总情感强度，取最强的几句并保持原文顺序"""
+        sentences = []
+        words, weight = [], 0.0
+        for token, contribution in zip(tokens, contributions):
+            if token in self.SENTENCE_ENDINGS:
+                if weight > 0:
+                    sentences.append((weight, len(sentences), ''.join(words)))
+                words, weight = [], 0.0
+                continue
+            words.append(token)
+            weight += abs(contribution)
+        if weight > 0:
+            sentences.append((weight, len(sentences), ''.join(words)))
+
+        strongest = sorted(sentences, key=lambda s: -s[0])[:self.MAX_KEY_POINTS]
+        return [text[:self.MAX_KEY_POINT_LENGTH] for _, _, text in sorted(strongest, key=lambda s: s[1])]
+
+    def _confidence_from_contributions(self, contributions: List[float]) -> float:
+        """置信度 = 证据量 × 方向一致性
+
+        证据量随情感词数量增加趋近1（1个0.5，2个0.75），
+        方向一致性为 |贡献之和| / 贡献绝对值之和，多空混杂时降低。
+        """
+        hits = [c for c in contributions if c != 0]
+        if not hits:
+            return 0.0
+        evidence = 1 - 0.5 ** len(hits)
+        agreement = abs(sum(hits)) / sum(abs(c) for c in hits)
+        return round(evidence * (0.5 + 0.5 * agreement), 4)
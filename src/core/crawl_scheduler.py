@@ -0,0 +1,57 @@
+"""
+爬取调度模块
+Crawl Scheduler Module
+"""
+
+import asyncio
+import logging
+import time
+from typing import Awaitable, Callable, Dict, List, Optional
+
+logger = logging.getLogger(__name__)
+
+class CrawlScheduler:
+    """并发爬取调度器
+
+    同时爬取多个UP主，单次请求的节奏由爬虫共享的 RateLimiter 控制，
+    因此一轮的总耗时取决于API预算，而不是所有等待时间之和。
+    """
+
+    def __init__(self, max_concurrency: int = 3):
+        self.max_concurrency = max(max_concurrency, 1)
+
+    async def run(self, jobs: List[Dict], worker: Callable[[Dict], Awaitable],
+                  should_continue: Optional[Callable[[], bool]] = None) -> Dict:
+        """并发执行爬取任务
+
+        Args:
+            jobs: 任务列表，如 config.UP_LIST 中的 {"uid": ..., "name": ...}
+            worker: 处理单个任务的协程函数
+            should_continue: 返回False时不再启动新任务
+
+        Returns:
+            统计信息 {'completed', 'failed', 'skipped', 'elapsed'}
+        """
+        semaphore = asyncio.Semaphore(self.max_concurrency)
+        stats = {'completed': 0, 'failed': 0, 'skipped': 0}
+        start = time.monotonic()
+
+        async def run_job(job: Dict):
+            async with semaphore:
+                if should_continue and not should_continue():
+                    stats['skipped'] += 1
+                    return
+                try:
+                    await worker(job)
+                    stats['completed'] += 1
+                except Exception as e:
+                    stats['failed'] += 1
+                    logger.error(f"爬取任务 {job.get('name', job)} 失败: {e}")
+
+        await asyncio.gather(*(run_job(job) for job in jobs))
+        stats['elapsed'] = time.monotonic() - start
+        logger.info(
+            f"爬取调度完成: 成功 {stats['completed']}, 失败 {stats['failed']}, "
+            f"跳过 {stats['skipped']}, 耗时 {stats['elapsed']:.1f} 秒"
+        )
+        return stats
@@ -9,16 +9,24 @@ import json
 import logging
 import re
 import hashlib
-from typing import List, Dict, Optional
+import time
+from typing import AsyncIterator, List, Dict, Optional, Tuple
 from datetime import datetime, timedelta
 from config import config
+from .rate_limiter import RateLimiter
+from .response_cache import ResponseCache
 
 logger = logging.getLogger(__name__)
 
 class BilibiliCrawler:
     """B站爬虫类"""
     
-    def __init__(self):
+    # 视频详情中保留的字段（VideoContent.from_api、字幕和评论请求用到的）
+    VIDEO_INFO_FIELDS = ('bvid', 'aid', 'cid', 'title', 'desc', 'pubdate', 'tags')
+    VIDEO_STAT_FIELDS = ('view', 'like', 'coin', 'share')
+    
+    def __init__(self, rate_limiter: Optional[RateLimiter] = None,
+                 response_cache: Optional[ResponseCache] = None):
         self.session = None
         self.headers = {
             'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/91.0.4472.124 Safari/537.36',
@@ -44,6 +52,17 @@ class BilibiliCrawler:
             
         self.rate_limit_delay = config.CRAWLER_CONFIG.get('rate_limit_delay', 2)
         self.timeout = config.CRAWLER_CONFIG.get('timeout', 30)
+        # 所有请求共享的端点预算和主机并发限制
+        self.rate_limiter = rate_limiter or RateLimiter.from_config(config.CRAWLER_CONFIG)
+        # 视频元数据缓存 {bvid: (过期时间, 视频信息)}，所有方法共享
+        self.video_info_ttl = config.CRAWLER_CONFIG.get('video_info_ttl', 240)
+        self.video_info_cache_size = config.CRAWLER_CONFIG.get('video_info_cache_size', 1000)
+        self._video_info_cache: Dict[str, Tuple[float, Dict]] = {}
+        self._video_info_pending: Dict[str, asyncio.Future] = {}
+        # 持久化响应缓存，未启用时为None
+        self.response_cache = response_cache or ResponseCache.from_config(
+            config.CRAWLER_CONFIG.get('response_cache', {})
+        )
         
     async def init_session(self):
         """初始化会话"""
@@ -61,46 +80,78 @@ class BilibiliCrawler:
             await self.session.close()
             self.session = None
             logger.info("B站爬虫会话已关闭")
+        if self.response_cache:
+            stats = self.response_cache.stats
+            logger.info(
+                f"响应缓存统计: 命中 {stats['hits']}, 未命中 {stats['misses']}, "
+                f"重新验证 {stats['revalidated']}, 写入 {stats['stores']}, 淘汰 {stats['evictions']}"
+            )
+            self.response_cache.close()
     
-    async def _make_request(self, url: str, params: Dict = None, max_retries: int = 3) -> Optional[Dict]:
-        """发起HTTP请求，带重试和速率限制"""
+    async def _make_request(self, url: str, params: Dict = None, max_retries: int = 3,
+                            cache_ttl: Optional[float] = None) -> Optional[Dict]:
+        """发起HTTP请求，带响应缓存、重试和速率限制
+
+        Args:
+            cache_ttl: 本次响应的缓存有效期，默认按端点配置
+        """
+        # 有效期内的缓存直接返回；过期条目用于条件请求重新验证
+        cached = self.response_cache.get(url, params) if self.response_cache else None
+        if cached and cached.is_fresh:
+            return cached.data
+        
         if not self.session:
             await self.init_session()
         
+        throttled = False
         for attempt in range(max_retries):
             try:
-                # 添加速率限制延迟
-                if attempt > 0:
+                # 普通失败按指数退避重试；-799 的退避由限流器对整个端点生效
+                if attempt > 0 and not throttled:
                     delay = min(self.rate_limit_delay * (2 ** attempt), 30)  # 指数退避，最大30秒
                     logger.info(f"请求重试 {attempt}/{max_retries}, 等待 {delay} 秒...")
                     await asyncio.sleep(delay)
-                elif hasattr(self, '_last_request_time'):
-                    # 确保请求间隔
-                    elapsed = asyncio.get_event_loop().time() - self._last_request_time
-                    if elapsed < self.rate_limit_delay:
-                        await asyncio.sleep(self.rate_limit_delay - elapsed)
+                throttled = False
                 
-                self._last_request_time = asyncio.get_event_loop().time()
+                headers = cached.conditional_headers() if cached else None
+                async with self.rate_limiter.limit(url):
+                    async with self.session.get(url, params=params, headers=headers) as response:
+                        etag = response.headers.get('ETag')
+                        last_modified = response.headers.get('Last-Modified')
+                        if response.status == 304 and cached:
+                            # 内容未变化，复用缓存
+                            self.response_cache.mark_revalidated(
+                                cached, url, etag, last_modified, cache_ttl
+                            )
+                            self.rate_limiter.report_success(url)
+                            return cached.data
+                        if response.status == 200:
+                            data = await response.json()
+                        else:
+                            data = None
+                            logger.warning(f"请求失败: {url}, 状态码: {response.status}")
                 
-                async with self.session.get(url, params=params) as response:
-                    if response.status == 200:
-                        data = await response.json()
-                        
-                        # 检查B站API响应码
-                        if data and data.get('code') == -799:
-                            logger.warning(f"请求过于频繁 (第{attempt+1}次尝试): {url}")
-                            if attempt < max_retries - 1:
-                                continue  # 重试
-                            else:
-                                logger.error("达到最大重试次数，请求失败")
-                                return None
-                        
-                        return data
+                if data is None:
+                    if attempt < max_retries - 1:
+                        continue
+                    return None
+                
+                # 检查B站API响应码
+                if data.get('code') == -799:
+                    throttled = True
+                    self.rate_limiter.report_throttled(url)
+                    logger.warning(f"请求过于频繁 (第{attempt+1}次尝试): {url}")
+                    if attempt < max_retries - 1:
+                        continue  # 重试
                     else:
-                        logger.warning(f"请求失败: {url}, 状态码: {response.status}")
-                        if attempt < max_retries - 1:
-                            continue
+                        logger.error("达到最大重试次数，请求失败")
                         return None
+                
+                self.rate_limiter.report_success(url)
+                # 只缓存成功的响应（字幕文件等非API响应没有code字段）
+                if self.response_cache and data.get('code', 0) == 0:
+                    self.response_cache.put(url, params, data, etag, last_modified, cache_ttl)
+                return data
                         
             except asyncio.TimeoutError:
                 logger.error(f"请求超时 (第{attempt+1}次尝试): {url}")
@@ -144,8 +195,27 @@ class BilibiliCrawler:
             logger.error(f"获取用户视频出错: {e}")
             return []
     
-    async def get_video_info(self, bvid: str) -> Optional[Dict]:
-        """获取视频详细信息"""
+    async def get_video_info(self, bvid: str, use_cache: bool = True) -> Optional[Dict]:
+        """获取视频详细信息
+
+        结果按bvid缓存 video_info_ttl 秒，同一视频的并发请求只会发出一次。
+        """
+        if use_cache:
+            cached = self._video_info_cache.get(bvid)
+            if cached and cached[0] > time.monotonic():
+                return cached[1]
+            
+            pending = self._video_info_pending.get(bvid)
+            if pending is None:
+                pending = asyncio.ensure_future(self._fetch_video_info(bvid))
+                self._video_info_pending[bvid] = pending
+                pending.add_done_callback(lambda _: self._video_info_pending.pop(bvid, None))
+            return await asyncio.shield(pending)
+        
+        return await self._fetch_video_info(bvid)
+    
+    async def _fetch_video_info(self, bvid: str) -> Optional[Dict]:
+        """请求视频详细信息并写入缓存"""
         url = "https://api.bilibili.com/x/web-interface/view"
         
         params = {
@@ -156,8 +226,9 @@ class BilibiliCrawler:
             data = await self._make_request(url, params)
             
             if data and data.get('code') == 0:
-                video_info = data.get('data', {})
+                video_info = self._compact_video_info(data.get('data', {}))
                 logger.debug(f"获取视频信息: {video_info.get('title', 'Unknown')}")
+                self._cache_video_info(bvid, video_info)
                 return video_info
             else:
                 logger.warning(f"获取视频信息失败: {bvid}")
@@ -167,15 +238,50 @@ class BilibiliCrawler:
             logger.error(f"获取视频信息出错: {e}")
             return None
     
-    async def get_video_transcript(self, bvid: str) -> str:
-        """获取视频转录文本（字幕）"""
+    @classmethod
+    def _compact_video_info(cls, data: Dict) -> Dict:
+        """只保留用到的字段，丢弃分P、权限、合集、UP主卡片等嵌套数据
+
+        视频信息会缓存并被多处引用，原始响应每条有数KB。
+        """
+        info = {key: data[key] for key in cls.VIDEO_INFO_FIELDS if key in data}
+        stat = data.get('stat') or {}
+        info['stat'] = {key: stat.get(key, 0) for key in cls.VIDEO_STAT_FIELDS}
+        return info
+    
+    def _cache_video_info(self, bvid: str, video_info: Dict):
+        """写入视频信息缓存，超出容量时先清理过期项，再淘汰最早写入的项"""
+        now = time.monotonic()
+        if len(self._video_info_cache) >= self.video_info_cache_size:
+            for key in [k for k, (expires, _) in self._video_info_cache.items() if expires <= now]:
+                del self._video_info_cache[key]
+            while len(self._video_info_cache) >= self.video_info_cache_size:
+                del self._video_info_cache[next(iter(self._video_info_cache))]
+        self._video_info_cache[bvid] = (now + self.video_info_ttl, video_info)
+    
+    def clear_video_info_cache(self):
+        """清空视频信息缓存"""
+        self._video_info_cache.clear()
+    
+    async def get_video_transcript(self, bvid: str, video_info: Optional[Dict] = None,
+                                   cid: Optional[int] = None) -> str:
+        """获取视频转录文本（字幕）
+
+        Args:
+            bvid: 视频BV号
+            video_info: 已获取的视频信息，提供时不再请求视频详情
+            cid: 已知的视频cid，提供时可跳过视频详情请求
+        """
+        fallback = video_info.get('desc', '') if video_info else ""
         try:
-            # 先获取视频的基本信息
-            video_info = await self.get_video_info(bvid)
-            if not video_info:
-                return ""
-            
-            cid = video_info.get('cid')
+            # 没有现成的视频信息和cid时才获取视频基本信息（走缓存）
+            if not cid:
+                if video_info is None:
+                    video_info = await self.get_video_info(bvid)
+                    if not video_info:
+                        return ""
+                    fallback = video_info.get('desc', '')
+                cid = video_info.get('cid')
             if not cid:
                 return ""
             
@@ -196,14 +302,14 @@ class BilibiliCrawler:
             
             if not subtitle_list:
                 # 如果没有字幕，尝试从视频描述中提取有用信息
-                return video_info.get('desc', '')
+                return fallback
             
             # 获取第一个字幕文件
             subtitle_info = subtitle_list[0]
             subtitle_file_url = subtitle_info.get('subtitle_url', '')
             
             if not subtitle_file_url:
-                return video_info.get('desc', '')
+                return fallback
             
             # 下载字幕文件
             if subtitle_file_url.startswith('//'):
@@ -212,7 +318,7 @@ class BilibiliCrawler:
             subtitle_content = await self._make_request(subtitle_file_url)
             
             if not subtitle_content:
-                return video_info.get('desc', '')
+                return fallback
             
             # 解析字幕内容
             transcript = ""
@@ -222,16 +328,12 @@ class BilibiliCrawler:
                     if text:
                         transcript += text + " "
             
-            return transcript.strip() or video_info.get('desc', '')
+            return transcript.strip() or fallback
             
         except Exception as e:
             logger.error(f"获取视频字幕失败: {bvid}, 错误: {e}")
             # 返回视频描述作为备选
-            try:
-                video_info = await self.get_video_info(bvid)
-                return video_info.get('desc', '') if video_info else ""
-            except:
-                return ""
+            return fallback
     
     async def get_user_dynamics(self, uid: str, offset: str = "0") -> List[Dict]:
         """获取用户动态"""
@@ -244,8 +346,11 @@ class BilibiliCrawler:
             'platform': 'web'
         }
         
+        # 较早的分页内容基本不再变化，按配置缓存；首页始终实时获取
+        cache_ttl = None if offset not in ("", "0") else 0
+        
         try:
-            data = await self._make_request(url, params)
+            data = await self._make_request(url, params, cache_ttl=cache_ttl)
             
             if data and data.get('code') == 0:
                 items = data.get('data', {}).get('items', [])
@@ -279,8 +384,10 @@ class BilibiliCrawler:
             # 动态ID
             dynamic_id = item.get('id_str', '')
             
-            # 发布时间
-            timestamp = basic.get('pub_ts', 0)
+            # 发布时间（新版接口位于 module_author.pub_ts）
+            timestamp = int(
+                modules.get('module_author', {}).get('pub_ts') or basic.get('pub_ts', 0)
+            )
             
             # 动态内容
             content = ""
@@ -318,15 +425,25 @@ class BilibiliCrawler:
             logger.error(f"解析动态项目出错: {e}")
             return None
     
-    async def get_video_comments(self, bvid: str, limit: int = 100) -> List[Dict]:
-        """获取视频评论"""
+    async def get_video_comments(self, bvid: str, limit: int = 100,
+                                 video_info: Optional[Dict] = None,
+                                 aid: Optional[int] = None) -> List[Dict]:
+        """获取视频评论
+
+        Args:
+            bvid: 视频BV号
+            limit: 评论数量上限
+            video_info: 已获取的视频信息，提供时不再请求视频详情
+            aid: 已知的视频aid，提供时可跳过视频详情请求
+        """
         try:
-            # 先获取视频信息以获得aid
-            video_info = await self.get_video_info(bvid)
-            if not video_info:
-                return []
-            
-            aid = video_info.get('aid')
+            # 没有现成的aid时才获取视频信息（走缓存）
+            if not aid:
+                if video_info is None:
+                    video_info = await self.get_video_info(bvid)
+                    if not video_info:
+                        return []
+                aid = video_info.get('aid')
             if not aid:
                 return []
             
@@ -346,21 +463,9 @@ class BilibiliCrawler:
                 comments = []
                 
                 for reply in replies:
-                    try:
-                        comment_info = {
-                            'comment_id': str(reply.get('rpid', '')),
-                            'content': reply.get('content', {}).get('message', ''),
-                            'author': reply.get('member', {}).get('uname', ''),
-                            'like_count': reply.get('like', 0),
-                            'timestamp': reply.get('ctime', 0)
-                        }
-                        
-                        if comment_info['content'].strip():
-                            comments.append(comment_info)
-                            
-                    except Exception as e:
-                        logger.error(f"解析评论失败: {e}")
-                        continue
+                    comment_info = self._parse_comment_item(reply)
+                    if comment_info:
+                        comments.append(comment_info)
                 
                 logger.info(f"获取到 {len(comments)} 条评论")
                 return comments
@@ -373,6 +478,162 @@ class BilibiliCrawler:
             logger.error(f"获取视频评论出错: {e}")
             return []
     
+    def _parse_comment_item(self, reply: Dict) -> Optional[Dict]:
+        """解析评论项目"""
+        try:
+            comment_info = {
+                'comment_id': str(reply.get('rpid', '')),
+                'content': reply.get('content', {}).get('message', ''),
+                'author': reply.get('member', {}).get('uname', ''),
+                'like_count': reply.get('like', 0),
+                'timestamp': reply.get('ctime', 0)
+            }
+            
+            if comment_info['content'].strip():
+                return comment_info
+            return None
+            
+        except Exception as e:
+            logger.error(f"解析评论失败: {e}")
+            return None
+    
+    @staticmethod
+    def _to_timestamp(since: Optional[datetime]) -> int:
+        """水位时间转为时间戳，未提供时为0（不截止）"""
+        return int(since.timestamp()) if since else 0
+    
+    async def iter_user_videos(self, uid: str, since: Optional[datetime] = None,
+                               page_size: int = 30,
+                               max_pages: Optional[int] = None) -> AsyncIterator[Dict]:
+        """按发布时间从新到旧逐页获取用户视频
+
+        遇到发布时间不晚于水位 since 的视频即停止，since 为空时回溯全部历史。
+        每次只在内存中保留一页数据。
+        """
+        url = "https://api.bilibili.com/x/space/arc/search"
+        watermark = self._to_timestamp(since)
+        page = 1
+        
+        while max_pages is None or page <= max_pages:
+            params = {
+                'mid': uid,
+                'ps': page_size,
+                'pn': page,
+                'order': 'pubdate',
+                'tid': 0,
+                'keyword': '',
+                'jsonp': 'jsonp'
+            }
+            data = await self._make_request(url, params)
+            if not data or data.get('code') != 0:
+                logger.warning(f"获取用户视频第{page}页失败: {data}")
+                return
+            
+            payload = data.get('data') or {}
+            videos = (payload.get('list') or {}).get('vlist') or []
+            for video in videos:
+                if watermark and video.get('created', 0) <= watermark:
+                    logger.debug(f"到达视频水位，停止翻页: {uid}")
+                    return
+                yield video
+            
+            total = (payload.get('page') or {}).get('count', 0)
+            if not videos or page * page_size >= total:
+                return
+            page += 1
+    
+    async def iter_user_dynamics(self, uid: str, since: Optional[datetime] = None,
+                                 max_pages: Optional[int] = None) -> AsyncIterator[Dict]:
+        """沿 has_more / offset 逐页获取用户动态
+
+        置顶动态不参与水位判断；遇到发布时间不晚于 since 的普通动态即停止。
+        """
+        url = "https://api.bilibili.com/x/polymer/web-dynamic/v1/feed/space"
+        watermark = self._to_timestamp(since)
+        offset = ""
+        pages = 0
+        
+        while max_pages is None or pages < max_pages:
+            params = {
+                'host_mid': uid,
+                'offset': offset,
+                'timezone_offset': -480,
+                'platform': 'web'
+            }
+            # 首页实时获取，较早的分页按配置缓存
+            data = await self._make_request(url, params, cache_ttl=None if offset else 0)
+            if not data or data.get('code') != 0:
+                logger.warning(f"获取用户动态失败: {data}")
+                return
+            pages += 1
+            
+            payload = data.get('data') or {}
+            for item in payload.get('items') or []:
+                modules = item.get('modules', {})
+                is_pinned = modules.get('module_tag', {}).get('text') == '置顶'
+                timestamp = int(
+                    modules.get('module_author', {}).get('pub_ts')
+                    or item.get('basic', {}).get('pub_ts', 0)
+                )
+                if watermark and not is_pinned and timestamp and timestamp <= watermark:
+                    logger.debug(f"到达动态水位，停止翻页: {uid}")
+                    return
+                
+                dynamic_info = self._parse_dynamic_item(item)
+                if dynamic_info:
+                    yield dynamic_info
+            
+            offset = str(payload.get('offset') or '')
+            if not payload.get('has_more') or not offset:
+                return
+    
+    async def iter_video_comments(self, bvid: str, since: Optional[datetime] = None,
+                                  video_info: Optional[Dict] = None,
+                                  aid: Optional[int] = None, page_size: int = 20,
+                                  max_pages: Optional[int] = None) -> AsyncIterator[Dict]:
+        """按时间从新到旧逐页获取视频评论，遇到不晚于 since 的评论即停止"""
+        if not aid:
+            if video_info is None:
+                video_info = await self.get_video_info(bvid)
+                if not video_info:
+                    return
+            aid = video_info.get('aid')
+        if not aid:
+            return
+        
+        url = "https://api.bilibili.com/x/v2/reply/main"
+        watermark = self._to_timestamp(since)
+        cursor_next = 0
+        pages = 0
+        
+        while max_pages is None or pages < max_pages:
+            params = {
+                'type': 1,  # 视频类型
+                'oid': aid,
+                'mode': 2,  # 按时间排序，水位判断依赖时间顺序
+                'next': cursor_next,
+                'ps': min(page_size, 49)  # B站API限制
+            }
+            data = await self._make_request(url, params, cache_ttl=0)
+            if not data or data.get('code') != 0:
+                logger.warning(f"获取视频评论失败: {data}")
+                return
+            pages += 1
+            
+            payload = data.get('data') or {}
+            replies = payload.get('replies') or []
+            for reply in replies:
+                if watermark and reply.get('ctime', 0) <= watermark:
+                    return
+                comment_info = self._parse_comment_item(reply)
+                if comment_info:
+                    yield comment_info
+            
+            cursor = payload.get('cursor') or {}
+            if not replies or cursor.get('is_end', True) or not cursor.get('next'):
+                return
+            cursor_next = cursor['next']
+    
     async def search_videos(self, keyword: str, page_size: int = 50) -> List[Dict]:
         """搜索视频"""
         url = "https://api.bilibili.com/x/web-interface/search/type"
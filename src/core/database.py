@@ -5,13 +5,58 @@
 
 import sqlite3
 import json
-from datetime import datetime, timedelta
-from typing import List, Dict, Optional
-from dataclasses import dataclass, asdict
+import threading
+import weakref
+from collections import namedtuple
+from contextlib import contextmanager
+from functools import lru_cache
+from datetime import datetime, timedelta, timezone
+from typing import Any, List, Dict, Optional, Iterator, Sequence, Tuple
+from dataclasses import dataclass, asdict, fields as dataclass_fields
 import logging
 
+from ..utils.text_processor import TextProcessor
+
 logger = logging.getLogger(__name__)
 
+# 批量写入的逐行结果
+SAVE_INSERTED = 'inserted'
+SAVE_UPDATED = 'updated'
+SAVE_UNCHANGED = 'unchanged'
+
+# 流式查询的行类型: record 为按列名生成的 namedtuple，row 为 sqlite3.Row，dict 为普通字典
+ROW_TYPES = ('record', 'row', 'dict')
+# 以JSON文本存储的列
+JSON_COLUMNS = frozenset(('tags', 'key_points', 'investment_signals'))
+
+@lru_cache(maxsize=64)
+def _record_type(name: str, columns: Tuple[str, ...]):
+    """按查询列生成轻量行类型（没有实例 __dict__，可按属性或下标访问）"""
+    return namedtuple(name, columns, rename=True)
+
+def _decode_json(value: Any) -> Any:
+    """解码JSON列，空值和无法解析的值原样返回"""
+    if not value or not isinstance(value, str):
+        return value
+    try:
+        return json.loads(value)
+    except ValueError:
+        return value
+
+def slotted(cls):
+    """为dataclass加上 __slots__（即 Python 3.10 的 dataclass(slots=True)，兼容3.8）
+
+    实例不再带 __dict__，大批量爬取和分析时每条记录省去一个字典。
+    """
+    field_names = tuple(field.name for field in dataclass_fields(cls))
+    namespace = {
+        key: value for key, value in cls.__dict__.items()
+        if key not in field_names and key not in ('__dict__', '__weakref__')
+    }
+    namespace['__slots__'] = field_names
+    return type(cls)(cls.__name__, cls.__bases__, namespace)
+
+@slotted
 @dataclass
 class VideoContent:
     """视频内容数据结构"""
@@ -27,7 +72,27 @@ class VideoContent:
     share_count: int
     tags: List[str]
     content_hash: str
-    
+
+    @classmethod
+    def from_api(cls, info: Dict, up_name: str, transcript: str, content_hash: str) -> 'VideoContent':
+        """由视频详情接口 (/x/web-interface/view) 的 data 构造"""
+        stat = info.get('stat') or {}
+        return cls(
+            bvid=info['bvid'],
+            title=info.get('title', ''),
+            description=info.get('desc', ''),
+            transcript=transcript,
+            publish_time=datetime.fromtimestamp(info.get('pubdate', 0)),
+            up_name=up_name,
+            view_count=stat.get('view', 0),
+            like_count=stat.get('like', 0),
+            coin_count=stat.get('coin', 0),
+            share_count=stat.get('share', 0),
+            tags=[tag['tag_name'] for tag in info.get('tags') or []],
+            content_hash=content_hash
+        )
+
+@slotted
 @dataclass
 class DynamicContent:
     """动态内容数据结构"""
@@ -40,6 +105,21 @@ class DynamicContent:
     comment_count: int
     content_hash: str
 
+    @classmethod
+    def from_api(cls, dynamic: Dict, up_name: str, content_hash: str) -> 'DynamicContent':
+        """由爬虫解析后的动态 (BilibiliCrawler.iter_user_dynamics 的返回项) 构造"""
+        return cls(
+            dynamic_id=str(dynamic['id']),
+            content=dynamic['content'],
+            publish_time=datetime.fromtimestamp(dynamic.get('timestamp', 0)),
+            up_name=up_name,
+            like_count=dynamic.get('like_count', 0),
+            forward_count=dynamic.get('forward_count', 0),
+            comment_count=dynamic.get('comment_count', 0),
+            content_hash=content_hash
+        )
+
+@slotted
 @dataclass
 class CommentContent:
     """评论内容数据结构"""
@@ -51,6 +131,20 @@ class CommentContent:
     parent_id: str  # 视频或动态ID
     parent_type: str  # 'video' or 'dynamic'
 
+    @classmethod
+    def from_api(cls, comment: Dict, parent_id: str, parent_type: str) -> 'CommentContent':
+        """由爬虫解析后的评论 (BilibiliCrawler.iter_video_comments 的返回项) 构造"""
+        return cls(
+            comment_id=str(comment['comment_id']),
+            content=comment['content'],
+            author=comment.get('author', ''),
+            like_count=comment.get('like_count', 0),
+            publish_time=datetime.fromtimestamp(comment.get('timestamp', 0)),
+            parent_id=parent_id,
+            parent_type=parent_type
+        )
+
+@slotted
 @dataclass
 class NewsContent:
     """新闻内容数据结构"""
@@ -62,6 +156,7 @@ class NewsContent:
     category: str  # 财经、地缘等
     content_hash: str
 
+@slotted
 @dataclass
 class AnalysisResult:
     """分析结果数据结构"""
@@ -73,338 +168,1650 @@ class AnalysisResult:
     risk_level: str  # 风险等级
     confidence: float  # 置信度
     analysis_time: datetime
+    content_hash: str = ''  # 被分析内容的哈希
+    analyzer_version: str = ''  # 分析器版本
+
+class _ConnectionHolder:
+    """线程本地的连接持有者，线程结束后被回收时关闭连接"""
+
+    __slots__ = ('conn', '__weakref__')
+
+    def __init__(self, conn: sqlite3.Connection):
+        self.conn = conn
+
+class ConnectionPool:
+    """SQLite连接池
+
+    每个线程持有一个长连接，首次创建时统一设置WAL模式和调优后的PRAGMA，
+    避免每次读写都重新 connect/close。线程结束时其连接随线程本地数据一起关闭，
+    多线程Web服务器每个请求一个线程时连接数不会累积。写操作通过 transaction() 上下文执行。
+    """
+
+    PRAGMAS = (
+        "PRAGMA journal_mode=WAL",
+        "PRAGMA synchronous=NORMAL",
+        "PRAGMA temp_store=MEMORY",
+        "PRAGMA cache_size=-16000",
+        "PRAGMA mmap_size=134217728",
+    )
+
+    def __init__(self, db_path: str, timeout: float = 30.0):
+        self.db_path = db_path
+        self.timeout = timeout
+        self._local = threading.local()
+        self._lock = threading.Lock()
+        self._connections: List[sqlite3.Connection] = []
+
+    def _connect(self) -> sqlite3.Connection:
+        """创建新连接并设置PRAGMA"""
+        # isolation_level=None: 由 transaction() 显式控制事务边界
+        conn = sqlite3.connect(
+            self.db_path,
+            timeout=self.timeout,
+            isolation_level=None,
+            check_same_thread=False
+        )
+        conn.execute(f"PRAGMA busy_timeout={int(self.timeout * 1000)}")
+        for pragma in self.PRAGMAS:
+            conn.execute(pragma)
+        with self._lock:
+            self._connections.append(conn)
+        return conn
+
+    def get_connection(self) -> sqlite3.Connection:
+        """获取当前线程的连接"""
+        holder = getattr(self._local, 'holder', None)
+        if holder is None:
+            holder = _ConnectionHolder(self._connect())
+            weakref.finalize(holder, self._release, holder.conn)
+            self._local.holder = holder
+        return holder.conn
+
+    def _release(self, conn: sqlite3.Connection):
+        """关闭已结束线程的连接"""
+        with self._lock:
+            if conn in self._connections:
+                self._connections.remove(conn)
+        try:
+            conn.close()
+        except Exception as e:
+            logger.warning(f"关闭数据库连接失败: {e}")
+
+    def connection_count(self) -> int:
+        """当前打开的连接数"""
+        with self._lock:
+            return len(self._connections)
+
+    @contextmanager
+    def transaction(self) -> Iterator[sqlite3.Cursor]:
+        """事务上下文，正常退出时提交，异常时回滚
+
+        嵌套调用时加入外层事务，由最外层负责提交。
+        """
+        conn = self.get_connection()
+        cursor = conn.cursor()
+        if conn.in_transaction:
+            try:
+                yield cursor
+            finally:
+                cursor.close()
+            return
+
+        cursor.execute("BEGIN IMMEDIATE")
+        try:
+            yield cursor
+        except BaseException:
+            conn.rollback()
+            raise
+        else:
+            conn.commit()
+        finally:
+            cursor.close()
+
+    def close_all(self):
+        """关闭所有线程的连接"""
+        with self._lock:
+            connections, self._connections = self._connections, []
+        for conn in connections:
+            try:
+                conn.close()
+            except Exception as e:
+                logger.warning(f"关闭数据库连接失败: {e}")
+        self._local = threading.local()
+
+def _fts_statements(table: str, fts_table: str, columns: Sequence[str], rowid: str) -> List[str]:
+    """创建外部内容FTS5表及同步触发器的SQL
+
+    索引的是预先分好词、以空格分隔的分词列。只有分词列不全为NULL的行才进入索引，
+    更新时仅在分词列变化时重建该行的索引，互动数据等其他列的更新不触发。
+    """
+    column_list = ', '.join(columns)
+    old_values = ', '.join(f'old.{column}' for column in columns)
+    new_values = ', '.join(f'new.{column}' for column in columns)
+    old_indexed = ' OR '.join(f'old.{column} IS NOT NULL' for column in columns)
+    new_indexed = ' OR '.join(f'new.{column} IS NOT NULL' for column in columns)
+    changed = ' OR '.join(f'old.{column} IS NOT new.{column}' for column in columns)
+    delete_old = (
+        f"INSERT INTO {fts_table}({fts_table}, rowid, {column_list}) "
+        f"SELECT 'delete', old.{rowid}, {old_values} WHERE {old_indexed};"
+    )
+    insert_new = (
+        f"INSERT INTO {fts_table}(rowid, {column_list}) "
+        f"SELECT new.{rowid}, {new_values} WHERE {new_indexed};"
+    )
+    return [
+        f"CREATE VIRTUAL TABLE IF NOT EXISTS {fts_table} USING fts5("
+        f"{column_list}, content='{table}', content_rowid='{rowid}', tokenize='unicode61')",
+        f"CREATE TRIGGER IF NOT EXISTS {fts_table}_ai AFTER INSERT ON {table} BEGIN {insert_new} END",
+        f"CREATE TRIGGER IF NOT EXISTS {fts_table}_ad AFTER DELETE ON {table} BEGIN {delete_old} END",
+        f"CREATE TRIGGER IF NOT EXISTS {fts_table}_au AFTER UPDATE ON {table} "
+        f"WHEN {changed} BEGIN {delete_old} {insert_new} END",
+    ]
+
+# 每日聚合表的累加列
+AGGREGATE_COLUMNS = (
+    'content_count', 'analysis_count', 'sentiment_sum', 'signal_count',
+    'bullish_signals', 'bearish_signals', 'high_risk', 'medium_risk', 'low_risk',
+)
+
+# 内容类型 -> (表, 作者列, 内容ID表达式, 按分析结果的 content_id 定位内容行的条件)
+_AGGREGATE_SOURCES = {
+    'video': ('videos', 'up_name', '{row}.bvid', 'c.bvid = {content_id}'),
+    'dynamic': ('dynamics', 'up_name', '{row}.dynamic_id', 'c.dynamic_id = {content_id}'),
+    'news': ('news', 'source', 'CAST({row}.id AS TEXT)', 'c.id = CAST({content_id} AS INTEGER)'),
+}
+
+def _aggregate_upsert(values: Sequence[str], source: str = '', where: str = '1', group_by: str = '') -> str:
+    """累加到 daily_aggregates 的UPSERT
+
+    values 依次为日期、内容类型、作者和 AGGREGATE_COLUMNS 各列的增量表达式。
+    """
+    columns = ', '.join(('day', 'content_type', 'author') + AGGREGATE_COLUMNS)
+    updates = ', '.join(f"{column} = {column} + excluded.{column}" for column in AGGREGATE_COLUMNS)
+    # SELECT 必须带 WHERE，否则之后的 ON CONFLICT 会被解析为联接条件
+    return (
+        f"INSERT INTO daily_aggregates ({columns}) SELECT {', '.join(values)} {source} WHERE {where} {group_by} "
+        f"ON CONFLICT(day, content_type, author) DO UPDATE SET {updates};"
+    )
+
+def _aggregate_bucket(row: str, author_column: str) -> Tuple[str, str]:
+    """内容行所在的聚合桶: (发布日期即 publish_time 的前10个字符, 作者)"""
+    return (f"COALESCE(substr({row}.publish_time, 1, 10), '')", f"COALESCE({row}.{author_column}, '')")
+
+def _content_deltas(sign: str, count: str = '1') -> List[str]:
+    """一条内容对聚合列的贡献"""
+    return [f"{sign}{count}"] + ['0'] * (len(AGGREGATE_COLUMNS) - 1)
+
+def _analysis_deltas(row: str, sign: str, aggregate: bool = False) -> List[str]:
+    """一条分析结果对聚合列的贡献，aggregate 为真时对多行求和"""
+    signals = f"CASE WHEN json_valid({row}.investment_signals) THEN {row}.investment_signals ELSE '[]' END"
+
+    def direction_count(direction: str) -> str:
+        return (f"(SELECT COUNT(*) FROM json_each({signals}) "
+                f"WHERE json_extract(value, '$.direction') = '{direction}')")
+
+    deltas = [
+        '1',
+        f"COALESCE({row}.sentiment_score, 0)",
+        f"json_array_length({signals})",
+        direction_count('bullish'),
+        direction_count('bearish'),
+        f"({row}.risk_level = '高')",
+        f"({row}.risk_level = '中等')",
+        f"({row}.risk_level = '低')",
+    ]
+    if aggregate:
+        deltas = [f"SUM({delta})" for delta in deltas]
+    return ['0'] + [f"{sign}{delta}" for delta in deltas]
+
+def _aggregate_statements() -> List[str]:
+    """创建每日聚合表和维护触发器，并由已有数据回填
+
+    内容和分析结果的增删改都由触发器在同一事务内累加到对应的 (发布日期, 类型, 作者) 桶，
+    重新分析（UPDATE）时先减去旧结果再加上新结果；内容换桶时连同其分析结果一起迁移。
+    """
+    columns = ''.join(
+        f"{column} {'REAL' if column == 'sentiment_sum' else 'INTEGER'} DEFAULT 0, "
+        for column in AGGREGATE_COLUMNS
+    )
+    statements = [
+        f"CREATE TABLE IF NOT EXISTS daily_aggregates (day TEXT, content_type TEXT, author TEXT, "
+        f"{columns}PRIMARY KEY (day, content_type, author)) WITHOUT ROWID",
+        "CREATE INDEX IF NOT EXISTS idx_daily_aggregates_type ON daily_aggregates(content_type, day)",
+    ]
+
+    analysis_insert, analysis_delete, analysis_update = [], [], []
+    for content_type, (table, author, content_id, locate) in _AGGREGATE_SOURCES.items():
+        literal = f"'{content_type}'"
+        new_day, new_author = _aggregate_bucket('new', author)
+        old_day, old_author = _aggregate_bucket('old', author)
+        content_day, content_author = _aggregate_bucket('c', author)
+
+        def upsert(day: str, author_value: str, deltas: List[str], source: str = '',
+                   where: str = '1', group_by: str = '') -> str:
+            return _aggregate_upsert([day, literal, author_value] + deltas, source, where, group_by)
+
+        # 内容换桶时迁移该内容的分析结果
+        own_analysis = (
+            "FROM analysis_results a",
+            f"a.content_type = {literal} AND a.content_id = {content_id.format(row='new')}",
+        )
+        statements += [
+            f"CREATE TRIGGER IF NOT EXISTS {table}_agg_ai AFTER INSERT ON {table} BEGIN "
+            f"{upsert(new_day, new_author, _content_deltas('+'))} END",
+            f"CREATE TRIGGER IF NOT EXISTS {table}_agg_ad AFTER DELETE ON {table} BEGIN "
+            f"{upsert(old_day, old_author, _content_deltas('-'))} END",
+            f"CREATE TRIGGER IF NOT EXISTS {table}_agg_au AFTER UPDATE ON {table} "
+            f"WHEN {old_day} IS NOT {new_day} OR {old_author} IS NOT {new_author} BEGIN "
+            f"{upsert(old_day, old_author, _content_deltas('-'))} "
+            f"{upsert(new_day, new_author, _content_deltas('+'))} "
+            f"{upsert(old_day, old_author, _analysis_deltas('a', '-'), *own_analysis)} "
+            f"{upsert(new_day, new_author, _analysis_deltas('a', '+'), *own_analysis)} END",
+            # 回填升级前已有的数据
+            upsert(content_day, content_author, _content_deltas('', 'COUNT(*)'),
+                   f"FROM {table} c", group_by="GROUP BY 1, 3"),
+            upsert(content_day, content_author, _analysis_deltas('a', '', aggregate=True),
+                   f"FROM analysis_results a JOIN {table} c "
+                   f"ON a.content_type = {literal} AND {locate.format(content_id='a.content_id')}",
+                   group_by="GROUP BY 1, 3"),
+        ]
+
+        def content_of(row: str) -> Tuple[str, str]:
+            return (f"FROM {table} c",
+                    f"{row}.content_type = {literal} AND {locate.format(content_id=f'{row}.content_id')}")
+
+        analysis_insert.append(upsert(content_day, content_author, _analysis_deltas('new', '+'), *content_of('new')))
+        analysis_delete.append(upsert(content_day, content_author, _analysis_deltas('old', '-'), *content_of('old')))
+        analysis_update += [
+            upsert(content_day, content_author, _analysis_deltas('old', '-'), *content_of('old')),
+            upsert(content_day, content_author, _analysis_deltas('new', '+'), *content_of('new')),
+        ]
+
+    changed = ' OR '.join(
+        f"old.{column} IS NOT new.{column}"
+        for column in ('content_id', 'content_type', 'sentiment_score', 'investment_signals', 'risk_level')
+    )
+    statements += [
+        f"CREATE TRIGGER IF NOT EXISTS analysis_results_agg_ai AFTER INSERT ON analysis_results "
+        f"BEGIN {' '.join(analysis_insert)} END",
+        f"CREATE TRIGGER IF NOT EXISTS analysis_results_agg_ad AFTER DELETE ON analysis_results "
+        f"BEGIN {' '.join(analysis_delete)} END",
+        f"CREATE TRIGGER IF NOT EXISTS analysis_results_agg_au AFTER UPDATE ON analysis_results "
+        f"WHEN {changed} BEGIN {' '.join(analysis_update)} END",
+    ]
+    return statements
 
 class DatabaseManager:
     """数据库管理器"""
-    
+
+    # 批量查询 IN (...) 时每批的参数个数
+    BULK_QUERY_CHUNK = 500
+    # 流式查询每次 fetchmany 的行数
+    ITER_CHUNK_SIZE = 500
+
+    # 内容类型与数据表的对应关系
+    CONTENT_TABLES = {
+        'video': 'videos',
+        'dynamic': 'dynamics',
+        'news': 'news',
+    }
+
+    # 数据库结构迁移: (版本号, SQL语句列表)，按版本顺序执行一次，
+    # 当前版本记录在 PRAGMA user_version 中
+    SCHEMA_MIGRATIONS = [
+        (1, [
+            # 时间窗口查询: WHERE [up_name = ?] AND publish_time >= ? ORDER BY publish_time
+            "CREATE INDEX IF NOT EXISTS idx_videos_up_publish ON videos(up_name, publish_time)",
+            "CREATE INDEX IF NOT EXISTS idx_videos_publish ON videos(publish_time)",
+            "CREATE INDEX IF NOT EXISTS idx_dynamics_up_publish ON dynamics(up_name, publish_time)",
+            "CREATE INDEX IF NOT EXISTS idx_dynamics_publish ON dynamics(publish_time)",
+            "CREATE INDEX IF NOT EXISTS idx_news_publish ON news(publish_time)",
+            # 分析结果: WHERE [content_type = ?] AND analysis_time >= ? ORDER BY analysis_time
+            "CREATE INDEX IF NOT EXISTS idx_analysis_type_time "
+            "ON analysis_results(content_type, analysis_time)",
+            "CREATE INDEX IF NOT EXISTS idx_analysis_time ON analysis_results(analysis_time)",
+            # 按内容查找分析结果
+            "CREATE INDEX IF NOT EXISTS idx_analysis_content "
+            "ON analysis_results(content_id, content_type)",
+        ]),
+        (2, [
+            # 增量分析: 每个内容只保留一条分析结果，记录分析时的内容哈希和分析器版本
+            "ALTER TABLE analysis_results ADD COLUMN content_hash TEXT",
+            "ALTER TABLE analysis_results ADD COLUMN analyzer_version TEXT",
+            "DELETE FROM analysis_results WHERE id NOT IN ("
+            "SELECT MAX(id) FROM analysis_results GROUP BY content_id, content_type)",
+            "DROP INDEX IF EXISTS idx_analysis_content",
+            "CREATE UNIQUE INDEX IF NOT EXISTS idx_analysis_content "
+            "ON analysis_results(content_id, content_type)",
+        ]),
+        (3, [
+            # 增量爬取水位: 每个UP主每个信息流已见到的最新内容
+            '''
+            CREATE TABLE IF NOT EXISTS crawl_state (
+                up_uid TEXT,
+                feed TEXT,
+                up_name TEXT,
+                newest_pubdate INTEGER,
+                newest_id TEXT,
+                last_crawl_time TIMESTAMP,
+                PRIMARY KEY (up_uid, feed)
+            )
+            ''',
+        ]),
+        (4, [
+            # 视频互动数据时间序列: 只追加，数值与上一个样本相同时不写入
+            '''
+            CREATE TABLE IF NOT EXISTS video_stats_history (
+                bvid TEXT,
+                sample_time INTEGER,
+                view_count INTEGER,
+                like_count INTEGER,
+                coin_count INTEGER,
+                share_count INTEGER,
+                PRIMARY KEY (bvid, sample_time)
+            ) WITHOUT ROWID
+            ''',
+        ]),
+        (5, [
+            # 全文检索: jieba预分词列 + 外部内容FTS5表，由触发器与原表同步
+            "ALTER TABLE videos ADD COLUMN title_seg TEXT",
+            "ALTER TABLE videos ADD COLUMN description_seg TEXT",
+            "ALTER TABLE videos ADD COLUMN transcript_seg TEXT",
+            "ALTER TABLE dynamics ADD COLUMN content_seg TEXT",
+            "ALTER TABLE news ADD COLUMN title_seg TEXT",
+            "ALTER TABLE news ADD COLUMN content_seg TEXT",
+            *_fts_statements('videos', 'videos_fts',
+                             ('title_seg', 'description_seg', 'transcript_seg'), 'rowid'),
+            *_fts_statements('dynamics', 'dynamics_fts', ('content_seg',), 'rowid'),
+            *_fts_statements('news', 'news_fts', ('title_seg', 'content_seg'), 'id'),
+        ]),
+        (6, [
+            # 每日聚合: 仪表板和统计摘要按天查询，不再扫描内容表
+            *_aggregate_statements(),
+        ]),
+        (7, [
+            # 警报合并状态检查点: 每个目标每个方向最近一次警报
+            '''
+            CREATE TABLE IF NOT EXISTS alert_state (
+                target TEXT,
+                direction TEXT,
+                bucket INTEGER,
+                last_alert REAL,
+                signal_count INTEGER,
+                suppressed INTEGER,
+                PRIMARY KEY (target, direction)
+            ) WITHOUT ROWID
+            ''',
+        ]),
+        (8, [
+            # 新闻源轮询: 条件请求验证字段和上次响应体哈希
+            '''
+            CREATE TABLE IF NOT EXISTS news_source_state (
+                url TEXT PRIMARY KEY,
+                etag TEXT,
+                last_modified TEXT,
+                body_hash TEXT,
+                feed_url TEXT,
+                checked_at TIMESTAMP
+            )
+            ''',
+        ]),
+        (9, [
+            # 今日新增统计: WHERE created_at >= ?（入库时间，UTC）
+            "CREATE INDEX IF NOT EXISTS idx_videos_created ON videos(created_at)",
+            "CREATE INDEX IF NOT EXISTS idx_dynamics_created ON dynamics(created_at)",
+            "CREATE INDEX IF NOT EXISTS idx_news_created ON news(created_at)",
+        ]),
+    ]
+
+    # 全文检索: 内容类型 -> (FTS表, [(原文列, 分词列, BM25权重)])，列顺序与FTS表一致
+    SEARCH_FIELDS = {
+        'video': ('videos_fts', [
+            ('title', 'title_seg', 3.0),
+            ('description', 'description_seg', 1.0),
+            ('transcript', 'transcript_seg', 1.0),
+        ]),
+        'dynamic': ('dynamics_fts', [
+            ('content', 'content_seg', 1.0),
+        ]),
+        'news': ('news_fts', [
+            ('title', 'title_seg', 3.0),
+            ('content', 'content_seg', 1.0),
+        ]),
+    }
+    # 全文检索版本: 升级到该结构版本时回填已有内容的分词列
+    SEARCH_SCHEMA_VERSION = 5
+
+    # 互动数据时间序列的数值列
+    STATS_COLUMNS = ('view_count', 'like_count', 'coin_count', 'share_count')
+
+    # 待分析内容查询中各内容类型的主键表达式（与 analysis_results.content_id 对应）
+    CONTENT_ID_COLUMNS = {
+        'video': 'c.bvid',
+        'dynamic': 'c.dynamic_id',
+        'news': 'CAST(c.id AS TEXT)',
+    }
+
+    # 历史分析数据（列式导出和报表）的列
+    HISTORY_COLUMNS = (
+        'content_type', 'content_id', 'author', 'title', 'publish_time',
+        'view_count', 'like_count', 'sentiment_score', 'confidence',
+        'risk_level', 'investment_signals',
+    )
+
     def __init__(self, db_path: str = "data/financial_analysis.db"):
         self.db_path = db_path
+        self.pool = ConnectionPool(db_path)
+        self.text_processor = TextProcessor()
         self.init_database()
+
+    def transaction(self):
+        """获取事务上下文"""
+        return self.pool.transaction()
+
+    def close(self):
+        """关闭数据库连接"""
+        self.pool.close_all()
     
     def init_database(self):
         """初始化数据库表"""
-        conn = sqlite3.connect(self.db_path)
-        cursor = conn.cursor()
+        with self.transaction() as cursor:
+            # 创建视频表
+            cursor.execute('''
+                CREATE TABLE IF NOT EXISTS videos (
+                    bvid TEXT PRIMARY KEY,
+                    title TEXT,
+                    description TEXT,
+                    transcript TEXT,
+                    publish_time TIMESTAMP,
+                    up_name TEXT,
+                    view_count INTEGER,
+                    like_count INTEGER,
+                    coin_count INTEGER,
+                    share_count INTEGER,
+                    tags TEXT,
+                    content_hash TEXT,
+                    created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+                )
+            ''')
+            
+            # 创建动态表
+            cursor.execute('''
+                CREATE TABLE IF NOT EXISTS dynamics (
+                    dynamic_id TEXT PRIMARY KEY,
+                    content TEXT,
+                    publish_time TIMESTAMP,
+                    up_name TEXT,
+                    like_count INTEGER,
+                    forward_count INTEGER,
+                    comment_count INTEGER,
+                    content_hash TEXT,
+                    created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+                )
+            ''')
+            
+            # 创建评论表
+            cursor.execute('''
+                CREATE TABLE IF NOT EXISTS comments (
+                    comment_id TEXT PRIMARY KEY,
+                    content TEXT,
+                    author TEXT,
+                    like_count INTEGER,
+                    publish_time TIMESTAMP,
+                    parent_id TEXT,
+                    parent_type TEXT,
+                    created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+                )
+            ''')
+            
+            # 创建新闻表
+            cursor.execute('''
+                CREATE TABLE IF NOT EXISTS news (
+                    id INTEGER PRIMARY KEY AUTOINCREMENT,
+                    title TEXT,
+                    content TEXT,
+                    source TEXT,
+                    publish_time TIMESTAMP,
+                    url TEXT UNIQUE,
+                    category TEXT,
+                    content_hash TEXT,
+                    created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+                )
+            ''')
+            
+            # 创建分析结果表
+            cursor.execute('''
+                CREATE TABLE IF NOT EXISTS analysis_results (
+                    id INTEGER PRIMARY KEY AUTOINCREMENT,
+                    content_id TEXT,
+                    content_type TEXT,
+                    sentiment_score REAL,
+                    key_points TEXT,
+                    investment_signals TEXT,
+                    risk_level TEXT,
+                    confidence REAL,
+                    analysis_time TIMESTAMP,
+                    created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+                )
+            ''')
+            
+            applied = self.migrate_schema(cursor)
+            if self.SEARCH_SCHEMA_VERSION in applied:
+                self.backfill_search_columns(cursor)
         
-        # 创建视频表
-        cursor.execute('''
-            CREATE TABLE IF NOT EXISTS videos (
-                bvid TEXT PRIMARY KEY,
-                title TEXT,
-                description TEXT,
-                transcript TEXT,
-                publish_time TIMESTAMP,
-                up_name TEXT,
-                view_count INTEGER,
-                like_count INTEGER,
-                coin_count INTEGER,
-                share_count INTEGER,
-                tags TEXT,
-                content_hash TEXT,
-                created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
-            )
-        ''')
+        logger.info("数据库初始化完成")
+
+    def get_schema_version(self) -> int:
+        """获取当前数据库结构版本"""
+        return self.pool.get_connection().execute("PRAGMA user_version").fetchone()[0]
+
+    def migrate_schema(self, cursor: sqlite3.Cursor) -> List[int]:
+        """执行尚未应用的结构迁移（需在事务内调用），返回本次应用的版本号"""
+        cursor.execute("PRAGMA user_version")
+        current_version = cursor.fetchone()[0]
         
-        # 创建动态表
-        cursor.execute('''
-            CREATE TABLE IF NOT EXISTS dynamics (
-                dynamic_id TEXT PRIMARY KEY,
-                content TEXT,
-                publish_time TIMESTAMP,
-                up_name TEXT,
-                like_count INTEGER,
-                forward_count INTEGER,
-                comment_count INTEGER,
-                content_hash TEXT,
-                created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+        applied = []
+        for version, statements in self.SCHEMA_MIGRATIONS:
+            if version <= current_version:
+                continue
+            for statement in statements:
+                cursor.execute(statement)
+            cursor.execute(f"PRAGMA user_version = {int(version)}")
+            applied.append(version)
+            logger.info(f"数据库结构迁移到版本 {version}")
+        return applied
+
+    def backfill_search_columns(self, cursor: sqlite3.Cursor):
+        """为分词列为空的已有内容补充分词，触发器随之写入全文索引"""
+        for content_type, (_, fields) in self.SEARCH_FIELDS.items():
+            table = self.CONTENT_TABLES[content_type]
+            sources = ', '.join(source for source, _, _ in fields)
+            assignments = ', '.join(f"{seg} = ?" for _, seg, _ in fields)
+            cursor.execute(
+                f"SELECT rowid, {sources} FROM {table} WHERE {fields[0][1]} IS NULL"
             )
-        ''')
-        
-        # 创建评论表
-        cursor.execute('''
-            CREATE TABLE IF NOT EXISTS comments (
-                comment_id TEXT PRIMARY KEY,
-                content TEXT,
-                author TEXT,
-                like_count INTEGER,
-                publish_time TIMESTAMP,
-                parent_id TEXT,
-                parent_type TEXT,
-                created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+            rows = cursor.fetchall()
+            cursor.executemany(
+                f"UPDATE {table} SET {assignments} WHERE rowid = ?",
+                [(*self._segment_for_search(*row[1:]), row[0]) for row in rows]
             )
-        ''')
-        
-        # 创建新闻表
-        cursor.execute('''
-            CREATE TABLE IF NOT EXISTS news (
-                id INTEGER PRIMARY KEY AUTOINCREMENT,
-                title TEXT,
-                content TEXT,
-                source TEXT,
-                publish_time TIMESTAMP,
-                url TEXT UNIQUE,
-                category TEXT,
-                content_hash TEXT,
-                created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+            if rows:
+                logger.info(f"全文索引回填 {table}: {len(rows)} 行")
+
+    def _segment_for_search(self, *texts: Optional[str]) -> Tuple[str, ...]:
+        """生成全文检索用的分词列"""
+        return tuple(self.text_processor.segment_for_search(text) for text in texts)
+
+    def _prepare_segments(self, table: str, key_column: str, keys: List[str], hashes: List[str],
+                          texts: List[Tuple[Optional[str], ...]]) -> List[Optional[Tuple[str, ...]]]:
+        """在写事务开始前为新增或内容变化的行分词，内容未变化的行为None
+
+        分词是CPU密集操作，放在事务外进行，写锁只覆盖 executemany；
+        已有 content_hash 用只读查询获取，WAL模式下不阻塞其他写入。
+        """
+        existing = self._fetch_existing(
+            self.pool.get_connection().cursor(), table, key_column, 'content_hash', keys
+        )
+        outcomes = self._classify_rows(existing, keys, hashes)
+        return [
+            None if outcome == SAVE_UNCHANGED else self._segment_for_search(*row_texts)
+            for outcome, row_texts in zip(outcomes, texts)
+        ]
+
+    def _search_segments(self, outcome: str, segments: Optional[Tuple[str, ...]],
+                         *texts: Optional[str]) -> Tuple[Optional[str], ...]:
+        """写入时的分词列: 内容未变化时返回None，由 COALESCE 保留已有分词，避免重复分词
+
+        segments 为事务前预先分好的词；事务前判断为未变化、期间被其他写入改变的行在此补分词。
+        """
+        if outcome == SAVE_UNCHANGED:
+            return (None,) * len(texts)
+        return segments if segments is not None else self._segment_for_search(*texts)
+    
+    def _fetch_existing(self, cursor: sqlite3.Cursor, table: str, key_column: str,
+                        value_column: str, keys: List[str]) -> Dict[str, str]:
+        """批量查询已存在记录的比较字段，返回 {主键: 比较字段}"""
+        existing = {}
+        unique_keys = list(dict.fromkeys(keys))
+        for start in range(0, len(unique_keys), self.BULK_QUERY_CHUNK):
+            chunk = unique_keys[start:start + self.BULK_QUERY_CHUNK]
+            placeholders = ','.join('?' * len(chunk))
+            cursor.execute(
+                f"SELECT {key_column}, {value_column} FROM {table} "
+                f"WHERE {key_column} IN ({placeholders})",
+                chunk
             )
-        ''')
-        
-        # 创建分析结果表
-        cursor.execute('''
-            CREATE TABLE IF NOT EXISTS analysis_results (
-                id INTEGER PRIMARY KEY AUTOINCREMENT,
-                content_id TEXT,
-                content_type TEXT,
-                sentiment_score REAL,
-                key_points TEXT,
-                investment_signals TEXT,
-                risk_level TEXT,
-                confidence REAL,
-                analysis_time TIMESTAMP,
-                created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+            existing.update(cursor.fetchall())
+        return existing
+
+    def _classify_rows(self, existing: Dict[str, str], keys: List[str],
+                       values: List[str]) -> List[str]:
+        """根据已存在记录判断每行的写入结果"""
+        outcomes = []
+        for key, value in zip(keys, values):
+            if key not in existing:
+                outcomes.append(SAVE_INSERTED)
+            elif existing[key] == value:
+                outcomes.append(SAVE_UNCHANGED)
+            else:
+                outcomes.append(SAVE_UPDATED)
+            # 同一批次内的重复主键以前一行为基准
+            existing[key] = value
+        return outcomes
+
+    def _log_bulk_outcomes(self, label: str, outcomes: List[str]):
+        """记录批量写入结果"""
+        logger.info(
+            f"批量保存{label}: {len(outcomes)} 条 "
+            f"(新增 {outcomes.count(SAVE_INSERTED)}, "
+            f"更新 {outcomes.count(SAVE_UPDATED)}, "
+            f"未变 {outcomes.count(SAVE_UNCHANGED)})"
+        )
+
+    def save_videos_bulk(self, videos: List[VideoContent]) -> List[str]:
+        """批量保存视频数据
+
+        在单个事务内用一次 executemany 完成写入。
+        返回与输入一一对应的写入结果 (inserted / updated / unchanged)，
+        以 content_hash 判断内容是否变化；互动数据总是刷新。
+        """
+        if not videos:
+            return []
+
+        try:
+            keys = [video.bvid for video in videos]
+            hashes = [video.content_hash for video in videos]
+            segments = self._prepare_segments('videos', 'bvid', keys, hashes, [
+                (video.title, video.description, video.transcript) for video in videos
+            ])
+            with self.transaction() as cursor:
+                existing = self._fetch_existing(cursor, 'videos', 'bvid', 'content_hash', keys)
+                outcomes = self._classify_rows(existing, keys, hashes)
+                cursor.executemany('''
+                    INSERT INTO videos 
+                    (bvid, title, description, transcript, publish_time, up_name,
+                     view_count, like_count, coin_count, share_count, tags, content_hash,
+                     title_seg, description_seg, transcript_seg)
+                    VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
+                    ON CONFLICT(bvid) DO UPDATE SET
+                        title = excluded.title,
+                        description = excluded.description,
+                        transcript = excluded.transcript,
+                        publish_time = excluded.publish_time,
+                        up_name = excluded.up_name,
+                        view_count = excluded.view_count,
+                        like_count = excluded.like_count,
+                        coin_count = excluded.coin_count,
+                        share_count = excluded.share_count,
+                        tags = excluded.tags,
+                        content_hash = excluded.content_hash,
+                        title_seg = COALESCE(excluded.title_seg, title_seg),
+                        description_seg = COALESCE(excluded.description_seg, description_seg),
+                        transcript_seg = COALESCE(excluded.transcript_seg, transcript_seg)
+                ''', [(
+                    video.bvid, video.title, video.description, video.transcript,
+                    video.publish_time, video.up_name, video.view_count,
+                    video.like_count, video.coin_count, video.share_count,
+                    json.dumps(video.tags, ensure_ascii=False), video.content_hash,
+                    *self._search_segments(outcome, segment, video.title, video.description,
+                                           video.transcript)
+                ) for video, outcome, segment in zip(videos, outcomes, segments)])
+                self._append_stats_samples(cursor, [(
+                    video.bvid, video.view_count, video.like_count,
+                    video.coin_count, video.share_count
+                ) for video in videos])
+            self._log_bulk_outcomes("视频数据", outcomes)
+            return outcomes
+        except Exception as e:
+            logger.error(f"批量保存视频数据失败: {e}")
+            return []
+
+    def save_dynamics_bulk(self, dynamics: List[DynamicContent]) -> List[str]:
+        """批量保存动态数据，返回每行的写入结果"""
+        if not dynamics:
+            return []
+
+        try:
+            keys = [dynamic.dynamic_id for dynamic in dynamics]
+            hashes = [dynamic.content_hash for dynamic in dynamics]
+            segments = self._prepare_segments(
+                'dynamics', 'dynamic_id', keys, hashes, [(dynamic.content,) for dynamic in dynamics]
             )
-        ''')
+            with self.transaction() as cursor:
+                existing = self._fetch_existing(
+                    cursor, 'dynamics', 'dynamic_id', 'content_hash', keys
+                )
+                outcomes = self._classify_rows(existing, keys, hashes)
+                cursor.executemany('''
+                    INSERT INTO dynamics 
+                    (dynamic_id, content, publish_time, up_name, like_count,
+                     forward_count, comment_count, content_hash, content_seg)
+                    VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)
+                    ON CONFLICT(dynamic_id) DO UPDATE SET
+                        content = excluded.content,
+                        publish_time = excluded.publish_time,
+                        up_name = excluded.up_name,
+                        like_count = excluded.like_count,
+                        forward_count = excluded.forward_count,
+                        comment_count = excluded.comment_count,
+                        content_hash = excluded.content_hash,
+                        content_seg = COALESCE(excluded.content_seg, content_seg)
+                ''', [(
+                    dynamic.dynamic_id, dynamic.content, dynamic.publish_time,
+                    dynamic.up_name, dynamic.like_count, dynamic.forward_count,
+                    dynamic.comment_count, dynamic.content_hash,
+                    *self._search_segments(outcome, segment, dynamic.content)
+                ) for dynamic, outcome, segment in zip(dynamics, outcomes, segments)])
+            self._log_bulk_outcomes("动态数据", outcomes)
+            return outcomes
+        except Exception as e:
+            logger.error(f"批量保存动态数据失败: {e}")
+            return []
+
+    def save_comments_bulk(self, comments: List[CommentContent]) -> List[str]:
+        """批量保存评论数据，返回每行的写入结果
+
+        评论表没有 content_hash，以评论正文判断是否变化。
+        """
+        if not comments:
+            return []
+
+        try:
+            with self.transaction() as cursor:
+                keys = [comment.comment_id for comment in comments]
+                existing = self._fetch_existing(
+                    cursor, 'comments', 'comment_id', 'content', keys
+                )
+                outcomes = self._classify_rows(
+                    existing, keys, [comment.content for comment in comments]
+                )
+                cursor.executemany('''
+                    INSERT INTO comments 
+                    (comment_id, content, author, like_count, publish_time,
+                     parent_id, parent_type)
+                    VALUES (?, ?, ?, ?, ?, ?, ?)
+                    ON CONFLICT(comment_id) DO UPDATE SET
+                        content = excluded.content,
+                        author = excluded.author,
+                        like_count = excluded.like_count,
+                        publish_time = excluded.publish_time,
+                        parent_id = excluded.parent_id,
+                        parent_type = excluded.parent_type
+                ''', [(
+                    comment.comment_id, comment.content, comment.author,
+                    comment.like_count, comment.publish_time, comment.parent_id,
+                    comment.parent_type
+                ) for comment in comments])
+            self._log_bulk_outcomes("评论数据", outcomes)
+            return outcomes
+        except Exception as e:
+            logger.error(f"批量保存评论数据失败: {e}")
+            return []
+
+    def save_news_bulk(self, news_list: List[NewsContent]) -> List[str]:
+        """批量保存新闻数据，以url去重，返回每行的写入结果
+
+        使用 ON CONFLICT 更新而不是 INSERT OR REPLACE，保留新闻原有的id。
+        """
+        if not news_list:
+            return []
+
+        try:
+            keys = [news.url for news in news_list]
+            hashes = [news.content_hash for news in news_list]
+            segments = self._prepare_segments(
+                'news', 'url', keys, hashes, [(news.title, news.content) for news in news_list]
+            )
+            with self.transaction() as cursor:
+                existing = self._fetch_existing(cursor, 'news', 'url', 'content_hash', keys)
+                outcomes = self._classify_rows(existing, keys, hashes)
+                cursor.executemany('''
+                    INSERT INTO news 
+                    (title, content, source, publish_time, url, category, content_hash,
+                     title_seg, content_seg)
+                    VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)
+                    ON CONFLICT(url) DO UPDATE SET
+                        title = excluded.title,
+                        content = excluded.content,
+                        source = excluded.source,
+                        publish_time = excluded.publish_time,
+                        category = excluded.category,
+                        content_hash = excluded.content_hash,
+                        title_seg = COALESCE(excluded.title_seg, title_seg),
+                        content_seg = COALESCE(excluded.content_seg, content_seg)
+                ''', [(
+                    news.title, news.content, news.source, news.publish_time,
+                    news.url, news.category, news.content_hash,
+                    *self._search_segments(outcome, segment, news.title, news.content)
+                ) for news, outcome, segment in zip(news_list, outcomes, segments)])
+            self._log_bulk_outcomes("新闻数据", outcomes)
+            return outcomes
+        except Exception as e:
+            logger.error(f"批量保存新闻数据失败: {e}")
+            return []
+
+    def save_analysis_results_bulk(self, results: List[AnalysisResult]) -> List[str]:
+        """批量保存分析结果，返回每行的写入结果
+
+        每个 (content_id, content_type) 只保留一条结果，重复分析时原地更新。
+        content_hash 与 analyzer_version 均未变化时记为 unchanged。
+        """
+        if not results:
+            return []
+
+        try:
+            with self.transaction() as cursor:
+                keys = [(result.content_id, result.content_type) for result in results]
+                existing = self.get_analysis_state(keys, cursor=cursor)
+                outcomes = self._classify_rows(
+                    existing, keys,
+                    [(result.content_hash, result.analyzer_version) for result in results]
+                )
+                cursor.executemany('''
+                    INSERT INTO analysis_results 
+                    (content_id, content_type, sentiment_score, key_points,
+                     investment_signals, risk_level, confidence, analysis_time,
+                     content_hash, analyzer_version)
+                    VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
+                    ON CONFLICT(content_id, content_type) DO UPDATE SET
+                        sentiment_score = excluded.sentiment_score,
+                        key_points = excluded.key_points,
+                        investment_signals = excluded.investment_signals,
+                        risk_level = excluded.risk_level,
+                        confidence = excluded.confidence,
+                        analysis_time = excluded.analysis_time,
+                        content_hash = excluded.content_hash,
+                        analyzer_version = excluded.analyzer_version
+                ''', [(
+                    result.content_id, result.content_type, result.sentiment_score,
+                    json.dumps(result.key_points, ensure_ascii=False),
+                    json.dumps(result.investment_signals, ensure_ascii=False),
+                    result.risk_level, result.confidence, result.analysis_time,
+                    result.content_hash, result.analyzer_version
+                ) for result in results])
+            self._log_bulk_outcomes("分析结果", outcomes)
+            return outcomes
+        except Exception as e:
+            logger.error(f"批量保存分析结果失败: {e}")
+            return []
+
+    def get_analysis_state(self, keys: List[Tuple[str, str]],
+                           cursor: sqlite3.Cursor = None) -> Dict[Tuple[str, str], Tuple[str, str]]:
+        """查询内容的分析状态
+
+        返回 {(content_id, content_type): (content_hash, analyzer_version)}，
+        未分析过的内容不在结果中。
+        """
+        cursor = cursor or self.pool.get_connection().cursor()
+        ids_by_type: Dict[str, List[str]] = {}
+        for content_id, content_type in keys:
+            ids_by_type.setdefault(content_type, []).append(content_id)
         
-        conn.commit()
-        conn.close()
-        logger.info("数据库初始化完成")
-    
-    def save_video(self, video: VideoContent):
-        """保存视频数据"""
-        conn = sqlite3.connect(self.db_path)
-        cursor = conn.cursor()
+        state = {}
+        for content_type, content_ids in ids_by_type.items():
+            unique_ids = list(dict.fromkeys(content_ids))
+            for start in range(0, len(unique_ids), self.BULK_QUERY_CHUNK):
+                chunk = unique_ids[start:start + self.BULK_QUERY_CHUNK]
+                placeholders = ','.join('?' * len(chunk))
+                cursor.execute(
+                    f"SELECT content_id, content_hash, analyzer_version FROM analysis_results "
+                    f"WHERE content_type = ? AND content_id IN ({placeholders})",
+                    [content_type, *chunk]
+                )
+                for content_id, content_hash, analyzer_version in cursor.fetchall():
+                    state[(content_id, content_type)] = (content_hash, analyzer_version)
+        return state
+
+    def get_analysis_results_by_keys(self, keys: List[Tuple[str, str]]) -> Dict[Tuple[str, str], AnalysisResult]:
+        """按 (content_id, content_type) 读取已保存的分析结果"""
+        cursor = self.pool.get_connection().cursor()
+        ids_by_type: Dict[str, List[str]] = {}
+        for content_id, content_type in keys:
+            ids_by_type.setdefault(content_type, []).append(content_id)
+
+        results = {}
+        try:
+            for content_type, content_ids in ids_by_type.items():
+                unique_ids = list(dict.fromkeys(content_ids))
+                for start in range(0, len(unique_ids), self.BULK_QUERY_CHUNK):
+                    chunk = unique_ids[start:start + self.BULK_QUERY_CHUNK]
+                    placeholders = ','.join('?' * len(chunk))
+                    cursor.execute(
+                        f"SELECT content_id, sentiment_score, key_points, investment_signals, "
+                        f"risk_level, confidence, analysis_time, content_hash, analyzer_version "
+                        f"FROM analysis_results WHERE content_type = ? AND content_id IN ({placeholders})",
+                        [content_type, *chunk]
+                    )
+                    for row in cursor.fetchall():
+                        results[(row[0], content_type)] = AnalysisResult(
+                            content_id=row[0],
+                            content_type=content_type,
+                            sentiment_score=row[1],
+                            key_points=json.loads(row[2] or '[]'),
+                            investment_signals=json.loads(row[3] or '[]'),
+                            risk_level=row[4],
+                            confidence=row[5],
+                            analysis_time=datetime.fromisoformat(row[6]) if row[6] else None,
+                            content_hash=row[7] or '',
+                            analyzer_version=row[8] or ''
+                        )
+            return results
+        except Exception as e:
+            logger.error(f"读取分析结果失败: {e}")
+            return {}
+        finally:
+            cursor.close()
+
+    def get_pending_analysis(self, content_type: str, analyzer_version: str,
+                             days: int = 1, limit: int = 100) -> List[Dict]:
+        """获取需要(重新)分析的内容
+
+        只返回从未分析过、内容哈希已变化或分析器版本已变化的内容，
+        使每轮分析量与新增内容量成正比，而不是与时间窗口大小成正比。
+        """
+        table = self.CONTENT_TABLES.get(content_type)
+        if not table:
+            logger.error(f"未知的内容类型: {content_type}")
+            return []
+
+        cursor = self.pool.get_connection().cursor()
+        since_date = (datetime.now() - timedelta(days=days)).isoformat()
         
         try:
-            cursor.execute('''
-                INSERT OR REPLACE INTO videos 
-                (bvid, title, description, transcript, publish_time, up_name,
-                 view_count, like_count, coin_count, share_count, tags, content_hash)
-                VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
-            ''', (
-                video.bvid, video.title, video.description, video.transcript,
-                video.publish_time, video.up_name, video.view_count,
-                video.like_count, video.coin_count, video.share_count,
-                json.dumps(video.tags, ensure_ascii=False), video.content_hash
-            ))
-            conn.commit()
-            logger.info(f"保存视频数据: {video.bvid}")
+            cursor.execute(f'''
+                SELECT c.* FROM {table} c
+                LEFT JOIN analysis_results a
+                    ON a.content_id = {self.CONTENT_ID_COLUMNS[content_type]}
+                    AND a.content_type = ?
+                WHERE c.publish_time >= ?
+                    AND (a.id IS NULL
+                         OR a.content_hash IS NOT c.content_hash
+                         OR a.analyzer_version IS NOT ?)
+                ORDER BY c.publish_time DESC
+                LIMIT ?
+            ''', (content_type, since_date, analyzer_version, limit))
+            
+            results = cursor.fetchall()
+            columns = [description[0] for description in cursor.description]
+            return [dict(zip(columns, row)) for row in results]
+            
         except Exception as e:
-            logger.error(f"保存视频数据失败: {e}")
+            logger.error(f"获取待分析内容失败: {e}")
+            return []
         finally:
-            conn.close()
+            cursor.close()
+
+    def save_video(self, video: VideoContent):
+        """保存视频数据"""
+        if self.save_videos_bulk([video]):
+            logger.info(f"保存视频数据: {video.bvid}")
     
     def save_dynamic(self, dynamic: DynamicContent):
         """保存动态数据"""
-        conn = sqlite3.connect(self.db_path)
-        cursor = conn.cursor()
-        
-        try:
-            cursor.execute('''
-                INSERT OR REPLACE INTO dynamics 
-                (dynamic_id, content, publish_time, up_name, like_count,
-                 forward_count, comment_count, content_hash)
-                VALUES (?, ?, ?, ?, ?, ?, ?, ?)
-            ''', (
-                dynamic.dynamic_id, dynamic.content, dynamic.publish_time,
-                dynamic.up_name, dynamic.like_count, dynamic.forward_count,
-                dynamic.comment_count, dynamic.content_hash
-            ))
-            conn.commit()
+        if self.save_dynamics_bulk([dynamic]):
             logger.info(f"保存动态数据: {dynamic.dynamic_id}")
-        except Exception as e:
-            logger.error(f"保存动态数据失败: {e}")
-        finally:
-            conn.close()
 
     def save_comment(self, comment: CommentContent):
         """保存评论数据"""
-        conn = sqlite3.connect(self.db_path)
-        cursor = conn.cursor()
-        
-        try:
-            cursor.execute('''
-                INSERT OR REPLACE INTO comments 
-                (comment_id, content, author, like_count, publish_time,
-                 parent_id, parent_type)
-                VALUES (?, ?, ?, ?, ?, ?, ?)
-            ''', (
-                comment.comment_id, comment.content, comment.author,
-                comment.like_count, comment.publish_time, comment.parent_id,
-                comment.parent_type
-            ))
-            conn.commit()
+        if self.save_comments_bulk([comment]):
             logger.info(f"保存评论数据: {comment.comment_id}")
-        except Exception as e:
-            logger.error(f"保存评论数据失败: {e}")
-        finally:
-            conn.close()
 
     def save_news(self, news: NewsContent):
         """保存新闻数据"""
-        conn = sqlite3.connect(self.db_path)
-        cursor = conn.cursor()
-        
-        try:
-            cursor.execute('''
-                INSERT OR REPLACE INTO news 
-                (title, content, source, publish_time, url, category, content_hash)
-                VALUES (?, ?, ?, ?, ?, ?, ?)
-            ''', (
-                news.title, news.content, news.source, news.publish_time,
-                news.url, news.category, news.content_hash
-            ))
-            conn.commit()
+        if self.save_news_bulk([news]):
             logger.info(f"保存新闻数据: {news.title}")
-        except Exception as e:
-            logger.error(f"保存新闻数据失败: {e}")
-        finally:
-            conn.close()
 
     def save_analysis_result(self, result: AnalysisResult):
         """保存分析结果"""
-        conn = sqlite3.connect(self.db_path)
-        cursor = conn.cursor()
-        
-        try:
-            cursor.execute('''
-                INSERT INTO analysis_results 
-                (content_id, content_type, sentiment_score, key_points,
-                 investment_signals, risk_level, confidence, analysis_time)
-                VALUES (?, ?, ?, ?, ?, ?, ?, ?)
-            ''', (
-                result.content_id, result.content_type, result.sentiment_score,
-                json.dumps(result.key_points, ensure_ascii=False),
-                json.dumps(result.investment_signals, ensure_ascii=False),
-                result.risk_level, result.confidence, result.analysis_time
-            ))
-            conn.commit()
+        if self.save_analysis_results_bulk([result]):
             logger.info(f"保存分析结果: {result.content_id}")
-        except Exception as e:
-            logger.error(f"保存分析结果失败: {e}")
-        finally:
-            conn.close()
     
-    def get_latest_content(self, content_type: str, up_name: str = None, days: int = 30) -> List[Dict]:
-        """获取最近的内容"""
-        conn = sqlite3.connect(self.db_path)
-        cursor = conn.cursor()
+    def _append_stats_samples(self, cursor: sqlite3.Cursor,
+                              samples: List[Tuple[str, int, int, int, int]],
+                              sample_time: int = None) -> int:
+        """追加互动数据样本，与该视频上一个样本完全相同的不写入，返回写入条数
+
+        samples: [(bvid, view_count, like_count, coin_count, share_count), ...]
+        """
+        if not samples:
+            return 0
+        sample_time = int(sample_time if sample_time is not None else datetime.now().timestamp())
+        
+        # 同一批次内同一视频以最后一个样本为准
+        latest_samples = {sample[0]: tuple(int(v or 0) for v in sample[1:]) for sample in samples}
+        bvids = list(latest_samples)
+        previous = {}
+        for start in range(0, len(bvids), self.BULK_QUERY_CHUNK):
+            chunk = bvids[start:start + self.BULK_QUERY_CHUNK]
+            placeholders = ','.join('?' * len(chunk))
+            cursor.execute(f'''
+                SELECT h.bvid, h.view_count, h.like_count, h.coin_count, h.share_count
+                FROM video_stats_history h
+                WHERE h.bvid IN ({placeholders})
+                    AND h.sample_time = (
+                        SELECT MAX(sample_time) FROM video_stats_history WHERE bvid = h.bvid
+                    )
+            ''', chunk)
+            for bvid, *values in cursor.fetchall():
+                previous[bvid] = tuple(values)
         
+        rows = [
+            (bvid, sample_time, *values)
+            for bvid, values in latest_samples.items()
+            if previous.get(bvid) != values
+        ]
+        cursor.executemany('''
+            INSERT OR REPLACE INTO video_stats_history
+            (bvid, sample_time, view_count, like_count, coin_count, share_count)
+            VALUES (?, ?, ?, ?, ?, ?)
+        ''', rows)
+        return len(rows)
+
+    def record_video_stats(self, samples: List[Tuple[str, int, int, int, int]],
+                           sample_time: int = None) -> int:
+        """记录一批视频的最新互动数据（不改动视频内容），返回新增样本数
+
+        samples: [(bvid, view_count, like_count, coin_count, share_count), ...]
+        """
+        if not samples:
+            return 0
+
+        try:
+            with self.transaction() as cursor:
+                cursor.executemany('''
+                    UPDATE videos
+                    SET view_count = ?, like_count = ?, coin_count = ?, share_count = ?
+                    WHERE bvid = ?
+                ''', [(*sample[1:], sample[0]) for sample in samples])
+                written = self._append_stats_samples(cursor, samples, sample_time)
+            logger.info(f"记录互动数据: {len(samples)} 个视频, 新增样本 {written} 条")
+            return written
+        except Exception as e:
+            logger.error(f"记录互动数据失败: {e}")
+            return 0
+
+    def get_recent_video_ids(self, up_name: str, days: int = 2) -> List[str]:
+        """获取UP主最近发布的视频BV号，用于跟踪互动数据增长"""
         since_date = (datetime.now() - timedelta(days=days)).isoformat()
+        try:
+            rows = self.pool.get_connection().execute('''
+                SELECT bvid FROM videos
+                WHERE up_name = ? AND publish_time >= ?
+                ORDER BY publish_time DESC
+            ''', (up_name, since_date))
+            return [row[0] for row in rows]
+        except Exception as e:
+            logger.error(f"获取最近视频失败: {e}")
+            return []
+
+    def get_video_stats_history(self, bvid: str, since: datetime = None,
+                                until: datetime = None) -> Dict[str, List[int]]:
+        """按时间范围获取视频互动数据序列
+
+        返回列式结构 {'sample_time': [...], 'view_count': [...], ...}，
+        数值在两个样本之间保持不变。
+        """
+        series = {'sample_time': [], **{column: [] for column in self.STATS_COLUMNS}}
+        conditions, params = ["bvid = ?"], [bvid]
+        if since:
+            conditions.append("sample_time >= ?")
+            params.append(int(since.timestamp()))
+        if until:
+            conditions.append("sample_time <= ?")
+            params.append(int(until.timestamp()))
         
         try:
-            if content_type == 'video':
-                if up_name:
-                    cursor.execute('''
-                        SELECT * FROM videos 
-                        WHERE up_name = ? AND publish_time >= ?
-                        ORDER BY publish_time DESC
-                    ''', (up_name, since_date))
-                else:
-                    cursor.execute('''
-                        SELECT * FROM videos 
-                        WHERE publish_time >= ?
-                        ORDER BY publish_time DESC
-                    ''', (since_date,))
-            elif content_type == 'dynamic':
-                if up_name:
-                    cursor.execute('''
-                        SELECT * FROM dynamics 
-                        WHERE up_name = ? AND publish_time >= ?
-                        ORDER BY publish_time DESC
-                    ''', (up_name, since_date))
-                else:
-                    cursor.execute('''
-                        SELECT * FROM dynamics 
-                        WHERE publish_time >= ?
-                        ORDER BY publish_time DESC
-                    ''', (since_date,))
-            elif content_type == 'news':
-                cursor.execute('''
-                    SELECT * FROM news 
-                    WHERE publish_time >= ?
-                    ORDER BY publish_time DESC
-                ''', (since_date,))
-            
-            results = cursor.fetchall()
+            rows = self.pool.get_connection().execute(f'''
+                SELECT sample_time, {', '.join(self.STATS_COLUMNS)}
+                FROM video_stats_history
+                WHERE {' AND '.join(conditions)}
+                ORDER BY sample_time
+            ''', params)
+            for row in rows:
+                for key, value in zip(series, row):
+                    series[key].append(value)
+        except Exception as e:
+            logger.error(f"获取互动数据序列失败: {e}")
+        return series
+
+    def get_video_stats_downsampled(self, bvid: str, bucket_seconds: int = 3600,
+                                    since: datetime = None,
+                                    until: datetime = None) -> Dict[str, List[int]]:
+        """按固定时间桶降采样，每个桶取桶内最后一个样本
+
+        sample_time 为桶的起始时间，没有样本的桶不返回。
+        """
+        series = {'sample_time': [], **{column: [] for column in self.STATS_COLUMNS}}
+        bucket_seconds = max(int(bucket_seconds), 1)
+        conditions, params = ["bvid = ?"], [bvid]
+        if since:
+            conditions.append("sample_time >= ?")
+            params.append(int(since.timestamp()))
+        if until:
+            conditions.append("sample_time <= ?")
+            params.append(int(until.timestamp()))
+        
+        try:
+            # SQLite 在包含 MAX() 的聚合查询中，其他列取自取得最大值的那一行
+            rows = self.pool.get_connection().execute(f'''
+                SELECT (sample_time / ?) * ? AS bucket, MAX(sample_time),
+                       {', '.join(self.STATS_COLUMNS)}
+                FROM video_stats_history
+                WHERE {' AND '.join(conditions)}
+                GROUP BY bucket
+                ORDER BY bucket
+            ''', [bucket_seconds, bucket_seconds, *params])
+            for bucket, _, *values in rows:
+                series['sample_time'].append(bucket)
+                for column, value in zip(self.STATS_COLUMNS, values):
+                    series[column].append(value)
+        except Exception as e:
+            logger.error(f"获取降采样互动数据失败: {e}")
+        return series
+
+    def get_view_velocity(self, bvid: str, bucket_seconds: int = 3600,
+                          since: datetime = None) -> Dict[str, List[float]]:
+        """计算播放量增速（每小时播放量），基于降采样后的相邻桶"""
+        series = self.get_video_stats_downsampled(bvid, bucket_seconds, since)
+        times, views = series['sample_time'], series['view_count']
+        velocity = {'sample_time': [], 'views_per_hour': []}
+        for i in range(1, len(times)):
+            elapsed = times[i] - times[i - 1]
+            if elapsed > 0:
+                velocity['sample_time'].append(times[i])
+                velocity['views_per_hour'].append((views[i] - views[i - 1]) * 3600 / elapsed)
+        return velocity
+
+    def get_content_hashes(self, content_type: str, content_ids: List[str]) -> Dict[str, str]:
+        """批量查询已入库内容的content_hash，返回 {内容ID: content_hash}"""
+        key_columns = {'video': 'bvid', 'dynamic': 'dynamic_id', 'news': 'url'}
+        if content_type not in key_columns:
+            logger.error(f"未知的内容类型: {content_type}")
+            return {}
+        
+        cursor = self.pool.get_connection().cursor()
+        try:
+            return self._fetch_existing(
+                cursor, self.CONTENT_TABLES[content_type], key_columns[content_type],
+                'content_hash', content_ids
+            )
+        except Exception as e:
+            logger.error(f"查询内容哈希失败: {e}")
+            return {}
+        finally:
+            cursor.close()
+
+    def get_crawl_state(self, up_uid: str, feed: str) -> Optional[Dict]:
+        """获取UP主某个信息流的爬取水位"""
+        cursor = self.pool.get_connection().cursor()
+        try:
+            cursor.execute(
+                "SELECT * FROM crawl_state WHERE up_uid = ? AND feed = ?", (up_uid, feed)
+            )
+            row = cursor.fetchone()
+            if row is None:
+                return None
             columns = [description[0] for description in cursor.description]
-            return [dict(zip(columns, row)) for row in results]
-            
+            return dict(zip(columns, row))
         except Exception as e:
-            logger.error(f"获取最近内容失败: {e}")
-            return []
+            logger.error(f"获取爬取水位失败: {e}")
+            return None
         finally:
-            conn.close()
+            cursor.close()
 
-    def get_analysis_results(self, content_type: str = None, days: int = 30) -> List[Dict]:
-        """获取分析结果"""
-        conn = sqlite3.connect(self.db_path)
-        cursor = conn.cursor()
+    def update_crawl_state(self, up_uid: str, feed: str, up_name: str,
+                           newest_pubdate: int, newest_id: str):
+        """更新爬取水位，水位只会前进不会后退"""
+        try:
+            with self.transaction() as cursor:
+                cursor.execute('''
+                    INSERT INTO crawl_state
+                    (up_uid, feed, up_name, newest_pubdate, newest_id, last_crawl_time)
+                    VALUES (?, ?, ?, ?, ?, ?)
+                    ON CONFLICT(up_uid, feed) DO UPDATE SET
+                        up_name = excluded.up_name,
+                        newest_id = CASE WHEN excluded.newest_pubdate > crawl_state.newest_pubdate
+                                         THEN excluded.newest_id ELSE crawl_state.newest_id END,
+                        newest_pubdate = MAX(crawl_state.newest_pubdate, excluded.newest_pubdate),
+                        last_crawl_time = excluded.last_crawl_time
+                ''', (up_uid, feed, up_name, newest_pubdate, newest_id, datetime.now()))
+        except Exception as e:
+            logger.error(f"更新爬取水位失败: {e}")
+
+    def get_alert_states(self, since: float) -> List[Dict]:
+        """获取 since（Unix时间戳）之后仍有效的警报状态，最近的在前"""
+        try:
+            return list(self.iter_query(
+                "SELECT * FROM alert_state WHERE last_alert >= ? ORDER BY last_alert DESC",
+                (since,), row_type='dict'
+            ))
+        except Exception as e:
+            logger.error(f"获取警报状态失败: {e}")
+            return []
+
+    def save_alert_states(self, states: List[Tuple[str, str, int, float, int, int]],
+                          expire_before: float = 0):
+        """保存警报状态检查点，并删除 expire_before 之前的过期状态（单个事务）
+
+        Args:
+            states: [(target, direction, bucket, last_alert, signal_count, suppressed)]
+            expire_before: 最后一次警报早于此时间戳的状态已过冷却期，不再需要保留
+        """
+        try:
+            with self.transaction() as cursor:
+                cursor.executemany('''
+                    INSERT OR REPLACE INTO alert_state
+                    (target, direction, bucket, last_alert, signal_count, suppressed)
+                    VALUES (?, ?, ?, ?, ?, ?)
+                ''', states)
+                cursor.execute("DELETE FROM alert_state WHERE last_alert < ?", (expire_before,))
+        except Exception as e:
+            logger.error(f"保存警报状态失败: {e}")
+
+    def get_news_source_states(self) -> Dict[str, Dict]:
+        """获取所有新闻源（及订阅源）的条件请求状态，返回 {网址: 状态}"""
+        try:
+            return {row['url']: row for row in self.iter_query(
+                "SELECT * FROM news_source_state", row_type='dict'
+            )}
+        except Exception as e:
+            logger.error(f"获取新闻源状态失败: {e}")
+            return {}
+
+    def save_news_source_state(self, url: str, etag: Optional[str], last_modified: Optional[str],
+                               body_hash: str, feed_url: Optional[str] = None):
+        """保存新闻源的ETag、Last-Modified、响应体哈希和页面声明的订阅源"""
+        try:
+            with self.transaction() as cursor:
+                cursor.execute('''
+                    INSERT OR REPLACE INTO news_source_state
+                    (url, etag, last_modified, body_hash, feed_url, checked_at)
+                    VALUES (?, ?, ?, ?, ?, ?)
+                ''', (url, etag, last_modified, body_hash, feed_url, datetime.now()))
+        except Exception as e:
+            logger.error(f"保存新闻源状态失败: {e}")
+
+    def get_latest_publish_time(self, content_type: str, up_name: str = None,
+                                parent_id: str = None) -> Optional[datetime]:
+        """获取已入库内容的最新发布时间，作为增量爬取的水位
+
+        Args:
+            content_type: 'video' / 'dynamic' / 'news' / 'comment'
+            up_name: 按UP主过滤（视频、动态）
+            parent_id: 按所属视频或动态过滤（评论）
+        """
+        table = 'comments' if content_type == 'comment' else self.CONTENT_TABLES.get(content_type)
+        if not table:
+            logger.error(f"未知的内容类型: {content_type}")
+            return None
         
-        since_date = (datetime.now() - timedelta(days=days)).isoformat()
+        conditions, params = [], []
+        if up_name and content_type in ('video', 'dynamic'):
+            conditions.append("up_name = ?")
+            params.append(up_name)
+        if parent_id and content_type == 'comment':
+            conditions.append("parent_id = ?")
+            params.append(parent_id)
+        where = f"WHERE {' AND '.join(conditions)}" if conditions else ""
         
         try:
-            if content_type:
-                cursor.execute('''
-                    SELECT * FROM analysis_results 
-                    WHERE content_type = ? AND analysis_time >= ?
-                    ORDER BY analysis_time DESC
-                ''', (content_type, since_date))
+            row = self.pool.get_connection().execute(
+                f"SELECT MAX(publish_time) FROM {table} {where}", params
+            ).fetchone()
+            if not row or not row[0]:
+                return None
+            return datetime.fromisoformat(str(row[0]))
+        except Exception as e:
+            logger.error(f"获取内容水位失败: {e}")
+            return None
+
+    def build_latest_content_query(self, content_type: str, up_name: str = None,
+                                   since_date: str = None) -> Tuple[str, tuple]:
+        """构造最近内容查询，返回 (SQL, 参数)"""
+        table = self.CONTENT_TABLES.get(content_type)
+        if not table:
+            raise ValueError(f"未知的内容类型: {content_type}")
+        
+        # 新闻没有UP主字段
+        if up_name and content_type != 'news':
+            return (f'''
+                SELECT * FROM {table} 
+                WHERE up_name = ? AND publish_time >= ?
+                ORDER BY publish_time DESC
+            ''', (up_name, since_date))
+        return (f'''
+            SELECT * FROM {table} 
+            WHERE publish_time >= ?
+            ORDER BY publish_time DESC
+        ''', (since_date,))
+
+    def build_analysis_results_query(self, content_type: str = None,
+                                     since_date: str = None) -> Tuple[str, tuple]:
+        """构造分析结果查询，返回 (SQL, 参数)"""
+        if content_type:
+            return ('''
+                SELECT * FROM analysis_results 
+                WHERE content_type = ? AND analysis_time >= ?
+                ORDER BY analysis_time DESC
+            ''', (content_type, since_date))
+        return ('''
+            SELECT * FROM analysis_results 
+            WHERE analysis_time >= ?
+            ORDER BY analysis_time DESC
+        ''', (since_date,))
+    
+    def build_history_query(self, content_type: str, since: datetime,
+                            until: Optional[datetime] = None,
+                            columns: Optional[Sequence[str]] = None,
+                            content_ids: Optional[Sequence[str]] = None) -> Tuple[str, tuple]:
+        """构造历史分析数据查询，返回 (SQL, 参数)
+
+        每条内容一行，附带其分析结果，三类内容使用相同的列 (HISTORY_COLUMNS)，
+        供列式导出和报表统计使用；不含正文等长文本列。content_ids 不为None时只查询这些内容。
+        """
+        table = self.CONTENT_TABLES.get(content_type)
+        if not table:
+            raise ValueError(f"未知的内容类型: {content_type}")
+
+        expressions = {
+            'content_type': f"'{content_type}'",
+            'content_id': self.CONTENT_ID_COLUMNS[content_type],
+            'author': 'c.source' if content_type == 'news' else 'c.up_name',
+            'title': 'c.title' if content_type != 'dynamic' else 'NULL',
+            'publish_time': 'c.publish_time',
+            'view_count': 'c.view_count' if content_type == 'video' else 'NULL',
+            'like_count': 'c.like_count' if content_type != 'news' else 'NULL',
+            'sentiment_score': 'a.sentiment_score',
+            'confidence': 'a.confidence',
+            'risk_level': 'a.risk_level',
+            'investment_signals': 'a.investment_signals',
+        }
+        select = ', '.join(f"{expressions[column]} AS {column}" for column in columns or self.HISTORY_COLUMNS)
+        time_filter = "c.publish_time >= ?" + (" AND c.publish_time < ?" if until else "")
+        params = [content_type, since, *((until,) if until else ())]
+        if content_ids is not None:
+            time_filter += f" AND {self.CONTENT_ID_COLUMNS[content_type]} IN ({','.join('?' * len(content_ids))})"
+            params.extend(content_ids)
+        return (f'''
+            SELECT {select} FROM {table} c
+            LEFT JOIN analysis_results a
+                ON a.content_id = {self.CONTENT_ID_COLUMNS[content_type]}
+                AND a.content_type = ?
+            WHERE {time_filter}
+            ORDER BY c.publish_time
+        ''', tuple(params))
+
+    def get_history_rows(self, keys: Sequence[Tuple[str, str]], since: datetime,
+                         until: Optional[datetime] = None,
+                         columns: Optional[Sequence[str]] = None) -> List[Dict]:
+        """按 (content_id, content_type) 读取时间窗口内的历史分析数据，按批查询"""
+        ids_by_type: Dict[str, List[str]] = {}
+        for content_id, content_type in keys:
+            ids_by_type.setdefault(content_type, []).append(content_id)
+
+        rows = []
+        try:
+            for content_type, content_ids in ids_by_type.items():
+                unique_ids = list(dict.fromkeys(content_ids))
+                for start in range(0, len(unique_ids), self.BULK_QUERY_CHUNK):
+                    sql, params = self.build_history_query(
+                        content_type, since, until, columns, unique_ids[start:start + self.BULK_QUERY_CHUNK]
+                    )
+                    rows.extend(self.iter_query(sql, params, row_type='dict'))
+        except Exception as e:
+            logger.error(f"按内容读取历史数据失败: {e}")
+        return rows
+
+    def get_history_watermarks(self, content_type: str, since: datetime,
+                               until: datetime) -> Dict[str, List]:
+        """按发布日期统计 [since, until) 内历史数据的水位
+
+        返回 {日期: [内容数, 分析结果数, 最新分析时间, 最新入库时间, 播放数合计, 点赞数合计]}，
+        补爬内容、重新分析或互动数据更新都会改变当天的水位，列式导出据此判断是否需要重新导出。
+        """
+        table = self.CONTENT_TABLES.get(content_type)
+        if not table:
+            raise ValueError(f"未知的内容类型: {content_type}")
+        view_count = 'c.view_count' if content_type == 'video' else '0'
+        like_count = 'c.like_count' if content_type != 'news' else '0'
+        rows = self.pool.get_connection().execute(f'''
+            SELECT date(c.publish_time) AS day, COUNT(*), COUNT(a.id), MAX(a.analysis_time),
+                   MAX(c.created_at), TOTAL({view_count}), TOTAL({like_count})
+            FROM {table} c
+            LEFT JOIN analysis_results a
+                ON a.content_id = {self.CONTENT_ID_COLUMNS[content_type]}
+                AND a.content_type = ?
+            WHERE c.publish_time >= ? AND c.publish_time < ?
+            GROUP BY day
+        ''', (content_type, since, until)).fetchall()
+        return {row[0]: list(row[1:]) for row in rows}
+
+    def iter_query(self, sql: str, params: Sequence = (), row_type: str = 'record',
+                   decode_json: bool = False, chunk_size: Optional[int] = None,
+                   record_name: str = 'Record') -> Iterator:
+        """流式执行查询，按 fetchmany 分块读取，逐行产出
+
+        内存占用与块大小成正比而不是与结果行数成正比，第一行在首块读取后即可使用。
+        生成器未遍历完时游标保持打开，关闭生成器（或被回收）时释放。
+
+        Args:
+            sql: 查询语句
+            params: 查询参数
+            row_type: 行类型，见 ROW_TYPES
+            decode_json: 是否解码 tags / key_points / investment_signals 等JSON列
+            chunk_size: 每次 fetchmany 的行数，默认 ITER_CHUNK_SIZE
+            record_name: row_type 为 record 时生成的类型名
+        """
+        if row_type not in ROW_TYPES:
+            raise ValueError(f"未知的行类型: {row_type}")
+        if decode_json and row_type == 'row':
+            raise ValueError("sqlite3.Row 为只读类型，不支持JSON解码")
+
+        cursor = self.pool.get_connection().cursor()
+        try:
+            if row_type == 'row':
+                cursor.row_factory = sqlite3.Row
+            cursor.execute(sql, params)
+            columns = tuple(description[0] for description in cursor.description)
+            json_indexes = [i for i, column in enumerate(columns) if column in JSON_COLUMNS] if decode_json else []
+            if row_type == 'record':
+                make_row = _record_type(record_name, columns)._make
+            elif row_type == 'dict':
+                make_row = lambda values: dict(zip(columns, values))
             else:
-                cursor.execute('''
-                    SELECT * FROM analysis_results 
-                    WHERE analysis_time >= ?
-                    ORDER BY analysis_time DESC
-                ''', (since_date,))
-            
-            results = cursor.fetchall()
-            columns = [description[0] for description in cursor.description]
-            return [dict(zip(columns, row)) for row in results]
-            
+                make_row = None
+
+            while True:
+                rows = cursor.fetchmany(chunk_size or self.ITER_CHUNK_SIZE)
+                if not rows:
+                    break
+                for row in rows:
+                    if json_indexes:
+                        row = list(row)
+                        for index in json_indexes:
+                            row[index] = _decode_json(row[index])
+                    yield make_row(row) if make_row else row
+        finally:
+            cursor.close()
+
+    def iter_content(self, content_type: str, up_name: str = None, days: int = 30,
+                     row_type: str = 'record', decode_json: bool = False,
+                     chunk_size: Optional[int] = None) -> Iterator:
+        """流式读取最近的内容，参数含义同 get_latest_content 和 iter_query"""
+        since_date = (datetime.now() - timedelta(days=days)).isoformat()
+        sql, params = self.build_latest_content_query(content_type, up_name, since_date)
+        return self.iter_query(sql, params, row_type, decode_json, chunk_size,
+                               record_name=f"{content_type.capitalize()}Row")
+
+    def iter_analysis_results(self, content_type: str = None, days: int = 30,
+                              row_type: str = 'record', decode_json: bool = False,
+                              chunk_size: Optional[int] = None) -> Iterator:
+        """流式读取分析结果，参数含义同 get_analysis_results 和 iter_query"""
+        since_date = (datetime.now() - timedelta(days=days)).isoformat()
+        sql, params = self.build_analysis_results_query(content_type, since_date)
+        return self.iter_query(sql, params, row_type, decode_json, chunk_size,
+                               record_name='AnalysisRow')
+
+    def get_latest_content(self, content_type: str, up_name: str = None, days: int = 30) -> List[Dict]:
+        """获取最近的内容（结果较多时使用 iter_content）"""
+        try:
+            return list(self.iter_content(content_type, up_name, days, row_type='dict'))
+        except Exception as e:
+            logger.error(f"获取最近内容失败: {e}")
+            return []
+
+    def get_analysis_results(self, content_type: str = None, days: int = 30) -> List[Dict]:
+        """获取分析结果（结果较多时使用 iter_analysis_results）"""
+        try:
+            return list(self.iter_analysis_results(content_type, days, row_type='dict'))
         except Exception as e:
             logger.error(f"获取分析结果失败: {e}")
             return []
+
+    def search(self, query: str, types: Optional[Sequence[str]] = None,
+               since: Optional[datetime] = None, limit: int = 20) -> List[Dict]:
+        """全文检索视频、动态和新闻
+
+        查询词按jieba分词后在各FTS5表中匹配（多个词之间为AND），
+        按BM25排序（标题权重更高），分数越小越相关。
+
+        Args:
+            query: 查询关键词
+            types: 内容类型列表 ('video', 'dynamic', 'news')，默认全部
+            since: 只返回此时间之后发布的内容
+            limit: 最多返回条数
+
+        Returns:
+            [{'content_type', 'content_id', 'title', 'text', 'publish_time', 'author', 'score'}]，
+            author 对视频和动态为UP主，对新闻为来源
+        """
+        match = self.text_processor.build_search_query(query)
+        if not match:
+            return []
+
+        selects, params = [], []
+        for content_type in types or list(self.SEARCH_FIELDS):
+            if content_type not in self.SEARCH_FIELDS:
+                logger.error(f"未知的内容类型: {content_type}")
+                continue
+            selects.append(self.build_search_select(content_type, since is not None))
+            params.extend([match, *([since] if since else []), limit])
+
+        if not selects:
+            return []
+
+        cursor = self.pool.get_connection().cursor()
+        try:
+            cursor.execute(
+                ' UNION ALL '.join(selects) + ' ORDER BY score LIMIT ?',
+                [*params, limit]
+            )
+            columns = [description[0] for description in cursor.description]
+            return [dict(zip(columns, row)) for row in cursor.fetchall()]
+        except Exception as e:
+            logger.error(f"全文检索失败: {e}")
+            return []
         finally:
-            conn.close()
+            cursor.close()
+
+    def build_search_select(self, content_type: str, with_since: bool) -> str:
+        """单个内容类型的全文检索子查询，参数为 (MATCH表达式, [since], limit)"""
+        fts_table, fields = self.SEARCH_FIELDS[content_type]
+        table = self.CONTENT_TABLES[content_type]
+        sources = [source for source, _, _ in fields]
+        weights = ', '.join(str(weight) for _, _, weight in fields)
+        title = 'c.title' if 'title' in sources else "''"
+        text = next(source for source in sources if source != 'title')
+        # 新闻没有UP主字段，以来源代替
+        author = 'c.source' if content_type == 'news' else 'c.up_name'
+        time_filter = "AND c.publish_time >= ?" if with_since else ""
+        return f'''
+            SELECT * FROM (
+                SELECT '{content_type}' AS content_type,
+                       {self.CONTENT_ID_COLUMNS[content_type]} AS content_id,
+                       {title} AS title, c.{text} AS text, c.publish_time AS publish_time,
+                       {author} AS author, bm25({fts_table}, {weights}) AS score
+                FROM {fts_table}
+                JOIN {table} c ON c.rowid = {fts_table}.rowid
+                WHERE {fts_table} MATCH ? {time_filter}
+                ORDER BY score LIMIT ?
+            )
+        '''
+
+    def get_daily_aggregates(self, since: Optional[str] = None, until: Optional[str] = None,
+                             content_type: Optional[str] = None, by_author: bool = False) -> List[Dict]:
+        """按天读取聚合统计
+
+        Args:
+            since: 起始日期 (YYYY-MM-DD，含)，默认不限
+            until: 结束日期 (YYYY-MM-DD，不含)，默认不限
+            content_type: 只统计该内容类型
+            by_author: 是否再按UP主/新闻来源细分
+
+        Returns:
+            [{'day', 'content_type', ['author'], AGGREGATE_COLUMNS..., 'avg_sentiment'}]，
+            按日期排序，跳过内容全部删除后清零的桶
+        """
+        keys = 'day, content_type' + (', author' if by_author else '')
+        conditions, params = [], []
+        for condition, value in (("day >= ?", since), ("day < ?", until), ("content_type = ?", content_type)):
+            if value is not None:
+                conditions.append(condition)
+                params.append(value)
+        where = f"WHERE {' AND '.join(conditions)}" if conditions else ''
+        sums = ', '.join(f"SUM({column}) AS {column}" for column in AGGREGATE_COLUMNS)
+
+        try:
+            return list(self.iter_query(f'''
+                SELECT {keys}, {sums},
+                       CASE WHEN SUM(analysis_count) > 0
+                            THEN SUM(sentiment_sum) / SUM(analysis_count) END AS avg_sentiment
+                FROM daily_aggregates {where}
+                GROUP BY {keys}
+                HAVING SUM(content_count) > 0 OR SUM(analysis_count) > 0
+                ORDER BY {keys}
+            ''', params, row_type='dict'))
+        except Exception as e:
+            logger.error(f"获取每日统计失败: {e}")
+            return []
 
     def get_statistics(self) -> Dict:
-        """获取统计信息"""
-        conn = sqlite3.connect(self.db_path)
-        cursor = conn.cursor()
+        """获取统计信息
+
+        内容总数从每日聚合表读取，不扫描内容表；今日新增按入库时间（created_at）统计，
+        走 created_at 索引只读取今天入库的行；分析总数为 analysis_results 的行数。
+        """
+        cursor = self.pool.get_connection().cursor()
         
-        stats = {}
+        stats = {'total_analysis': 0}
+        for content_type, table in self.CONTENT_TABLES.items():
+            stats[f'total_{table}'] = 0
+            stats[f'today_{table}'] = 0
         
         try:
-            # 视频统计
-            cursor.execute("SELECT COUNT(*) FROM videos")
-            stats['total_videos'] = cursor.fetchone()[0]
-            
-            # 动态统计
-            cursor.execute("SELECT COUNT(*) FROM dynamics")
-            stats['total_dynamics'] = cursor.fetchone()[0]
+            cursor.execute('''
+                SELECT content_type, SUM(content_count)
+                FROM daily_aggregates
+                GROUP BY content_type
+            ''')
+            for content_type, content_count in cursor.fetchall():
+                table = self.CONTENT_TABLES.get(content_type)
+                if table:
+                    stats[f'total_{table}'] = content_count
             
-            # 新闻统计
-            cursor.execute("SELECT COUNT(*) FROM news")
-            stats['total_news'] = cursor.fetchone()[0]
+            # created_at 为UTC时间，按本地今天零点换算
+            today_start = datetime.combine(datetime.now().date(), datetime.min.time()).astimezone(timezone.utc)
+            today_start = today_start.strftime('%Y-%m-%d %H:%M:%S')
+            for table in self.CONTENT_TABLES.values():
+                cursor.execute(f"SELECT COUNT(*) FROM {table} WHERE created_at >= ?", (today_start,))
+                stats[f'today_{table}'] = cursor.fetchone()[0]
             
-            # 分析结果统计
             cursor.execute("SELECT COUNT(*) FROM analysis_results")
             stats['total_analysis'] = cursor.fetchone()[0]
-            
-            # 今日新增统计
-            today = datetime.now().date().isoformat()
-            cursor.execute("SELECT COUNT(*) FROM videos WHERE DATE(created_at) = ?", (today,))
-            stats['today_videos'] = cursor.fetchone()[0]
-            
-            cursor.execute("SELECT COUNT(*) FROM dynamics WHERE DATE(created_at) = ?", (today,))
-            stats['today_dynamics'] = cursor.fetchone()[0]
-            
-            cursor.execute("SELECT COUNT(*) FROM news WHERE DATE(created_at) = ?", (today,))
-            stats['today_news'] = cursor.fetchone()[0]
-            
             return stats
             
         except Exception as e:
             logger.error(f"获取统计信息失败: {e}")
             return {}
         finally:
-            conn.close() 
\ No newline at end of file
+            cursor.close()
@@ -0,0 +1,235 @@
+"""
+近似重复索引模块
+Near-Duplicate Index Module
+
+同一条市场消息常被UP主动态、视频简介和新闻反复转发，content_hash 只能识别
+完全相同的文本。这里为每条内容计算字符 n-gram 的 MinHash 签名，按 LSH 分带
+写入与主数据库同目录的 SQLite 文件；新内容只需按分带查找候选，
+再用签名估计的 Jaccard 相似度确认，即可归入已有的重复簇。
+"""
+
+import logging
+import threading
+import time
+from datetime import datetime
+from pathlib import Path
+from typing import Dict, List, Optional, Sequence, Tuple
+
+import numpy as np
+
+from ..utils.text_processor import TextProcessor
+from .database import ConnectionPool
+
+logger = logging.getLogger(__name__)
+
+# 内容键: (content_id, content_type)，与 DatabaseManager.get_analysis_state 一致
+ContentKey = Tuple[str, str]
+
+class NearDuplicateIndex:
+    """MinHash-LSH 近似重复索引"""
+
+    def __init__(self, db_path: str, threshold: float = 0.5, min_shingles: int = 20,
+                 num_perm: int = 128, bands: int = 32,
+                 text_processor: Optional[TextProcessor] = None):
+        """
+        Args:
+            db_path: 索引数据库路径
+            threshold: 判定为重复的 Jaccard 相似度下限
+            min_shingles: n-gram 数少于此值的短文本不参与去重（如“转发动态”）
+            num_perm: MinHash 签名长度
+            bands: LSH 分带数，每带 num_perm / bands 行；
+                   相似度为 s 的两条内容成为候选的概率为 1 - (1 - s^rows)^bands
+        """
+        if num_perm % bands:
+            raise ValueError("num_perm 必须能被 bands 整除")
+        self.db_path = db_path
+        self.threshold = threshold
+        self.min_shingles = min_shingles
+        self.num_perm = num_perm
+        self.bands = bands
+        self.rows = num_perm // bands
+        self.text_processor = text_processor or TextProcessor()
+        self.pool: Optional[ConnectionPool] = None
+        self._init_lock = threading.Lock()
+
+    @classmethod
+    def from_config(cls, database_path: str, analysis_config: Dict) -> Optional['NearDuplicateIndex']:
+        """根据 config.ANALYSIS_CONFIG 创建索引，未启用时返回None
+
+        默认与主数据库放在同一目录: data/financial_analysis.db -> data/financial_analysis.dedup.db
+        """
+        if not analysis_config.get('dedup_enabled', True):
+            return None
+        path = analysis_config.get('dedup_index_path') or str(Path(database_path).with_suffix('.dedup.db'))
+        return cls(
+            path,
+            threshold=analysis_config.get('dedup_threshold', 0.5),
+            min_shingles=analysis_config.get('dedup_min_shingles', 20),
+        )
+
+    def _get_pool(self) -> ConnectionPool:
+        """首次使用时再创建数据库"""
+        if self.pool is None:
+            with self._init_lock:
+                if self.pool is None:
+                    Path(self.db_path).parent.mkdir(parents=True, exist_ok=True)
+                    pool = ConnectionPool(self.db_path)
+                    with pool.transaction() as cursor:
+                        cursor.execute('''
+                            CREATE TABLE IF NOT EXISTS minhash_signatures (
+                                content_type TEXT,
+                                content_id TEXT,
+                                signature BLOB,
+                                cluster_type TEXT,
+                                cluster_id TEXT,
+                                indexed_at REAL,
+                                PRIMARY KEY (content_type, content_id)
+                            )
+                        ''')
+                        cursor.execute('''
+                            CREATE TABLE IF NOT EXISTS minhash_bands (
+                                band INTEGER,
+                                band_key BLOB,
+                                content_type TEXT,
+                                content_id TEXT,
+                                PRIMARY KEY (band, band_key, content_type, content_id)
+                            ) WITHOUT ROWID
+                        ''')
+                        cursor.execute(
+                            "CREATE INDEX IF NOT EXISTS idx_minhash_bands_content "
+                            "ON minhash_bands(content_type, content_id)"
+                        )
+                        cursor.execute(
+                            "CREATE INDEX IF NOT EXISTS idx_minhash_cluster "
+                            "ON minhash_signatures(cluster_type, cluster_id)"
+                        )
+                        cursor.execute(
+                            "CREATE INDEX IF NOT EXISTS idx_minhash_indexed_at "
+                            "ON minhash_signatures(indexed_at)"
+                        )
+                    self.pool = pool
+        return self.pool
+
+    def _band_keys(self, signature: np.ndarray) -> List[bytes]:
+        """把签名切成若干带，每带的原始字节作为查找键"""
+        return [signature[i * self.rows:(i + 1) * self.rows].tobytes() for i in range(self.bands)]
+
+    def assign(self, items: Sequence[Tuple[str, str, str, str]]) -> Dict[ContentKey, ContentKey]:
+        """把内容加入索引并分配重复簇
+
+        Args:
+            items: (content_id, content_type, text, content_hash) 列表，与分析条目格式相同
+
+        Returns:
+            {内容键: 簇代表的内容键}，不重复的内容以自身为代表；
+            同一批内先加入的内容可成为后加入内容的代表。索引出错时全部以自身为代表。
+        """
+        clusters = {}
+        try:
+            with self._get_pool().transaction() as cursor:
+                for content_id, content_type, text, _ in items:
+                    key = (content_id, content_type)
+                    shingles = self.text_processor.shingles(text)
+                    if len(shingles) < self.min_shingles:
+                        clusters[key] = key
+                        continue
+                    signature = self.text_processor.minhash_from_shingles(shingles, self.num_perm)
+                    band_keys = self._band_keys(signature)
+                    cluster = self._find_cluster(cursor, key, signature, band_keys) or key
+                    self._store(cursor, key, signature, band_keys, cluster)
+                    clusters[key] = cluster
+        except Exception as e:
+            logger.error(f"更新近似重复索引失败: {e}")
+            return {(item[0], item[1]): (item[0], item[1]) for item in items}
+
+        duplicates = sum(1 for key, cluster in clusters.items() if key != cluster)
+        if duplicates:
+            logger.info(f"近似重复: {len(clusters)} 条内容中 {duplicates} 条归入已有簇")
+        return clusters
+
+    def _find_cluster(self, cursor, key: ContentKey, signature: np.ndarray,
+                      band_keys: List[bytes]) -> Optional[ContentKey]:
+        """按分带查找候选，返回相似度最高且达到阈值的候选所在簇"""
+        values = ','.join('(?, ?)' for _ in band_keys)
+        params = [value for band, band_key in enumerate(band_keys) for value in (band, band_key)]
+        cursor.execute(f'''
+            WITH query(band, band_key) AS (VALUES {values})
+            SELECT DISTINCT s.content_id, s.content_type, s.signature, s.cluster_id, s.cluster_type
+            FROM query
+            JOIN minhash_bands b ON b.band = query.band AND b.band_key = query.band_key
+            JOIN minhash_signatures s
+                ON s.content_type = b.content_type AND s.content_id = b.content_id
+        ''', params)
+
+        best, best_similarity = None, self.threshold
+        for content_id, content_type, blob, cluster_id, cluster_type in cursor.fetchall():
+            if (content_id, content_type) == key:
+                continue
+            similarity = float(np.mean(np.frombuffer(blob, dtype=np.uint32) == signature))
+            if similarity >= best_similarity:
+                best, best_similarity = (cluster_id, cluster_type), similarity
+        return best
+
+    def _store(self, cursor, key: ContentKey, signature: np.ndarray,
+               band_keys: List[bytes], cluster: ContentKey):
+        """写入签名和分带，内容变化时替换旧的分带"""
+        content_id, content_type = key
+        cursor.execute('''
+            INSERT OR REPLACE INTO minhash_signatures
+            (content_type, content_id, signature, cluster_type, cluster_id, indexed_at)
+            VALUES (?, ?, ?, ?, ?, ?)
+        ''', (content_type, content_id, signature.tobytes(), cluster[1], cluster[0], time.time()))
+        cursor.execute(
+            "DELETE FROM minhash_bands WHERE content_type = ? AND content_id = ?",
+            (content_type, content_id)
+        )
+        cursor.executemany(
+            "INSERT OR IGNORE INTO minhash_bands (band, band_key, content_type, content_id) "
+            "VALUES (?, ?, ?, ?)",
+            [(band, band_key, content_type, content_id) for band, band_key in enumerate(band_keys)]
+        )
+
+    def get_clusters(self, keys: Sequence[ContentKey]) -> Dict[ContentKey, ContentKey]:
+        """查询内容所属的簇，未索引的内容以自身为代表"""
+        clusters = {key: key for key in keys}
+        try:
+            cursor = self._get_pool().get_connection().cursor()
+            for content_id, content_type in keys:
+                row = cursor.execute(
+                    "SELECT cluster_id, cluster_type FROM minhash_signatures "
+                    "WHERE content_type = ? AND content_id = ?",
+                    (content_type, content_id)
+                ).fetchone()
+                if row:
+                    clusters[(content_id, content_type)] = (row[0], row[1])
+        except Exception as e:
+            logger.error(f"查询近似重复簇失败: {e}")
+        return clusters
+
+    def get_cluster_members(self, since: Optional[datetime] = None) -> Dict[ContentKey, ContentKey]:
+        """since 以来入索引的内容中，同簇有两条以上的成员: {内容键: 簇代表的内容键}
+
+        内容发布后才会被抓取和入索引，since 以来发布的内容都在 indexed_at >= since 的范围内，
+        查询只扫描这段时间入索引的签名，耗时与索引总量无关。since 为None时返回整个索引。
+        """
+        indexed_since = since.timestamp() if since else 0
+        try:
+            rows = self._get_pool().get_connection().execute('''
+                SELECT s.content_id, s.content_type, s.cluster_id, s.cluster_type
+                FROM minhash_signatures s
+                JOIN (
+                    SELECT cluster_type, cluster_id FROM minhash_signatures
+                    WHERE indexed_at >= ?
+                    GROUP BY cluster_type, cluster_id HAVING COUNT(*) > 1
+                ) c ON c.cluster_type = s.cluster_type AND c.cluster_id = s.cluster_id
+                WHERE s.indexed_at >= ?
+            ''', (indexed_since, indexed_since)).fetchall()
+        except Exception as e:
+            logger.error(f"查询近似重复簇失败: {e}")
+            return {}
+        return {(row[0], row[1]): (row[2], row[3]) for row in rows}
+
+    def close(self):
+        """关闭索引数据库"""
+        if self.pool:
+            self.pool.close_all()
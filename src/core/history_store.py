@@ -0,0 +1,251 @@
+"""
+历史数据列式存储模块
+Columnar History Store Module
+
+周报、月报和与行情的相关性分析要扫描数周到数月的内容和分析结果，
+逐行构造字典既慢又占内存。这里把已结束日期的数据按 内容类型/发布日期
+分区导出为 Parquet，读取时只加载需要的列，并按类型和日期在分区层面裁剪；
+当天的数据仍在变化，始终直接从 SQLite 读入 DataFrame。
+每个分区记录导出时的水位（内容数、分析数、最新分析/入库时间等），补爬或重新分析
+使某天的水位变化后，下次读取前重新导出该天。
+未安装 pyarrow 时全部从 SQLite 读取，结果相同。
+"""
+
+import json
+import logging
+import shutil
+from datetime import date, datetime, timedelta
+from pathlib import Path
+from typing import Dict, List, Optional, Sequence
+
+import pandas as pd
+
+from .database import DatabaseManager
+
+try:
+    import pyarrow as pa
+    import pyarrow.dataset as ds
+    import pyarrow.parquet as pq
+except ImportError:  # 可选依赖，缺少时退回SQLite查询
+    pa = ds = pq = None
+
+logger = logging.getLogger(__name__)
+
+# 分区列: <root>/content_type=video/day=2024-01-01/part-0.parquet
+PARTITION_COLUMNS = ('content_type', 'day')
+# 分区目录中的水位文件，以 _ 开头，读取数据集时被忽略
+WATERMARK_FILE = '_watermark.json'
+
+class HistoryStore:
+    """历史分析数据的列式存储"""
+
+    def __init__(self, db_manager: DatabaseManager, root: str):
+        """
+        Args:
+            db_manager: 数据库管理器
+            root: Parquet 数据集根目录
+        """
+        self.db_manager = db_manager
+        self.root = Path(root)
+
+    @classmethod
+    def from_config(cls, db_manager: DatabaseManager, analysis_config: Dict) -> 'HistoryStore':
+        """根据 config.ANALYSIS_CONFIG 创建，默认放在数据库同目录的 history/ 下"""
+        root = analysis_config.get('history_export_path') or str(Path(db_manager.db_path).parent / 'history')
+        return cls(db_manager, root)
+
+    @property
+    def parquet_enabled(self) -> bool:
+        return pq is not None
+
+    @staticmethod
+    def _day_start(value: datetime) -> datetime:
+        return datetime.combine(value.date(), datetime.min.time())
+
+    def _partition_dir(self, content_type: str, day: date) -> Path:
+        return self.root / f"content_type={content_type}" / f"day={day.isoformat()}"
+
+    def exported_days(self, content_type: str) -> List[date]:
+        """已导出的日期分区"""
+        type_dir = self.root / f"content_type={content_type}"
+        if not type_dir.is_dir():
+            return []
+        days = []
+        for path in type_dir.glob('day=*'):
+            try:
+                days.append(date.fromisoformat(path.name[len('day='):]))
+            except ValueError:
+                continue
+        return sorted(days)
+
+    def _read_watermark(self, content_type: str, day: date) -> Optional[Dict]:
+        """分区导出时的水位，未导出或没有水位文件时返回None"""
+        path = self._partition_dir(content_type, day) / WATERMARK_FILE
+        try:
+            return json.loads(path.read_text(encoding='utf-8'))
+        except (OSError, ValueError):
+            return None
+
+    def _write_watermark(self, content_type: str, day: date, watermark: Optional[List]):
+        """记录分区的水位，没有内容的日期水位为None"""
+        path = self._partition_dir(content_type, day) / WATERMARK_FILE
+        path.write_text(json.dumps({'watermark': watermark}), encoding='utf-8')
+
+    def read_sqlite(self, content_type: str, since: datetime, until: Optional[datetime] = None,
+                    columns: Optional[Sequence[str]] = None) -> pd.DataFrame:
+        """直接从SQLite读取一个内容类型的历史数据"""
+        conn = self.db_manager.pool.get_connection()
+        sql, params = self.db_manager.build_history_query(content_type, since, until, columns)
+        frame = pd.read_sql_query(sql, conn, params=params)
+        if 'publish_time' in frame:
+            frame['publish_time'] = pd.to_datetime(frame['publish_time'], format='ISO8601', errors='coerce')
+        return frame
+
+    def export(self, since: datetime, until: Optional[datetime] = None,
+               content_types: Optional[Sequence[str]] = None) -> int:
+        """把 [since, until) 内发布的数据导出为Parquet，返回导出行数
+
+        按整天导出并整体替换这些日期的已有分区，同时记录每天的水位。
+        until 默认为今天零点（只导出已结束的日期）。
+        """
+        if not self.parquet_enabled:
+            logger.warning("未安装pyarrow，跳过Parquet导出")
+            return 0
+
+        since = self._day_start(since)
+        until = self._day_start(until or datetime.now())
+        total = 0
+        for content_type in content_types or list(self.db_manager.CONTENT_TABLES):
+            try:
+                # 先取水位再读数据，读取期间的变化会在下次同步时被发现
+                watermarks = self.db_manager.get_history_watermarks(content_type, since, until)
+                frame = self.read_sqlite(content_type, since, until)
+                # 先清空区间内的分区；没有内容的日期保留空目录，标记为已导出
+                day = since
+                while day < until:
+                    partition = self._partition_dir(content_type, day.date())
+                    shutil.rmtree(partition, ignore_errors=True)
+                    partition.mkdir(parents=True, exist_ok=True)
+                    day += timedelta(days=1)
+                if not frame.empty:
+                    frame['day'] = frame['publish_time'].dt.strftime('%Y-%m-%d')
+                    pq.write_to_dataset(
+                        pa.Table.from_pandas(frame, preserve_index=False),
+                        str(self.root),
+                        partition_cols=list(PARTITION_COLUMNS),
+                        existing_data_behavior='delete_matching',
+                        basename_template='part-{i}.parquet',
+                    )
+                    total += len(frame)
+                day = since
+                while day < until:
+                    self._write_watermark(content_type, day.date(), watermarks.get(day.date().isoformat()))
+                    day += timedelta(days=1)
+            except Exception as e:
+                logger.error(f"导出{content_type}历史数据失败: {e}")
+        logger.info(f"历史数据导出完成: {total} 行 ({since.date()} ~ {until.date()})")
+        return total
+
+    def sync(self, since: datetime) -> int:
+        """导出 since 以来未导出或水位已变化的已结束日期，返回导出行数"""
+        if not self.parquet_enabled:
+            return 0
+        start = since.date()
+        today = date.today()
+        total = 0
+        for content_type in self.db_manager.CONTENT_TABLES:
+            try:
+                watermarks = self.db_manager.get_history_watermarks(
+                    content_type, datetime.combine(start, datetime.min.time()),
+                    datetime.combine(today, datetime.min.time())
+                )
+            except Exception as e:
+                logger.error(f"读取{content_type}历史数据水位失败: {e}")
+                continue
+
+            # 需要导出的连续日期区间 [首日, 末日]
+            runs: List[List[date]] = []
+            day = start
+            while day < today:
+                stored = self._read_watermark(content_type, day)
+                if stored is None or stored.get('watermark') != watermarks.get(day.isoformat()):
+                    if runs and runs[-1][1] + timedelta(days=1) == day:
+                        runs[-1][1] = day
+                    else:
+                        runs.append([day, day])
+                day += timedelta(days=1)
+
+            for first, last in runs:
+                total += self.export(
+                    datetime.combine(first, datetime.min.time()),
+                    datetime.combine(last + timedelta(days=1), datetime.min.time()),
+                    [content_type]
+                )
+        return total
+
+    def load(self, since: datetime, until: Optional[datetime] = None,
+             content_types: Optional[Sequence[str]] = None,
+             columns: Optional[Sequence[str]] = None) -> pd.DataFrame:
+        """读取 [since, until) 内发布的历史数据
+
+        今天零点之前的部分从Parquet读取（只读 columns 列，按类型和日期裁剪分区），
+        之后的部分从SQLite读取。
+
+        Args:
+            since: 起始时间
+            until: 结束时间，默认不限
+            content_types: 内容类型，默认全部
+            columns: 需要的列（HISTORY_COLUMNS 的子集），默认全部
+        """
+        content_types = list(content_types or self.db_manager.CONTENT_TABLES)
+        columns = list(columns or self.db_manager.HISTORY_COLUMNS)
+        today = self._day_start(datetime.now())
+        frames = []
+
+        split = since
+        if self.parquet_enabled and since < today:
+            self.sync(since)
+            end = min(today, until) if until else today
+            frame = self._read_parquet(content_types, columns, since, end)
+            if frame is not None:
+                frames.append(frame)
+                split = end
+
+        if until is None or split < until:
+            for content_type in content_types:
+                try:
+                    frames.append(self.read_sqlite(content_type, split, until, columns))
+                except Exception as e:
+                    logger.error(f"读取{content_type}历史数据失败: {e}")
+
+        frames = [frame for frame in frames if not frame.empty]
+        if not frames:
+            return pd.DataFrame(columns=columns)
+        return pd.concat(frames, ignore_index=True)[columns]
+
+    def _read_parquet(self, content_types: List[str], columns: List[str],
+                      since: datetime, until: datetime) -> Optional[pd.DataFrame]:
+        """从Parquet读取，数据集不存在或读取失败时返回None"""
+        if not self.root.is_dir() or not any(self.root.glob('content_type=*')):
+            return None
+        try:
+            partitioning = ds.partitioning(
+                pa.schema([('content_type', pa.string()), ('day', pa.string())]), flavor='hive'
+            )
+            dataset = ds.dataset(str(self.root), format='parquet', partitioning=partitioning)
+            # 分区列上的条件在读取文件前裁剪目录，publish_time 条件下推到行组统计
+            condition = (
+                ds.field('content_type').isin(content_types)
+                & (ds.field('day') >= since.date().isoformat())
+                & (ds.field('day') <= until.date().isoformat())
+                & (ds.field('publish_time') >= pa.scalar(since))
+                & (ds.field('publish_time') < pa.scalar(until))
+            )
+            frame = dataset.to_table(columns=columns, filter=condition).to_pandas()
+            if 'content_type' in frame:
+                # 分区列读回为字典编码，与SQLite路径保持一致
+                frame['content_type'] = frame['content_type'].astype(str)
+            return frame
+        except Exception as e:
+            logger.error(f"读取Parquet历史数据失败: {e}")
+            return None
@@ -1,38 +1,377 @@
 """
 新闻聚合模块
 News Aggregator Module
+
+所有新闻源通过一个共享的aiohttp会话并发获取，连接池按主机限制并发连接数。
+优先使用RSS/Atom（feedparser）或JSON Feed；没有可用订阅源时退回解析网页，
+网页由lxml解析，先查找页面声明的订阅源，再按站点解析器（news_parsers）提取文章和正文。
+解析在线程池中进行，不阻塞事件循环；每个新闻源的获取和解析耗时记录在 source_stats 中。
 """
 
+import asyncio
+import calendar
+import hashlib
+import json
 import logging
+import time
+from datetime import datetime
+from typing import Dict, List, Optional, Tuple
+from urllib.parse import urljoin, urlsplit
+
 import aiohttp
-from typing import List, Dict
+import feedparser
+import lxml.html
 from config import config
-from .database import NewsContent
+from .database import DatabaseManager, NewsContent
+from .news_parsers import get_parser, parse_time
 
 logger = logging.getLogger(__name__)
 
+# 页面中声明订阅源的 <link rel="alternate"> 类型
+FEED_LINK_TYPES = (
+    'application/rss+xml', 'application/atom+xml', 'application/feed+json', 'application/json',
+)
+
 class NewsAggregator:
     """新闻聚合器"""
-    
-    def __init__(self):
-        self.news_sources = config.NEWS_SOURCES
-        
+
+    def __init__(self, sources: Optional[Dict[str, List[str]]] = None,
+                 news_config: Optional[Dict] = None, db_manager: Optional[DatabaseManager] = None):
+        """
+        Args:
+            sources: {分类: [新闻源网址]}，默认为 config.NEWS_SOURCES
+            news_config: 抓取参数，默认为 config.NEWS_CONFIG
+            db_manager: 保存条件请求状态、查询已入库文章的数据库，为None时状态只保存在内存中
+        """
+        self.news_sources = config.NEWS_SOURCES if sources is None else sources
+        news_config = config.NEWS_CONFIG if news_config is None else news_config
+        self.feeds: Dict[str, str] = news_config.get('feeds', {})
+        self.timeout = news_config.get('timeout', 15)
+        self.max_connections = news_config.get('max_connections', 20)
+        self.per_host_connections = news_config.get('per_host_connections', 2)
+        self.max_items_per_source = news_config.get('max_items_per_source', 50)
+        self.min_title_length = news_config.get('min_title_length', 8)
+        self.fetch_article_bodies = news_config.get('fetch_article_bodies', True)
+        self.max_articles_per_source = news_config.get('max_articles_per_source', 20)
+        self.db_manager = db_manager
+        # 条件请求状态: 网址 -> {etag, last_modified, body_hash, feed_url}，首次使用时从数据库加载
+        self._source_states: Optional[Dict[str, Dict]] = None
+        # 本轮获取成功、等待 commit_source_states() 写入的状态: 新闻源 -> {网址: 状态}
+        self._pending_states: Dict[str, Dict[str, Dict]] = {}
+        self.headers = {
+            'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/91.0.4472.124 Safari/537.36',
+            'Accept-Language': 'zh-CN,zh;q=0.9,en;q=0.8',
+        }
+        self.session: Optional[aiohttp.ClientSession] = None
+        # 最近一次获取各新闻源的统计: 网址 -> {via, parser, items, bytes, articles, article_errors,
+        #   fetch_seconds, parse_seconds, seconds, error}
+        self.source_stats: Dict[str, Dict] = {}
+
+    async def init_session(self):
+        """初始化共享会话（按主机限制并发连接数）"""
+        if not self.session:
+            connector = aiohttp.TCPConnector(
+                limit=self.max_connections, limit_per_host=self.per_host_connections
+            )
+            self.session = aiohttp.ClientSession(
+                headers=self.headers,
+                timeout=aiohttp.ClientTimeout(total=self.timeout),
+                connector=connector
+            )
+            logger.info("新闻聚合会话初始化完成")
+
+    async def close_session(self):
+        """关闭会话"""
+        if self.session:
+            await self.session.close()
+            self.session = None
+            logger.info("新闻聚合会话已关闭")
+
     async def fetch_latest_news(self, category: str) -> List[NewsContent]:
-        """获取最新新闻"""
-        # TODO: 实现新闻爬取逻辑
-        return []
-    
+        """并发获取某个分类下所有新闻源的最新新闻"""
+        await self.init_session()
+        urls = self.news_sources.get(category, [])
+        results = await asyncio.gather(*(self.fetch_source(url, category) for url in urls))
+
+        seen = set()
+        news_list = []
+        for items in results:
+            for news in items:
+                if news.url not in seen:
+                    seen.add(news.url)
+                    news_list.append(news)
+        logger.info(f"{category} 新闻获取完成: {len(urls)} 个新闻源, {len(news_list)} 条")
+        return news_list
+
+    async def fetch_all_news(self) -> List[NewsContent]:
+        """并发获取所有分类的最新新闻"""
+        results = await asyncio.gather(*(
+            self.fetch_latest_news(category) for category in self.news_sources
+        ))
+        return [news for news_list in results for news in news_list]
+
     async def fetch_financial_news(self) -> List[NewsContent]:
         """获取财经新闻"""
-        # TODO: 实现财经新闻爬取
-        return []
-    
+        return await self.fetch_latest_news('financial')
+
     async def fetch_geopolitical_news(self) -> List[NewsContent]:
         """获取地缘政治新闻"""
-        # TODO: 实现地缘政治新闻爬取
-        return []
-    
+        return await self.fetch_latest_news('geopolitical')
+
+    async def fetch_source(self, url: str, category: str) -> List[NewsContent]:
+        """获取单个新闻源的新文章
+
+        配置或页面声明的订阅源优先，没有时解析网页中的文章链接。页面和订阅源都发送
+        条件请求，304或响应体哈希未变化时不解析；已入库的文章网址不再返回，也不获取正文。
+        新的条件请求状态暂存，调用方保存新闻成功后通过 commit_source_states() 写入；
+        解析失败或有文章正文获取失败时不暂存，下一轮重新获取。
+        """
+        stats = {'via': None, 'parser': get_parser(url).name, 'items': 0, 'bytes': 0, 'articles': 0,
+                 'article_errors': 0, 'fetch_seconds': 0.0, 'parse_seconds': 0.0, 'seconds': 0.0,
+                 'error': None}
+        start = time.perf_counter()
+        pending: Dict[str, Dict] = {}
+        items: Optional[List[Dict]] = []
+        try:
+            items = await self._fetch_items(url, stats, pending)
+            if items is None:
+                stats['via'] = 'unchanged'
+                items = []
+            items = self._drop_known(items[:self.max_items_per_source])
+            if self.fetch_article_bodies:
+                items = await self._fill_article_bodies(items, stats)
+            if not stats['article_errors']:
+                self._pending_states[url] = pending
+        except Exception as e:
+            stats['error'] = str(e)
+            logger.error(f"获取新闻源 {url} 失败: {e}")
+
+        news_list = [self._to_news(item, url, category) for item in items]
+        stats['items'] = len(news_list)
+        stats['seconds'] = time.perf_counter() - start
+        self.source_stats[url] = stats
+        logger.info(
+            f"新闻源 {url}: {len(news_list)} 条新文章 ({stats['via']}), 下载 {stats['bytes']} 字节, "
+            f"获取 {stats['fetch_seconds']:.2f}秒, 解析 {stats['parse_seconds']:.2f}秒"
+        )
+        return news_list
+
+    def commit_source_states(self):
+        """本轮获取的新闻保存成功后调用，写入各新闻源暂存的条件请求状态"""
+        pending, self._pending_states = self._pending_states, {}
+        for states in pending.values():
+            for url, state in states.items():
+                self._save_state(url, state['etag'], state['last_modified'],
+                                 state['body_hash'], state['feed_url'])
+
+    async def _fetch_items(self, url: str, stats: Dict, pending: Dict[str, Dict]) -> Optional[List[Dict]]:
+        """获取新闻源的文章列表，页面和订阅源都未变化时返回None"""
+        feed_url = self.feeds.get(url)
+        if feed_url:
+            items = await self._fetch_feed(feed_url, stats, pending)
+            if items != []:
+                return items
+
+        page = await self._fetch(url, stats, pending)
+        if page is None:
+            page_items = None
+            discovered = self._get_state(url).get('feed_url')
+        else:
+            feed_links, page_items = await self._parse(stats, self._parse_page, page[0], url)
+            stats['via'] = 'html'
+            discovered = feed_links[0] if feed_links else None
+            pending[url]['feed_url'] = discovered
+
+        if discovered and not feed_url:
+            feed_items = await self._fetch_feed(discovered, stats, pending)
+            # 订阅源不可用时才使用网页中的文章
+            return page_items if feed_items == [] else feed_items
+        return page_items
+
+    def _get_state(self, url: str) -> Dict:
+        """网址已写入的条件请求状态，首次使用时从数据库加载全部新闻源状态"""
+        if self._source_states is None:
+            self._source_states = self.db_manager.get_news_source_states() if self.db_manager else {}
+        return self._source_states.get(url, {})
+
+    def _save_state(self, url: str, etag: Optional[str], last_modified: Optional[str],
+                    body_hash: str, feed_url: Optional[str]):
+        """写入网址的条件请求状态"""
+        self._get_state(url)
+        self._source_states[url] = {
+            'url': url, 'etag': etag, 'last_modified': last_modified,
+            'body_hash': body_hash, 'feed_url': feed_url,
+        }
+        if self.db_manager:
+            self.db_manager.save_news_source_state(url, etag, last_modified, body_hash, feed_url)
+
+    async def _fetch(self, url: str, stats: Dict,
+                     pending: Optional[Dict[str, Dict]] = None) -> Optional[Tuple[bytes, str]]:
+        """下载网址，返回 (响应体, Content-Type)
+
+        pending 不为None时带上次的 ETag/Last-Modified 发送条件请求，304或响应体哈希
+        与上次相同时返回None，新状态暂存到 pending[url]。耗时和下载字节数累加到 stats。
+        """
+        conditional = pending is not None
+        state = self._get_state(url) if conditional else {}
+        headers = {}
+        if state.get('etag'):
+            headers['If-None-Match'] = state['etag']
+        if state.get('last_modified'):
+            headers['If-Modified-Since'] = state['last_modified']
+
+        start = time.perf_counter()
+        try:
+            async with self.session.get(url, headers=headers) as response:
+                if response.status == 304 and conditional:
+                    return None
+                response.raise_for_status()
+                body = await response.read()
+                content_type = response.headers.get('Content-Type', '')
+                etag = response.headers.get('ETag')
+                last_modified = response.headers.get('Last-Modified')
+        finally:
+            stats['fetch_seconds'] += time.perf_counter() - start
+        stats['bytes'] += len(body)
+
+        if not conditional:
+            return body, content_type
+        body_hash = hashlib.sha1(body).hexdigest()
+        pending[url] = {'etag': etag, 'last_modified': last_modified,
+                        'body_hash': body_hash, 'feed_url': state.get('feed_url')}
+        return None if body_hash == state.get('body_hash') else (body, content_type)
+
+    async def _parse(self, stats: Dict, parser, *args):
+        """在线程池中解析，耗时累加到 stats['parse_seconds']"""
+        start = time.perf_counter()
+        try:
+            return await asyncio.get_running_loop().run_in_executor(None, parser, *args)
+        finally:
+            stats['parse_seconds'] += time.perf_counter() - start
+
+    async def _fetch_feed(self, feed_url: str, stats: Dict, pending: Dict[str, Dict]) -> Optional[List[Dict]]:
+        """获取并解析订阅源，未变化时返回None，失败时返回空列表以便退回网页解析"""
+        try:
+            feed = await self._fetch(feed_url, stats, pending)
+            if feed is None:
+                return None
+            items = await self._parse(stats, self.parse_feed, feed[0], feed[1], feed_url)
+        except Exception as e:
+            # 失败的订阅源不写入状态，下一轮重新获取
+            pending.pop(feed_url, None)
+            logger.warning(f"获取订阅源 {feed_url} 失败，改为解析网页: {e}")
+            return []
+        if items:
+            stats['via'] = 'feed'
+        return items
+
+    def _drop_known(self, items: List[Dict]) -> List[Dict]:
+        """按 news.url 批量查询，去掉已入库的文章"""
+        if not self.db_manager or not items:
+            return items
+        known = self.db_manager.get_content_hashes('news', [item['url'] for item in items])
+        return [item for item in items if item['url'] not in known]
+
+    async def _fill_article_bodies(self, items: List[Dict], stats: Dict) -> List[Dict]:
+        """为没有摘要的新文章（网页中提取的链接）获取正文和发布时间
+
+        正文获取失败的文章本轮不返回，避免以空正文入库后被当作已入库文章跳过。
+        """
+        targets = [item for item in items if not item.get('summary')][:self.max_articles_per_source]
+        failed = set()
+
+        async def fill(item: Dict):
+            try:
+                page = await self._fetch(item['url'], stats)
+                article = await self._parse(stats, self.parse_article, page[0], item['url'])
+            except Exception as e:
+                logger.warning(f"获取文章正文失败 {item['url']}: {e}")
+                failed.add(item['url'])
+                return
+            stats['articles'] += 1
+            item['summary'] = article['content']
+            item['publish_time'] = item.get('publish_time') or article['publish_time']
+
+        await asyncio.gather(*(fill(item) for item in targets))
+        stats['article_errors'] = len(failed)
+        return [item for item in items if item['url'] not in failed]
+
+    @classmethod
+    def parse_feed(cls, body: bytes, content_type: str = '', base_url: str = '') -> List[Dict]:
+        """解析RSS/Atom或JSON Feed，返回 [{'title', 'url', 'summary', 'publish_time'}]"""
+        if 'json' in content_type or body.lstrip()[:1] == b'{':
+            return cls._parse_json_feed(json.loads(body), base_url)
+
+        parsed = feedparser.parse(body)
+        items = []
+        for entry in parsed.entries:
+            published = entry.get('published_parsed') or entry.get('updated_parsed')
+            items.append({
+                'title': entry.get('title', ''),
+                'url': urljoin(base_url, entry.get('link', '')),
+                'summary': cls._html_to_text(entry.get('summary', '')),
+                'publish_time': datetime.fromtimestamp(calendar.timegm(published)) if published else None,
+            })
+        return [item for item in items if item['title'] and item['url']]
+
+    @classmethod
+    def _parse_json_feed(cls, feed: Dict, base_url: str = '') -> List[Dict]:
+        """解析JSON Feed (https://jsonfeed.org)"""
+        items = []
+        for entry in feed.get('items', []):
+            published = entry.get('date_published') or entry.get('date_modified')
+            items.append({
+                'title': entry.get('title', ''),
+                'url': urljoin(base_url, entry.get('url') or entry.get('external_url') or ''),
+                'summary': entry.get('summary') or entry.get('content_text')
+                           or cls._html_to_text(entry.get('content_html', '')),
+                'publish_time': parse_time(published) if published else None,
+            })
+        return [item for item in items if item['title'] and item['url']]
+
+    @staticmethod
+    def _html_to_text(html: str) -> str:
+        """去除HTML标签"""
+        if not html or '<' not in html:
+            return (html or '').strip()
+        return ' '.join(lxml.html.fromstring(html).text_content().split())
+
+    def _parse_page(self, body: bytes, base_url: str) -> Tuple[List[str], List[Dict]]:
+        """解析网页，返回 (页面声明的订阅源网址, 文章列表)"""
+        document = lxml.html.fromstring(body, base_url=base_url)
+        feed_links = [
+            urljoin(base_url, link.get('href'))
+            for link in document.xpath('//link[@rel="alternate"][@href]')
+            if (link.get('type') or '').lower() in FEED_LINK_TYPES
+        ]
+        return feed_links, get_parser(base_url).parse_listing(document, base_url, self.min_title_length)
+
+    @staticmethod
+    def parse_article(body: bytes, url: str) -> Dict:
+        """按站点解析器从文章页提取标题、正文和发布时间，返回 {'title', 'content', 'publish_time'}"""
+        return get_parser(url).parse_article(lxml.html.fromstring(body, base_url=url), url)
+
     def parse_news_content(self, html: str, source: str) -> List[Dict]:
-        """解析新闻内容"""
-        # TODO: 实现新闻内容解析
-        return [] 
\ No newline at end of file
+        """解析新闻列表页中的文章链接，source 为页面网址"""
+        document = lxml.html.fromstring(html, base_url=source)
+        return get_parser(source).parse_listing(document, source, self.min_title_length)
+
+    @staticmethod
+    def _site(url: str) -> str:
+        """网址的主机名（去掉 www.）"""
+        host = urlsplit(url).hostname or ''
+        return host[4:] if host.startswith('www.') else host
+
+    def _to_news(self, item: Dict, source_url: str, category: str) -> NewsContent:
+        """转换为新闻记录，内容哈希与视频动态一致使用标题+正文的MD5"""
+        title = item['title'].strip()
+        content = item.get('summary') or ''
+        return NewsContent(
+            title=title,
+            content=content,
+            source=self._site(source_url),
+            publish_time=item.get('publish_time') or datetime.now(),
+            url=item['url'],
+            category=category,
+            content_hash=hashlib.md5((title + content).encode()).hexdigest()
+        )
@@ -0,0 +1,251 @@
+"""
+新闻站点解析器模块
+News Site Parsers
+
+每个新闻站点一个解析器，列表页文章链接、文章标题、正文段落和发布时间的选择器
+在导入时编译为 lxml XPath 对象，解析时不再重复编译。未登记的站点使用通用解析器:
+列表页取同站且URL带日期或数字ID的链接，文章页取段落最多的正文块（readability风格）；
+站点改版导致选择器匹配不到内容时，同样退回通用解析器。
+"""
+
+import logging
+import re
+from datetime import datetime
+from typing import Dict, Iterable, List, Optional
+from urllib.parse import urljoin, urlsplit
+
+from lxml import etree
+
+logger = logging.getLogger(__name__)
+
+# 文章链接的URL特征: 含日期或较长的数字ID
+ARTICLE_URL_PATTERN = re.compile(r'\d{4,}')
+# URL中的发布日期: 2024-01-02 / 2024/01/02 / 20240102
+URL_DATE_PATTERN = re.compile(r'(20\d{2})[-/]?(0[1-9]|1[0-2])[-/]?(0[1-9]|[12]\d|3[01])')
+# 页面中的日期时间: 2024年01月24日 09:30 / 2024-01-24 09:30:00 / 2024/01/24
+TEXT_TIME_PATTERN = re.compile(
+    r'(20\d{2})\s*[年/.-]\s*(\d{1,2})\s*[月/.-]\s*(\d{1,2})\s*日?'
+    r'(?:\s*(\d{1,2}):(\d{2})(?::(\d{2}))?)?'
+)
+
+def normalize_text(text: str) -> str:
+    """合并空白"""
+    return ' '.join(text.split())
+
+def registered_domain(url: str) -> str:
+    """注册域名: finance.sina.com.cn -> sina.com.cn, world.huanqiu.com -> huanqiu.com"""
+    labels = (urlsplit(url).hostname or '').split('.')
+    if len(labels) >= 3 and len(labels[-1]) == 2 and labels[-2] in ('com', 'net', 'org', 'gov', 'edu'):
+        return '.'.join(labels[-3:])
+    return '.'.join(labels[-2:])
+
+def parse_time(value: str) -> Optional[datetime]:
+    """解析ISO格式或中文日期时间，带时区时转换为本地时间"""
+    value = value.strip()
+    try:
+        parsed = datetime.fromisoformat(value.replace('Z', '+00:00').replace(' ', 'T', 1))
+    except ValueError:
+        match = TEXT_TIME_PATTERN.search(value)
+        if not match:
+            return None
+        try:
+            return datetime(*(int(part) for part in match.groups() if part is not None))
+        except ValueError:
+            return None
+    return parsed.astimezone().replace(tzinfo=None) if parsed.tzinfo else parsed
+
+def date_from_url(path: str) -> Optional[datetime]:
+    """从URL路径中提取发布日期"""
+    match = URL_DATE_PATTERN.search(path)
+    if not match:
+        return None
+    try:
+        return datetime(*(int(part) for part in match.groups()))
+    except ValueError:
+        return None
+
+class GenericParser:
+    """通用解析器，适用于任何站点"""
+
+    name = 'generic'
+    domains: tuple = ()
+
+    LINKS = etree.XPath('//a[@href]')
+    NOISE = etree.XPath('//script | //style | //noscript')
+    PARAGRAPHS = etree.XPath('//p')
+    TITLE = etree.XPath('//meta[@property="og:title"]/@content | //h1 | //title')
+    PUBLISH_TIME = etree.XPath(
+        '//meta[@property="article:published_time"]/@content'
+        ' | //meta[@name="publishdate"]/@content'
+        ' | //time/@datetime'
+    )
+
+    def parse_listing(self, document, base_url: str, min_title_length: int = 8) -> List[Dict]:
+        """从列表页提取同站（同一注册域名）文章: 标题足够长且URL带日期或数字ID
+
+        Returns:
+            [{'title', 'url', 'summary', 'publish_time'}]
+        """
+        site = registered_domain(base_url)
+        return self._collect_links(
+            self.LINKS(document), base_url, min_title_length,
+            lambda url, path: registered_domain(url) == site and ARTICLE_URL_PATTERN.search(path)
+        )
+
+    def parse_article(self, document, url: str) -> Dict:
+        """从文章页提取标题、正文和发布时间，返回 {'title', 'content', 'publish_time'}
+
+        正文取 <p> 文字最多的同一父元素下的段落。
+        """
+        for element in self.NOISE(document):
+            element.drop_tree()
+
+        blocks: Dict = {}
+        for paragraph in self.PARAGRAPHS(document):
+            text = normalize_text(paragraph.text_content())
+            if text:
+                blocks.setdefault(paragraph.getparent(), []).append(text)
+        content = max(blocks.values(), key=lambda texts: sum(map(len, texts)), default=[])
+
+        return {
+            'title': self._first_text(self.TITLE(document)),
+            'content': '\n'.join(content),
+            'publish_time': self._first_time(self.PUBLISH_TIME(document)),
+        }
+
+    @staticmethod
+    def _collect_links(anchors: Iterable, base_url: str, min_title_length: int,
+                       accept=None) -> List[Dict]:
+        """链接转换为文章条目，去掉标题过短、非HTTP、重复和 accept(url, path) 为假的链接"""
+        seen = set()
+        items = []
+        for anchor in anchors:
+            title = normalize_text(anchor.text_content())
+            if not min_title_length <= len(title) <= 100:
+                continue
+            url = urljoin(base_url, anchor.get('href', '')).split('#')[0]
+            parts = urlsplit(url)
+            if parts.scheme not in ('http', 'https') or url in seen:
+                continue
+            if accept is not None and not accept(url, parts.path):
+                continue
+            seen.add(url)
+            items.append({
+                'title': title,
+                'url': url,
+                'summary': '',
+                'publish_time': date_from_url(parts.path),
+            })
+        return items
+
+    @staticmethod
+    def _first_text(results: List) -> str:
+        """XPath结果中第一个非空文本（元素取其文字，属性和文本节点取字符串）"""
+        for result in results:
+            text = normalize_text(result.text_content() if hasattr(result, 'text_content') else str(result))
+            if text:
+                return text
+        return ''
+
+    @staticmethod
+    def _first_time(results: List) -> Optional[datetime]:
+        """XPath结果中第一个可解析的时间"""
+        for result in results:
+            text = result.text_content() if hasattr(result, 'text_content') else str(result)
+            publish_time = parse_time(text)
+            if publish_time:
+                return publish_time
+        return None
+
+class SiteParser(GenericParser):
+    """按站点选择器解析，选择器匹配不到内容时退回通用解析"""
+
+    def __init__(self, name: str, domains: tuple, links: str, title: str, body: str,
+                 publish_time: str):
+        """
+        Args:
+            name: 解析器名称
+            domains: 适用的注册域名
+            links: 列表页文章链接 <a> 的XPath
+            title: 文章标题的XPath
+            body: 正文段落的XPath
+            publish_time: 发布时间（文本或属性）的XPath，未匹配时使用通用的元信息
+        """
+        self.name = name
+        self.domains = domains
+        self.links = etree.XPath(links)
+        self.title = etree.XPath(title)
+        self.body = etree.XPath(body)
+        self.publish_time = etree.XPath(publish_time)
+
+    def parse_listing(self, document, base_url: str, min_title_length: int = 8) -> List[Dict]:
+        items = self._collect_links(self.links(document), base_url, min_title_length)
+        return items or super().parse_listing(document, base_url, min_title_length)
+
+    def parse_article(self, document, url: str) -> Dict:
+        paragraphs = [normalize_text(p.text_content()) for p in self.body(document)]
+        paragraphs = [text for text in paragraphs if text]
+        if not paragraphs:
+            logger.debug(f"{self.name} 解析器未匹配到正文，使用通用解析: {url}")
+            return super().parse_article(document, url)
+        return {
+            'title': self._first_text(self.title(document)) or self._first_text(self.TITLE(document)),
+            'content': '\n'.join(paragraphs),
+            'publish_time': (self._first_time(self.publish_time(document))
+                             or self._first_time(self.PUBLISH_TIME(document))),
+        }
+
+GENERIC_PARSER = GenericParser()
+
+# 注册域名 -> 解析器
+PARSERS: Dict[str, GenericParser] = {}
+
+def register_parser(parser: GenericParser):
+    """登记站点解析器，同一域名后登记的覆盖先登记的"""
+    for domain in parser.domains:
+        PARSERS[domain] = parser
+
+def get_parser(url: str) -> GenericParser:
+    """按网址的注册域名查找解析器，未登记时返回通用解析器"""
+    return PARSERS.get(registered_domain(url), GENERIC_PARSER)
+
+# 各站点选择器（对应 config.NEWS_SOURCES 中的站点）
+for _parser in (
+    SiteParser(
+        'sina', ('sina.com.cn',),
+        links='//a[contains(@href, "/doc-i")]',
+        title='//h1[@class="main-title"]',
+        body='//div[@id="artibody"]//p',
+        publish_time='//div[@class="date-source"]/span[@class="date"]/text()',
+    ),
+    SiteParser(
+        'jiemian', ('jiemian.com',),
+        links='//a[contains(@href, "/article/")]',
+        title='//div[contains(@class, "article-header")]//h1',
+        body='//div[contains(@class, "article-content")]//p',
+        publish_time='//div[contains(@class, "article-info")]//span/@data-article-publish-time'
+                     ' | //div[contains(@class, "article-info")]//span/text()',
+    ),
+    SiteParser(
+        'wallstreetcn', ('wallstreetcn.com',),
+        links='//a[contains(@href, "/articles/") or contains(@href, "/livenews/")]',
+        title='//h1',
+        body='//div[contains(@class, "rich-text")]//p',
+        publish_time='//time/@datetime | //time/text()',
+    ),
+    SiteParser(
+        'yicai', ('yicai.com',),
+        links='//a[contains(@href, "/news/")]',
+        title='//div[contains(@class, "title")]/h1',
+        body='//div[contains(@class, "m-txt")]//p',
+        publish_time='//div[contains(@class, "title")]//p/em/text()',
+    ),
+    SiteParser(
+        'huanqiu', ('huanqiu.com',),
+        links='//a[contains(@href, "/article/")]',
+        title='//div[contains(@class, "t-container")]//h3 | //h1',
+        body='//div[contains(@class, "l-con")]//article//p',
+        publish_time='//div[contains(@class, "metadata-info")]//p[contains(@class, "time")]/text()',
+    ),
+):
+    register_parser(_parser)
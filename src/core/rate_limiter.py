@@ -0,0 +1,161 @@
+"""
+请求限流模块
+Rate Limiter Module
+
+按API端点划分令牌桶预算，按主机限制并发连接数，
+并在B站返回 -799（请求过于频繁）时让同一端点的所有请求一起退避。
+"""
+
+import asyncio
+import logging
+import time
+from contextlib import asynccontextmanager
+from typing import Callable, Dict, Optional, Tuple
+from urllib.parse import urlsplit
+
+logger = logging.getLogger(__name__)
+
+class TokenBucket:
+    """令牌桶
+
+    以 rate 个/秒 的速度补充令牌，最多积累 capacity 个。
+    等待者按到达顺序获取令牌。
+    """
+
+    def __init__(self, rate: float, capacity: float = 1.0,
+                 clock: Callable[[], float] = time.monotonic):
+        if rate <= 0:
+            raise ValueError("令牌补充速率必须大于0")
+        self.rate = rate
+        self.capacity = max(capacity, 1.0)
+        self.tokens = self.capacity
+        self._clock = clock
+        self._updated = clock()
+        self._lock = asyncio.Lock()
+        self.blocked_until = 0.0  # 退避期间不发放令牌
+
+    def _refill(self, now: float):
+        """按流逝时间补充令牌"""
+        elapsed = max(now - self._updated, 0.0)
+        self.tokens = min(self.capacity, self.tokens + elapsed * self.rate)
+        self._updated = now
+
+    def block_for(self, seconds: float):
+        """在接下来的 seconds 秒内暂停发放令牌，并清空已积累的令牌"""
+        now = self._clock()
+        self._refill(now)
+        self.tokens = 0.0
+        self.blocked_until = max(self.blocked_until, now + seconds)
+
+    async def acquire(self) -> float:
+        """获取一个令牌，返回等待的秒数"""
+        waited = 0.0
+        async with self._lock:
+            while True:
+                now = self._clock()
+                self._refill(now)
+                wait = self.blocked_until - now
+                if wait <= 0:
+                    if self.tokens >= 1:
+                        self.tokens -= 1
+                        return waited
+                    wait = (1 - self.tokens) / self.rate
+                await asyncio.sleep(wait)
+                waited += wait
+
+class RateLimiter:
+    """按端点和主机限流的请求预算管理器"""
+
+    def __init__(self, default_rate: float = 0.2, default_burst: float = 1.0,
+                 endpoint_limits: Optional[Dict[str, Tuple[float, float]]] = None,
+                 per_host_concurrency: int = 2,
+                 backoff_base: float = 10.0, backoff_max: float = 120.0,
+                 clock: Callable[[], float] = time.monotonic):
+        """
+        Args:
+            default_rate: 未单独配置的端点每秒请求数
+            default_burst: 未单独配置的端点允许的突发请求数
+            endpoint_limits: {URL路径: (每秒请求数, 突发请求数)}
+            per_host_concurrency: 每个主机同时进行的请求数上限
+            backoff_base: 首次被限流(-799)时的退避秒数，连续限流时翻倍
+            backoff_max: 退避秒数上限
+        """
+        self.default_rate = default_rate
+        self.default_burst = default_burst
+        self.endpoint_limits = endpoint_limits or {}
+        self.per_host_concurrency = max(per_host_concurrency, 1)
+        self.backoff_base = backoff_base
+        self.backoff_max = backoff_max
+        self._clock = clock
+        self._buckets: Dict[str, TokenBucket] = {}
+        self._host_semaphores: Dict[str, asyncio.Semaphore] = {}
+        self._throttle_counts: Dict[str, int] = {}
+
+    @classmethod
+    def from_config(cls, crawler_config: Dict) -> 'RateLimiter':
+        """根据 config.CRAWLER_CONFIG 创建限流器"""
+        delay = crawler_config.get('rate_limit_delay', 2) or 1
+        return cls(
+            default_rate=1.0 / delay,
+            default_burst=crawler_config.get('default_burst', 1),
+            endpoint_limits={
+                path: tuple(limit)
+                for path, limit in crawler_config.get('endpoint_rate_limits', {}).items()
+            },
+            per_host_concurrency=crawler_config.get('per_host_concurrency', 2),
+            backoff_base=crawler_config.get('throttle_backoff', 10),
+            backoff_max=crawler_config.get('throttle_backoff_max', 120),
+        )
+
+    @staticmethod
+    def split_url(url: str) -> Tuple[str, str]:
+        """拆分出 (主机, 端点路径)"""
+        parts = urlsplit(url if '://' in url else 'https:' + url)
+        return parts.netloc, parts.path
+
+    def get_bucket(self, url: str) -> TokenBucket:
+        """获取端点对应的令牌桶"""
+        _, path = self.split_url(url)
+        bucket = self._buckets.get(path)
+        if bucket is None:
+            rate, burst = self.endpoint_limits.get(path, (self.default_rate, self.default_burst))
+            bucket = TokenBucket(rate, burst, clock=self._clock)
+            self._buckets[path] = bucket
+        return bucket
+
+    def _get_host_semaphore(self, host: str) -> asyncio.Semaphore:
+        """获取主机对应的并发信号量"""
+        semaphore = self._host_semaphores.get(host)
+        if semaphore is None:
+            semaphore = asyncio.Semaphore(self.per_host_concurrency)
+            self._host_semaphores[host] = semaphore
+        return semaphore
+
+    @asynccontextmanager
+    async def limit(self, url: str):
+        """在端点预算和主机并发限制内执行请求
+
+        先在端点令牌桶上等待（包括 -799 退避），再占用主机并发名额，
+        名额只覆盖请求本身，一个端点退避时不会阻塞同主机的其他端点。
+        """
+        host, _ = self.split_url(url)
+        waited = await self.get_bucket(url).acquire()
+        if waited > 0:
+            logger.debug(f"限流等待 {waited:.2f} 秒: {url}")
+        async with self._get_host_semaphore(host):
+            yield
+
+    def report_throttled(self, url: str) -> float:
+        """记录一次 -799 限流，让该端点整体退避，返回退避秒数"""
+        _, path = self.split_url(url)
+        count = self._throttle_counts.get(path, 0) + 1
+        self._throttle_counts[path] = count
+        delay = min(self.backoff_base * (2 ** (count - 1)), self.backoff_max)
+        self.get_bucket(url).block_for(delay)
+        logger.warning(f"端点 {path} 被限流，第{count}次，退避 {delay:.0f} 秒")
+        return delay
+
+    def report_success(self, url: str):
+        """请求成功后重置该端点的连续限流计数"""
+        _, path = self.split_url(url)
+        self._throttle_counts.pop(path, None)
@@ -3,18 +3,71 @@
 Report Generator Module
 """
 
+import json
 import logging
-from datetime import datetime, date
-from typing import Dict, List
+from collections import Counter
+from datetime import datetime, date, timedelta
+from typing import Dict, List, Optional, Tuple
+
+import pandas as pd
+
+from config import config
 from .database import DatabaseManager
+from .dedup_index import NearDuplicateIndex
+from .history_store import HistoryStore
 
 logger = logging.getLogger(__name__)
 
 class ReportGenerator:
     """报告生成器"""
     
-    def __init__(self, db_manager: DatabaseManager):
+    # 周期报告用到的列，只从列式存储中读取这些列
+    PERIOD_REPORT_COLUMNS = ['content_type', 'content_id', 'author', 'publish_time', 'sentiment_score',
+                             'risk_level', 'investment_signals']
+    CONTENT_TYPE_NAMES = {'video': '视频', 'dynamic': '动态', 'news': '新闻'}
+    TOP_AUTHORS = 10
+    TOP_SIGNALS = 10
+    
+    def __init__(self, db_manager: DatabaseManager, dedup_index: Optional[NearDuplicateIndex] = None,
+                 history_store: Optional[HistoryStore] = None):
         self.db_manager = db_manager
+        self.dedup_index = dedup_index
+        self._history_store = history_store
+    
+    @property
+    def history_store(self) -> HistoryStore:
+        """历史数据列式存储，首次生成周期报告时创建"""
+        if self._history_store is None:
+            self._history_store = HistoryStore.from_config(self.db_manager, config.ANALYSIS_CONFIG)
+        return self._history_store
+    
+    def collapse_reposts(self, frame: pd.DataFrame,
+                         members: Optional[Dict[Tuple[str, str], Tuple[str, str]]] = None) -> pd.DataFrame:
+        """合并近似重复的转发
+        
+        每个重复簇只保留最先发布的一条，并在 repost_count 列中记录被合并的转发数。
+        
+        Args:
+            frame: 含 content_id、content_type、publish_time 列的历史数据，如 HistoryStore.load 的返回值
+            members: 重复簇成员，默认查询 frame 中最早发布时间以来的簇
+        """
+        if not self.dedup_index or frame.empty:
+            return frame
+        
+        # 读取顺序是内容类型和存储顺序，按发布时间排序后每簇的第一条才是最先发布的
+        publish_time = pd.to_datetime(frame['publish_time'], format='ISO8601', errors='coerce')
+        ordered = frame.loc[publish_time.sort_values(kind='stable').index]
+        if members is None:
+            earliest = publish_time.min()
+            members = self.dedup_index.get_cluster_members(
+                None if pd.isna(earliest) else earliest.to_pydatetime()
+            )
+        keys = zip(ordered['content_id'].astype(str), ordered['content_type'])
+        clusters = pd.Series([members.get(key, key) for key in keys], index=ordered.index)
+        first = ~clusters.duplicated()
+        collapsed = frame[first.reindex(frame.index)].copy()
+        collapsed['repost_count'] = clusters[first].map(clusters.value_counts()) - 1
+        return collapsed
         
     def generate_daily_report(self) -> str:
         """生成日报"""
@@ -23,18 +76,181 @@ class ReportGenerator:
     
     def generate_weekly_report(self) -> str:
         """生成周报"""
-        # TODO: 实现周报生成逻辑
-        return "本周财经分析报告"
+        return self.generate_period_report("本周财经分析报告", days=7)
     
     def generate_monthly_report(self) -> str:
         """生成月报"""
-        # TODO: 实现月报生成逻辑
-        return "本月财经分析报告"
+        return self.generate_period_report("本月财经分析报告", days=30)
+    
+    def generate_period_report(self, title: str, days: int, until: Optional[datetime] = None) -> str:
+        """生成最近 days 天的汇总报告
+        
+        数据通过列式存储按列读取为DataFrame，统计全部在pandas中完成。
+        """
+        until = until or datetime.now()
+        since = until - timedelta(days=days)
+        try:
+            frame = self.history_store.load(since, until, columns=self.PERIOD_REPORT_COLUMNS)
+            return self.format_period_report(title, since, until, self.collapse_reposts(frame))
+        except Exception as e:
+            logger.error(f"生成{title}失败: {e}")
+            return title
+    
+    def format_period_report(self, title: str, since: datetime, until: datetime,
+                             frame: pd.DataFrame) -> str:
+        """把一个周期的历史数据汇总为文本报告，frame 经 collapse_reposts 合并时注明合并的转发数"""
+        lines = [f"{title} ({since.date()} ~ {until.date()})", ""]
+        if frame.empty:
+            lines.append("本期没有新内容")
+            return "\n".join(lines)
+        
+        counts = frame['content_type'].value_counts()
+        lines.append("内容数量: " + " / ".join(
+            f"{name} {int(counts.get(content_type, 0))}"
+            for content_type, name in self.CONTENT_TYPE_NAMES.items()
+        ))
+        reposts = int(frame['repost_count'].sum()) if 'repost_count' in frame else 0
+        if reposts:
+            lines.append(f"已合并转发: {reposts} 条")
+        
+        analyzed = frame.dropna(subset=['sentiment_score'])
+        if not analyzed.empty:
+            scores = analyzed['sentiment_score']
+            threshold = config.ANALYSIS_CONFIG.get('sentiment_threshold', 0.3)
+            lines.append(
+                f"平均情感: {scores.mean():.2f} "
+                f"(偏多 {int((scores >= threshold).sum())} / 偏空 {int((scores <= -threshold).sum())})"
+            )
+            risks = analyzed['risk_level'].value_counts()
+            lines.append("风险分布: " + " / ".join(
+                f"{level} {int(risks.get(level, 0))}" for level in ('高', '中等', '低')
+            ))
+            
+            by_author = (analyzed.groupby('author')['sentiment_score']
+                         .agg(['mean', 'count'])
+                         .sort_values('count', ascending=False)
+                         .head(self.TOP_AUTHORS))
+            if not by_author.empty:
+                lines.extend(["", "来源情感:"])
+                lines.extend(
+                    f"  {author}: {row['mean']:.2f} ({int(row['count'])}条)"
+                    for author, row in by_author.iterrows()
+                )
+        
+        signals = self.count_signals(frame['investment_signals'])
+        if signals:
+            lines.extend(["", "热门信号:"])
+            lines.extend(
+                f"  {target} {signal_type} {count}次 ({'偏多' if direction == 'bullish' else '偏空'})"
+                for (target, signal_type, direction), count in signals.most_common(self.TOP_SIGNALS)
+            )
+        return "\n".join(lines)
+    
+    @staticmethod
+    def count_signals(signal_column: pd.Series) -> Counter:
+        """按 (目标, 信号类型, 方向) 统计信号次数，没有关联目标的信号以关键词为目标"""
+        counter = Counter()
+        for payload in signal_column.dropna():
+            if payload in ('', '[]'):
+                continue
+            try:
+                signals = json.loads(payload)
+            except ValueError:
+                continue
+            for signal in signals:
+                target = signal.get('target') or {}
+                counter[(target.get('name') or signal.get('keyword', ''),
+                         signal.get('type', ''), signal.get('direction', ''))] += 1
+        return counter
     
-    def generate_summary_statistics(self) -> Dict:
-        """生成统计摘要"""
-        # TODO: 实现统计摘要生成
-        return {}
+    def count_repost_signals(self, since: datetime) -> Tuple[int, Counter]:
+        """since 以来发布的转发（重复簇中最先发布的一条之外的内容）数及其信号数（按方向）
+        
+        只查询 since 以来入索引的重复簇成员，耗时与索引总量无关。
+        """
+        if not self.dedup_index:
+            return 0, Counter()
+        members = self.dedup_index.get_cluster_members(since)
+        if not members:
+            return 0, Counter()
+        columns = ['content_type', 'content_id', 'publish_time', 'investment_signals']
+        frame = pd.DataFrame(
+            self.db_manager.get_history_rows(list(members), since, columns=columns),
+            columns=columns
+        )
+        reposts = frame.drop(self.collapse_reposts(frame, members).index)
+        signals = Counter()
+        for (_, _, direction), count in self.count_signals(reposts['investment_signals']).items():
+            signals[direction] += count
+        return len(reposts), signals
+    
+    def generate_summary_statistics(self, days: Optional[int] = None) -> Dict:
+        """生成最近 days 天（默认 lookback_days，含今天）的统计摘要
+        
+        只读取每日聚合表，耗时与天数成正比，与内容量无关；
+        信号数扣除近似重复的转发，同一条消息只计一次。
+        """
+        days = days or config.ANALYSIS_CONFIG.get('lookback_days', 7)
+        today = date.today()
+        since = (today - timedelta(days=days - 1)).isoformat()
+        daily = self.db_manager.get_daily_aggregates(since=since)
+        
+        def total(column: str, rows: List[Dict] = daily) -> float:
+            return sum(row[column] or 0 for row in rows)
+        
+        def average_sentiment(rows: List[Dict]) -> Optional[float]:
+            count = total('analysis_count', rows)
+            return round(total('sentiment_sum', rows) / count, 4) if count else None
+        
+        by_day: Dict[str, List[Dict]] = {}
+        for row in daily:
+            by_day.setdefault(row['day'], []).append(row)
+        
+        by_author: Dict = {}
+        for row in self.db_manager.get_daily_aggregates(since=since, by_author=True):
+            by_author.setdefault((row['content_type'], row['author']), []).append(row)
+        
+        reposts, repost_signals = self.count_repost_signals(datetime.fromisoformat(since))
+        
+        return {
+            'since': since,
+            'until': today.isoformat(),
+            'content_counts': {
+                content_type: int(total('content_count', [r for r in daily if r['content_type'] == content_type]))
+                for content_type in self.CONTENT_TYPE_NAMES
+            },
+            'analysis_count': int(total('analysis_count')),
+            'avg_sentiment': average_sentiment(daily),
+            'signals': {
+                'total': int(total('signal_count')) - sum(repost_signals.values()),
+                'bullish': int(total('bullish_signals')) - repost_signals['bullish'],
+                'bearish': int(total('bearish_signals')) - repost_signals['bearish'],
+            },
+            'collapsed_reposts': reposts,
+            'risk_distribution': {
+                '高': int(total('high_risk')),
+                '中等': int(total('medium_risk')),
+                '低': int(total('low_risk')),
+            },
+            'daily': [
+                {
+                    'day': day,
+                    'content_count': int(total('content_count', rows)),
+                    'analysis_count': int(total('analysis_count', rows)),
+                    'avg_sentiment': average_sentiment(rows),
+                }
+                for day, rows in sorted(by_day.items())
+            ],
+            'top_authors': sorted((
+                {
+                    'content_type': content_type,
+                    'author': author,
+                    'content_count': int(total('content_count', rows)),
+                    'avg_sentiment': average_sentiment(rows),
+                }
+                for (content_type, author), rows in by_author.items()
+            ), key=lambda row: -row['content_count'])[:self.TOP_AUTHORS],
+        }
     
     def format_report_html(self, content: str) -> str:
         """格式化报告为HTML"""
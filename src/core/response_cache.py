@@ -0,0 +1,246 @@
+"""
+HTTP响应缓存模块
+HTTP Response Cache Module
+
+以SQLite持久化API响应，按URL和规范化后的参数作为键。
+支持按端点配置有效期、ETag/Last-Modified 条件请求重新验证，
+以及按总大小进行LRU淘汰。缓存总大小在进程内累计，只在首次写入时统计一次；
+读取时的访问时间按间隔节流写回，避免每次命中都产生一次写入。
+"""
+
+import json
+import logging
+import threading
+import time
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Any, Dict, Optional
+from urllib.parse import urlencode, urlsplit
+
+from .database import ConnectionPool
+
+logger = logging.getLogger(__name__)
+
+@dataclass
+class CacheEntry:
+    """缓存条目"""
+    key: str
+    data: Any
+    etag: Optional[str]
+    last_modified: Optional[str]
+    expires_at: float
+
+    @property
+    def is_fresh(self) -> bool:
+        """是否仍在有效期内"""
+        return self.expires_at > time.time()
+
+    def conditional_headers(self) -> Dict[str, str]:
+        """重新验证时使用的条件请求头"""
+        headers = {}
+        if self.etag:
+            headers['If-None-Match'] = self.etag
+        if self.last_modified:
+            headers['If-Modified-Since'] = self.last_modified
+        return headers
+
+class ResponseCache:
+    """持久化HTTP响应缓存"""
+
+    # 每次淘汰查询的条目数
+    EVICT_BATCH = 100
+
+    def __init__(self, db_path: str = "data/cache/http_cache.db",
+                 ttls: Optional[Dict[str, float]] = None, default_ttl: float = 0,
+                 max_bytes: int = 50 * 1024 * 1024, access_update_interval: float = 60):
+        """
+        Args:
+            db_path: 缓存数据库路径
+            ttls: {URL路径或主机名: 有效期秒数}，路径优先匹配
+            default_ttl: 未配置端点的有效期，0表示每次都需要重新验证
+            max_bytes: 缓存总大小上限，超出后按最近访问时间淘汰
+            access_update_interval: 命中时距上次记录的访问时间超过此秒数才写回，LRU淘汰按此精度
+        """
+        self.db_path = db_path
+        self.ttls = ttls or {}
+        self.default_ttl = default_ttl
+        self.max_bytes = max_bytes
+        self.access_update_interval = access_update_interval
+        self.pool: Optional[ConnectionPool] = None
+        self._init_lock = threading.Lock()
+        # 缓存总大小，首次写入时统计，之后随写入和淘汰增减
+        self._total_bytes: Optional[int] = None
+        self._size_lock = threading.Lock()
+        self.stats = {'hits': 0, 'misses': 0, 'revalidated': 0, 'stores': 0, 'evictions': 0}
+
+    @classmethod
+    def from_config(cls, cache_config: Dict) -> Optional['ResponseCache']:
+        """根据 config.CRAWLER_CONFIG['response_cache'] 创建缓存，未启用时返回None"""
+        if not cache_config or not cache_config.get('enabled', False):
+            return None
+        return cls(
+            db_path=cache_config.get('path', "data/cache/http_cache.db"),
+            ttls=cache_config.get('ttls', {}),
+            default_ttl=cache_config.get('default_ttl', 0),
+            max_bytes=cache_config.get('max_bytes', 50 * 1024 * 1024),
+            access_update_interval=cache_config.get('access_update_interval', 60),
+        )
+
+    def _get_pool(self) -> ConnectionPool:
+        """首次使用时再创建数据库，避免未发请求就生成缓存文件"""
+        if self.pool is None:
+            with self._init_lock:
+                if self.pool is None:
+                    Path(self.db_path).parent.mkdir(parents=True, exist_ok=True)
+                    pool = ConnectionPool(self.db_path)
+                    with pool.transaction() as cursor:
+                        cursor.execute('''
+                            CREATE TABLE IF NOT EXISTS http_cache (
+                                cache_key TEXT PRIMARY KEY,
+                                body TEXT,
+                                etag TEXT,
+                                last_modified TEXT,
+                                size INTEGER,
+                                stored_at REAL,
+                                expires_at REAL,
+                                last_access REAL
+                            )
+                        ''')
+                        cursor.execute(
+                            "CREATE INDEX IF NOT EXISTS idx_http_cache_access "
+                            "ON http_cache(last_access)"
+                        )
+                    self.pool = pool
+        return self.pool
+
+    @staticmethod
+    def make_key(url: str, params: Optional[Dict] = None) -> str:
+        """生成缓存键: 补全协议并按参数名排序"""
+        if url.startswith('//'):
+            url = 'https:' + url
+        if not params:
+            return url
+        normalized = sorted((str(k), str(v)) for k, v in params.items() if v is not None)
+        return f"{url}?{urlencode(normalized)}"
+
+    def ttl_for(self, url: str) -> float:
+        """获取端点的有效期"""
+        parts = urlsplit(url if '://' in url else 'https:' + url)
+        if parts.path in self.ttls:
+            return self.ttls[parts.path]
+        return self.ttls.get(parts.netloc, self.default_ttl)
+
+    def get(self, url: str, params: Optional[Dict] = None) -> Optional[CacheEntry]:
+        """读取缓存条目（可能已过期，需要调用方重新验证）"""
+        key = self.make_key(url, params)
+        try:
+            conn = self._get_pool().get_connection()
+            row = conn.execute(
+                "SELECT body, etag, last_modified, expires_at, last_access FROM http_cache WHERE cache_key = ?",
+                (key,)
+            ).fetchone()
+            if row is None:
+                self.stats['misses'] += 1
+                return None
+            now = time.time()
+            if now - (row[4] or 0) >= self.access_update_interval:
+                conn.execute(
+                    "UPDATE http_cache SET last_access = ? WHERE cache_key = ?",
+                    (now, key)
+                )
+            entry = CacheEntry(key, json.loads(row[0]), row[1], row[2], row[3])
+            if entry.is_fresh:
+                self.stats['hits'] += 1
+            return entry
+        except Exception as e:
+            logger.warning(f"读取响应缓存失败: {e}")
+            return None
+
+    def put(self, url: str, params: Optional[Dict], data: Any,
+            etag: Optional[str] = None, last_modified: Optional[str] = None,
+            ttl: Optional[float] = None) -> bool:
+        """写入缓存
+
+        既没有有效期也没有验证字段的响应无法复用，不写入。
+        """
+        ttl = self.ttl_for(url) if ttl is None else ttl
+        if ttl <= 0 and not etag and not last_modified:
+            return False
+
+        key = self.make_key(url, params)
+        body = json.dumps(data, ensure_ascii=False)
+        size = len(body.encode('utf-8'))
+        now = time.time()
+        try:
+            with self._size_lock:
+                # 事务提交后才记录新的总大小，失败时下次写入重新统计
+                total, self._total_bytes = self._total_bytes, None
+                with self._get_pool().transaction() as cursor:
+                    if total is None:
+                        cursor.execute("SELECT COALESCE(SUM(size), 0) FROM http_cache")
+                        total = cursor.fetchone()[0]
+                    cursor.execute("SELECT size FROM http_cache WHERE cache_key = ?", (key,))
+                    replaced = cursor.fetchone()
+                    cursor.execute('''
+                        INSERT OR REPLACE INTO http_cache
+                        (cache_key, body, etag, last_modified, size, stored_at, expires_at, last_access)
+                        VALUES (?, ?, ?, ?, ?, ?, ?, ?)
+                    ''', (key, body, etag, last_modified, size, now, now + ttl, now))
+                    total = self._evict(cursor, total + size - (replaced[0] if replaced else 0))
+                self._total_bytes = total
+            self.stats['stores'] += 1
+            return True
+        except Exception as e:
+            logger.warning(f"写入响应缓存失败: {e}")
+            return False
+
+    def mark_revalidated(self, entry: CacheEntry, url: str,
+                         etag: Optional[str] = None, last_modified: Optional[str] = None,
+                         ttl: Optional[float] = None):
+        """服务器返回304后延长条目有效期"""
+        ttl = self.ttl_for(url) if ttl is None else ttl
+        now = time.time()
+        try:
+            with self._get_pool().transaction() as cursor:
+                cursor.execute('''
+                    UPDATE http_cache
+                    SET expires_at = ?, last_access = ?,
+                        etag = COALESCE(?, etag), last_modified = COALESCE(?, last_modified)
+                    WHERE cache_key = ?
+                ''', (now + ttl, now, etag, last_modified, entry.key))
+            self.stats['revalidated'] += 1
+        except Exception as e:
+            logger.warning(f"更新响应缓存失败: {e}")
+
+    def _evict(self, cursor, total: int) -> int:
+        """超出大小上限时按批淘汰最久未访问的条目，返回淘汰后的总大小"""
+        evicted = 0
+        while total > self.max_bytes:
+            cursor.execute(
+                "SELECT cache_key, size FROM http_cache ORDER BY last_access LIMIT ?",
+                (self.EVICT_BATCH,)
+            )
+            victims = []
+            for key, size in cursor.fetchall():
+                if total <= self.max_bytes:
+                    break
+                victims.append((key,))
+                total -= size
+            if not victims:
+                break
+            cursor.executemany("DELETE FROM http_cache WHERE cache_key = ?", victims)
+            evicted += len(victims)
+        self.stats['evictions'] += evicted
+        return total
+
+    def clear(self):
+        """清空缓存"""
+        with self._size_lock:
+            with self._get_pool().transaction() as cursor:
+                cursor.execute("DELETE FROM http_cache")
+            self._total_bytes = 0
+
+    def close(self):
+        """关闭缓存数据库"""
+        if self.pool:
+            self.pool.close_all()
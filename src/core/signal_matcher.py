@@ -0,0 +1,256 @@
+"""
+投资信号匹配模块
+Investment Signal Matcher Module
+
+由带版本号的信号词典（A股/港股代码、公司简称、行业板块、交易动作词、否定词）
+构建 Aho-Corasick 自动机，每条文本线性扫描一遍即可找出全部词条，
+再把交易动作与同句中最近的股票或板块关联为结构化信号。
+词典文件变化时按修改时间重新构建，构建耗时与词条总长度成正比。
+"""
+
+import bisect
+import json
+import logging
+import os
+from collections import deque
+from pathlib import Path
+from typing import Dict, Iterator, List, NamedTuple, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_SIGNAL_DICTIONARY_PATH = Path(__file__).parent / "lexicons" / "signal_dictionary.json"
+
+class AhoCorasick:
+    """Aho-Corasick 多模式匹配自动机"""
+
+    def __init__(self, patterns: List[str]):
+        """
+        Args:
+            patterns: 模式串列表，匹配结果以列表下标标识
+        """
+        self.lengths = [len(pattern) for pattern in patterns]
+        self.goto: List[Dict[str, int]] = [{}]
+        self.fail: List[int] = [0]
+        self.outputs: List[Tuple[int, ...]] = [()]
+
+        outputs = [[]]
+        for index, pattern in enumerate(patterns):
+            if not pattern:
+                continue
+            node = 0
+            for char in pattern:
+                next_node = self.goto[node].get(char)
+                if next_node is None:
+                    next_node = len(self.goto)
+                    self.goto[node][char] = next_node
+                    self.goto.append({})
+                    self.fail.append(0)
+                    outputs.append([])
+                node = next_node
+            outputs[node].append(index)
+
+        # 按层构建失败指针，并把失败链上的输出合并到当前节点
+        queue = deque(self.goto[0].values())
+        while queue:
+            node = queue.popleft()
+            for char, child in self.goto[node].items():
+                queue.append(child)
+                fallback = self.fail[node]
+                while fallback and char not in self.goto[fallback]:
+                    fallback = self.fail[fallback]
+                self.fail[child] = self.goto[fallback].get(char, 0)
+                outputs[child].extend(outputs[self.fail[child]])
+        self.outputs = [tuple(output) for output in outputs]
+
+    def iter_matches(self, text: str) -> Iterator[Tuple[int, int, int]]:
+        """扫描文本，依次产出 (起始偏移, 结束偏移, 模式下标)，包含重叠匹配"""
+        goto, fail, outputs, lengths = self.goto, self.fail, self.outputs, self.lengths
+        node = 0
+        for position, char in enumerate(text):
+            while node and char not in goto[node]:
+                node = fail[node]
+            node = goto[node].get(char, 0)
+            for index in outputs[node]:
+                yield position + 1 - lengths[index], position + 1, index
+
+class SignalMatch(NamedTuple):
+    """词条命中"""
+    start: int
+    end: int
+    term: str
+    kind: str  # ticker / sector / action / negation
+    info: Dict
+
+class SignalMatcher:
+    """投资信号匹配器"""
+
+    # 动作与目标关联的句子边界
+    SENTENCE_ENDINGS = frozenset('。！？!?；;\n')
+    # 否定词作用的分句边界
+    CLAUSE_BOUNDARIES = frozenset('。！？!?；;\n，,、：:')
+
+    def __init__(self, dictionary_path: Optional[str] = None, negation_window: int = 4):
+        """
+        Args:
+            dictionary_path: 信号词典JSON路径，默认使用内置词典
+            negation_window: 否定词与动作词之间允许间隔的最大字符数
+        """
+        self.dictionary_path = Path(dictionary_path) if dictionary_path else DEFAULT_SIGNAL_DICTIONARY_PATH
+        self.negation_window = negation_window
+        self.version = ''
+        self._file_signature = None
+        self.reload()
+
+    def _signature(self) -> Tuple[int, int]:
+        stat = os.stat(self.dictionary_path)
+        return stat.st_mtime_ns, stat.st_size
+
+    def reload_if_changed(self) -> bool:
+        """词典文件有变化时重新构建自动机"""
+        try:
+            if self._signature() == self._file_signature:
+                return False
+        except OSError as e:
+            logger.warning(f"检查信号词典失败: {e}")
+            return False
+        self.reload()
+        return True
+
+    def reload(self):
+        """加载词典并构建自动机"""
+        signature = self._signature()
+        with open(self.dictionary_path, 'r', encoding='utf-8') as f:
+            dictionary = json.load(f)
+
+        entries: Dict[str, Tuple[str, Dict]] = {}
+
+        def add(term: str, kind: str, info: Dict):
+            # 同一词条出现多次时保留先登记的（股票代码优先于简称、简称优先于板块）
+            entries.setdefault(term.lower(), (kind, info))
+
+        for code, ticker in dictionary.get('tickers', {}).items():
+            info = {'code': code, 'name': ticker['name'], 'market': ticker.get('market', '')}
+            add(code, 'ticker', info)
+            add(ticker['name'], 'ticker', info)
+            for alias in ticker.get('aliases', []):
+                add(alias, 'ticker', info)
+        for sector, aliases in dictionary.get('sectors', {}).items():
+            for alias in [sector] + list(aliases):
+                add(alias, 'sector', {'name': sector})
+        for term, action in dictionary.get('actions', {}).items():
+            add(term, 'action', action)
+        for term in dictionary.get('negations', []):
+            add(term, 'negation', {})
+
+        self.terms = list(entries)
+        self.entries = [entries[term] for term in self.terms]
+        # 字母数字词条（股票代码、AI等）要求两侧不是字母数字，避免匹配到长代码或单词内部
+        self.word_bounded = [term.isascii() and term.isalnum() for term in self.terms]
+        self.automaton = AhoCorasick(self.terms)
+        self.version = str(dictionary.get('version', ''))
+        self._file_signature = signature
+        logger.info(f"信号词典已加载: 版本 {self.version}, {len(self.terms)} 个词条")
+
+    def match(self, text: str) -> List[SignalMatch]:
+        """查找文本中的全部词条
+
+        重叠时保留起点最早、其次最长的词条（如“贵州茅台”优先于“茅台”）。
+        """
+        if not text:
+            return []
+        lowered = text.lower()
+        if len(lowered) != len(text):
+            lowered = text
+
+        candidates = []
+        for start, end, index in self.automaton.iter_matches(lowered):
+            if self.word_bounded[index] and (
+                (start > 0 and self._is_word_char(text[start - 1]))
+                or (end < len(text) and self._is_word_char(text[end]))
+            ):
+                continue
+            candidates.append((start, -end, index))
+        candidates.sort()
+
+        matches = []
+        covered = 0
+        for start, neg_end, index in candidates:
+            if start < covered:
+                continue
+            kind, info = self.entries[index]
+            matches.append(SignalMatch(start, -neg_end, text[start:-neg_end], kind, info))
+            covered = -neg_end
+        return matches
+
+    @staticmethod
+    def _is_word_char(char: str) -> bool:
+        return char.isascii() and char.isalnum()
+
+    def extract_signals(self, text: str) -> List[Dict]:
+        """提取投资信号
+
+        每个交易动作词生成一个信号: 方向来自词典，前面同一分句内紧邻的否定词使方向取反；
+        目标为同一句中最近的股票或板块，优先取动作之前的。
+        """
+        matches = self.match(text)
+        if not matches:
+            return []
+
+        sentence_ends = [i for i, char in enumerate(text) if char in self.SENTENCE_ENDINGS]
+        targets = [m for m in matches if m.kind in ('ticker', 'sector')]
+        target_sentences = [bisect.bisect_left(sentence_ends, m.start) for m in targets]
+
+        signals = []
+        last_negation = None
+        for match in matches:
+            if match.kind == 'negation':
+                last_negation = match
+                continue
+            if match.kind != 'action':
+                continue
+
+            negated = self._negates(text, last_negation, match)
+            direction = match.info.get('direction', 'bullish')
+            if negated:
+                direction = 'bearish' if direction == 'bullish' else 'bullish'
+
+            signals.append({
+                'type': match.info.get('type', match.term),
+                'keyword': match.term,
+                'direction': direction,
+                'negated': negated,
+                'strength': match.info.get('strength', 1.0),
+                'start': match.start,
+                'end': match.end,
+                'target': self._nearest_target(
+                    match, targets, target_sentences,
+                    bisect.bisect_left(sentence_ends, match.start)
+                ),
+            })
+        return signals
+
+    def _negates(self, text: str, negation: Optional[SignalMatch], action: SignalMatch) -> bool:
+        """否定词位于动作词之前的同一分句内，且间隔不超过 negation_window"""
+        if negation is None or action.start - negation.end > self.negation_window:
+            return False
+        return not any(char in self.CLAUSE_BOUNDARIES for char in text[negation.end:action.start])
+
+    @staticmethod
+    def _nearest_target(action: SignalMatch, targets: List[SignalMatch],
+                        target_sentences: List[int], sentence: int) -> Optional[Dict]:
+        """同一句中距离动作最近的股票或板块"""
+        best = None
+        best_key = None
+        for target, target_sentence in zip(targets, target_sentences):
+            if target_sentence != sentence:
+                continue
+            # 动作之后的目标只在前面没有目标时使用
+            if target.end <= action.start:
+                key = (0, action.start - target.end)
+            else:
+                key = (1, target.start - action.end)
+            if best_key is None or key < best_key:
+                best, best_key = target, key
+        if best is None:
+            return None
+        return dict(best.info, kind=best.kind, term=best.term, start=best.start, end=best.end)
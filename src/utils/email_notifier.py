@@ -1,41 +1,360 @@
 """
 邮件通知模块
 Email Notification Module
+
+send_report / send_alert / send_notification 只把邮件写入磁盘上的发件箱并立即返回，
+由后台线程投递，不阻塞事件循环。后台线程复用一个已认证的 SMTP(STARTTLS) 连接，
+空闲超时后断开；同一收件人在合并窗口内的警报合并为一封；临时失败按指数退避重试，
+进程重启后继续投递上次未发出的邮件。
 """
 
+import json
 import smtplib
+import sqlite3
+import ssl
+import threading
+import time
 import logging
 from email.mime.text import MIMEText
 from email.mime.multipart import MIMEMultipart
 from email.mime.application import MIMEApplication
-from typing import List, Optional
+from email.utils import formatdate, make_msgid
+from pathlib import Path
+from typing import Dict, List, Optional, Tuple
 
 logger = logging.getLogger(__name__)
 
+# 邮件类型
+MAIL_REPORT = 'report'
+MAIL_ALERT = 'alert'
+MAIL_NOTIFICATION = 'notification'
+
+ALERT_SUBJECT = "财经智能分析警报"
+
 class EmailNotifier:
     """邮件通知器"""
-    
-    def __init__(self, smtp_server: str, smtp_port: int, email: str, password: str):
+
+    def __init__(self, smtp_server: str, smtp_port: int, email: str, password: str,
+                 queue_path: Optional[str] = None, starttls: bool = True,
+                 batch_window: float = 5.0, max_retries: int = 5,
+                 retry_backoff: float = 30.0, retry_backoff_max: float = 1800.0,
+                 idle_timeout: float = 60.0, timeout: float = 30.0):
+        """
+        Args:
+            smtp_server: SMTP服务器
+            smtp_port: 端口，465使用SMTP over SSL，其余端口按 starttls 升级
+            email: 发件人（同时作为登录用户名）
+            password: 密码或应用密码，为空时不登录
+            queue_path: 发件箱数据库路径，None表示只保存在内存中
+            starttls: 非465端口是否使用STARTTLS
+            batch_window: 警报合并窗口（秒），窗口内同一收件人的警报合并为一封
+            max_retries: 最大投递次数，超过后标记为失败并保留在发件箱中
+            retry_backoff: 首次重试等待秒数，之后每次翻倍
+            retry_backoff_max: 重试等待秒数上限
+            idle_timeout: SMTP连接空闲多久后断开（秒）
+            timeout: SMTP网络操作超时（秒）
+        """
         self.smtp_server = smtp_server
         self.smtp_port = smtp_port
         self.email = email
         self.password = password
-        
-    def send_report(self, to_email: str, subject: str, content: str, 
+        self.starttls = starttls
+        self.batch_window = batch_window
+        self.max_retries = max(max_retries, 1)
+        self.retry_backoff = retry_backoff
+        self.retry_backoff_max = retry_backoff_max
+        self.idle_timeout = idle_timeout
+        self.timeout = timeout
+        self.stats = {'sent': 0, 'messages': 0, 'retries': 0, 'failed': 0, 'connections': 0}
+
+        self.queue_path = queue_path or ':memory:'
+        if queue_path:
+            Path(queue_path).parent.mkdir(parents=True, exist_ok=True)
+        self._db = sqlite3.connect(self.queue_path, check_same_thread=False, isolation_level=None)
+        self._db_lock = threading.Lock()
+        self._db.execute('''
+            CREATE TABLE IF NOT EXISTS outbox (
+                id INTEGER PRIMARY KEY AUTOINCREMENT,
+                kind TEXT NOT NULL,
+                to_email TEXT NOT NULL,
+                subject TEXT,
+                body TEXT,
+                attachments TEXT,
+                created_at REAL NOT NULL,
+                next_attempt REAL NOT NULL,
+                attempts INTEGER DEFAULT 0,
+                last_error TEXT,
+                failed INTEGER DEFAULT 0
+            )
+        ''')
+
+        self._smtp: Optional[smtplib.SMTP] = None
+        self._last_used = 0.0
+        self._wakeup = threading.Condition()
+        self._worker: Optional[threading.Thread] = None
+        self._force = False
+        self._stopping = False
+
+    def send_report(self, to_email: str, subject: str, content: str,
                    attachments: Optional[List[str]] = None) -> bool:
-        """发送报告邮件"""
-        # TODO: 实现邮件发送逻辑
-        logger.info(f"发送邮件到: {to_email}, 主题: {subject}")
-        return True
-    
+        """发送报告邮件（加入发件箱），attachments 为附件文件路径"""
+        return self._enqueue(MAIL_REPORT, to_email, subject, content, attachments)
+
     def send_alert(self, to_email: str, message: str) -> bool:
-        """发送警报邮件"""
-        # TODO: 实现警报邮件发送
-        logger.info(f"发送警报到: {to_email}")
-        return True
-    
+        """发送警报邮件（合并窗口内的警报合并为一封）"""
+        return self._enqueue(MAIL_ALERT, to_email, ALERT_SUBJECT, message)
+
     def send_notification(self, to_email: str, title: str, content: str) -> bool:
-        """发送通知邮件"""
-        # TODO: 实现通知邮件发送
-        logger.info(f"发送通知到: {to_email}")
-        return True 
\ No newline at end of file
+        """发送通知邮件（加入发件箱）"""
+        return self._enqueue(MAIL_NOTIFICATION, to_email, title, content)
+
+    def _enqueue(self, kind: str, to_email: str, subject: str, body: str,
+                 attachments: Optional[List[str]] = None) -> bool:
+        """写入发件箱并唤醒后台线程，返回是否入队成功"""
+        now = time.time()
+        next_attempt = now + self.batch_window if kind == MAIL_ALERT else now
+        try:
+            with self._db_lock:
+                self._db.execute('''
+                    INSERT INTO outbox (kind, to_email, subject, body, attachments, created_at, next_attempt)
+                    VALUES (?, ?, ?, ?, ?, ?, ?)
+                ''', (kind, to_email, subject, body, json.dumps(attachments or []), now, next_attempt))
+        except Exception as e:
+            logger.error(f"邮件加入发送队列失败: {e}")
+            return False
+
+        logger.info(f"邮件加入发送队列: {to_email}, 主题: {subject}")
+        self.start()
+        with self._wakeup:
+            self._wakeup.notify_all()
+        return True
+
+    def pending_count(self) -> int:
+        """发件箱中等待投递的邮件数（不含已放弃的）"""
+        with self._db_lock:
+            return self._db.execute("SELECT COUNT(*) FROM outbox WHERE failed = 0").fetchone()[0]
+
+    def start(self):
+        """启动后台投递线程（重复调用无副作用），启动后会继续投递上次未发出的邮件"""
+        with self._wakeup:
+            if self._stopping or (self._worker and self._worker.is_alive()):
+                return
+            self._worker = threading.Thread(target=self._run, name="email-notifier", daemon=True)
+            self._worker.start()
+
+    def flush(self, timeout: Optional[float] = None) -> bool:
+        """忽略合并窗口和退避时间，立即尝试投递全部待发邮件
+
+        Returns:
+            超时前完成一轮投递且发件箱已清空时返回True
+        """
+        self.start()
+        with self._wakeup:
+            if not (self._worker and self._worker.is_alive()):
+                return False
+            self._force = True
+            self._wakeup.notify_all()
+            finished = self._wakeup.wait_for(lambda: not self._force, timeout)
+        return finished and self.pending_count() == 0
+
+    def close(self, timeout: Optional[float] = 10.0):
+        """尝试投递待发邮件后停止后台线程，未发出的邮件保留在发件箱中"""
+        if self._worker and self._worker.is_alive():
+            self.flush(timeout)
+        with self._wakeup:
+            self._stopping = True
+            self._wakeup.notify_all()
+        if self._worker:
+            self._worker.join(timeout)
+        self._disconnect()
+        with self._db_lock:
+            self._db.close()
+        logger.info("邮件发送队列已关闭")
+
+    def _run(self):
+        """后台投递循环"""
+        while True:
+            with self._wakeup:
+                if self._stopping:
+                    break
+                force = self._force
+
+            batches = self._take_due(force)
+            for ids, to_email, message in batches:
+                self._deliver(ids, to_email, message)
+
+            with self._wakeup:
+                if force:
+                    self._force = False
+                    self._wakeup.notify_all()
+                if batches or self._force or self._stopping:
+                    continue
+                if self._smtp and time.time() - self._last_used >= self.idle_timeout:
+                    self._disconnect()
+                self._wakeup.wait(self._next_delay())
+        self._disconnect()
+
+    def _next_delay(self) -> Optional[float]:
+        """距下一封邮件到期或连接空闲超时的秒数，都没有时返回None（一直等待）"""
+        with self._db_lock:
+            next_attempt = self._db.execute(
+                "SELECT MIN(next_attempt) FROM outbox WHERE failed = 0"
+            ).fetchone()[0]
+        now = time.time()
+        delays = []
+        if next_attempt is not None:
+            delays.append(next_attempt - now)
+        if self._smtp:
+            delays.append(self._last_used + self.idle_timeout - now)
+        return max(min(delays), 0) if delays else None
+
+    def _take_due(self, force: bool = False) -> List[Tuple[List[int], str, MIMEMultipart]]:
+        """取出到期的邮件，返回 [(发件箱ID列表, 收件人, 邮件)]
+
+        某收件人有警报到期时，同时带上该收件人尚未尝试过的其他警报，合并为一封。
+        """
+        with self._db_lock:
+            rows = self._db.execute('''
+                SELECT id, kind, to_email, subject, body, attachments, attempts
+                FROM outbox
+                WHERE failed = 0 AND (? OR next_attempt <= ?)
+                ORDER BY id
+            ''', (force, time.time())).fetchall()
+            alert_recipients = sorted({row[2] for row in rows if row[1] == MAIL_ALERT})
+            if alert_recipients:
+                seen = {row[0] for row in rows}
+                placeholders = ', '.join('?' * len(alert_recipients))
+                rows += [row for row in self._db.execute(f'''
+                    SELECT id, kind, to_email, subject, body, attachments, attempts
+                    FROM outbox
+                    WHERE failed = 0 AND kind = ? AND attempts = 0 AND to_email IN ({placeholders})
+                    ORDER BY id
+                ''', (MAIL_ALERT, *alert_recipients)) if row[0] not in seen]
+
+        batches = []
+        alerts: Dict[str, List[Tuple]] = {}
+        for row in rows:
+            row_id, kind, to_email, subject, body, attachments, _ = row
+            if kind == MAIL_ALERT:
+                alerts.setdefault(to_email, []).append(row)
+                continue
+            batches.append(([row_id], to_email, self._build_message(
+                to_email, subject, body, json.loads(attachments or '[]')
+            )))
+
+        for to_email, alert_rows in alerts.items():
+            alert_rows.sort(key=lambda row: row[0])
+            if len(alert_rows) == 1:
+                subject, body = ALERT_SUBJECT, alert_rows[0][4]
+            else:
+                subject = f"{ALERT_SUBJECT} ({len(alert_rows)}条)"
+                body = "\n\n".join(
+                    f"[{index}] {row[4]}" for index, row in enumerate(alert_rows, 1)
+                )
+            batches.append(([row[0] for row in alert_rows], to_email,
+                            self._build_message(to_email, subject, body)))
+        return batches
+
+    def _build_message(self, to_email: str, subject: str, body: str,
+                       attachments: Optional[List[str]] = None) -> MIMEMultipart:
+        """构造邮件，附件在投递时读取，文件不存在时跳过"""
+        message = MIMEMultipart()
+        message['From'] = self.email
+        message['To'] = to_email
+        message['Subject'] = subject
+        message['Date'] = formatdate(localtime=True)
+        message['Message-ID'] = make_msgid()
+        message.attach(MIMEText(body or '', 'plain', 'utf-8'))
+
+        for path in attachments or []:
+            try:
+                part = MIMEApplication(Path(path).read_bytes(), Name=Path(path).name)
+            except OSError as e:
+                logger.warning(f"读取邮件附件失败，跳过: {path}: {e}")
+                continue
+            part['Content-Disposition'] = f'attachment; filename="{Path(path).name}"'
+            message.attach(part)
+        return message
+
+    def _connect(self) -> smtplib.SMTP:
+        """获取SMTP连接，已有连接时直接复用"""
+        if self._smtp is not None:
+            return self._smtp
+
+        context = ssl.create_default_context()
+        if self.smtp_port == 465:
+            smtp = smtplib.SMTP_SSL(self.smtp_server, self.smtp_port,
+                                    timeout=self.timeout, context=context)
+        else:
+            smtp = smtplib.SMTP(self.smtp_server, self.smtp_port, timeout=self.timeout)
+        try:
+            if self.smtp_port != 465 and self.starttls:
+                smtp.starttls(context=context)
+            if self.password:
+                smtp.login(self.email, self.password)
+        except Exception:
+            smtp.close()
+            raise
+
+        self._smtp = smtp
+        self.stats['connections'] += 1
+        logger.info(f"已连接SMTP服务器: {self.smtp_server}:{self.smtp_port}")
+        return smtp
+
+    def _disconnect(self):
+        """关闭SMTP连接"""
+        if self._smtp is None:
+            return
+        try:
+            self._smtp.quit()
+        except Exception:
+            self._smtp.close()
+        self._smtp = None
+
+    def _deliver(self, ids: List[int], to_email: str, message: MIMEMultipart):
+        """投递一封邮件，成功后从发件箱删除，失败时安排重试或标记为失败"""
+        try:
+            try:
+                self._connect().sendmail(self.email, [to_email], message.as_string())
+            except smtplib.SMTPServerDisconnected:
+                # 复用的连接已被服务器关闭，重连后再试一次
+                self._smtp = None
+                self._connect().sendmail(self.email, [to_email], message.as_string())
+        except Exception as e:
+            self._disconnect()
+            self._record_failure(ids, to_email, e)
+            return
+
+        self._last_used = time.time()
+        placeholders = ', '.join('?' * len(ids))
+        with self._db_lock:
+            self._db.execute(f"DELETE FROM outbox WHERE id IN ({placeholders})", ids)
+        self.stats['sent'] += 1
+        self.stats['messages'] += len(ids)
+        logger.info(f"邮件已发送到: {to_email}, 主题: {message['Subject']}")
+
+    def _record_failure(self, ids: List[int], to_email: str, error: Exception):
+        """记录投递失败: 永久错误或超过最大次数时放弃，否则按指数退避安排重试"""
+        permanent = isinstance(error, smtplib.SMTPRecipientsRefused) or (
+            isinstance(error, smtplib.SMTPResponseException)
+            and not isinstance(error, smtplib.SMTPAuthenticationError)
+            and 500 <= error.smtp_code < 600
+        )
+        placeholders = ', '.join('?' * len(ids))
+        with self._db_lock:
+            attempts = self._db.execute(
+                f"SELECT MAX(attempts) FROM outbox WHERE id IN ({placeholders})", ids
+            ).fetchone()[0] + 1
+            failed = permanent or attempts >= self.max_retries
+            delay = min(self.retry_backoff * 2 ** (attempts - 1), self.retry_backoff_max)
+            self._db.execute(f'''
+                UPDATE outbox SET attempts = ?, last_error = ?, failed = ?, next_attempt = ?
+                WHERE id IN ({placeholders})
+            ''', (attempts, str(error), int(failed), time.time() + delay, *ids))
+
+        if failed:
+            self.stats['failed'] += 1
+            logger.error(f"发送邮件到 {to_email} 失败，已放弃（第{attempts}次）: {error}")
+        else:
+            self.stats['retries'] += 1
+            logger.warning(f"发送邮件到 {to_email} 失败，{delay:.0f}秒后重试（第{attempts}次）: {error}")
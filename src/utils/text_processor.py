@@ -4,12 +4,31 @@ Text Processing Utilities
 """
 
 import re
+import hashlib
 import jieba
 import logging
-from typing import List, Dict
+import numpy as np
+from functools import lru_cache
+from typing import Dict, Iterable, List
 
 logger = logging.getLogger(__name__)
 
+# MinHash 使用的素数模数（大于2^32，a*x+b 不会溢出uint64）
+MINHASH_PRIME = (1 << 32) + 15
+
+@lru_cache(maxsize=65536)
+def _shingle_hash(shingle: str) -> int:
+    """稳定的32位词片哈希（内置hash每个进程加盐不同，不能持久化）"""
+    return int.from_bytes(hashlib.blake2b(shingle.encode('utf-8'), digest_size=4).digest(), 'little')
+
+@lru_cache(maxsize=8)
+def _minhash_permutations(num_perm: int, seed: int):
+    """固定种子的哈希置换参数，保证不同进程、不同轮次的签名可比"""
+    rng = np.random.RandomState(seed)
+    a = rng.randint(1, 1 << 32, size=num_perm, dtype=np.uint64)
+    b = rng.randint(0, 1 << 32, size=num_perm, dtype=np.uint64)
+    return a, b
+
 class TextProcessor:
     """文本处理器"""
     
@@ -27,15 +46,69 @@ class TextProcessor:
         # TODO: 实现关键词提取
         return []
     
+    def add_words(self, words: Iterable[str]):
+        """向分词词典加入自定义词（jieba全局词典，重复加入无副作用）"""
+        for word in words:
+            jieba.add_word(word)
+    
     def segment_text(self, text: str) -> List[str]:
-        """文本分词"""
-        # TODO: 实现中文分词
-        return []
+        """文本分词
+        
+        保留标点以便按分句处理；空白丢弃，换行保留为一个换行符作为分句边界。
+        """
+        tokens = []
+        for word in jieba.lcut(text):
+            if word.strip():
+                tokens.append(word)
+            elif '\n' in word:
+                tokens.append('\n')
+        return tokens
+    
+    def segment_for_search(self, text: str) -> str:
+        """全文检索用的分词结果，以空格分隔
+
+        使用搜索引擎模式，长词同时输出其中的短词（如“新能源汽车”也产生“新能源”“汽车”），
+        查询时按精确模式分词即可命中。
+        """
+        if not text:
+            return ''
+        return ' '.join(word for word in jieba.cut_for_search(text) if word.strip())
+
+    def build_search_query(self, query: str) -> str:
+        """把用户输入转换为FTS5查询: 分词后每个词加引号，多个词之间为AND"""
+        terms = []
+        for word in jieba.lcut(query or ''):
+            word = word.strip()
+            if word and any(char.isalnum() for char in word):
+                terms.append('"' + word.replace('"', '""') + '"')
+        return ' '.join(terms)
+
+    def shingles(self, text: str, size: int = 3) -> set:
+        """字符 n-gram 集合: 先转小写，只保留文字和数字"""
+        normalized = ''.join(char for char in (text or '').lower() if char.isalnum())
+        if not normalized:
+            return set()
+        return {normalized[i:i + size] for i in range(max(len(normalized) - size + 1, 1))}
+    
+    def compute_minhash(self, text: str, num_perm: int = 128, seed: int = 1) -> np.ndarray:
+        """计算MinHash签名（uint32数组），两段文本签名相同位置的比例近似其 n-gram 的Jaccard相似度"""
+        return self.minhash_from_shingles(self.shingles(text), num_perm, seed)
+    
+    def minhash_from_shingles(self, shingles: set, num_perm: int = 128, seed: int = 1) -> np.ndarray:
+        """由 n-gram 集合计算MinHash签名"""
+        if not shingles:
+            return np.full(num_perm, 0xFFFFFFFF, dtype=np.uint32)
+        hashes = np.fromiter((_shingle_hash(s) for s in shingles), dtype=np.uint64, count=len(shingles))
+        a, b = _minhash_permutations(num_perm, seed)
+        permuted = (np.outer(hashes, a) + b) % np.uint64(MINHASH_PRIME)
+        return permuted.min(axis=0).astype(np.uint32)
     
     def calculate_similarity(self, text1: str, text2: str) -> float:
-        """计算文本相似度"""
-        # TODO: 实现文本相似度计算
-        return 0.0
+        """计算文本相似度（字符 n-gram 的Jaccard系数）"""
+        shingles1, shingles2 = self.shingles(text1), self.shingles(text2)
+        if not shingles1 or not shingles2:
+            return 0.0
+        return len(shingles1 & shingles2) / len(shingles1 | shingles2)
     
     def extract_entities(self, text: str) -> Dict[str, List[str]]:
         """提取命名实体"""
@@ -3,13 +3,27 @@ API接口模块
 API Endpoints Module
 """
 
-from flask import Blueprint, jsonify, request
+from datetime import datetime, timedelta
+from flask import Blueprint, current_app, jsonify, request
 import logging
+from config import config
+from ..core.database import DatabaseManager
 
 logger = logging.getLogger(__name__)
 
 api_bp = Blueprint('api', __name__)
 
+# 全文检索单次返回条数上限
+MAX_SEARCH_LIMIT = 100
+
+def get_db_manager() -> DatabaseManager:
+    """每个应用共用一个数据库管理器（连接按线程复用）"""
+    db_manager = current_app.extensions.get('db_manager')
+    if db_manager is None:
+        db_manager = DatabaseManager(current_app.config.get('DATABASE_PATH', config.DATABASE_PATH))
+        current_app.extensions['db_manager'] = db_manager
+    return db_manager
+
 @api_bp.route('/analysis/start', methods=['POST'])
 def start_analysis():
     """启动分析"""
@@ -39,7 +53,7 @@ def get_dashboard_data():
     return jsonify({
         'success': True,
         'data': {
-            'stats': {},
+            'stats': get_db_manager().get_statistics(),
             'sentiment': {},
             'signals': [],
             'hot_topics': [],
@@ -56,4 +70,23 @@ def generate_report():
         'success': True,
         'message': '报告生成完成',
         'download_url': '/static/reports/latest.pdf'
-    }) 
\ No newline at end of file
+    })
+
+@api_bp.route('/search')
+def search_content():
+    """全文检索视频、动态和新闻
+
+    参数: q 关键词；types 逗号分隔的内容类型 (video,dynamic,news)；
+    days 只检索最近几天发布的内容；limit 返回条数
+    """
+    query = request.args.get('q', '').strip()
+    if not query:
+        return jsonify({'success': False, 'message': '缺少查询关键词'}), 400
+
+    types = [t.strip() for t in request.args.get('types', '').split(',') if t.strip()] or None
+    days = request.args.get('days', type=int)
+    since = datetime.now() - timedelta(days=days) if days else None
+    limit = min(max(request.args.get('limit', 20, type=int), 1), MAX_SEARCH_LIMIT)
+
+    results = get_db_manager().search(query, types=types, since=since, limit=limit)
+    return jsonify({'success': True, 'data': results})
@@ -15,7 +15,7 @@ def create_app():
     app.config.update(config.WEB_CONFIG)
     
     # 注册蓝图
-    from .api import api_bp
+    from .api import api_bp, get_db_manager
     app.register_blueprint(api_bp, url_prefix='/api')
     
     @app.route('/')
@@ -23,7 +23,7 @@ def create_app():
         """仪表板首页"""
         # TODO: 实现仪表板数据获取
         data = {
-            'stats': {},
+            'stats': get_db_manager().get_statistics(),
             'sentiment': {},
             'signals': [],
             'hot_topics': [],
@@ -0,0 +1,126 @@
+"""
+测试数据构造
+Test Data Factories
+
+各测试模块共用的内容、分析结果和投资信号构造函数，以及使用临时目录和临时数据库的测试基类。
+"""
+
+import os
+import shutil
+import tempfile
+import unittest
+from datetime import datetime
+from typing import Dict, List, Optional
+from unittest.mock import patch
+
+from config import config
+from src.core.database import AnalysisResult, DatabaseManager, DynamicContent, NewsContent, VideoContent
+
+
+class TempDirTestCase(unittest.TestCase):
+    """在临时目录 self.tmp_dir 中运行，结束后删除"""
+
+    def setUp(self):
+        """测试初始化"""
+        self.tmp_dir = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.tmp_dir, ignore_errors=True)
+
+
+class DatabaseTestCase(TempDirTestCase):
+    """使用临时数据库 self.db（路径 self.db_path），结束时关闭"""
+
+    def setUp(self):
+        """测试初始化"""
+        super().setUp()
+        self.db_path = os.path.join(self.tmp_dir, "test.db")
+        self.db = DatabaseManager(self.db_path)
+        # 测试中可能重新打开数据库，关闭的是结束时的 self.db
+        self.addCleanup(lambda: self.db.close())
+
+
+class SystemTestCase(TempDirTestCase):
+    """使用临时数据库的 FinancialAnalysisSystem（self.system），结束时关闭数据库和去重索引"""
+
+    def setUp(self):
+        """测试初始化"""
+        super().setUp()
+        from main import FinancialAnalysisSystem
+
+        with patch.object(config, 'DATABASE_PATH', os.path.join(self.tmp_dir, "test.db")):
+            self.system = FinancialAnalysisSystem()
+        self.addCleanup(self.system.db_manager.close)
+        if self.system.dedup_index:
+            self.addCleanup(self.system.dedup_index.close)
+
+
+def make_video(bvid: str, title: Optional[str] = None, description: str = "描述",
+               transcript: str = "字幕", publish_time: Optional[datetime] = None,
+               up_name: str = "测试UP", view_count: int = 100,
+               content_hash: str = "hash") -> VideoContent:
+    """构造测试视频数据，标题默认为 标题<bvid>"""
+    return VideoContent(
+        bvid=bvid,
+        title=f"标题{bvid}" if title is None else title,
+        description=description,
+        transcript=transcript,
+        publish_time=publish_time or datetime.now(),
+        up_name=up_name,
+        view_count=view_count,
+        like_count=10,
+        coin_count=5,
+        share_count=1,
+        tags=["财经"],
+        content_hash=content_hash
+    )
+
+
+def make_dynamic(dynamic_id: str, content: str = "内容", publish_time: Optional[datetime] = None,
+                 up_name: str = "测试UP", content_hash: Optional[str] = None) -> DynamicContent:
+    """构造测试动态数据，内容哈希默认为正文"""
+    return DynamicContent(
+        dynamic_id=dynamic_id,
+        content=content,
+        publish_time=publish_time or datetime.now(),
+        up_name=up_name,
+        like_count=1,
+        forward_count=0,
+        comment_count=0,
+        content_hash=content if content_hash is None else content_hash
+    )
+
+
+def make_news(url: str, title: str, content: str, publish_time: Optional[datetime] = None) -> NewsContent:
+    """构造测试新闻数据，内容哈希为标题+正文"""
+    return NewsContent(
+        title=title,
+        content=content,
+        source="测试来源",
+        publish_time=publish_time or datetime.now(),
+        url=url,
+        category="财经",
+        content_hash=title + content
+    )
+
+
+def make_result(content_id: str, content_type: str = "video", sentiment_score: float = 0.1,
+                risk_level: str = "中等", investment_signals: Optional[List[Dict]] = None,
+                content_hash: str = "hash", analyzer_version: str = "1",
+                analysis_time: Optional[datetime] = None) -> AnalysisResult:
+    """构造测试分析结果"""
+    return AnalysisResult(
+        content_id=content_id,
+        content_type=content_type,
+        sentiment_score=sentiment_score,
+        key_points=[],
+        investment_signals=investment_signals or [],
+        risk_level=risk_level,
+        confidence=0.5,
+        analysis_time=analysis_time or datetime.now(),
+        content_hash=content_hash,
+        analyzer_version=analyzer_version
+    )
+
+
+def make_signal(target: Optional[Dict], direction: str = 'bullish', signal_type: str = '买入') -> Dict:
+    """构造投资信号"""
+    return {'type': signal_type, 'keyword': signal_type, 'direction': direction, 'target': target}
@@ -0,0 +1,107 @@
+"""
+警报合并模块测试
+Alert Pipeline Tests
+"""
+
+import unittest
+from datetime import datetime
+from unittest import mock
+
+from src.core.alert_pipeline import AlertPipeline
+from tests.factories import DatabaseTestCase, make_result, make_signal
+
+MOUTAI = {'code': '600519', 'name': '贵州茅台', 'kind': 'ticker'}
+BANKS = {'name': '银行', 'kind': 'sector'}
+
+
+class TestAlertPipeline(DatabaseTestCase):
+    """警报合并测试类"""
+
+    def setUp(self):
+        """测试初始化"""
+        super().setUp()
+        self.notifier = mock.Mock()
+        self.now = 1_700_000_000.0
+
+    def make_pipeline(self, **kwargs) -> AlertPipeline:
+        """创建使用模拟通知器的警报合并器"""
+        options = dict(window=3600, cooldown=4 * 3600, max_entries=100)
+        options.update(kwargs)
+        return AlertPipeline(self.db, self.notifier, "user@example.com", **options)
+
+    def test_burst_merged_into_one_digest(self):
+        """同一目标的一批信号合并为一组，一轮只发一封摘要"""
+        pipeline = self.make_pipeline()
+        results = [make_result(f"D{i}", "dynamic", investment_signals=[make_signal(MOUTAI)]) for i in range(7)]
+        results.append(make_result("D9", "dynamic", investment_signals=[make_signal(BANKS, 'bearish', '减持')]))
+        results.append(make_result("D10", "dynamic", investment_signals=[{'type': '买入', 'direction': 'bullish', 'target': None}]))
+
+        fired = pipeline.process(results, now=self.now)
+
+        self.assertEqual([(d.target, d.direction, d.signal_count) for d in fired],
+                         [('600519', 'bullish', 7), ('银行', 'bearish', 1)])
+        self.notifier.send_alert.assert_called_once()
+        message = self.notifier.send_alert.call_args[0][1]
+        self.assertIn("贵州茅台(600519) 偏多: 7条信号 (买入)", message)
+        self.assertIn("等7条内容", message)
+        self.assertIn("银行 偏空: 1条信号 (减持)", message)
+
+    def test_cooldown_suppresses_repeats(self):
+        """冷却期内的重复信号只计数，冷却后再次警报并带上合并数"""
+        pipeline = self.make_pipeline()
+        pipeline.process([make_result("D1", "dynamic", investment_signals=[make_signal(MOUTAI)])], now=self.now)
+        self.assertEqual(pipeline.process([make_result("D2", "dynamic", investment_signals=[make_signal(MOUTAI)])],
+                                          now=self.now + 2 * 3600), [])
+        # 反方向是独立的键
+        opposite = pipeline.process([make_result("D3", "dynamic", investment_signals=[make_signal(MOUTAI, 'bearish')])],
+                                    now=self.now + 2 * 3600)
+        self.assertEqual(len(opposite), 1)
+
+        self.assertEqual(self.notifier.send_alert.call_count, 2)
+        self.assertEqual(pipeline.stats['suppressed'], 1)
+
+        fired = pipeline.process([make_result("D4", "dynamic", investment_signals=[make_signal(MOUTAI)])],
+                                 now=self.now + 4 * 3600 - 1)
+        self.assertEqual(fired, [])
+        fired = pipeline.process([make_result("D5", "dynamic", investment_signals=[make_signal(MOUTAI)])],
+                                 now=self.now + 5 * 3600)
+        self.assertEqual([digest.suppressed for digest in fired], [2])
+
+    def test_window_without_cooldown(self):
+        """冷却期为0时同一时间窗口内仍只警报一次"""
+        pipeline = self.make_pipeline(cooldown=0)
+        start = self.now - self.now % 3600
+        pipeline.process([make_result("D1", "dynamic", investment_signals=[make_signal(MOUTAI)])], now=start)
+        self.assertEqual(pipeline.process([make_result("D2", "dynamic", investment_signals=[make_signal(MOUTAI)])],
+                                          now=start + 1800), [])
+        self.assertEqual(len(pipeline.process([make_result("D3", "dynamic", investment_signals=[make_signal(MOUTAI)])],
+                                              now=start + 3600)), 1)
+
+    def test_state_checkpointed_and_restored(self):
+        """重启后从检查点恢复冷却状态"""
+        pipeline = self.make_pipeline()
+        with mock.patch('time.time', return_value=self.now):
+            pipeline.process([make_result("D1", "dynamic", investment_signals=[make_signal(MOUTAI)])])
+        self.assertEqual(len(self.db.get_alert_states(self.now - 3600)), 1)
+
+        with mock.patch('time.time', return_value=self.now + 600):
+            restarted = self.make_pipeline()
+            self.assertEqual(restarted.process([make_result("D2", "dynamic", investment_signals=[make_signal(MOUTAI)])]), [])
+        self.assertEqual(self.db.get_alert_states(self.now - 3600)[0]['suppressed'], 1)
+
+    def test_state_bounded(self):
+        """内存状态数不超过上限，过期状态从检查点删除"""
+        pipeline = self.make_pipeline(max_entries=3)
+        for i in range(10):
+            target = {'code': f"00000{i}", 'name': f"股票{i}", 'kind': 'ticker'}
+            pipeline.process([make_result(f"D{i}", "dynamic", investment_signals=[make_signal(target)])], now=self.now + i)
+        self.assertEqual(len(pipeline._states), 3)
+        self.assertEqual(list(pipeline._states)[-1], ('000009', 'bullish'))
+
+        pipeline.process([], now=self.now + 5 * 3600)
+        self.assertEqual(len(pipeline._states), 0)
+        self.assertEqual(self.db.get_alert_states(0), [])
+
+
+if __name__ == '__main__':
+    unittest.main()
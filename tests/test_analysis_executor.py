@@ -0,0 +1,81 @@
+"""
+分析执行器测试
+Analysis Executor Tests
+"""
+
+import asyncio
+import threading
+import unittest
+from unittest.mock import patch
+
+from src.core import analysis_executor
+from src.core.analysis_executor import AnalysisExecutor
+
+ITEMS = [
+    (str(i), 'dynamic', text, f"h{i}")
+    for i, text in enumerate(["市场大涨，看好后市", "业绩不及预期，股价跌停", "今天去吃饭"] * 5)
+]
+
+
+class TestAnalysisExecutor(unittest.TestCase):
+    """分析执行器测试类"""
+
+    def test_process_pool_matches_in_process(self):
+        """进程池分析结果与进程内一致，顺序保持不变"""
+        executor = AnalysisExecutor(max_workers=2, shard_size=4)
+        try:
+            results = asyncio.run(executor.analyze(ITEMS))
+        finally:
+            executor.shutdown()
+
+        self.assertEqual([r.content_id for r in results], [item[0] for item in ITEMS])
+        self.assertGreater(results[0].sentiment_score, 0)
+        self.assertLess(results[1].sentiment_score, 0)
+        self.assertEqual(results[2].sentiment_score, 0.0)
+
+    def test_backpressure(self):
+        """在途分片达到上限时提交方等待"""
+        release = threading.Event()
+
+        def blocking_shard(items):
+            release.wait(5)
+            return []
+
+        async def run_test():
+            executor = AnalysisExecutor(max_workers=0, max_pending=1)
+            first = await executor.submit(ITEMS[:1])
+            second = asyncio.create_task(executor.submit(ITEMS[1:2]))
+            await asyncio.sleep(0.05)
+            waiting = not second.done()
+            release.set()
+            await first
+            await (await second)
+            executor.shutdown()
+            return waiting
+
+        with patch.object(analysis_executor, '_analyze_shard', blocking_shard):
+            self.assertTrue(asyncio.run(run_test()))
+
+    def test_failed_shard_skipped(self):
+        """失败的分片被跳过，其他分片结果保留"""
+        def flaky_shard(items):
+            if items[0][0] == '0':
+                raise RuntimeError("boom")
+            return items
+
+        executor = AnalysisExecutor(max_workers=0, shard_size=5)
+        with patch.object(analysis_executor, '_analyze_shard', flaky_shard):
+            results = asyncio.run(executor.analyze(ITEMS))
+        executor.shutdown()
+        self.assertEqual(len(results), len(ITEMS) - 5)
+
+    def test_submit_after_shutdown(self):
+        """关闭后拒绝新的分片"""
+        executor = AnalysisExecutor(max_workers=0)
+        executor.shutdown()
+        with self.assertRaises(RuntimeError):
+            asyncio.run(executor.submit(ITEMS))
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,126 @@
+"""
+内容分析器测试
+Content Analyzer Tests
+"""
+
+import json
+import os
+import shutil
+import tempfile
+import unittest
+
+from src.core.analyzer import ContentAnalyzer
+from src.core.sentiment import SentimentEngine
+
+
+class TestSentimentEngine(unittest.TestCase):
+    """情感打分引擎测试类"""
+
+    @classmethod
+    def setUpClass(cls):
+        """加载一次内置词典"""
+        cls.engine = SentimentEngine()
+
+    def score(self, text: str) -> float:
+        return float(self.engine.score_texts([text])[0])
+
+    def test_polarity(self):
+        """利好为正，利空为负，无情感词为0"""
+        self.assertGreater(self.score("券商板块大涨，市场情绪乐观"), 0.5)
+        self.assertLess(self.score("业绩不及预期，股价跌停"), -0.5)
+        self.assertEqual(self.score("今天去吃饭"), 0.0)
+        self.assertEqual(self.score(""), 0.0)
+
+    def test_negation_and_degree(self):
+        """否定词取反，程度副词放大"""
+        self.assertLess(self.score("不看好"), 0)
+        self.assertGreater(self.score("非常看好"), self.score("看好"))
+        self.assertGreater(self.score("看好"), self.score("稍微看好"))
+
+    def test_modifier_stays_in_clause(self):
+        """否定词不跨分句作用"""
+        self.assertLess(self.score("不上涨"), 0)
+        self.assertAlmostEqual(self.score("不，上涨"), self.score("上涨"))
+
+    def test_batch_matches_single(self):
+        """批量打分与逐条打分一致，修饰词不跨文本作用"""
+        texts = ["没有", "上涨", "", "大幅下跌，风险加大"]
+        batch = self.engine.score_texts(texts)
+        for text, score in zip(texts, batch):
+            self.assertAlmostEqual(score, self.score(text))
+
+    def test_custom_lexicon(self):
+        """可加载自定义词典"""
+        tmp_dir = tempfile.mkdtemp()
+        try:
+            path = os.path.join(tmp_dir, "lexicon.json")
+            with open(path, 'w', encoding='utf-8') as f:
+                json.dump({'version': 't1', 'positive': {'起飞': 2.0}, 'negations': ['不']}, f)
+            engine = SentimentEngine(path)
+            self.assertEqual(engine.version, 't1')
+            self.assertGreater(engine.score_texts(["起飞"])[0], 0)
+            self.assertLess(engine.score_texts(["不起飞"])[0], 0)
+        finally:
+            shutil.rmtree(tmp_dir, ignore_errors=True)
+
+
+class TestContentAnalyzer(unittest.TestCase):
+    """内容分析器测试类"""
+
+    @classmethod
+    def setUpClass(cls):
+        """共用一个分析器"""
+        cls.analyzer = ContentAnalyzer()
+
+    def test_analyze_batch(self):
+        """批量分析返回完整的分析结果"""
+        items = [
+            ("BV1", "video", "央行降准，市场大涨。我们建议逢低买入！", "h1"),
+            ("D1", "dynamic", "今天去吃饭", "h2"),
+            ("3", "news", "业绩不及预期。不建议买入，注意风险", "h3"),
+        ]
+        results = self.analyzer.analyze_batch(items)
+        self.assertEqual([r.content_id for r in results], ["BV1", "D1", "3"])
+        self.assertEqual(results[0].content_hash, "h1")
+        self.assertEqual(results[0].analyzer_version, ContentAnalyzer.ANALYZER_VERSION)
+
+        bullish, neutral, bearish = results
+        self.assertGreater(bullish.sentiment_score, 0)
+        self.assertEqual(bullish.risk_level, "低")
+        self.assertEqual(bullish.investment_signals[0]['type'], "买入")
+        self.assertEqual(bullish.investment_signals[0]['direction'], "bullish")
+        self.assertEqual(bullish.key_points, ["央行降准，市场大涨", "我们建议逢低买入"])
+
+        self.assertEqual((neutral.sentiment_score, neutral.confidence), (0.0, 0.0))
+        self.assertEqual((neutral.key_points, neutral.investment_signals), ([], []))
+
+        self.assertLess(bearish.sentiment_score, 0)
+        self.assertEqual(bearish.risk_level, "高")
+        self.assertEqual(bearish.investment_signals[0]['direction'], "bearish")
+
+    def test_batch_matches_single_methods(self):
+        """批量结果与逐项方法一致"""
+        text = "券商板块大幅上涨，但是要警惕回调风险。继续看好消费"
+        result = self.analyzer.analyze_batch([("1", "dynamic", text, "")])[0]
+        self.assertEqual(result.sentiment_score, self.analyzer.analyze_sentiment(text))
+        self.assertEqual(result.key_points, self.analyzer.extract_key_points(text))
+        self.assertEqual(result.investment_signals, self.analyzer.detect_investment_signals(text))
+        self.assertEqual(result.confidence, self.analyzer.calculate_confidence(text, []))
+
+    def test_analyze_batch_empty(self):
+        """空批次返回空列表"""
+        self.assertEqual(self.analyzer.analyze_batch([]), [])
+
+    def test_analyze_sentiment_batch(self):
+        """批量接口返回与输入等长的分数列表"""
+        analyzer = self.analyzer
+        scores = analyzer.analyze_sentiment_batch(["看多", "看空", "中性描述"])
+        self.assertEqual(len(scores), 3)
+        self.assertGreater(scores[0], 0)
+        self.assertLess(scores[1], 0)
+        self.assertEqual(scores[2], 0.0)
+        self.assertEqual(analyzer.analyze_sentiment("看多"), scores[0])
+
+
+if __name__ == '__main__':
+    unittest.main()
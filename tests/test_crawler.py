@@ -3,16 +3,32 @@
 Crawler Module Tests
 """
 
+import os
 import unittest
 import asyncio
+from datetime import datetime
+from unittest.mock import patch
 from src.core.crawler import BilibiliCrawler
+from src.core.response_cache import ResponseCache
+from tests.factories import TempDirTestCase
 
-class TestBilibiliCrawler(unittest.TestCase):
+
+class CrawlerTestCase(TempDirTestCase):
+    """爬虫使用临时目录中的响应缓存，测试不写入 data/cache"""
+
+    def setUp(self):
+        """测试初始化"""
+        super().setUp()
+        self.crawler = BilibiliCrawler(response_cache=ResponseCache(os.path.join(self.tmp_dir, "cache.db")))
+        self.addCleanup(self.crawler.response_cache.close)
+
+
+class TestBilibiliCrawler(CrawlerTestCase):
     """B站爬虫测试类"""
     
     def setUp(self):
         """测试初始化"""
-        self.crawler = BilibiliCrawler()
+        super().setUp()
         self.test_uid = "37663924"  # 巫师财经的UID
         self.loop = asyncio.new_event_loop()
         asyncio.set_event_loop(self.loop)
@@ -105,6 +121,193 @@ class TestBilibiliCrawler(unittest.TestCase):
         
         self.loop.run_until_complete(run_test())
 
+class TestVideoInfoCache(CrawlerTestCase):
+    """视频信息缓存测试类（模拟API响应，不访问网络）"""
+    
+    VIDEO_INFO = {'bvid': 'BV1test', 'aid': 1, 'cid': 2, 'title': '标题', 'desc': '描述'}
+    
+    def setUp(self):
+        """测试初始化"""
+        super().setUp()
+        self.calls = []
+    
+    async def fake_request(self, url, params=None, max_retries=3):
+        """模拟B站API"""
+        self.calls.append(url)
+        await asyncio.sleep(0.01)
+        if url.endswith('/x/web-interface/view'):
+            return {'code': 0, 'data': dict(self.VIDEO_INFO)}
+        if url.endswith('/x/player/v2'):
+            return {'code': 0, 'data': {'subtitle': {'subtitles': []}}}
+        if url.endswith('/x/v2/reply/main'):
+            return {'code': 0, 'data': {'replies': []}}
+        return None
+    
+    def view_calls(self):
+        """视频详情请求次数"""
+        return sum(url.endswith('/x/web-interface/view') for url in self.calls)
+    
+    def test_video_info_fetched_once(self):
+        """详情、字幕、评论共享同一次视频详情请求"""
+        async def run_test():
+            with patch.object(self.crawler, '_make_request', self.fake_request):
+                await self.crawler.get_video_info('BV1test')
+                transcript = await self.crawler.get_video_transcript('BV1test')
+                await self.crawler.get_video_comments('BV1test')
+            return transcript
+        
+        transcript = asyncio.run(run_test())
+        self.assertEqual(transcript, '描述')
+        self.assertEqual(self.view_calls(), 1)
+    
+    def test_concurrent_requests_deduplicated(self):
+        """同一视频的并发请求只发出一次"""
+        async def run_test():
+            with patch.object(self.crawler, '_make_request', self.fake_request):
+                return await asyncio.gather(*(
+                    self.crawler.get_video_info('BV1test') for _ in range(5)
+                ))
+        
+        results = asyncio.run(run_test())
+        self.assertTrue(all(result['cid'] == 2 for result in results))
+        self.assertEqual(self.view_calls(), 1)
+    
+    def test_prefetched_info_skips_request(self):
+        """传入已获取的信息或cid/aid时不请求视频详情"""
+        async def run_test():
+            with patch.object(self.crawler, '_make_request', self.fake_request):
+                await self.crawler.get_video_transcript('BV1test', video_info=self.VIDEO_INFO)
+                await self.crawler.get_video_transcript('BV1test', cid=2)
+                await self.crawler.get_video_comments('BV1test', aid=1)
+        
+        asyncio.run(run_test())
+        self.assertEqual(self.view_calls(), 0)
+    
+    def test_cached_info_is_compact(self):
+        """缓存的视频信息只保留用到的字段"""
+        raw = dict(self.VIDEO_INFO, pages=[{'cid': 2, 'part': 'P1'}] * 50,
+                   owner={'mid': 1, 'name': 'UP'}, stat={'view': 10, 'like': 2, 'danmaku': 3})
+        
+        async def fake_view(url, params=None, max_retries=3):
+            return {'code': 0, 'data': raw}
+        
+        async def run_test():
+            with patch.object(self.crawler, '_make_request', fake_view):
+                return await self.crawler.get_video_info('BV1test')
+        
+        info = asyncio.run(run_test())
+        self.assertNotIn('pages', info)
+        self.assertNotIn('owner', info)
+        self.assertEqual(info['stat'], {'view': 10, 'like': 2, 'coin': 0, 'share': 0})
+        self.assertEqual(info['cid'], 2)
+    
+    def test_cache_expires(self):
+        """缓存过期后重新请求"""
+        self.crawler.video_info_ttl = 0
+        
+        async def run_test():
+            with patch.object(self.crawler, '_make_request', self.fake_request):
+                await self.crawler.get_video_info('BV1test')
+                await self.crawler.get_video_info('BV1test')
+        
+        asyncio.run(run_test())
+        self.assertEqual(self.view_calls(), 2)
+
+class TestPaginationIterators(CrawlerTestCase):
+    """分页生成器测试类（模拟API响应，不访问网络）"""
+    
+    def setUp(self):
+        """测试初始化"""
+        super().setUp()
+        self.calls = []
+        # 7个视频，发布时间从新到旧: 1007 ... 1001
+        self.videos = [{'bvid': f'BV{t}', 'created': t} for t in range(1007, 1000, -1)]
+        # 5条动态，首条为置顶的旧动态
+        self.dynamics = [self.make_dynamic('1', 500, pinned=True)] + [
+            self.make_dynamic(str(t), t) for t in range(1004, 1000, -1)
+        ]
+        self.replies = [
+            {'rpid': t, 'ctime': t, 'content': {'message': f'评论{t}'}, 'member': {}, 'like': 0}
+            for t in range(1005, 1000, -1)
+        ]
+    
+    @staticmethod
+    def make_dynamic(dynamic_id: str, pub_ts: int, pinned: bool = False) -> dict:
+        """构造动态项目"""
+        modules = {
+            'module_author': {'pub_ts': pub_ts},
+            'module_dynamic': {'desc': {'text': f'动态{dynamic_id}'}},
+        }
+        if pinned:
+            modules['module_tag'] = {'text': '置顶'}
+        return {'id_str': dynamic_id, 'basic': {}, 'modules': modules}
+    
+    async def fake_request(self, url, params=None, max_retries=3, cache_ttl=None):
+        """按页返回模拟数据，每页2条"""
+        self.calls.append(dict(params or {}))
+        if url.endswith('/x/space/arc/search'):
+            start = (params['pn'] - 1) * params['ps']
+            return {'code': 0, 'data': {
+                'list': {'vlist': self.videos[start:start + params['ps']]},
+                'page': {'count': len(self.videos)},
+            }}
+        if url.endswith('/feed/space'):
+            start = int(params['offset'] or 0)
+            return {'code': 0, 'data': {
+                'items': self.dynamics[start:start + 2],
+                'has_more': start + 2 < len(self.dynamics),
+                'offset': str(start + 2),
+            }}
+        if url.endswith('/x/v2/reply/main'):
+            start = params['next']
+            end = start + 2
+            return {'code': 0, 'data': {
+                'replies': self.replies[start:end],
+                'cursor': {'next': end, 'is_end': end >= len(self.replies)},
+            }}
+        return None
+    
+    def collect(self, iterator):
+        """收集异步生成器的全部结果"""
+        async def run_test():
+            with patch.object(self.crawler, '_make_request', self.fake_request):
+                return [item async for item in iterator]
+        return asyncio.run(run_test())
+    
+    def test_videos_backfill_all_pages(self):
+        """没有水位时回溯全部分页"""
+        videos = self.collect(self.crawler.iter_user_videos('1', page_size=2))
+        self.assertEqual(len(videos), 7)
+        self.assertEqual(len(self.calls), 4)
+    
+    def test_videos_stop_at_watermark(self):
+        """到达水位后停止翻页"""
+        since = datetime.fromtimestamp(1005)
+        videos = self.collect(self.crawler.iter_user_videos('1', since=since, page_size=2))
+        self.assertEqual([v['bvid'] for v in videos], ['BV1007', 'BV1006'])
+        self.assertEqual(len(self.calls), 2)
+    
+    def test_dynamics_follow_offset_and_skip_pinned(self):
+        """动态沿offset翻页，置顶动态不触发水位截止"""
+        dynamics = self.collect(self.crawler.iter_user_dynamics('1'))
+        self.assertEqual(len(dynamics), 5)
+        self.assertEqual(len(self.calls), 3)
+        
+        self.calls.clear()
+        since = datetime.fromtimestamp(1003)
+        dynamics = self.collect(self.crawler.iter_user_dynamics('1', since=since))
+        self.assertEqual([d['id'] for d in dynamics], ['1', '1004'])
+        self.assertEqual(dynamics[1]['timestamp'], 1004)
+    
+    def test_comments_follow_cursor(self):
+        """评论沿游标翻页并在水位处停止"""
+        comments = self.collect(self.crawler.iter_video_comments('BV1', aid=1, page_size=2))
+        self.assertEqual(len(comments), 5)
+        
+        since = datetime.fromtimestamp(1002)
+        comments = self.collect(self.crawler.iter_video_comments('BV1', since=since, aid=1, page_size=2))
+        self.assertEqual([c['comment_id'] for c in comments], ['1005', '1004', '1003'])
+
 if __name__ == '__main__':
     print("🚀 开始测试B站爬虫功能")
     print("=" * 50)
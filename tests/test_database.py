@@ -0,0 +1,602 @@
+"""
+数据库模块测试
+Database Module Tests
+"""
+
+import os
+import pickle
+import sqlite3
+import threading
+import unittest
+from datetime import datetime
+
+from src.core.database import (
+    DatabaseManager, ConnectionPool, VideoContent, DynamicContent, CommentContent,
+    NewsContent, SAVE_INSERTED, SAVE_UPDATED, SAVE_UNCHANGED, AGGREGATE_COLUMNS
+)
+from src.core.report_generator import ReportGenerator
+from tests.factories import DatabaseTestCase, TempDirTestCase, make_video, make_result
+
+
+class TestConnectionPool(TempDirTestCase):
+    """连接池测试类"""
+
+    def setUp(self):
+        """测试初始化"""
+        super().setUp()
+        self.db_path = os.path.join(self.tmp_dir, "test.db")
+        self.pool = ConnectionPool(self.db_path)
+
+    def tearDown(self):
+        """测试清理"""
+        self.pool.close_all()
+
+    def test_connection_reused_per_thread(self):
+        """同一线程复用连接，不同线程使用不同连接"""
+        conn = self.pool.get_connection()
+        self.assertIs(conn, self.pool.get_connection())
+
+        other = []
+        thread = threading.Thread(target=lambda: other.append(self.pool.get_connection()))
+        thread.start()
+        thread.join()
+        self.assertIsNot(conn, other[0])
+
+    def test_connections_closed_when_threads_exit(self):
+        """线程结束后关闭其连接，大量短生命周期线程不会累积连接"""
+        db = DatabaseManager(os.path.join(self.tmp_dir, "threads.db"))
+        db.get_statistics()
+        baseline = db.pool.connection_count()
+        closed = []
+
+        def request():
+            closed.append(db.pool.get_connection())
+            db.get_statistics()
+
+        for _ in range(5):
+            threads = [threading.Thread(target=request) for _ in range(10)]
+            for thread in threads:
+                thread.start()
+            for thread in threads:
+                thread.join()
+            self.assertEqual(db.pool.connection_count(), baseline)
+
+        with self.assertRaises(sqlite3.ProgrammingError):
+            closed[0].execute("SELECT 1")
+        db.close()
+
+    def test_wal_mode_enabled(self):
+        """连接启用WAL模式"""
+        mode = self.pool.get_connection().execute("PRAGMA journal_mode").fetchone()[0]
+        self.assertEqual(mode.lower(), "wal")
+
+    def test_transaction_commit_and_rollback(self):
+        """事务正常提交，异常回滚"""
+        with self.pool.transaction() as cursor:
+            cursor.execute("CREATE TABLE t (v INTEGER)")
+            cursor.execute("INSERT INTO t VALUES (1)")
+
+        with self.assertRaises(RuntimeError):
+            with self.pool.transaction() as cursor:
+                cursor.execute("INSERT INTO t VALUES (2)")
+                raise RuntimeError("boom")
+
+        rows = self.pool.get_connection().execute("SELECT v FROM t").fetchall()
+        self.assertEqual(rows, [(1,)])
+
+    def test_nested_transaction_joins_outer(self):
+        """嵌套事务加入外层事务"""
+        with self.pool.transaction() as cursor:
+            cursor.execute("CREATE TABLE t (v INTEGER)")
+            with self.pool.transaction() as inner:
+                inner.execute("INSERT INTO t VALUES (1)")
+            self.assertTrue(self.pool.get_connection().in_transaction)
+
+        # 其他连接可见已提交的数据
+        conn = sqlite3.connect(self.db_path)
+        self.assertEqual(conn.execute("SELECT COUNT(*) FROM t").fetchone()[0], 1)
+        conn.close()
+
+
+class TestRecordTypes(unittest.TestCase):
+    """记录类型测试类"""
+
+    def test_slotted(self):
+        """记录没有实例 __dict__，仍可修改、比较和跨进程传递"""
+        result = make_result("BV1")
+        self.assertFalse(hasattr(result, '__dict__'))
+        with self.assertRaises(AttributeError):
+            result.unknown = 1
+        result.sentiment_score = 0.5
+        self.assertEqual(pickle.loads(pickle.dumps(result)), result)
+        self.assertEqual(make_result("BV1").content_hash, "hash")
+
+    def test_video_from_api(self):
+        """由视频详情构造，只取需要的字段"""
+        video = VideoContent.from_api({
+            'bvid': 'BV1', 'title': '标题', 'desc': '简介', 'pubdate': 1700000000,
+            'stat': {'view': 10, 'like': 2, 'coin': 1, 'share': 0, 'danmaku': 5},
+            'tags': [{'tag_name': '财经'}], 'pages': [{'cid': 1}],
+        }, "测试UP", "字幕", "h")
+        self.assertEqual((video.bvid, video.description, video.view_count, video.tags),
+                         ("BV1", "简介", 10, ["财经"]))
+        self.assertEqual(video.publish_time, datetime.fromtimestamp(1700000000))
+
+    def test_dynamic_and_comment_from_api(self):
+        """由爬虫解析结果构造动态和评论"""
+        dynamic = DynamicContent.from_api(
+            {'id': 123, 'content': '内容', 'timestamp': 1700000000, 'like_count': 3}, "测试UP", "h"
+        )
+        self.assertEqual((dynamic.dynamic_id, dynamic.like_count, dynamic.forward_count),
+                         ("123", 3, 0))
+        comment = CommentContent.from_api(
+            {'comment_id': '9', 'content': '评论', 'author': '网友', 'like_count': 1,
+             'timestamp': 1700000000}, "BV1", "video"
+        )
+        self.assertEqual((comment.comment_id, comment.parent_id), ("9", "BV1"))
+
+
+class TestDatabaseManager(DatabaseTestCase):
+    """数据库管理器测试类"""
+
+    def test_save_and_get_video(self):
+        """保存并读取视频"""
+        self.db.save_video(make_video("BV1"))
+        videos = self.db.get_latest_content('video', days=1)
+        self.assertEqual(len(videos), 1)
+        self.assertEqual(videos[0]['bvid'], "BV1")
+
+    def test_statistics(self):
+        """统计信息"""
+        self.db.save_video(make_video("BV1"))
+        self.db.save_video(make_video("BV2"))
+        stats = self.db.get_statistics()
+        self.assertEqual(stats['total_videos'], 2)
+
+    def test_save_videos_bulk_outcomes(self):
+        """批量保存返回逐行结果"""
+        outcomes = self.db.save_videos_bulk([make_video("BV1"), make_video("BV2")])
+        self.assertEqual(outcomes, [SAVE_INSERTED, SAVE_INSERTED])
+
+        outcomes = self.db.save_videos_bulk([
+            make_video("BV1", view_count=999),
+            make_video("BV2", content_hash="changed"),
+            make_video("BV3"),
+        ])
+        self.assertEqual(outcomes, [SAVE_UNCHANGED, SAVE_UPDATED, SAVE_INSERTED])
+
+        # 内容未变时互动数据依然刷新
+        videos = {v['bvid']: v for v in self.db.get_latest_content('video', days=1)}
+        self.assertEqual(videos['BV1']['view_count'], 999)
+
+    def test_save_videos_bulk_single_commit(self):
+        """批量保存在单个事务内完成"""
+        conn = self.db.pool.get_connection()
+        statements = []
+        conn.set_trace_callback(statements.append)
+        try:
+            self.db.save_videos_bulk([make_video(f"BV{i}") for i in range(50)])
+        finally:
+            conn.set_trace_callback(None)
+        # 全文索引由触发器在同一事务内写入，total_changes 会计入，这里直接统计提交次数
+        self.assertEqual(sum(1 for s in statements if s.strip().upper() == "COMMIT"), 1)
+        self.assertEqual(conn.execute("SELECT COUNT(*) FROM videos").fetchone()[0], 50)
+        self.assertEqual(conn.execute("SELECT COUNT(*) FROM video_stats_history").fetchone()[0], 50)
+        self.assertFalse(conn.in_transaction)
+
+    def test_save_news_bulk_keeps_id(self):
+        """新闻按url更新时保留原id"""
+        news = NewsContent(
+            title="新闻", content="正文", source="sina", publish_time=datetime.now(),
+            url="https://example.com/1", category="financial", content_hash="h1"
+        )
+        self.db.save_news_bulk([news])
+        first_id = self.db.get_latest_content('news', days=1)[0]['id']
+
+        news.content_hash = "h2"
+        self.assertEqual(self.db.save_news_bulk([news]), [SAVE_UPDATED])
+        rows = self.db.get_latest_content('news', days=1)
+        self.assertEqual(len(rows), 1)
+        self.assertEqual(rows[0]['id'], first_id)
+
+    def test_save_analysis_results_bulk(self):
+        """批量保存分析结果"""
+        results = [make_result(f"BV{i}") for i in range(3)]
+        self.assertEqual(self.db.save_analysis_results_bulk(results), [SAVE_INSERTED] * 3)
+        self.assertEqual(len(self.db.get_analysis_results(days=1)), 3)
+
+    def test_analysis_results_upsert(self):
+        """重复分析原地更新，不追加新行"""
+        result = make_result("BV1", content_hash="h1")
+        self.assertEqual(self.db.save_analysis_results_bulk([result]), [SAVE_INSERTED])
+        self.assertEqual(self.db.save_analysis_results_bulk([result]), [SAVE_UNCHANGED])
+
+        result.content_hash = "h2"
+        result.sentiment_score = 0.8
+        self.assertEqual(self.db.save_analysis_results_bulk([result]), [SAVE_UPDATED])
+
+        rows = self.db.get_analysis_results(days=1)
+        self.assertEqual(len(rows), 1)
+        self.assertEqual(rows[0]['sentiment_score'], 0.8)
+
+    def test_pending_analysis(self):
+        """只返回新增或变化的内容"""
+        self.db.save_videos_bulk([make_video("BV1"), make_video("BV2")])
+        pending = self.db.get_pending_analysis('video', "1")
+        self.assertEqual({v['bvid'] for v in pending}, {"BV1", "BV2"})
+
+        self.db.save_analysis_results_bulk([
+            make_result("BV1", content_hash="hash"),
+            make_result("BV2", content_hash="hash"),
+        ])
+        self.assertEqual(self.db.get_pending_analysis('video', "1"), [])
+
+        # 内容变化
+        self.db.save_videos_bulk([make_video("BV2", content_hash="changed")])
+        pending = self.db.get_pending_analysis('video', "1")
+        self.assertEqual([v['bvid'] for v in pending], ["BV2"])
+
+        # 分析器版本变化
+        self.assertEqual(len(self.db.get_pending_analysis('video', "2")), 2)
+
+    def test_pending_analysis_news(self):
+        """新闻以自增id作为content_id"""
+        news = NewsContent(
+            title="新闻", content="正文", source="sina", publish_time=datetime.now(),
+            url="https://example.com/1", category="financial", content_hash="h1"
+        )
+        self.db.save_news_bulk([news])
+        pending = self.db.get_pending_analysis('news', "1")
+        self.assertEqual(len(pending), 1)
+
+        self.db.save_analysis_results_bulk([
+            make_result(str(pending[0]['id']), content_type='news', content_hash="h1")
+        ])
+        self.assertEqual(self.db.get_pending_analysis('news', "1"), [])
+
+    def test_latest_publish_time(self):
+        """按UP主获取内容水位"""
+        self.assertIsNone(self.db.get_latest_publish_time('video', up_name="测试UP"))
+        older, newer = make_video("BV1"), make_video("BV2")
+        older.publish_time = datetime(2024, 1, 1, 8, 0)
+        newer.publish_time = datetime(2024, 1, 2, 9, 30)
+        self.db.save_videos_bulk([older, newer])
+
+        self.assertEqual(
+            self.db.get_latest_publish_time('video', up_name="测试UP"),
+            datetime(2024, 1, 2, 9, 30)
+        )
+        self.assertIsNone(self.db.get_latest_publish_time('video', up_name="其他UP"))
+
+    def test_migration_deduplicates_analysis_results(self):
+        """旧库迁移时去除重复的分析结果"""
+        legacy_path = os.path.join(self.tmp_dir, "legacy.db")
+        conn = sqlite3.connect(legacy_path)
+        conn.execute('''
+            CREATE TABLE analysis_results (
+                id INTEGER PRIMARY KEY AUTOINCREMENT,
+                content_id TEXT, content_type TEXT, sentiment_score REAL,
+                key_points TEXT, investment_signals TEXT, risk_level TEXT,
+                confidence REAL, analysis_time TIMESTAMP,
+                created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+            )
+        ''')
+        conn.executemany(
+            "INSERT INTO analysis_results (content_id, content_type, sentiment_score) VALUES (?, ?, ?)",
+            [("BV1", "video", 0.1), ("BV1", "video", 0.2), ("BV2", "video", 0.3)]
+        )
+        conn.commit()
+        conn.close()
+
+        db = DatabaseManager(legacy_path)
+        try:
+            rows = db.pool.get_connection().execute(
+                "SELECT content_id, sentiment_score FROM analysis_results ORDER BY content_id"
+            ).fetchall()
+            self.assertEqual(rows, [("BV1", 0.2), ("BV2", 0.3)])
+        finally:
+            db.close()
+
+
+class TestStreamingQueries(DatabaseTestCase):
+    """流式查询测试类"""
+
+    def setUp(self):
+        """测试初始化"""
+        super().setUp()
+        self.db.save_videos_bulk([make_video(f"BV{i}", view_count=i) for i in range(5)])
+        self.db.save_analysis_results_bulk([make_result("BV1")])
+
+    def test_records_in_chunks(self):
+        """分块读取全部行，记录可按属性访问且没有 __dict__"""
+        rows = list(self.db.iter_content('video', days=1, chunk_size=2))
+        self.assertEqual(sorted(row.bvid for row in rows), [f"BV{i}" for i in range(5)])
+        self.assertEqual(sum(row.view_count for row in rows), 10)
+        self.assertFalse(hasattr(rows[0], '__dict__'))
+        self.assertEqual(type(rows[0]).__name__, "VideoRow")
+
+    def test_row_types(self):
+        """sqlite3.Row 和字典两种行类型"""
+        row = next(self.db.iter_content('video', days=1, row_type='row'))
+        self.assertIsInstance(row, sqlite3.Row)
+        self.assertEqual(row['up_name'], "测试UP")
+        row = next(self.db.iter_content('video', days=1, row_type='dict'))
+        self.assertEqual(row['tags'], '["财经"]')
+        with self.assertRaises(ValueError):
+            next(self.db.iter_content('video', days=1, row_type='row', decode_json=True))
+        with self.assertRaises(ValueError):
+            next(self.db.iter_content('video', days=1, row_type='object'))
+
+    def test_decode_json(self):
+        """按需解码JSON列"""
+        video = next(self.db.iter_content('video', days=1, decode_json=True))
+        self.assertEqual(video.tags, ["财经"])
+        result = next(self.db.iter_analysis_results('video', days=1, decode_json=True))
+        self.assertEqual((result.content_id, result.key_points, result.investment_signals),
+                         ("BV1", [], []))
+
+    def test_get_methods_unchanged(self):
+        """列表接口返回与流式字典相同的结果"""
+        self.assertEqual(
+            self.db.get_latest_content('video', days=1),
+            list(self.db.iter_content('video', days=1, row_type='dict'))
+        )
+        self.assertEqual(len(self.db.get_analysis_results(days=1)), 1)
+
+    def test_closing_generator_releases_cursor(self):
+        """提前结束遍历后仍可写入"""
+        rows = self.db.iter_content('video', days=1, chunk_size=1)
+        next(rows)
+        rows.close()
+        self.assertEqual(self.db.save_videos_bulk([make_video("BV9")]), [SAVE_INSERTED])
+
+
+class TestVideoStatsHistory(DatabaseTestCase):
+    """互动数据时间序列测试类"""
+
+    def setUp(self):
+        """测试初始化"""
+        super().setUp()
+        self.db.save_videos_bulk([make_video("BV1")])
+        # 清空保存视频时写入的样本，使用固定时间的样本测试
+        self.db.pool.get_connection().execute("DELETE FROM video_stats_history")
+        self.base = 1700000000
+
+    def record(self, offset: int, views: int, likes: int = 0) -> int:
+        """在 base + offset 时刻记录一个样本"""
+        return self.db.record_video_stats([("BV1", views, likes, 0, 0)], self.base + offset)
+
+    def test_unchanged_samples_skipped(self):
+        """数值未变化的样本不写入"""
+        self.assertEqual(self.record(0, 100), 1)
+        self.assertEqual(self.record(60, 100), 0)
+        self.assertEqual(self.record(120, 150), 1)
+        self.assertEqual(self.record(180, 150, likes=1), 1)
+
+        series = self.db.get_video_stats_history("BV1")
+        self.assertEqual(series['sample_time'], [self.base, self.base + 120, self.base + 180])
+        self.assertEqual(series['view_count'], [100, 150, 150])
+
+        # 视频表同步为最新数值
+        video = self.db.get_latest_content('video', days=1)[0]
+        self.assertEqual(video['view_count'], 150)
+
+    def test_save_videos_bulk_appends_sample(self):
+        """保存视频时在同一事务内追加样本"""
+        self.db.save_videos_bulk([make_video("BV1", view_count=300)])
+        self.assertEqual(self.db.get_video_stats_history("BV1")['view_count'], [300])
+
+    def test_range_query(self):
+        """按时间范围查询"""
+        for i, views in enumerate([100, 200, 300, 400]):
+            self.record(i * 3600, views)
+        since = datetime.fromtimestamp(self.base + 3600)
+        until = datetime.fromtimestamp(self.base + 7200)
+        series = self.db.get_video_stats_history("BV1", since, until)
+        self.assertEqual(series['view_count'], [200, 300])
+
+    def test_downsample_and_velocity(self):
+        """降采样取每个桶最后一个样本，并计算增速"""
+        base = (self.base // 3600) * 3600
+        self.base = base
+        self.record(0, 100)
+        self.record(1800, 150)
+        self.record(3600, 300)
+        self.record(5400, 400)
+
+        series = self.db.get_video_stats_downsampled("BV1", 3600)
+        self.assertEqual(series['sample_time'], [base, base + 3600])
+        self.assertEqual(series['view_count'], [150, 400])
+
+        velocity = self.db.get_view_velocity("BV1", 3600)
+        self.assertEqual(velocity['views_per_hour'], [250.0])
+
+
+class TestQueryPlans(DatabaseTestCase):
+    """热点查询执行计划测试类"""
+
+    def setUp(self):
+        """测试初始化"""
+        super().setUp()
+        self.since = datetime.now().isoformat()
+
+    def explain(self, sql: str, params: tuple) -> str:
+        """返回执行计划文本"""
+        rows = self.db.pool.get_connection().execute(f"EXPLAIN QUERY PLAN {sql}", params)
+        return "\n".join(row[-1] for row in rows)
+
+    def assert_uses_index(self, sql: str, params: tuple):
+        """断言查询走索引且不需要额外排序"""
+        plan = self.explain(sql, params)
+        self.assertIn("USING INDEX", plan.replace("COVERING ", ""), plan)
+        self.assertNotIn("TEMP B-TREE", plan, plan)
+
+    def test_schema_version(self):
+        """迁移后记录最新版本，重复初始化不报错"""
+        latest = self.db.SCHEMA_MIGRATIONS[-1][0]
+        self.assertEqual(self.db.get_schema_version(), latest)
+        self.db.init_database()
+        self.assertEqual(self.db.get_schema_version(), latest)
+
+    def test_latest_content_queries_use_index(self):
+        """最近内容查询走索引"""
+        for content_type in ('video', 'dynamic', 'news'):
+            for up_name in (None, "测试UP"):
+                with self.subTest(content_type=content_type, up_name=up_name):
+                    self.assert_uses_index(*self.db.build_latest_content_query(
+                        content_type, up_name, self.since
+                    ))
+
+    def test_analysis_queries_use_index(self):
+        """分析结果查询走索引"""
+        for content_type in (None, 'video'):
+            with self.subTest(content_type=content_type):
+                self.assert_uses_index(*self.db.build_analysis_results_query(
+                    content_type, self.since
+                ))
+
+        self.assert_uses_index(
+            "SELECT * FROM analysis_results WHERE content_id = ? AND content_type = ?",
+            ("BV1", "video")
+        )
+
+
+class TestDailyAggregates(DatabaseTestCase):
+    """每日聚合表测试类"""
+
+    def setUp(self):
+        """测试初始化"""
+        super().setUp()
+        self.today = datetime.now().date().isoformat()
+        self.bullish = {'type': '买入', 'keyword': '买入', 'direction': 'bullish'}
+
+    def analyze(self, content_id: str, score: float, risk: str, signals=None):
+        """保存一条视频分析结果"""
+        result = make_result(content_id)
+        result.sentiment_score = score
+        result.risk_level = risk
+        result.investment_signals = signals or []
+        self.db.save_analysis_results_bulk([result])
+
+    def video_totals(self) -> dict:
+        """视频类型的全部聚合值"""
+        rows = self.db.get_daily_aggregates(content_type='video')
+        return {column: sum(row[column] for row in rows) for column in AGGREGATE_COLUMNS}
+
+    def test_counts_follow_writes(self):
+        """批量写入后聚合与内容表一致"""
+        self.db.save_videos_bulk([make_video("BV1"), make_video("BV2")])
+        self.analyze("BV1", 0.5, "低", [self.bullish])
+
+        rows = self.db.get_daily_aggregates(since=self.today)
+        self.assertEqual(len(rows), 1)
+        self.assertEqual(rows[0]['day'], self.today)
+        self.assertEqual(rows[0]['content_count'], 2)
+        self.assertEqual(rows[0]['analysis_count'], 1)
+        self.assertEqual(rows[0]['bullish_signals'], 1)
+        self.assertEqual(rows[0]['low_risk'], 1)
+        self.assertAlmostEqual(rows[0]['avg_sentiment'], 0.5)
+
+    def test_reanalysis_replaces_contribution(self):
+        """重新分析替换旧结果的贡献而不是重复累加"""
+        self.db.save_videos_bulk([make_video("BV1")])
+        self.analyze("BV1", 0.5, "低", [self.bullish])
+        self.analyze("BV1", -0.2, "高")
+
+        totals = self.video_totals()
+        self.assertEqual(totals['analysis_count'], 1)
+        self.assertAlmostEqual(totals['sentiment_sum'], -0.2)
+        self.assertEqual((totals['high_risk'], totals['low_risk']), (1, 0))
+        self.assertEqual(totals['signal_count'], 0)
+
+    def test_delete_and_move_content(self):
+        """删除内容扣减计数，修改发布日期时连同分析结果迁移"""
+        self.db.save_videos_bulk([make_video("BV1"), make_video("BV2")])
+        self.analyze("BV1", 0.5, "中等")
+        with self.db.transaction() as cursor:
+            cursor.execute("DELETE FROM videos WHERE bvid = 'BV2'")
+            cursor.execute("UPDATE videos SET publish_time = '2024-01-01T08:00:00' WHERE bvid = 'BV1'")
+
+        self.assertEqual(self.db.get_daily_aggregates(since=self.today), [])
+        moved = self.db.get_daily_aggregates(until='2024-01-02')
+        self.assertEqual(len(moved), 1)
+        self.assertEqual(moved[0]['day'], '2024-01-01')
+        self.assertEqual((moved[0]['content_count'], moved[0]['medium_risk']), (1, 1))
+
+    def test_by_author(self):
+        """按作者细分"""
+        other = make_video("BV2")
+        other.up_name = "另一个UP"
+        self.db.save_videos_bulk([make_video("BV1"), other])
+        authors = {row['author']: row['content_count']
+                   for row in self.db.get_daily_aggregates(by_author=True)}
+        self.assertEqual(authors, {"测试UP": 1, "另一个UP": 1})
+
+    def test_migration_backfills_existing_data(self):
+        """从版本5升级时由已有数据回填"""
+        self.db.save_videos_bulk([make_video("BV1")])
+        self.analyze("BV1", 0.5, "低")
+        with self.db.transaction() as cursor:
+            cursor.execute("DROP TABLE daily_aggregates")
+            for table in ('videos', 'dynamics', 'news', 'analysis_results'):
+                for suffix in ('ai', 'ad', 'au'):
+                    cursor.execute(f"DROP TRIGGER {table}_agg_{suffix}")
+            cursor.execute("PRAGMA user_version = 5")
+        self.db.close()
+
+        self.db = DatabaseManager(self.db_path)
+        totals = self.video_totals()
+        self.assertEqual((totals['content_count'], totals['analysis_count'], totals['low_risk']), (1, 1, 1))
+
+    def test_statistics(self):
+        """内容总数来自聚合表，今日新增按入库时间统计，分析总数为全部分析结果"""
+        old = make_video("BV2")
+        old.publish_time = datetime(2024, 1, 1)
+        self.db.save_videos_bulk([make_video("BV1"), old, make_video("BV3")])
+        with self.db.transaction() as cursor:
+            cursor.execute("UPDATE videos SET created_at = '2024-01-01 00:00:00' WHERE bvid = 'BV3'")
+        self.analyze("BV1", 0.5, "低")
+        self.db.save_analysis_results_bulk([make_result("BV404")])
+
+        stats = self.db.get_statistics()
+        self.assertEqual(stats['total_videos'], 3)
+        self.assertEqual(stats['today_videos'], 2)  # 今天入库的旧视频计入，之前入库的今日发布视频不计入
+        self.assertEqual(stats['total_dynamics'], 0)
+        self.assertEqual(stats['total_analysis'], 2)
+
+    def test_today_statistics_use_created_index(self):
+        """今日新增只按索引读取今天入库的行"""
+        for table in ('videos', 'dynamics', 'news'):
+            plan = "\n".join(row[-1] for row in self.db.pool.get_connection().execute(
+                f"EXPLAIN QUERY PLAN SELECT COUNT(*) FROM {table} WHERE created_at >= ?", ("2024-01-01",)
+            ))
+            self.assertIn(f"idx_{table}_created", plan)
+
+    def test_statistics_skip_content_tables(self):
+        """统计查询只读取聚合表"""
+        cursor = self.db.pool.get_connection().execute(
+            "EXPLAIN QUERY PLAN SELECT content_type, SUM(content_count) FROM daily_aggregates "
+            "GROUP BY content_type"
+        )
+        plan = "\n".join(row[-1] for row in cursor)
+        for table in ('videos', 'dynamics', 'news', 'analysis_results'):
+            self.assertNotIn(f" {table}", plan)
+
+    def test_summary_statistics(self):
+        """报告统计摘要"""
+        self.db.save_videos_bulk([make_video("BV1"), make_video("BV2")])
+        self.analyze("BV1", 0.5, "低", [self.bullish])
+
+        summary = ReportGenerator(self.db, None).generate_summary_statistics(days=7)
+        self.assertEqual(summary['until'], self.today)
+        self.assertEqual(summary['content_counts']['video'], 2)
+        self.assertEqual(summary['analysis_count'], 1)
+        self.assertEqual(summary['avg_sentiment'], 0.5)
+        self.assertEqual(summary['signals'], {'total': 1, 'bullish': 1, 'bearish': 0})
+        self.assertEqual(summary['risk_distribution'], {'高': 0, '中等': 0, '低': 1})
+        self.assertEqual([day['day'] for day in summary['daily']], [self.today])
+        self.assertEqual(summary['top_authors'][0]['author'], "测试UP")
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,234 @@
+"""
+近似重复索引测试
+Near-Duplicate Index Tests
+"""
+
+import asyncio
+import os
+import unittest
+from datetime import datetime, timedelta
+from unittest.mock import patch
+
+import pandas as pd
+
+from src.core.analysis_executor import AnalysisExecutor
+from src.core import history_store
+from src.core.database import DynamicContent
+from src.core.dedup_index import NearDuplicateIndex
+from src.core.history_store import HistoryStore
+from src.core.report_generator import ReportGenerator
+from src.utils.text_processor import TextProcessor
+from tests.factories import DatabaseTestCase, SystemTestCase, TempDirTestCase, make_result, make_signal
+
+STORY = "央行宣布全面降准0.5个百分点，释放长期资金约1万亿元，市场普遍认为这是重大利好，A股有望迎来一波反弹行情。"
+REPOST = "转发：" + STORY.replace("一波", "") + "大家怎么看？"
+OTHER = "美联储维持利率不变，鲍威尔表示将继续关注通胀数据，美股三大指数集体收涨，科技股领涨。"
+
+
+class TestSimilarity(unittest.TestCase):
+    """文本相似度测试类"""
+
+    def test_minhash_estimates_jaccard(self):
+        """MinHash签名的一致比例接近真实Jaccard系数"""
+        processor = TextProcessor()
+        exact = processor.calculate_similarity(STORY, REPOST)
+        estimate = (processor.compute_minhash(STORY) == processor.compute_minhash(REPOST)).mean()
+        self.assertGreater(exact, 0.6)
+        self.assertAlmostEqual(estimate, exact, delta=0.15)
+        self.assertEqual(processor.calculate_similarity(STORY, OTHER), 0.0)
+        self.assertEqual(processor.calculate_similarity("", STORY), 0.0)
+
+
+class TestNearDuplicateIndex(TempDirTestCase):
+    """近似重复索引测试类"""
+
+    def setUp(self):
+        """测试初始化"""
+        super().setUp()
+        self.path = os.path.join(self.tmp_dir, "test.dedup.db")
+        self.index = NearDuplicateIndex(self.path)
+
+    def tearDown(self):
+        """测试清理"""
+        self.index.close()
+
+    def test_reposts_share_cluster(self):
+        """同一批内的转发归入先出现内容的簇"""
+        clusters = self.index.assign([
+            ("D1", "dynamic", STORY, "h1"),
+            ("BV1", "video", REPOST, "h2"),
+            ("3", "news", OTHER, "h3"),
+            ("D2", "dynamic", "转发动态", "h4"),
+        ])
+        self.assertEqual(clusters[("BV1", "video")], ("D1", "dynamic"))
+        self.assertEqual(clusters[("3", "news")], ("3", "news"))
+        self.assertEqual(clusters[("D2", "dynamic")], ("D2", "dynamic"))
+
+    def test_persisted_across_instances(self):
+        """索引持久化，重新打开后新内容仍能匹配到旧簇"""
+        self.index.assign([("D1", "dynamic", STORY, "h1")])
+        self.index.close()
+
+        self.index = NearDuplicateIndex(self.path)
+        clusters = self.index.assign([("9", "news", REPOST, "h9")])
+        self.assertEqual(clusters[("9", "news")], ("D1", "dynamic"))
+        self.assertEqual(
+            self.index.get_clusters([("9", "news"), ("X", "video")]),
+            {("9", "news"): ("D1", "dynamic"), ("X", "video"): ("X", "video")}
+        )
+
+    def test_reindex_changed_content(self):
+        """内容变化后替换旧分带，不再与原簇匹配"""
+        self.index.assign([("D1", "dynamic", STORY, "h1"), ("D2", "dynamic", REPOST, "h2")])
+        self.index.assign([("D2", "dynamic", OTHER, "h2b")])
+        self.assertEqual(self.index.get_clusters([("D2", "dynamic")])[("D2", "dynamic")], ("D2", "dynamic"))
+
+    def test_collapse_reposts(self):
+        """报告中合并转发并统计转发数"""
+        self.index.assign([("D1", "dynamic", STORY, "h1"), ("D2", "dynamic", REPOST, "h2")])
+        now = datetime.now()
+        rows = pd.DataFrame({'content_id': ["D1", "D2", "3"], 'content_type': ["dynamic", "dynamic", "news"],
+                             'publish_time': [now - timedelta(hours=2), now - timedelta(hours=1), now]})
+        collapsed = ReportGenerator(None, self.index).collapse_reposts(rows)
+        self.assertEqual(list(zip(collapsed['content_id'], collapsed['repost_count'])), [("D1", 1), ("3", 0)])
+
+    def test_collapse_reposts_keeps_earliest_published(self):
+        """转发在数据中排在原文之前时，仍保留最先发布的原文"""
+        self.index.assign([("D1", "dynamic", STORY, "h1"), ("BV1", "video", REPOST, "h2")])
+        now = datetime.now()
+        rows = pd.DataFrame({'content_id': ["D1", "BV1", "3"], 'content_type': ["dynamic", "video", "news"],
+                             'publish_time': [now - timedelta(hours=1), now - timedelta(hours=2), now]})
+        rows = rows.sort_values('content_type', ascending=False, ignore_index=True)
+        self.assertEqual(list(rows['content_id']), ["BV1", "3", "D1"])
+        collapsed = ReportGenerator(None, self.index).collapse_reposts(rows)
+        self.assertEqual(list(zip(collapsed['content_id'], collapsed['repost_count'])), [("BV1", 1), ("3", 0)])
+
+        rows.loc[rows['content_id'] == "BV1", 'publish_time'] = now - timedelta(minutes=30)
+        collapsed = ReportGenerator(None, self.index).collapse_reposts(rows)
+        self.assertEqual(list(zip(collapsed['content_id'], collapsed['repost_count'])), [("3", 0), ("D1", 1)])
+
+    def test_cluster_members_since(self):
+        """只返回 since 以来入索引的重复簇成员"""
+        self.index.assign([("D1", "dynamic", STORY, "h1"), ("D2", "dynamic", REPOST, "h2")])
+        self.assertEqual(set(self.index.get_cluster_members(datetime.now() - timedelta(hours=1))),
+                         {("D1", "dynamic"), ("D2", "dynamic")})
+        self.assertEqual(self.index.get_cluster_members(datetime.now() + timedelta(hours=1)), {})
+
+
+class TestAnalyzeRepresentatives(SystemTestCase):
+    """按簇分析测试类"""
+
+    def setUp(self):
+        """测试初始化"""
+        super().setUp()
+        self.system.analysis_executor = AnalysisExecutor(max_workers=0)
+        self.addCleanup(self.system.analysis_executor.shutdown)
+
+    def save_dynamics(self, texts):
+        self.system.db_manager.save_dynamics_bulk([
+            DynamicContent(f"D{i}", text, datetime.now(), "测试UP", 0, 0, 0, f"h{i}")
+            for i, text in enumerate(texts)
+        ])
+
+    def test_duplicates_reuse_representative_result(self):
+        """重复簇只分析代表，其余内容复用代表结果"""
+        self.assertTrue(self.system.dedup_index.db_path.endswith("test.dedup.db"))
+        self.save_dynamics([STORY, REPOST, OTHER])
+        analyzed = []
+        analyze = self.system.analysis_executor.analyze
+
+        async def tracking_analyze(items):
+            analyzed.extend(item[0] for item in items)
+            return await analyze(items)
+
+        with patch.object(self.system.analysis_executor, 'analyze', tracking_analyze):
+            asyncio.run(self.system.analyze_content())
+
+        # D0 与 D1 互为转发，只分析其中先入索引的一条
+        self.assertEqual(len(analyzed), 2)
+        self.assertIn("D2", analyzed)
+        results = self.system.db_manager.get_analysis_results_by_keys(
+            [("D0", "dynamic"), ("D1", "dynamic")]
+        )
+        self.assertEqual(results[("D1", "dynamic")].sentiment_score, results[("D0", "dynamic")].sentiment_score)
+        self.assertEqual(
+            (results[("D0", "dynamic")].content_hash, results[("D1", "dynamic")].content_hash), ("h0", "h1")
+        )
+        self.assertEqual(self.system.db_manager.get_pending_analysis(
+            'dynamic', self.system.analyzer.ANALYZER_VERSION), [])
+
+    def test_pending_content_analyzed_page_by_page(self):
+        """待分析内容按页读取，每页保存后再读下一页，直到读完"""
+        self.save_dynamics([f"第{i}条动态" for i in range(5)])
+        pages = []
+        analyze = self.system.analysis_executor.analyze
+
+        async def tracking_analyze(items):
+            pages.append(len(items))
+            return await analyze(items)
+
+        with patch.object(self.system, 'PENDING_ANALYSIS_PAGE', {'video': 1, 'dynamic': 2, 'news': 1}), \
+                patch.object(self.system.analysis_executor, 'analyze', tracking_analyze):
+            asyncio.run(self.system.analyze_content())
+        self.assertEqual(pages, [2, 2, 1])
+        self.assertEqual(self.system.db_manager.get_pending_analysis(
+            'dynamic', self.system.analyzer.ANALYZER_VERSION), [])
+
+    def test_copied_result_gets_current_analysis_time(self):
+        """复用的分析结果记录本次的分析时间，而不是代表结果的旧时间"""
+        source = make_result(
+            "D0", "dynamic", 0.3, content_hash="h0",
+            analyzer_version=self.system.analyzer.ANALYZER_VERSION,
+            analysis_time=datetime.now() - timedelta(days=10)
+        )
+        copied = asyncio.run(self.system.copy_cluster_results(
+            [("D1", "dynamic", REPOST, "h1")], {("D1", "dynamic"): ("D0", "dynamic")}, [source]
+        ))
+        self.assertEqual([(result.content_id, result.sentiment_score) for result in copied], [("D1", 0.3)])
+        self.assertGreater(copied[0].analysis_time, datetime.now() - timedelta(minutes=1))
+
+
+class TestRepostReports(DatabaseTestCase):
+    """报告中转发只计一次测试类"""
+
+    def setUp(self):
+        """测试初始化: D0 与 D1 为同一重复簇，三条内容都带同一个买入信号"""
+        super().setUp()
+        self.index = NearDuplicateIndex(os.path.join(self.tmp_dir, "test.dedup.db"))
+        published = datetime.now() - timedelta(days=1)
+        texts = [STORY, REPOST, OTHER]
+        self.db.save_dynamics_bulk([
+            DynamicContent(f"D{i}", text, published, "测试UP", 0, 0, 0, f"h{i}")
+            for i, text in enumerate(texts)
+        ])
+        self.index.assign([(f"D{i}", "dynamic", text, f"h{i}") for i, text in enumerate(texts)])
+        buy = make_signal({'name': '贵州茅台', 'kind': 'ticker'})
+        self.db.save_analysis_results_bulk([
+            make_result(f"D{i}", "dynamic", 0.5, "低", [buy], content_hash=f"h{i}") for i in range(3)
+        ])
+        self.generator = ReportGenerator(
+            self.db, self.index, history_store=HistoryStore(self.db, os.path.join(self.tmp_dir, "history"))
+        )
+
+    def tearDown(self):
+        """测试清理"""
+        self.index.close()
+
+    def test_period_report_counts_cluster_once(self):
+        """周报中一个重复簇只计一条内容和一次信号"""
+        with patch.object(history_store, 'pq', None):
+            report = self.generator.generate_weekly_report()
+        self.assertIn("动态 2", report)
+        self.assertIn("已合并转发: 1 条", report)
+        self.assertIn("贵州茅台 买入 2次 (偏多)", report)
+
+    def test_summary_statistics_count_cluster_signals_once(self):
+        """统计摘要的信号数扣除转发"""
+        summary = self.generator.generate_summary_statistics(days=7)
+        self.assertEqual(summary['collapsed_reposts'], 1)
+        self.assertEqual(summary['signals'], {'total': 2, 'bullish': 2, 'bearish': 0})
+        self.assertEqual(ReportGenerator(self.db).generate_summary_statistics(days=7)['signals']['total'], 3)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,234 @@
+"""
+邮件通知模块测试
+Email Notifier Tests
+"""
+
+import base64
+import os
+import shutil
+import socketserver
+import tempfile
+import threading
+import unittest
+from email import message_from_string
+from email.header import decode_header, make_header
+
+from src.utils.email_notifier import EmailNotifier
+
+
+class StubSMTPServer(socketserver.ThreadingTCPServer):
+    """本地SMTP桩服务器（aiosmtpd风格，只实现通知器用到的命令）
+
+    记录连接数、登录数和收到的邮件；fail_data 次数内 DATA 返回临时错误。
+    """
+    daemon_threads = True
+    allow_reuse_address = True
+
+    def __init__(self, username: str = "bot@example.com", password: str = "secret"):
+        super().__init__(("127.0.0.1", 0), StubSMTPHandler)
+        self.credentials = f"\0{username}\0{password}"
+        self.connections = 0
+        self.logins = 0
+        self.fail_data = 0
+        self.messages = []
+        self.lock = threading.Lock()
+
+    @property
+    def port(self) -> int:
+        return self.server_address[1]
+
+
+class StubSMTPHandler(socketserver.StreamRequestHandler):
+    """单个SMTP会话"""
+
+    def reply(self, line: str):
+        self.wfile.write(f"{line}\r\n".encode())
+
+    def handle(self):
+        server = self.server
+        with server.lock:
+            server.connections += 1
+        self.reply("220 stub ESMTP")
+        recipients = []
+        while True:
+            line = self.rfile.readline().decode().rstrip("\r\n")
+            if not line:
+                return
+            command, _, argument = line.partition(" ")
+            command = command.upper()
+            if command == "EHLO":
+                self.reply("250-stub")
+                self.reply("250 AUTH PLAIN")
+            elif command == "AUTH":
+                credentials = base64.b64decode(argument.split()[1]).decode()
+                if credentials == server.credentials:
+                    with server.lock:
+                        server.logins += 1
+                    self.reply("235 Authentication successful")
+                else:
+                    self.reply("535 Authentication failed")
+            elif command == "MAIL":
+                recipients = []
+                self.reply("250 OK")
+            elif command == "RCPT":
+                recipients.append(argument)
+                self.reply("250 OK")
+            elif command == "DATA":
+                self.reply("354 End data with <CR><LF>.<CR><LF>")
+                lines = []
+                while True:
+                    data_line = self.rfile.readline().decode().rstrip("\r\n")
+                    if data_line == ".":
+                        break
+                    lines.append(data_line[1:] if data_line.startswith("..") else data_line)
+                with server.lock:
+                    if server.fail_data > 0:
+                        server.fail_data -= 1
+                        self.reply("451 Try again later")
+                        continue
+                    server.messages.append(message_from_string("\n".join(lines)))
+                self.reply("250 OK")
+            elif command in ("RSET", "NOOP"):
+                self.reply("250 OK")
+            elif command == "QUIT":
+                self.reply("221 Bye")
+                return
+            else:
+                self.reply("502 Command not implemented")
+
+
+def subject_of(message) -> str:
+    """解码邮件主题"""
+    return str(make_header(decode_header(message['Subject'])))
+
+
+class TestEmailNotifier(unittest.TestCase):
+    """邮件发送队列测试类"""
+
+    def setUp(self):
+        """测试初始化"""
+        self.tmp_dir = tempfile.mkdtemp()
+        self.queue_path = os.path.join(self.tmp_dir, "mail_queue.db")
+        self.server = StubSMTPServer()
+        threading.Thread(target=self.server.serve_forever, daemon=True).start()
+        self.notifiers = []
+
+    def tearDown(self):
+        """测试清理"""
+        for notifier in self.notifiers:
+            notifier.close(timeout=1)
+        self.server.shutdown()
+        self.server.server_close()
+        shutil.rmtree(self.tmp_dir, ignore_errors=True)
+
+    def make_notifier(self, port: int = None, **kwargs) -> EmailNotifier:
+        """创建连接桩服务器的通知器"""
+        options = dict(queue_path=self.queue_path, starttls=False, batch_window=0.2,
+                       retry_backoff=0.05, idle_timeout=5, timeout=2)
+        options.update(kwargs)
+        notifier = EmailNotifier("127.0.0.1", port or self.server.port,
+                                 "bot@example.com", "secret", **options)
+        self.notifiers.append(notifier)
+        return notifier
+
+    def test_connection_reused(self):
+        """多封邮件复用一个已认证连接"""
+        notifier = self.make_notifier()
+        self.assertTrue(notifier.send_report("user@example.com", "日报", "报告内容"))
+        notifier.send_notification("user@example.com", "通知", "通知内容")
+        self.assertTrue(notifier.flush(timeout=5))
+        notifier.send_notification("user@example.com", "通知2", "通知内容")
+        self.assertTrue(notifier.flush(timeout=5))
+
+        self.assertEqual([subject_of(m) for m in self.server.messages], ["日报", "通知", "通知2"])
+        self.assertEqual(self.server.connections, 1)
+        self.assertEqual(self.server.logins, 1)
+
+    def test_report_attachment(self):
+        """报告附带附件"""
+        path = os.path.join(self.tmp_dir, "report.csv")
+        with open(path, "w", encoding="utf-8") as f:
+            f.write("a,b\n1,2\n")
+        notifier = self.make_notifier()
+        notifier.send_report("user@example.com", "日报", "见附件", attachments=[path])
+        self.assertTrue(notifier.flush(timeout=5))
+
+        parts = self.server.messages[0].get_payload()
+        self.assertEqual(parts[1].get_filename(), "report.csv")
+        self.assertEqual(parts[1].get_payload(decode=True), b"a,b\n1,2\n")
+
+    def test_alerts_batched(self):
+        """合并窗口内的警报合并为一封"""
+        notifier = self.make_notifier(batch_window=0.5)
+        for index in range(3):
+            notifier.send_alert("user@example.com", f"警报{index}")
+        self.assertTrue(notifier.flush(timeout=5))
+
+        self.assertEqual(len(self.server.messages), 1)
+        message = self.server.messages[0]
+        self.assertEqual(subject_of(message), "财经智能分析警报 (3条)")
+        body = message.get_payload()[0].get_payload(decode=True).decode("utf-8")
+        self.assertIn("[3] 警报2", body)
+
+    def test_alert_waits_for_window(self):
+        """警报在合并窗口结束后自动发出"""
+        notifier = self.make_notifier(batch_window=0.2)
+        notifier.send_alert("user@example.com", "警报")
+        self.assertEqual(self.server.messages, [])
+        for _ in range(50):
+            if self.server.messages:
+                break
+            threading.Event().wait(0.05)
+        self.assertEqual(subject_of(self.server.messages[0]), "财经智能分析警报")
+
+    def test_retry_with_backoff(self):
+        """临时错误后退避重试"""
+        self.server.fail_data = 2
+        notifier = self.make_notifier()
+        notifier.send_notification("user@example.com", "通知", "内容")
+        for _ in range(100):
+            if self.server.messages:
+                break
+            threading.Event().wait(0.05)
+
+        self.assertEqual(len(self.server.messages), 1)
+        self.assertEqual(notifier.stats['retries'], 2)
+        self.assertEqual(notifier.pending_count(), 0)
+
+    def test_gives_up_after_max_retries(self):
+        """超过最大次数后放弃并保留在发件箱中"""
+        self.server.fail_data = 10
+        notifier = self.make_notifier(max_retries=2)
+        notifier.send_notification("user@example.com", "通知", "内容")
+        for _ in range(100):
+            if notifier.stats['failed']:
+                break
+            threading.Event().wait(0.05)
+
+        self.assertEqual(notifier.stats['failed'], 1)
+        self.assertEqual(notifier.pending_count(), 0)
+        self.assertEqual(self.server.messages, [])
+
+    def test_unsent_messages_survive_restart(self):
+        """服务器不可用时邮件留在发件箱，重启后继续投递"""
+        closed_port = self.server.port
+        self.server.shutdown()
+        self.server.server_close()
+
+        notifier = self.make_notifier(port=closed_port, retry_backoff=60)
+        notifier.send_report("user@example.com", "日报", "报告内容")
+        self.assertFalse(notifier.flush(timeout=5))
+        notifier.close(timeout=1)
+        self.notifiers.remove(notifier)
+
+        self.server = StubSMTPServer()
+        threading.Thread(target=self.server.serve_forever, daemon=True).start()
+        restarted = self.make_notifier()
+        self.assertEqual(restarted.pending_count(), 1)
+        restarted.start()
+        self.assertTrue(restarted.flush(timeout=5))
+        self.assertEqual([subject_of(m) for m in self.server.messages], ["日报"])
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,142 @@
+"""
+历史数据列式存储测试
+Columnar History Store Tests
+"""
+
+import os
+import unittest
+from unittest import mock
+from datetime import datetime, timedelta
+
+from src.core import history_store
+from src.core.history_store import HistoryStore
+from src.core.report_generator import ReportGenerator
+from tests.factories import DatabaseTestCase, make_video, make_dynamic, make_result, make_signal
+
+
+class HistoryStoreTestCase(DatabaseTestCase):
+    """准备跨越多天的内容和分析结果"""
+
+    def setUp(self):
+        """测试初始化"""
+        super().setUp()
+        self.store = HistoryStore(self.db, os.path.join(self.tmp_dir, "history"))
+        now = datetime.now()
+        self.db.save_videos_bulk([
+            make_video("BV1", publish_time=now - timedelta(days=3)),
+            make_video("BV2", publish_time=now - timedelta(days=2), up_name="另一个UP"),
+            make_video("BV3", publish_time=now - timedelta(days=40)),
+            make_video("BV4", publish_time=now),
+        ])
+        self.db.save_dynamics_bulk([make_dynamic("D1", publish_time=now - timedelta(days=1))])
+        buy = make_signal({'name': '贵州茅台', 'kind': 'ticker'})
+        self.db.save_analysis_results_bulk([
+            make_result("BV1", "video", 0.5, "低", [buy]),
+            make_result("BV2", "video", -0.5, "高"),
+            make_result("D1", "dynamic", 0.1, "中等", [buy]),
+        ])
+
+
+class TestHistoryQuery(HistoryStoreTestCase):
+    """SQLite查询路径测试类"""
+
+    def test_load_projects_and_filters(self):
+        """只返回请求的列和时间窗口内的内容"""
+        frame = self.store.read_sqlite('video', datetime.now() - timedelta(days=7),
+                                       columns=['content_id', 'sentiment_score'])
+        self.assertEqual(list(frame.columns), ['content_id', 'sentiment_score'])
+        self.assertEqual(sorted(frame['content_id']), ['BV1', 'BV2', 'BV4'])
+
+    def test_watermarks_track_late_content_and_reanalysis(self):
+        """补爬内容和重新分析都会改变当天的水位"""
+        day = datetime.now() - timedelta(days=3)
+        since, until = day - timedelta(days=1), day + timedelta(days=1)
+        key = day.date().isoformat()
+        before = self.db.get_history_watermarks('video', since, until)
+        self.assertEqual(before[key][:2], [1, 1])
+
+        self.db.save_analysis_results_bulk([make_result("BV1", "video", -0.2, "高")])
+        reanalyzed = self.db.get_history_watermarks('video', since, until)
+        self.assertNotEqual(reanalyzed[key], before[key])
+
+        self.db.save_videos_bulk([make_video("BV5", publish_time=day)])
+        late = self.db.get_history_watermarks('video', since, until)
+        self.assertEqual(late[key][:2], [2, 1])
+
+    def test_load_without_pyarrow(self):
+        """未安装pyarrow时全部从SQLite读取"""
+        with mock.patch.object(history_store, 'pq', None):
+            frame = self.store.load(datetime.now() - timedelta(days=7),
+                                    columns=['content_type', 'content_id', 'sentiment_score'])
+            self.assertEqual(self.store.export(datetime.now() - timedelta(days=7)), 0)
+        self.assertEqual(sorted(frame['content_id']), ['BV1', 'BV2', 'BV4', 'D1'])
+        self.assertFalse(os.path.exists(self.store.root))
+
+    def test_weekly_report(self):
+        """周报汇总数量、情感、风险和信号"""
+        with mock.patch.object(history_store, 'pq', None):
+            report = ReportGenerator(self.db, history_store=self.store).generate_weekly_report()
+        self.assertIn("视频 3 / 动态 1 / 新闻 0", report)
+        self.assertIn("风险分布: 高 1 / 中等 1 / 低 1", report)
+        self.assertIn("另一个UP: -0.50 (1条)", report)
+        self.assertIn("贵州茅台 买入 2次 (偏多)", report)
+
+    def test_empty_report(self):
+        """没有数据时给出提示"""
+        report = ReportGenerator(self.db, history_store=self.store).generate_period_report(
+            "测试报告", days=7, until=datetime.now() - timedelta(days=100)
+        )
+        self.assertIn("本期没有新内容", report)
+
+
+@unittest.skipUnless(history_store.pq is not None, "需要pyarrow")
+class TestParquetExport(HistoryStoreTestCase):
+    """Parquet导出测试类"""
+
+    def test_export_partitions(self):
+        """按内容类型和日期分区，当天不导出"""
+        exported = self.store.export(datetime.now() - timedelta(days=7))
+        self.assertEqual(exported, 3)
+        self.assertEqual(len(self.store.exported_days('video')), 7)
+        day = (datetime.now() - timedelta(days=3)).date().isoformat()
+        self.assertTrue(any((self.store.root / "content_type=video" / f"day={day}").iterdir()))
+
+    def test_load_matches_sqlite(self):
+        """Parquet与SQLite合并读取的结果与直接查询一致"""
+        since = datetime.now() - timedelta(days=7)
+        frame = self.store.load(since, columns=['content_type', 'content_id', 'sentiment_score'])
+        self.assertEqual(sorted(frame['content_id']), ['BV1', 'BV2', 'BV4', 'D1'])
+        self.assertEqual(set(frame['content_type']), {'video', 'dynamic'})
+
+        videos = self.store.load(since, content_types=['video'], columns=['content_id'])
+        self.assertEqual(sorted(videos['content_id']), ['BV1', 'BV2', 'BV4'])
+
+    def test_reexport_refreshes_analysis(self):
+        """重新分析后再导出会覆盖旧分区"""
+        since = datetime.now() - timedelta(days=7)
+        self.store.export(since)
+        self.db.save_analysis_results_bulk([make_result("BV2", "video", 0.9, "低")])
+        self.store.export(since)
+        frame = self.store.load(since, content_types=['video'],
+                                columns=['content_id', 'sentiment_score'])
+        scores = dict(zip(frame['content_id'], frame['sentiment_score']))
+        self.assertEqual(scores['BV2'], 0.9)
+        self.assertEqual(len(frame), 3)
+
+    def test_sync_refreshes_changed_days(self):
+        """已导出日期的内容或分析变化后，读取前重新导出该天，其他日期不重新导出"""
+        since = datetime.now() - timedelta(days=7)
+        self.store.sync(since)
+        self.assertEqual(self.store.sync(since), 0)
+
+        self.db.save_videos_bulk([make_video("BV5", publish_time=datetime.now() - timedelta(days=3))])
+        self.db.save_analysis_results_bulk([make_result("BV2", "video", 0.9, "低")])
+        frame = self.store.load(since, content_types=['video'],
+                                columns=['content_id', 'sentiment_score'])
+        self.assertEqual(sorted(frame['content_id']), ['BV1', 'BV2', 'BV4', 'BV5'])
+        self.assertEqual(dict(zip(frame['content_id'], frame['sentiment_score']))['BV2'], 0.9)
+        self.assertEqual(self.store.sync(since), 0)
+
+
+if __name__ == '__main__':
+    unittest.main()
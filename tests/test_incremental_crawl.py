@@ -0,0 +1,116 @@
+"""
+增量爬取测试
+Incremental Crawl Tests
+"""
+
+import asyncio
+import unittest
+
+from tests.factories import SystemTestCase
+
+
+class FakeCrawler:
+    """模拟爬虫，按水位返回视频和动态，并记录详情请求"""
+
+    def __init__(self):
+        self.videos = []
+        self.dynamics = []
+        self.detail_calls = []
+        self.failing = set()
+
+    def add_video(self, bvid: str, created: int, title: str = "标题"):
+        self.videos.insert(0, {'bvid': bvid, 'created': created, 'title': title, 'description': "简介"})
+
+    async def iter_user_videos(self, uid, since=None, max_pages=None):
+        for video in self.videos:
+            if since and video['created'] <= since.timestamp():
+                return
+            yield video
+
+    async def iter_user_dynamics(self, uid, since=None, max_pages=None):
+        for dynamic in self.dynamics:
+            if since and dynamic['timestamp'] <= since.timestamp():
+                return
+            yield dynamic
+
+    async def get_video_info(self, bvid):
+        self.detail_calls.append(bvid)
+        if bvid in self.failing:
+            return None
+        video = next(v for v in self.videos if v['bvid'] == bvid)
+        return {
+            'bvid': bvid, 'title': video['title'], 'desc': video['description'],
+            'pubdate': video['created'],
+            'stat': {'view': 1, 'like': 1, 'coin': 1, 'share': 1},
+        }
+
+    async def get_video_transcript(self, bvid, video_info=None):
+        return "字幕"
+
+
+class TestIncrementalCrawl(SystemTestCase):
+    """增量爬取测试类"""
+
+    def setUp(self):
+        """测试初始化"""
+        super().setUp()
+        self.crawler = FakeCrawler()
+        self.system.crawler = self.crawler
+        self.system.crawl_stats = {'fetched': 0, 'skipped': 0, 'changed': 0}
+
+    def crawl(self):
+        """执行一次UP主爬取"""
+        asyncio.run(self.system.crawl_up_content("1", "测试UP"))
+
+    def test_only_new_videos_fetched(self):
+        """第二轮只获取水位之后的新视频"""
+        self.crawler.add_video("BV1", 1700000000)
+        self.crawler.add_video("BV2", 1700000100)
+        self.crawl()
+        self.assertEqual(sorted(self.crawler.detail_calls), ["BV1", "BV2"])
+        state = self.system.db_manager.get_crawl_state("1", "video")
+        self.assertEqual((state['newest_pubdate'], state['newest_id']), (1700000100, "BV2"))
+
+        self.crawler.detail_calls.clear()
+        self.crawl()
+        self.assertEqual(self.crawler.detail_calls, [])
+
+        self.crawler.add_video("BV3", 1700000200)
+        self.crawl()
+        self.assertEqual(self.crawler.detail_calls, ["BV3"])
+        self.assertEqual(self.system.crawl_stats, {'fetched': 3, 'skipped': 0, 'changed': 3})
+
+    def test_failed_video_retried_and_unchanged_skipped(self):
+        """失败的视频下轮重试，已入库且未变化的视频跳过详情请求"""
+        self.crawler.add_video("BV1", 1700000000)
+        self.crawler.add_video("BV2", 1700000100)
+        self.crawler.failing.add("BV1")
+        self.crawl()
+        state = self.system.db_manager.get_crawl_state("1", "video")
+        self.assertEqual(state['newest_pubdate'], 1700000000 - 1)
+
+        self.crawler.failing.clear()
+        self.crawler.detail_calls.clear()
+        self.crawl()
+        self.assertEqual(self.crawler.detail_calls, ["BV1"])
+        self.assertEqual(self.system.crawl_stats['skipped'], 1)
+        state = self.system.db_manager.get_crawl_state("1", "video")
+        self.assertEqual(state['newest_pubdate'], 1700000100)
+
+    def test_dynamics_watermark(self):
+        """动态按水位增量获取"""
+        self.crawler.dynamics = [
+            {'id': '2', 'content': '动态二', 'timestamp': 1700000100},
+            {'id': '1', 'content': '动态一', 'timestamp': 1700000000},
+        ]
+        self.crawl()
+        self.assertEqual(len(self.system.db_manager.get_content_hashes('dynamic', ['1', '2'])), 2)
+
+        self.crawl()
+        self.assertEqual(self.system.crawl_stats['fetched'], 2)
+        state = self.system.db_manager.get_crawl_state("1", "dynamic")
+        self.assertEqual(state['newest_id'], '2')
+
+
+if __name__ == '__main__':
+    unittest.main()
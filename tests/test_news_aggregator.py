@@ -0,0 +1,336 @@
+"""
+新闻聚合模块测试
+News Aggregator Tests
+"""
+
+import asyncio
+import hashlib
+import os
+import shutil
+import tempfile
+import unittest
+from datetime import datetime, timezone
+from pathlib import Path
+
+from aiohttp import web
+
+from src.core.database import DatabaseManager
+from src.core.news_aggregator import NewsAggregator
+
+FIXTURES = Path(__file__).parent / "fixtures" / "news"
+
+
+def read_fixture(name: str) -> bytes:
+    """读取保存的新闻源文件"""
+    return (FIXTURES / name).read_bytes()
+
+
+def utc(*args) -> datetime:
+    """UTC时间转换为本地无时区时间（与解析结果一致）"""
+    return datetime.fromtimestamp(datetime(*args, tzinfo=timezone.utc).timestamp())
+
+
+class StubNewsServer:
+    """本地桩新闻站点，提供保存的RSS/JSON Feed/网页，并记录最大并发请求数"""
+
+    CONTENT_TYPES = {
+        '.xml': 'application/rss+xml',
+        '.json': 'application/feed+json',
+        '.html': 'text/html',
+    }
+
+    def __init__(self, slow_seconds: float = 0.2, etags: bool = True):
+        self.slow_seconds = slow_seconds
+        self.etags = etags
+        self.active = 0
+        self.max_active = 0
+        self.requests = []
+        # 覆盖fixtures中的文件内容: 文件名 -> 字节
+        self.pages = {}
+        # 返回500的路径
+        self.broken = set()
+        self.runner = None
+        self.base_url = ""
+
+    def respond(self, request, name: str, body: bytes):
+        """记录请求，支持ETag条件请求"""
+        self.requests.append((request.path, request.headers.get('If-None-Match')))
+        if request.path in self.broken:
+            raise web.HTTPInternalServerError()
+        headers = {}
+        if self.etags:
+            headers['ETag'] = f'"{hashlib.sha1(body).hexdigest()}"'
+            if request.headers.get('If-None-Match') == headers['ETag']:
+                return web.Response(status=304, headers=headers)
+        return web.Response(body=body, headers=headers,
+                            content_type=self.CONTENT_TYPES[Path(name).suffix], charset='utf-8')
+
+    async def fixture(self, request):
+        """返回fixtures中的文件"""
+        name = request.match_info['name']
+        path = FIXTURES / name
+        if name not in self.pages and not path.is_file():
+            raise web.HTTPNotFound()
+        return self.respond(request, name, self.pages.get(name) or path.read_bytes())
+
+    async def article(self, request):
+        """任意文章页都返回同一篇文章"""
+        return self.respond(request, "article.html", read_fixture("article.html"))
+
+    async def slow(self, request):
+        """延迟返回网页，用于观察并发"""
+        self.active += 1
+        self.max_active = max(self.max_active, self.active)
+        try:
+            await asyncio.sleep(self.slow_seconds)
+        finally:
+            self.active -= 1
+        return web.Response(body=read_fixture("listing.html"), content_type='text/html', charset='utf-8')
+
+    async def start(self):
+        app = web.Application()
+        app.router.add_get('/slow/{n}', self.slow)
+        app.router.add_get('/article/{n}', self.article)
+        app.router.add_get('/{name}', self.fixture)
+        self.runner = web.AppRunner(app)
+        await self.runner.setup()
+        site = web.TCPSite(self.runner, '127.0.0.1', 0)
+        await site.start()
+        self.base_url = f"http://127.0.0.1:{self.runner.addresses[0][1]}"
+
+    async def stop(self):
+        await self.runner.cleanup()
+
+
+class TestNewsParsing(unittest.TestCase):
+    """订阅源和网页解析测试类"""
+
+    def test_parse_rss(self):
+        """RSS条目转换为绝对网址、纯文本摘要和本地时间"""
+        items = NewsAggregator.parse_feed(
+            read_fixture("rss.xml"), 'application/rss+xml', "http://finance.example.com/rss.xml"
+        )
+        self.assertEqual(len(items), 3)
+        self.assertEqual(items[0]['url'], "http://finance.example.com/2024/01/24/100001.html")
+        self.assertEqual(items[0]['summary'], "中国人民银行决定于2月5日下调存款准备金率0.5个百分点。")
+        self.assertEqual(items[0]['publish_time'], utc(2024, 1, 24, 7, 30))
+        self.assertIsNone(items[2]['publish_time'])
+
+    def test_parse_json_feed(self):
+        """JSON Feed条目"""
+        items = NewsAggregator.parse_feed(
+            read_fixture("feed.json"), 'application/feed+json', "http://world.example.com/feed.json"
+        )
+        self.assertEqual([item['url'] for item in items], [
+            "http://world.example.com/world/2024/01/24/200001.html",
+            "http://world.example.com/2024/01/24/200002.html",
+        ])
+        self.assertEqual(items[0]['summary'], "欧洲央行宣布维持主要再融资利率在4.5%不变。")
+        self.assertEqual(items[0]['publish_time'], utc(2024, 1, 25, 13, 15))
+        self.assertEqual(items[1]['summary'], "多家航运公司继续绕行好望角。")
+
+    def test_parse_listing_page(self):
+        """网页中只提取同站、标题足够长且URL带数字的文章链接"""
+        aggregator = NewsAggregator(sources={}, news_config={})
+        items = aggregator.parse_news_content(
+            read_fixture("listing.html").decode("utf-8"), "http://finance.example.com/"
+        )
+        self.assertEqual([item['url'] for item in items], [
+            "http://finance.example.com/2024-01-24/doc-300001.shtml",
+            "http://finance.example.com/20240123/300002.html",
+            "http://stock.example.com/a/300003.html",
+        ])
+        self.assertEqual(items[2]['title'], "新能源汽车板块午后拉升 多股涨停")
+        self.assertEqual([item['publish_time'] for item in items],
+                         [datetime(2024, 1, 24), datetime(2024, 1, 23), None])
+
+    def test_parse_article(self):
+        """文章页取段落最多的正文块和发布时间"""
+        article = NewsAggregator.parse_article(read_fixture("article.html"), "http://finance.example.com/a/1.html")
+        self.assertEqual(article['content'].split("\n"), [
+            "证监会近日发布多项举措，进一步加强上市公司现金分红监管。",
+            "对多年未分红或分红比例偏低的公司，将限制大股东减持。",
+            "鼓励上市公司一年多次分红， 增强投资者获得感。",
+        ])
+        self.assertEqual(article['publish_time'], utc(2024, 1, 24, 1, 30))
+
+
+class TestNewsFetching(unittest.TestCase):
+    """并发抓取测试类（本地桩站点）"""
+
+    def fetch(self, sources, feeds=None, **news_config):
+        """用桩站点抓取，sources/feeds 中的路径相对于站点根目录"""
+        server = StubNewsServer()
+
+        async def run_test():
+            await server.start()
+            url = lambda path: server.base_url + path
+            aggregator = NewsAggregator(
+                sources={category: [url(path) for path in paths] for category, paths in sources.items()},
+                news_config=dict(news_config, feeds={url(k): url(v) for k, v in (feeds or {}).items()}),
+            )
+            try:
+                start = asyncio.get_running_loop().time()
+                news_list = await aggregator.fetch_all_news()
+                elapsed = asyncio.get_running_loop().time() - start
+            finally:
+                await aggregator.close_session()
+                await server.stop()
+            stats = {path[len(server.base_url):]: value for path, value in aggregator.source_stats.items()}
+            return news_list, stats, elapsed
+
+        news_list, stats, elapsed = asyncio.run(run_test())
+        return server, news_list, stats, elapsed
+
+    def test_feed_preferred_with_html_fallback(self):
+        """配置的订阅源、页面声明的订阅源优先，订阅源不可用时解析网页"""
+        _, news_list, stats, _ = self.fetch(
+            {'financial': ['/autodiscover.html', '/listing.html', '/missing.html'],
+             'geopolitical': ['/world']},
+            feeds={'/world': '/feed.json', '/listing.html': '/missing.xml'},
+        )
+        self.assertEqual(
+            {path: (value['via'], value['items']) for path, value in stats.items()},
+            {'/autodiscover.html': ('feed', 3), '/listing.html': ('html', 0),
+             '/missing.html': (None, 0), '/world': ('feed', 2)},
+        )
+        self.assertIsNotNone(stats['/missing.html']['error'])
+        # 桩站点没有网页中链接的文章页，正文获取失败的文章本轮不返回
+        self.assertEqual(stats['/listing.html']['article_errors'], 1)
+        self.assertGreater(stats['/autodiscover.html']['fetch_seconds'], 0)
+        self.assertGreater(stats['/autodiscover.html']['parse_seconds'], 0)
+
+        by_title = {news.title: news for news in news_list}
+        self.assertEqual(len(news_list), 5)
+        news = by_title["央行宣布降准0.5个百分点 释放长期资金约1万亿元"]
+        self.assertEqual((news.source, news.category), ("127.0.0.1", "financial"))
+        self.assertEqual(by_title["欧洲央行维持三大关键利率不变"].category, "geopolitical")
+        self.assertEqual(len(news.content_hash), 32)
+
+    def test_sources_fetched_concurrently_with_host_limit(self):
+        """多个新闻源并发获取，同一主机的并发连接数受限"""
+        server, news_list, stats, elapsed = self.fetch(
+            {'financial': [f'/slow/{n}' for n in range(4)]}, per_host_connections=2
+        )
+        self.assertEqual(server.max_active, 2)
+        self.assertLess(elapsed, 4 * server.slow_seconds)
+        self.assertEqual(len(stats), 4)
+
+
+
+class TestNewsPolling(unittest.TestCase):
+    """重复轮询测试类: 条件请求、响应体哈希和已入库文章"""
+
+    def setUp(self):
+        """测试初始化"""
+        self.tmp_dir = tempfile.mkdtemp()
+        self.db = DatabaseManager(os.path.join(self.tmp_dir, "test.db"))
+
+    def tearDown(self):
+        """测试清理"""
+        self.db.close()
+        shutil.rmtree(self.tmp_dir, ignore_errors=True)
+
+    def poll(self, server: StubNewsServer, paths, rounds, between=None, failed_saves=()):
+        """轮询 rounds 轮，每轮保存新闻并返回 [(新闻列表, 统计)]
+
+        between(轮次) 在两轮之间修改站点；failed_saves 中的轮次模拟保存失败，不保存也不写入状态。
+        """
+        async def run_test():
+            await server.start()
+            polls = []
+            try:
+                for index in range(rounds):
+                    if index and between:
+                        between(index)
+                    # 每轮新建聚合器，状态只能来自数据库
+                    aggregator = NewsAggregator(
+                        sources={'financial': [server.base_url + path for path in paths]},
+                        news_config={}, db_manager=self.db
+                    )
+                    try:
+                        news_list = await aggregator.fetch_latest_news('financial')
+                    finally:
+                        await aggregator.close_session()
+                    if index not in failed_saves:
+                        self.db.save_news_bulk(news_list)
+                        aggregator.commit_source_states()
+                    stats = {url[len(server.base_url):]: value
+                             for url, value in aggregator.source_stats.items()}
+                    polls.append((news_list, stats))
+            finally:
+                await server.stop()
+            return polls
+
+        return asyncio.run(run_test())
+
+    def test_not_modified_skips_download_and_parse(self):
+        """页面和声明的订阅源都返回304时不下载也不解析"""
+        server = StubNewsServer()
+        (first, _), (second, stats) = self.poll(server, ['/autodiscover.html'], 2)
+
+        self.assertEqual(len(first), 3)
+        self.assertEqual(second, [])
+        source = stats['/autodiscover.html']
+        self.assertEqual((source['via'], source['bytes'], source['parse_seconds']), ('unchanged', 0, 0))
+        # 第二轮仍请求上次发现的订阅源，且都带 If-None-Match
+        self.assertEqual([path for path, etag in server.requests[2:] if etag],
+                         ['/autodiscover.html', '/rss.xml'])
+
+    def test_unchanged_body_hash_skips_parse(self):
+        """服务器不支持条件请求时，响应体哈希未变化也不解析"""
+        server = StubNewsServer(etags=False)
+        _, (second, stats) = self.poll(server, ['/rss.xml'], 2)
+
+        self.assertEqual(second, [])
+        source = stats['/rss.xml']
+        self.assertEqual(source['via'], 'unchanged')
+        self.assertGreater(source['bytes'], 0)
+        self.assertEqual(source['parse_seconds'], 0)
+
+    def test_only_new_articles_fetched(self):
+        """页面变化时按 news.url 批量去掉已入库文章，只获取新文章的正文"""
+        server = StubNewsServer()
+
+        def add_article(_):
+            server.pages["articles.html"] = read_fixture("articles.html").replace(
+                b"</ul>", '<li><a href="/article/500003.html">国际油价连续第三日上涨</a></li></ul>'.encode()
+            )
+
+        (first, _), (second, stats) = self.poll(server, ['/articles.html'], 2, between=add_article)
+
+        self.assertEqual(len(first), 2)
+        self.assertTrue(first[0].content.startswith("证监会近日发布多项举措"))
+        self.assertEqual([news.url[len(server.base_url):] for news in second], ['/article/500003.html'])
+        self.assertEqual(stats['/articles.html']['articles'], 1)
+        article_requests = [path for path, _ in server.requests if path.startswith('/article/')]
+        self.assertEqual(len(article_requests), 3)
+
+    def test_failed_save_refetched_next_poll(self):
+        """新闻保存失败时不写入条件请求状态，下一轮重新获取同样的文章"""
+        server = StubNewsServer()
+        (first, _), (second, stats), (third, _) = self.poll(
+            server, ['/autodiscover.html'], 3, failed_saves=(0,)
+        )
+
+        self.assertEqual(len(first), 3)
+        self.assertEqual([news.url for news in second], [news.url for news in first])
+        self.assertEqual(stats['/autodiscover.html']['via'], 'feed')
+        self.assertEqual(third, [])
+
+    def test_failed_article_retried_next_poll(self):
+        """正文获取失败的文章本轮不返回，下一轮重新获取"""
+        server = StubNewsServer()
+        server.broken.add('/article/500002.html')
+        (first, stats), (second, _) = self.poll(
+            server, ['/articles.html'], 2, between=lambda _: server.broken.clear()
+        )
+
+        self.assertEqual([news.url[len(server.base_url):] for news in first], ['/article/500001.html'])
+        self.assertEqual(stats['/articles.html']['article_errors'], 1)
+        self.assertEqual([news.url[len(server.base_url):] for news in second], ['/article/500002.html'])
+        self.assertTrue(second[0].content.startswith("证监会近日发布多项举措"))
+
+
+if __name__ == '__main__':
+    unittest.main()
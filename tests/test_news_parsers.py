@@ -0,0 +1,129 @@
+"""
+新闻站点解析器测试
+News Site Parsers Tests
+"""
+
+import unittest
+from datetime import datetime, timedelta, timezone
+from pathlib import Path
+
+import lxml.html
+
+from src.core.news_parsers import GENERIC_PARSER, get_parser, parse_time
+
+SITES = Path(__file__).parent / "fixtures" / "news" / "sites"
+
+
+def load(name: str, url: str):
+    """读取保存的站点网页并解析为lxml文档"""
+    return lxml.html.fromstring((SITES / name).read_bytes(), base_url=url)
+
+
+def local(*args, hours: int = 0) -> datetime:
+    """UTC+hours 时间转换为本地无时区时间（与解析结果一致）"""
+    aware = datetime(*args, tzinfo=timezone(timedelta(hours=hours)))
+    return datetime.fromtimestamp(aware.timestamp())
+
+
+# 站点 -> (列表页网址, 列表页文章网址, 文章标题, 正文首段, 发布时间)
+EXPECTED = {
+    'sina': (
+        "https://finance.sina.com.cn/",
+        ["https://finance.sina.com.cn/china/2024-01-24/doc-inaecxyz1234567.shtml",
+         "https://finance.sina.com.cn/stock/marketresearch/2024-01-24/doc-inaecxyz2345678.shtml"],
+        "央行宣布降准0.5个百分点 释放长期资金约1万亿元",
+        "中国人民银行决定于2月5日下调金融机构存款准备金率0.5个百分点。",
+        datetime(2024, 1, 24, 15, 30),
+    ),
+    'jiemian': (
+        "https://www.jiemian.com/lists/2.html",
+        ["https://www.jiemian.com/article/10744301.html",
+         "https://www.jiemian.com/article/10744302.html"],
+        "证监会：严格限制未分红公司大股东减持",
+        "证监会近日发布多项举措，进一步加强上市公司现金分红监管。",
+        local(2024, 1, 24, 9, 30, hours=8),
+    ),
+    'wallstreetcn': (
+        "https://wallstreetcn.com/news/global",
+        ["https://wallstreetcn.com/articles/3707512",
+         "https://wallstreetcn.com/livenews/2601234"],
+        "美联储维持利率不变 鲍威尔称3月降息可能性不大",
+        "美联储宣布将联邦基金利率目标区间维持在5.25%-5.5%不变。",
+        local(2024, 1, 31, 19, 5),
+    ),
+    'yicai': (
+        "https://www.yicai.com/news/",
+        ["https://www.yicai.com/news/101657890.html",
+         "https://www.yicai.com/news/101657891.html"],
+        "一财调查：多数经济学家预计一季度GDP增速在5%左右",
+        "第一财经首席经济学家调查显示，多数受访者预计一季度GDP同比增长5%左右。",
+        datetime(2024, 1, 24, 20, 15, 32),
+    ),
+    'huanqiu': (
+        "https://world.huanqiu.com/",
+        ["https://world.huanqiu.com/article/4GHWqNmXcVb",
+         "https://world.huanqiu.com/article/4GHWqNmXcVc"],
+        "红海局势持续紧张 多家航运公司继续绕行好望角",
+        "据外媒报道，受红海局势影响，多家航运公司宣布继续绕行好望角。",
+        datetime(2024, 1, 24, 10, 2),
+    ),
+}
+
+
+class TestNewsParsers(unittest.TestCase):
+    """站点解析器测试类"""
+
+    def test_site_parsers(self):
+        """各站点解析器从保存的列表页和文章页提取文章链接、标题、正文和发布时间"""
+        for name, (base_url, urls, title, first_paragraph, publish_time) in EXPECTED.items():
+            with self.subTest(site=name):
+                parser = get_parser(base_url)
+                self.assertEqual(parser.name, name)
+
+                items = parser.parse_listing(load(f"{name}_listing.html", base_url), base_url)
+                self.assertEqual([item['url'] for item in items], urls)
+
+                article = parser.parse_article(load(f"{name}_article.html", urls[0]), urls[0])
+                self.assertEqual(article['title'], title)
+                paragraphs = article['content'].split("\n")
+                self.assertEqual(len(paragraphs), 2)
+                self.assertEqual(paragraphs[0], first_paragraph)
+                self.assertEqual(article['publish_time'], publish_time)
+
+    def test_site_parser_skips_related_block(self):
+        """站点选择器只取正文，通用解析会误取文字更多的相关阅读块"""
+        url = EXPECTED['sina'][1][0]
+        generic = GENERIC_PARSER.parse_article(load("sina_article.html", url), url)
+        self.assertTrue(generic['content'].startswith("相关阅读"))
+        self.assertFalse(get_parser(url).parse_article(load("sina_article.html", url), url)['content']
+                         .startswith("相关阅读"))
+
+    def test_unknown_domain_uses_generic_parser(self):
+        """未登记的站点使用通用解析器"""
+        url = "http://oil.example.com/2024/01/24/1.html"
+        parser = get_parser(url)
+        self.assertIs(parser, GENERIC_PARSER)
+        article = parser.parse_article(load("unknown_article.html", url), url)
+        self.assertEqual(article['title'], "国际油价连续第三日上涨")
+        self.assertEqual(article['content'].split("\n")[0], "受中东局势影响，布伦特原油期货价格连续第三个交易日上涨。")
+        self.assertEqual(article['publish_time'], local(2024, 1, 24, 8, hours=8))
+
+    def test_selectors_miss_falls_back_to_generic(self):
+        """站点改版、选择器匹配不到正文时退回通用解析"""
+        url = "https://finance.sina.com.cn/roll/2024-01-24/doc-inaecxyz3456789.shtml"
+        article = get_parser(url).parse_article(load("unknown_article.html", url), url)
+        self.assertEqual(article['title'], "国际油价连续第三日上涨")
+        self.assertEqual(len(article['content'].split("\n")), 2)
+        self.assertEqual(article['publish_time'], local(2024, 1, 24, 8, hours=8))
+
+    def test_parse_time(self):
+        """ISO格式和中文日期时间"""
+        self.assertEqual(parse_time("2024年01月24日 09:30"), datetime(2024, 1, 24, 9, 30))
+        self.assertEqual(parse_time("发布于 2024/1/5"), datetime(2024, 1, 5))
+        self.assertEqual(parse_time("2024-01-24 20:15:32"), datetime(2024, 1, 24, 20, 15, 32))
+        self.assertIsNone(parse_time("昨天"))
+        self.assertIsNone(parse_time("2024年13月40日"))
+
+
+if __name__ == '__main__':
+    unittest.main()
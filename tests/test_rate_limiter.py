@@ -0,0 +1,179 @@
+"""
+限流与爬取调度测试
+Rate Limiter and Crawl Scheduler Tests
+"""
+
+import asyncio
+import time
+import unittest
+
+from aiohttp import web
+
+from src.core.crawler import BilibiliCrawler
+from src.core.crawl_scheduler import CrawlScheduler
+from src.core.rate_limiter import RateLimiter, TokenBucket
+
+
+class TestTokenBucket(unittest.TestCase):
+    """令牌桶测试类"""
+
+    def test_burst_then_paced(self):
+        """先消耗突发额度，之后按速率发放"""
+        async def run_test():
+            bucket = TokenBucket(rate=20, capacity=2)
+            start = time.monotonic()
+            for _ in range(4):
+                await bucket.acquire()
+            return time.monotonic() - start
+
+        elapsed = asyncio.run(run_test())
+        self.assertGreaterEqual(elapsed, 0.09)
+        self.assertLess(elapsed, 0.5)
+
+    def test_block_for(self):
+        """退避期间不发放令牌"""
+        async def run_test():
+            bucket = TokenBucket(rate=100, capacity=5)
+            bucket.block_for(0.1)
+            start = time.monotonic()
+            await bucket.acquire()
+            return time.monotonic() - start
+
+        self.assertGreaterEqual(asyncio.run(run_test()), 0.09)
+
+    def test_invalid_rate(self):
+        """速率必须为正"""
+        with self.assertRaises(ValueError):
+            TokenBucket(rate=0)
+
+
+class TestRateLimiter(unittest.TestCase):
+    """限流器测试类"""
+
+    def test_per_host_concurrency(self):
+        """同一主机的并发请求数受限"""
+        limiter = RateLimiter(default_rate=1000, default_burst=100, per_host_concurrency=2)
+        active = {'now': 0, 'max': 0}
+
+        async def request(path: str):
+            async with limiter.limit(f"https://api.example.com{path}"):
+                active['now'] += 1
+                active['max'] = max(active['max'], active['now'])
+                await asyncio.sleep(0.02)
+                active['now'] -= 1
+
+        async def run_test():
+            await asyncio.gather(*(request(f"/p{i % 3}") for i in range(8)))
+
+        asyncio.run(run_test())
+        self.assertEqual(active['max'], 2)
+
+    def test_backoff_does_not_hold_host_slot(self):
+        """一个端点退避时不占用主机并发名额，同主机其他端点的请求不被延迟"""
+        limiter = RateLimiter(default_rate=1000, default_burst=100, per_host_concurrency=1)
+        slow_url = "https://api.example.com/slow"
+        limiter.get_bucket(slow_url).block_for(0.5)
+        finished = {}
+
+        async def request(name: str, url: str):
+            async with limiter.limit(url):
+                await asyncio.sleep(0.01)
+            finished[name] = time.monotonic() - start
+
+        async def run_test():
+            await asyncio.gather(
+                request('slow', slow_url),
+                request('fast', "https://api.example.com/fast"),
+            )
+
+        start = time.monotonic()
+        asyncio.run(run_test())
+        self.assertLess(finished['fast'], 0.2)
+        self.assertGreaterEqual(finished['slow'], 0.45)
+
+    def test_endpoint_buckets_are_independent(self):
+        """不同端点使用各自的预算"""
+        limiter = RateLimiter(
+            default_rate=1, default_burst=1,
+            endpoint_limits={'/fast': (50, 5)}
+        )
+        self.assertIsNot(limiter.get_bucket("https://a.com/fast"), limiter.get_bucket("https://a.com/slow"))
+        self.assertEqual(limiter.get_bucket("https://a.com/fast?x=1").rate, 50)
+        self.assertEqual(limiter.get_bucket("//a.com/slow").rate, 1)
+
+    def test_throttle_backoff_doubles_and_resets(self):
+        """连续限流时退避翻倍，成功后重置"""
+        limiter = RateLimiter(backoff_base=1, backoff_max=3)
+        url = "https://api.example.com/x"
+        self.assertEqual(limiter.report_throttled(url), 1)
+        self.assertEqual(limiter.report_throttled(url), 2)
+        self.assertEqual(limiter.report_throttled(url), 3)
+        limiter.report_success(url)
+        self.assertEqual(limiter.report_throttled(url), 1)
+
+
+class TestCrawlerThrottle(unittest.TestCase):
+    """爬虫限流退避测试类（本地桩服务器）"""
+
+    def test_backoff_on_799(self):
+        """收到-799后退避并重试成功"""
+        calls = []
+
+        async def handler(request):
+            calls.append(time.monotonic())
+            code = -799 if len(calls) == 1 else 0
+            return web.json_response({'code': code, 'data': {}})
+
+        async def run_test():
+            app = web.Application()
+            app.router.add_get('/x/test', handler)
+            runner = web.AppRunner(app)
+            await runner.setup()
+            site = web.TCPSite(runner, '127.0.0.1', 0)
+            await site.start()
+            port = runner.addresses[0][1]
+
+            crawler = BilibiliCrawler(RateLimiter(default_rate=1000, backoff_base=0.1))
+            crawler.response_cache = None
+            try:
+                data = await crawler._make_request(f"http://127.0.0.1:{port}/x/test")
+            finally:
+                await crawler.close_session()
+                await runner.cleanup()
+            return data
+
+        data = asyncio.run(run_test())
+        self.assertEqual(data['code'], 0)
+        self.assertEqual(len(calls), 2)
+        self.assertGreaterEqual(calls[1] - calls[0], 0.09)
+
+
+class TestCrawlScheduler(unittest.TestCase):
+    """爬取调度器测试类"""
+
+    def test_runs_jobs_concurrently(self):
+        """任务并发执行，失败不影响其他任务"""
+        async def worker(job):
+            await asyncio.sleep(0.1)
+            if job['name'] == 'bad':
+                raise RuntimeError("boom")
+
+        jobs = [{'name': 'a'}, {'name': 'b'}, {'name': 'bad'}]
+        stats = asyncio.run(CrawlScheduler(max_concurrency=3).run(jobs, worker))
+        self.assertEqual(stats['completed'], 2)
+        self.assertEqual(stats['failed'], 1)
+        self.assertLess(stats['elapsed'], 0.25)
+
+    def test_should_continue(self):
+        """停止后不再启动新任务"""
+        async def worker(job):
+            pass
+
+        stats = asyncio.run(CrawlScheduler().run(
+            [{'name': 'a'}, {'name': 'b'}], worker, should_continue=lambda: False
+        ))
+        self.assertEqual(stats['skipped'], 2)
+
+
+if __name__ == '__main__':
+    unittest.main()
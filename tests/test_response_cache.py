@@ -0,0 +1,192 @@
+"""
+HTTP响应缓存测试
+Response Cache Tests
+"""
+
+import asyncio
+import os
+import shutil
+import tempfile
+import unittest
+
+from aiohttp import web
+
+from src.core.crawler import BilibiliCrawler
+from src.core.rate_limiter import RateLimiter
+from src.core.response_cache import ResponseCache
+
+
+class StubServer:
+    """本地桩HTTP服务器，记录请求并支持条件请求"""
+
+    def __init__(self):
+        self.requests = []
+        self.runner = None
+        self.base_url = ""
+
+    async def subtitle(self, request):
+        """带ETag的字幕文件"""
+        self.requests.append(request)
+        if request.headers.get('If-None-Match') == '"v1"':
+            return web.Response(status=304, headers={'ETag': '"v1"'})
+        return web.json_response({'body': [{'content': '字幕'}]}, headers={'ETag': '"v1"'})
+
+    async def api(self, request):
+        """不带验证字段的API"""
+        self.requests.append(request)
+        return web.json_response({'code': 0, 'data': {'n': len(self.requests)}})
+
+    async def start(self):
+        app = web.Application()
+        app.router.add_get('/subtitle.json', self.subtitle)
+        app.router.add_get('/x/api', self.api)
+        self.runner = web.AppRunner(app)
+        await self.runner.setup()
+        site = web.TCPSite(self.runner, '127.0.0.1', 0)
+        await site.start()
+        self.base_url = f"http://127.0.0.1:{self.runner.addresses[0][1]}"
+
+    async def stop(self):
+        await self.runner.cleanup()
+
+
+class TestResponseCache(unittest.TestCase):
+    """响应缓存测试类"""
+
+    def setUp(self):
+        """测试初始化"""
+        self.tmp_dir = tempfile.mkdtemp()
+        self.cache = ResponseCache(os.path.join(self.tmp_dir, "cache.db"))
+
+    def tearDown(self):
+        """测试清理"""
+        self.cache.close()
+        shutil.rmtree(self.tmp_dir, ignore_errors=True)
+
+    def test_database_created_on_first_use(self):
+        """创建缓存和爬虫不生成数据库文件，首次读取时才创建"""
+        path = os.path.join(self.tmp_dir, "lazy", "cache.db")
+        cache = ResponseCache(path)
+        BilibiliCrawler(response_cache=cache)
+        self.assertFalse(os.path.exists(os.path.dirname(path)))
+        self.assertIsNone(cache.get("https://a.com/x"))
+        self.assertTrue(os.path.exists(path))
+        cache.close()
+
+    def test_key_normalizes_params(self):
+        """参数顺序和协议简写不影响缓存键"""
+        self.assertEqual(
+            ResponseCache.make_key("//a.com/x", {'b': 2, 'a': 1}),
+            ResponseCache.make_key("https://a.com/x", {'a': '1', 'b': '2'})
+        )
+
+    def test_ttl_lookup(self):
+        """路径优先于主机匹配有效期"""
+        cache = ResponseCache(ttls={'/x/view': 10, 'cdn.com': 20}, default_ttl=1)
+        self.assertEqual(cache.ttl_for("https://api.com/x/view"), 10)
+        self.assertEqual(cache.ttl_for("//cdn.com/any.json"), 20)
+        self.assertEqual(cache.ttl_for("https://api.com/other"), 1)
+
+    def test_fresh_entry_and_counters(self):
+        """有效期内命中，未缓存时计为未命中"""
+        self.assertIsNone(self.cache.get("https://a.com/x"))
+        self.assertTrue(self.cache.put("https://a.com/x", None, {'v': 1}, ttl=60))
+        entry = self.cache.get("https://a.com/x")
+        self.assertTrue(entry.is_fresh)
+        self.assertEqual(entry.data, {'v': 1})
+        self.assertEqual(self.cache.stats['hits'], 1)
+        self.assertEqual(self.cache.stats['misses'], 1)
+
+    def test_uncacheable_response_skipped(self):
+        """没有有效期也没有验证字段的响应不写入"""
+        self.assertFalse(self.cache.put("https://a.com/x", None, {'v': 1}, ttl=0))
+        self.assertTrue(self.cache.put("https://a.com/y", None, {'v': 1}, etag='"e"', ttl=0))
+
+    def test_lru_eviction(self):
+        """超出大小上限时淘汰最久未访问的条目"""
+        self.cache.max_bytes = 70  # 每个条目32字节，最多容纳两个
+        self.cache.access_update_interval = 0
+        payload = {'data': 'x' * 20}
+        self.cache.put("https://a.com/1", None, payload, ttl=60)
+        self.cache.put("https://a.com/2", None, payload, ttl=60)
+        self.cache.get("https://a.com/1")  # 访问1，使2成为最久未访问
+        self.cache.put("https://a.com/3", None, payload, ttl=60)
+
+        self.assertIsNotNone(self.cache.get("https://a.com/1"))
+        self.assertIsNone(self.cache.get("https://a.com/2"))
+        self.assertIsNotNone(self.cache.get("https://a.com/3"))
+        self.assertEqual(self.cache.stats['evictions'], 1)
+
+        self.cache.put("https://a.com/1", None, {'data': 'y' * 20}, ttl=60)  # 替换不改变总大小
+        self.assertIsNotNone(self.cache.get("https://a.com/3"))
+        self.assertEqual(self.cache.stats['evictions'], 1)
+
+    def test_access_time_update_throttled(self):
+        """访问时间在间隔内不重复写回"""
+        self.cache.put("https://a.com/x", None, {'v': 1}, ttl=60)
+        conn = self.cache.pool.get_connection()
+        stored = conn.execute("SELECT last_access FROM http_cache").fetchone()[0]
+        changes = conn.total_changes
+        self.cache.get("https://a.com/x")
+        self.assertEqual(conn.total_changes, changes)
+
+        self.cache.access_update_interval = 0
+        self.cache.get("https://a.com/x")
+        self.assertGreater(conn.total_changes, changes)
+        self.assertGreaterEqual(conn.execute("SELECT last_access FROM http_cache").fetchone()[0], stored)
+
+
+class TestCrawlerResponseCache(unittest.TestCase):
+    """爬虫接入响应缓存测试类（本地桩服务器）"""
+
+    def setUp(self):
+        """测试初始化"""
+        self.tmp_dir = tempfile.mkdtemp()
+        self.cache = ResponseCache(os.path.join(self.tmp_dir, "cache.db"))
+        self.server = StubServer()
+
+    def tearDown(self):
+        """测试清理"""
+        self.cache.close()
+        shutil.rmtree(self.tmp_dir, ignore_errors=True)
+
+    def run_requests(self, path: str, times: int, cache_ttl=None):
+        """用同一个爬虫连续请求若干次"""
+        async def run_test():
+            await self.server.start()
+            crawler = BilibiliCrawler(RateLimiter(default_rate=1000), self.cache)
+            try:
+                return [
+                    await crawler._make_request(self.server.base_url + path, cache_ttl=cache_ttl)
+                    for _ in range(times)
+                ]
+            finally:
+                await crawler.close_session()
+                await self.server.stop()
+
+        return asyncio.run(run_test())
+
+    def test_etag_revalidation(self):
+        """过期条目通过If-None-Match重新验证，304时复用缓存"""
+        results = self.run_requests('/subtitle.json', 3, cache_ttl=0)
+        self.assertEqual(results[0], results[2])
+        self.assertEqual(len(self.server.requests), 3)
+        self.assertNotIn('If-None-Match', self.server.requests[0].headers)
+        self.assertEqual(self.server.requests[1].headers['If-None-Match'], '"v1"')
+        self.assertEqual(self.cache.stats['revalidated'], 2)
+
+    def test_fresh_entry_skips_network(self):
+        """有效期内不再请求网络"""
+        results = self.run_requests('/x/api', 3, cache_ttl=60)
+        self.assertEqual(len(self.server.requests), 1)
+        self.assertEqual(results, [results[0]] * 3)
+        self.assertEqual(self.cache.stats['hits'], 2)
+
+    def test_no_ttl_no_validators_always_fetches(self):
+        """无法复用的响应每次都请求网络"""
+        self.run_requests('/x/api', 2, cache_ttl=0)
+        self.assertEqual(len(self.server.requests), 2)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,193 @@
+"""
+全文检索测试
+Full-Text Search Tests
+"""
+
+import os
+import sqlite3
+import unittest
+from unittest import mock
+from datetime import datetime, timedelta
+
+from src.core.database import DatabaseManager
+from src.web.api import get_db_manager
+from src.web.app import create_app
+from tests.factories import DatabaseTestCase, TempDirTestCase, make_video, make_dynamic, make_news
+
+
+class TestFullTextSearch(DatabaseTestCase):
+    """全文检索测试类"""
+
+    def setUp(self):
+        """测试初始化"""
+        super().setUp()
+        self.db.save_videos_bulk([
+            make_video("BV1", "新能源汽车板块大涨", "今天聊聊市场"),
+            make_video("BV2", "市场周评", "顺带提一句新能源汽车销量"),
+            make_video("BV3", "白酒行业分析", "茅台和五粮液"),
+        ])
+        self.db.save_dynamics_bulk([
+            make_dynamic("D1", "新能源汽车出口数据超预期"),
+            make_dynamic("D2", "上周的新能源动态", publish_time=datetime.now() - timedelta(days=10)),
+        ])
+        self.db.save_news_bulk([
+            make_news("https://example.com/1", "光伏组件价格下跌", "新能源产业链承压"),
+        ])
+
+    def fts_rowcount(self, fts_table: str, query: str) -> int:
+        """直接查询FTS表的命中行数"""
+        return self.db.pool.get_connection().execute(
+            f"SELECT COUNT(*) FROM {fts_table} WHERE {fts_table} MATCH ?",
+            (self.db.text_processor.build_search_query(query),)
+        ).fetchone()[0]
+
+    def test_search_across_types(self):
+        """三类内容都能检索到，结果带类型和主键"""
+        results = self.db.search("新能源")
+        found = {(r['content_type'], r['content_id']) for r in results}
+        self.assertEqual(found, {
+            ('video', 'BV1'), ('video', 'BV2'),
+            ('dynamic', 'D1'), ('dynamic', 'D2'),
+            ('news', '1'),
+        })
+
+    def test_title_match_ranks_first(self):
+        """标题命中排在仅简介命中之前"""
+        results = self.db.search("新能源汽车", types=['video'])
+        self.assertEqual([r['content_id'] for r in results], ['BV1', 'BV2'])
+        self.assertEqual(results[0]['title'], "新能源汽车板块大涨")
+        self.assertEqual(results[0]['author'], "测试UP")
+
+    def test_multiple_terms_match_all(self):
+        """多个关键词之间为AND"""
+        results = self.db.search("茅台 五粮液")
+        self.assertEqual([r['content_id'] for r in results], ['BV3'])
+        self.assertEqual(self.db.search("茅台 光伏"), [])
+
+    def test_type_since_and_limit(self):
+        """类型、发布时间和条数过滤"""
+        results = self.db.search("新能源", types=['dynamic'],
+                                 since=datetime.now() - timedelta(days=1))
+        self.assertEqual([r['content_id'] for r in results], ['D1'])
+        self.assertEqual(len(self.db.search("新能源", limit=2)), 2)
+        self.assertEqual(self.db.search("新能源", types=['comment']), [])
+
+    def test_query_syntax_is_escaped(self):
+        """FTS5语法字符按普通文本处理"""
+        self.assertEqual(self.db.search('新能源" OR "白酒'), [])
+        self.assertEqual(self.db.search("   "), [])
+
+    def test_stats_update_does_not_reindex(self):
+        """只有互动数据变化时不重新分词，标题变化时更新索引"""
+        with mock.patch.object(
+            self.db.text_processor, 'segment_for_search',
+            wraps=self.db.text_processor.segment_for_search
+        ) as segment:
+            self.db.save_videos_bulk([make_video("BV3", "白酒行业分析", "茅台和五粮液",
+                                                 view_count=999)])
+            segment.assert_not_called()
+        self.assertEqual([r['content_id'] for r in self.db.search("茅台")], ['BV3'])
+
+        self.db.save_videos_bulk([make_video("BV3", "光伏龙头复盘", "硅料价格", content_hash="光伏")])
+        self.assertEqual(self.db.search("茅台"), [])
+        self.assertEqual({r['content_id'] for r in self.db.search("光伏")}, {'BV3', '1'})
+
+    def test_segmentation_outside_write_transaction(self):
+        """分词在写事务开始前完成，不持有写锁"""
+        connection = self.db.pool.get_connection()
+        segment_for_search = self.db.text_processor.segment_for_search
+        in_transaction = []
+
+        def tracking_segment(text):
+            in_transaction.append(connection.in_transaction)
+            return segment_for_search(text)
+
+        with mock.patch.object(self.db.text_processor, 'segment_for_search', tracking_segment):
+            self.db.save_videos_bulk([make_video("BV4", "光伏龙头复盘", "硅料价格")])
+            self.db.save_dynamics_bulk([make_dynamic("D9", "光伏装机量创新高")])
+            self.db.save_news_bulk([make_news("http://n/9", "光伏出口", "逆变器出口增长")])
+        self.assertEqual(in_transaction, [False] * 6)
+        self.assertEqual([r['content_id'] for r in self.db.search("硅料")], ['BV4'])
+        self.assertEqual([r['content_id'] for r in self.db.search("装机量")], ['D9'])
+        self.assertEqual(len(self.db.search("逆变器", types=["news"])), 1)
+
+    def test_index_integrity(self):
+        """增删改之后外部内容索引与原表一致"""
+        self.db.save_videos_bulk([make_video("BV1", "标题修改", "简介修改", content_hash="changed")])
+        with self.db.transaction() as cursor:
+            cursor.execute("DELETE FROM dynamics WHERE dynamic_id = 'D1'")
+        connection = self.db.pool.get_connection()
+        for fts_table in ('videos_fts', 'dynamics_fts', 'news_fts'):
+            with self.subTest(fts_table=fts_table):
+                connection.execute(
+                    f"INSERT INTO {fts_table}({fts_table}, rank) VALUES ('integrity-check', 1)"
+                )
+        self.assertEqual(self.fts_rowcount('dynamics_fts', "出口"), 0)
+
+
+class TestSearchMigration(TempDirTestCase):
+    """全文检索迁移测试类"""
+
+    def test_backfill_existing_rows(self):
+        """升级前已有的内容在迁移时补充索引"""
+        path = os.path.join(self.tmp_dir, "legacy.db")
+        conn = sqlite3.connect(path)
+        conn.execute('''
+            CREATE TABLE videos (
+                bvid TEXT PRIMARY KEY, title TEXT, description TEXT, transcript TEXT,
+                publish_time TIMESTAMP, up_name TEXT, view_count INTEGER, like_count INTEGER,
+                coin_count INTEGER, share_count INTEGER, tags TEXT, content_hash TEXT,
+                created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+            )
+        ''')
+        conn.execute(
+            "INSERT INTO videos (bvid, title, description, publish_time) VALUES (?, ?, ?, ?)",
+            ("BV9", "半导体设备国产替代", "", datetime.now())
+        )
+        conn.execute("PRAGMA user_version = 4")
+        conn.commit()
+        conn.close()
+
+        db = DatabaseManager(path)
+        try:
+            self.assertEqual([r['content_id'] for r in db.search("半导体")], ['BV9'])
+        finally:
+            db.close()
+
+
+class TestSearchApi(TempDirTestCase):
+    """全文检索接口测试类"""
+
+    def setUp(self):
+        """测试初始化"""
+        super().setUp()
+        self.app = create_app()
+        self.app.config['DATABASE_PATH'] = os.path.join(self.tmp_dir, "test.db")
+        self.client = self.app.test_client()
+        with self.app.app_context():
+            self.db = get_db_manager()
+        self.db.save_news_bulk([
+            make_news("https://example.com/1", "光伏组件价格下跌", "新能源产业链承压"),
+        ])
+
+    def tearDown(self):
+        """测试清理"""
+        self.db.close()
+
+    def test_search_endpoint(self):
+        """返回检索结果"""
+        response = self.client.get('/api/search', query_string={'q': '光伏', 'types': 'news,video'})
+        self.assertEqual(response.status_code, 200)
+        data = response.get_json()
+        self.assertTrue(data['success'])
+        self.assertEqual([r['title'] for r in data['data']], ["光伏组件价格下跌"])
+
+    def test_missing_query(self):
+        """缺少关键词时返回400"""
+        response = self.client.get('/api/search')
+        self.assertEqual(response.status_code, 400)
+        self.assertFalse(response.get_json()['success'])
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,98 @@
+"""
+投资信号匹配测试
+Signal Matcher Tests
+"""
+
+import json
+import os
+import shutil
+import tempfile
+import unittest
+
+from src.core.signal_matcher import AhoCorasick, SignalMatcher
+
+
+class TestAhoCorasick(unittest.TestCase):
+    """Aho-Corasick 自动机测试类"""
+
+    def test_matches_all_occurrences(self):
+        """与逐个模式暴力查找的结果一致（含重叠）"""
+        patterns = ["he", "she", "his", "hers", "茅台", "贵州茅台", "台"]
+        text = "ushers 贵州茅台和茅台his"
+        expected = sorted(
+            (i, i + len(p), index)
+            for index, p in enumerate(patterns)
+            for i in range(len(text)) if text.startswith(p, i)
+        )
+        self.assertEqual(sorted(AhoCorasick(patterns).iter_matches(text)), expected)
+
+    def test_empty(self):
+        """空模式和空文本"""
+        self.assertEqual(list(AhoCorasick([]).iter_matches("abc")), [])
+        self.assertEqual(list(AhoCorasick(["a"]).iter_matches("")), [])
+
+
+class TestSignalMatcher(unittest.TestCase):
+    """投资信号匹配器测试类"""
+
+    @classmethod
+    def setUpClass(cls):
+        """加载内置词典"""
+        cls.matcher = SignalMatcher()
+
+    def test_longest_match_and_word_boundary(self):
+        """重叠时取最长词条，代码和英文词条要求完整匹配"""
+        matches = self.matcher.match("贵州茅台 1600519 AIR 600519 ai")
+        self.assertEqual(
+            [(m.term, m.kind, m.start) for m in matches],
+            [("贵州茅台", "ticker", 0), ("600519", "ticker", 17), ("ai", "sector", 24)]
+        )
+
+    def test_action_with_target(self):
+        """动作关联同句中最近的前置目标，跨句不关联"""
+        signals = self.matcher.extract_signals("茅台回调到位，可以加仓。港股准备减仓")
+        self.assertEqual([s['keyword'] for s in signals], ["加仓", "减仓"])
+        self.assertEqual(signals[0]['target']['code'], "600519")
+        self.assertEqual((signals[0]['start'], signals[0]['end']), (9, 11))
+        self.assertEqual(signals[1]['target']['name'], "港股")
+        self.assertEqual(signals[1]['direction'], "bearish")
+
+        self.assertIsNone(self.matcher.extract_signals("宁德时代。加仓")[0]['target'])
+
+    def test_following_target(self):
+        """前面没有目标时使用动作之后的目标"""
+        signal = self.matcher.extract_signals("建议买入宁德时代")[0]
+        self.assertEqual(signal['target']['name'], "宁德时代")
+
+    def test_negation(self):
+        """紧邻的否定词使方向取反，分句边界阻断否定"""
+        signal = self.matcher.extract_signals("不建议买入")[0]
+        self.assertTrue(signal['negated'])
+        self.assertEqual(signal['direction'], "bearish")
+        signal = self.matcher.extract_signals("不要慌，加仓")[0]
+        self.assertFalse(signal['negated'])
+        self.assertEqual(signal['direction'], "bullish")
+
+    def test_reload_when_dictionary_changes(self):
+        """词典文件变化后自动重建"""
+        tmp_dir = tempfile.mkdtemp()
+        try:
+            path = os.path.join(tmp_dir, "signals.json")
+            with open(path, 'w', encoding='utf-8') as f:
+                json.dump({'version': '1', 'actions': {'上车': {'type': '买入', 'direction': 'bullish'}}}, f)
+            matcher = SignalMatcher(path)
+            self.assertFalse(matcher.reload_if_changed())
+            self.assertEqual(matcher.extract_signals("起飞")[:1], [])
+
+            with open(path, 'w', encoding='utf-8') as f:
+                json.dump({'version': '2', 'actions': {'起飞': {'type': '看多', 'direction': 'bullish'}}}, f)
+            os.utime(path, ns=(0, os.stat(path).st_mtime_ns + 10 ** 9))
+            self.assertTrue(matcher.reload_if_changed())
+            self.assertEqual(matcher.version, '2')
+            self.assertEqual(matcher.extract_signals("起飞")[0]['type'], "看多")
+        finally:
+            shutil.rmtree(tmp_dir, ignore_errors=True)
+
+
+if __name__ == '__main__':
+    unittest.main()